@@ -25,16 +25,17 @@ def __():
     import plotly.express as px
     from plotly.subplots import make_subplots
     from datetime import datetime, timedelta
-    import sys
-    sys.path.append('../utils')
-    from data_access import OSRPData
+    from osrp.analysis import OSRPData, QueryCache, ResampledFigure
 
-    # Initialize data access
+    # Initialize data access; the cache remembers which days were already
+    # fetched, so moving the date picker only reads the newly selected day
     data_access = OSRPData(
         region='us-west-2',
-        data_bucket='osrp-data'
+        data_bucket='osrp-data',
+        cache=QueryCache()
     )
-    return mo, pd, np, go, px, make_subplots, datetime, timedelta, data_access
+    return (mo, pd, np, go, px, make_subplots, datetime, timedelta, data_access,
+            ResampledFigure)
 
 
 @app.cell
@@ -175,20 +176,37 @@ def __(data_loaded, screenshots, go, make_subplots):
 
 
 @app.cell
-def __(data_loaded, accelerometer, heart_rate, steps, make_subplots, go):
+def __(mo):
+    """
+    Dashboard Zoom
+    """
+    zoom_hours = mo.ui.range_slider(
+        start=0, stop=24, step=0.25, value=[0, 24],
+        label='Zoom (hours of day)', full_width=True
+    )
+    zoom_hours
+    return zoom_hours,
+
+
+@app.cell
+def __(data_loaded, user_selector, selected_date, accelerometer, heart_rate, steps,
+       zoom_hours, data_access, ResampledFigure, make_subplots, go, np, timedelta):
     """
     Multi-Panel Activity Dashboard
     """
     if data_loaded:
-        # Create subplot with 3 rows
-        fig_dashboard = make_subplots(
+        day_end = selected_date + timedelta(days=1) - timedelta(milliseconds=1)
+        
+        # Create subplot with 3 rows; raw movement and heart rate readings
+        # are decimated to ~4000 points per trace for the zoomed range
+        fig_dashboard = ResampledFigure(make_subplots(
             rows=3, cols=1,
             subplot_titles=('Movement (Accelerometer)', 'Heart Rate', 'Steps per Hour'),
             vertical_spacing=0.12,
             row_heights=[0.33, 0.33, 0.34]
-        )
+        ))
         
-        # Plot 1: Accelerometer magnitude
+        # Plot 1: Accelerometer magnitude; min/max per pixel keeps every spike
         if not accelerometer.empty and all(col in accelerometer.columns for col in ['x', 'y', 'z']):
             accel_mag = np.sqrt(
                 accelerometer['x']**2 + 
@@ -196,45 +214,63 @@ def __(data_loaded, accelerometer, heart_rate, steps, make_subplots, go):
                 accelerometer['z']**2
             )
             fig_dashboard.add_trace(
-                go.Scatter(x=accelerometer.index, y=accel_mag, 
-                          name='Movement', line=dict(color='blue')),
+                accel_mag.index, accel_mag.values, method='minmax',
+                name='Movement', line=dict(color='blue'),
                 row=1, col=1
             )
+        else:
+            accel_mag = None
         
-        # Plot 2: Heart rate
+        # Plot 2: Heart rate; LTTB keeps the shape of the curve
         if not heart_rate.empty and 'heartRate' in heart_rate.columns:
+            hr_readings = heart_rate['heartRate']
             fig_dashboard.add_trace(
-                go.Scatter(x=heart_rate.index, y=heart_rate['heartRate'],
-                          name='Heart Rate', line=dict(color='red')),
+                hr_readings.index, hr_readings.values, method='lttb',
+                name='Heart Rate', line=dict(color='red'),
                 row=2, col=1
             )
+        else:
+            hr_readings = None
         
-        # Plot 3: Steps per hour
-        if not steps.empty and 'steps' in steps.columns:
-            hourly_steps = steps['steps'].resample('1H').sum()
-            fig_dashboard.add_trace(
+        # Plot 3: Steps per hour, from the rollup pyramid when built
+        hourly_steps = data_access.get_rollups(
+            user_selector.value, 'wearable_googlefit', selected_date, day_end, '1h',
+            columns=['steps']
+        ).get('steps_sum')
+        if hourly_steps is None and not steps.empty and 'steps' in steps.columns:
+            hourly_steps = steps['steps'].resample('1h').sum()
+        if hourly_steps is not None:
+            fig_dashboard.figure.add_trace(
                 go.Bar(x=hourly_steps.index, y=hourly_steps.values,
                        name='Steps', marker_color='green'),
                 row=3, col=1
             )
         
-        fig_dashboard.update_layout(
+        # Re-decimate the raw traces for the zoomed hours
+        zoom_start, zoom_end = zoom_hours.value
+        if (zoom_start, zoom_end) != (0, 24):
+            fig_dashboard.update_range(
+                selected_date + timedelta(hours=zoom_start),
+                selected_date + timedelta(hours=zoom_end)
+            )
+        
+        fig_dashboard.figure.update_layout(
             height=800,
             showlegend=False,
             title_text='Activity Dashboard'
         )
         
-        fig_dashboard.update_xaxes(title_text='Time', row=3, col=1)
-        fig_dashboard.update_yaxes(title_text='Magnitude (g)', row=1, col=1)
-        fig_dashboard.update_yaxes(title_text='BPM', row=2, col=1)
-        fig_dashboard.update_yaxes(title_text='Steps', row=3, col=1)
+        fig_dashboard.figure.update_xaxes(title_text='Time', row=3, col=1)
+        fig_dashboard.figure.update_yaxes(title_text='Magnitude (g)', row=1, col=1)
+        fig_dashboard.figure.update_yaxes(title_text='BPM', row=2, col=1)
+        fig_dashboard.figure.update_yaxes(title_text='Steps', row=3, col=1)
         
-        dashboard_plot = fig_dashboard
+        dashboard_plot = fig_dashboard.figure
     else:
         dashboard_plot = None
     
     dashboard_plot
-    return dashboard_plot, fig_dashboard, accel_mag, hourly_steps
+    return dashboard_plot, fig_dashboard, accel_mag, hr_readings, hourly_steps
 
 
 @app.cell
@@ -30,17 +30,17 @@ def __():
     from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
     from sklearn.preprocessing import StandardScaler
     from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve
-    import sys
-    sys.path.append('../utils')
-    from data_access import OSRPData, DataAggregator
+    from osrp.analysis import OSRPData, DataAggregator, ArrowSessionCache, window_features
 
-    data_access = OSRPData(region='us-west-2')
+    # Loaded streams are memory-mapped Arrow files: re-running cells and other
+    # notebooks on the same cohort reuse one copy instead of refetching it
+    data_access = OSRPData(region='us-west-2', session_cache=ArrowSessionCache())
     aggregator = DataAggregator()
     
     return (mo, pd, np, go, px, datetime, timedelta, train_test_split,
             cross_val_score, RandomForestClassifier, GradientBoostingClassifier,
             StandardScaler, classification_report, confusion_matrix, 
-            roc_auc_score, roc_curve, data_access, aggregator)
+            roc_auc_score, roc_curve, window_features, data_access, aggregator)
 
 
 @app.cell
@@ -91,8 +91,8 @@ def __(mo, data_access):
     
     # Feature window
     feature_window = mo.ui.dropdown(
-        options=['30min', '1H', '2H', '4H'],
-        value='1H',
+        options=['30min', '1h', '2h', '4h'],
+        value='1h',
         label='Feature Window'
     )
     
@@ -174,127 +174,23 @@ def __(mo, data_loaded, all_participant_data):
 
 
 @app.cell
-def __(data_loaded, all_participant_data, feature_window, pd, np):
+def __(data_loaded, all_participant_data, feature_window, pd, window_features):
     """
     Feature Engineering
     Extract features from time windows
     """
     if data_loaded:
-        features_list = []
-        
-        for entry in all_participant_data:
-            user_id = entry['user_id']
-            date = entry['date']
-            data = entry['data']
-            
-            # Get data streams
-            screenshots = data['screenshots']
-            accelerometer = data['accelerometer']
-            heart_rate = data['heart_rate']
-            steps = data['steps']
-            ema = data['ema_responses']
-            
-            # Resample to feature windows
-            window = feature_window.value
-            
-            # Generate time windows for the day
-            start_time = pd.Timestamp(date)
-            end_time = start_time + pd.Timedelta(days=1)
-            time_index = pd.date_range(start=start_time, end=end_time, freq=window)[:-1]
-            
-            for window_start in time_index:
-                window_end = window_start + pd.Timedelta(window)
-                
-                # Extract features for this window
-                window_features = {
-                    'user_id': user_id,
-                    'timestamp': window_start,
-                    'hour_of_day': window_start.hour,
-                    'day_of_week': window_start.dayofweek
-                }
-                
-                # Screen activity features
-                if not screenshots.empty:
-                    window_screenshots = screenshots[
-                        (screenshots.index >= window_start) & 
-                        (screenshots.index < window_end)
-                    ]
-                    window_features['screen_count'] = len(window_screenshots)
-                    window_features['unique_apps'] = window_screenshots['appName'].nunique() if 'appName' in window_screenshots.columns else 0
-                else:
-                    window_features['screen_count'] = 0
-                    window_features['unique_apps'] = 0
-                
-                # Movement features
-                if not accelerometer.empty and all(c in accelerometer.columns for c in ['x', 'y', 'z']):
-                    window_accel = accelerometer[
-                        (accelerometer.index >= window_start) & 
-                        (accelerometer.index < window_end)
-                    ]
-                    if not window_accel.empty:
-                        mag = np.sqrt(window_accel['x']**2 + window_accel['y']**2 + window_accel['z']**2)
-                        window_features['movement_mean'] = mag.mean()
-                        window_features['movement_std'] = mag.std()
-                    else:
-                        window_features['movement_mean'] = 0
-                        window_features['movement_std'] = 0
-                else:
-                    window_features['movement_mean'] = 0
-                    window_features['movement_std'] = 0
-                
-                # Heart rate features
-                if not heart_rate.empty and 'heartRate' in heart_rate.columns:
-                    window_hr = heart_rate[
-                        (heart_rate.index >= window_start) & 
-                        (heart_rate.index < window_end)
-                    ]
-                    if not window_hr.empty:
-                        window_features['hr_mean'] = window_hr['heartRate'].mean()
-                        window_features['hr_std'] = window_hr['heartRate'].std()
-                        window_features['hr_max'] = window_hr['heartRate'].max()
-                    else:
-                        window_features['hr_mean'] = np.nan
-                        window_features['hr_std'] = np.nan
-                        window_features['hr_max'] = np.nan
-                else:
-                    window_features['hr_mean'] = np.nan
-                    window_features['hr_std'] = np.nan
-                    window_features['hr_max'] = np.nan
-                
-                # Steps
-                if not steps.empty and 'steps' in steps.columns:
-                    window_steps = steps[
-                        (steps.index >= window_start) & 
-                        (steps.index < window_end)
-                    ]
-                    window_features['steps'] = window_steps['steps'].sum() if not window_steps.empty else 0
-                else:
-                    window_features['steps'] = 0
-                
-                # Label from EMA (stress rating)
-                # Assuming EMA has a 'stress_level' field (1-5 scale)
-                if not ema.empty:
-                    window_ema = ema[
-                        (ema.index >= window_start) & 
-                        (ema.index < window_end)
-                    ]
-                    if not window_ema.empty and 'stress_level' in window_ema.columns:
-                        # Take most recent EMA in window
-                        stress = window_ema['stress_level'].iloc[-1]
-                        # Binary classification: high stress (4-5) vs low stress (1-3)
-                        window_features['label'] = 1 if stress >= 4 else 0
-                        window_features['has_label'] = True
-                    else:
-                        window_features['label'] = np.nan
-                        window_features['has_label'] = False
-                else:
-                    window_features['label'] = np.nan
-                    window_features['has_label'] = False
-                
-                features_list.append(window_features)
+        # Every stream is reduced over all windows of a day at once instead
+        # of masking it once per window (see osrp.analysis.window_features)
+        window_frames = [
+            window_features(
+                entry['data'], entry['date'], feature_window.value, user_id=entry['user_id']
+            )
+            for entry in all_participant_data
+        ]
         
         # Create DataFrame
-        features_df = pd.DataFrame(features_list)
+        features_df = pd.concat(window_frames, ignore_index=True)
         
         # Filter to only labeled samples
         labeled_df = features_df[features_df['has_label']].copy()
@@ -308,8 +204,7 @@ def __(data_loaded, all_participant_data, feature_window, pd, np):
         features_created = 0
         labeled_samples = 0
     
-    return (features_list, features_df, labeled_df, 
-            features_created, labeled_samples, window_features)
+    return features_df, labeled_df, features_created, labeled_samples
 
 
 @app.cell
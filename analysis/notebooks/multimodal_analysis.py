@@ -27,11 +27,11 @@ def __():
     from scipy import stats
     from sklearn.preprocessing import StandardScaler
     from sklearn.decomposition import PCA
-    import sys
-    sys.path.append('../utils')
-    from data_access import OSRPData, DataAggregator
+    from osrp.analysis import OSRPData, DataAggregator, ArrowSessionCache
 
-    data_access = OSRPData(region='us-west-2')
+    # Loaded streams are memory-mapped Arrow files: re-running cells and other
+    # notebooks on the same cohort reuse one copy instead of refetching it
+    data_access = OSRPData(region='us-west-2', session_cache=ArrowSessionCache())
     aggregator = DataAggregator()
     return (mo, pd, np, go, px, make_subplots, datetime, timedelta, 
             stats, StandardScaler, PCA, data_access, aggregator)
@@ -0,0 +1,65 @@
+"""
+Benchmarks of the analysis layer hot paths
+
+Each benchmark runs one participant-day of the synthetic cohort through a
+step of the ML pipeline notebook. Results are compared with the latest
+baseline in benchmarks/baselines; a mean more than 25% slower fails the run.
+"""
+
+from osrp.analysis import DataAggregator, window_features
+
+
+def test_get_daily_summary_parquet(benchmark, parquet_data, cohort):
+    """Read every stream of a 50 Hz participant-day from Parquet"""
+    summary = benchmark.pedantic(
+        parquet_data.get_daily_summary, args=(cohort.user_ids[0], cohort.start), rounds=5
+    )
+
+    assert len(summary['accelerometer']) >= 50 * 86_400
+
+
+def test_get_daily_summary_dynamodb(benchmark, dynamodb_data):
+    """Query every stream of a reduced-rate participant-day from DynamoDB"""
+    data, cohort = dynamodb_data
+
+    summary = benchmark.pedantic(
+        data.get_daily_summary, args=(cohort.user_ids[0], cohort.start), rounds=3
+    )
+
+    assert not summary['accelerometer'].empty
+
+
+def test_compute_screen_time(benchmark, parquet_data, summary):
+    """Sessionize a day of screenshots"""
+    screenshots = summary['screenshots']
+
+    sessions = benchmark(lambda: parquet_data.compute_screen_time(screenshots.copy()))
+
+    assert len(sessions) > 0
+
+
+def test_align_multi_modal(benchmark, parquet_data, summary):
+    """Align accelerometer, location, heart rate and steps on 1-minute bins"""
+    streams = {
+        name: summary[name] for name in ('accelerometer', 'location', 'heart_rate', 'steps')
+    }
+
+    aligned = benchmark.pedantic(parquet_data.align_multi_modal, args=(streams,), rounds=5)
+
+    assert len(aligned) == 1440
+
+
+def test_context_features(benchmark, summary):
+    """Extract 5-minute context features from the sensor streams"""
+    features = benchmark.pedantic(DataAggregator.context_features, args=(summary,), rounds=5)
+
+    assert len(features) > 0
+
+
+def test_window_features(benchmark, summary, cohort):
+    """The notebook's feature engineering step on 1-hour windows"""
+    features = benchmark.pedantic(
+        window_features, args=(summary, cohort.start, '1h'), rounds=5
+    )
+
+    assert len(features) == 24
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Sensor block codec throughput and compression
+
+Encodes and decodes upload batches of synthetic 50 Hz accelerometer readings
+and reports readings per second and size against the JSON request body and
+the DynamoDB items the readings would otherwise be stored as.
+
+Usage:
+    python benchmarks/codec_throughput.py [--batches 50] [--batch-size 1000]
+"""
+
+import argparse
+import json
+import random
+import time
+from decimal import Decimal
+
+from osrp.codec import decode_readings, encode_readings
+
+
+def make_batch(size: int, rng: random.Random, start: int):
+    """One upload batch of jittered 50 Hz readings at the client's 3-decimal precision"""
+    timestamp, x, z = start, 0.0, 0.0
+    readings = []
+    for _ in range(size):
+        timestamp += 20 + rng.choice([-1, 0, 0, 0, 1])
+        x = 0.9 * x + rng.gauss(0, 0.3)
+        z = 0.8 * z + rng.gauss(0, 0.2)
+        readings.append({
+            'timestamp': timestamp,
+            'data': {'x': round(x, 3), 'y': round(-9.81 + rng.gauss(0, 0.05), 3), 'z': round(z, 3)},
+            'accuracy': 3,
+        })
+    return readings
+
+
+def item_bytes(reading) -> int:
+    """Approximate DynamoDB item size of one reading"""
+    return len(json.dumps({
+        'userIdSensorType': 'us-west-2:0f1e2d3c-4b5a-6978-8796-a5b4c3d2e1f0#accelerometer',
+        'timestamp': reading['timestamp'],
+        'groupCode': 'depression_study_2026',
+        'data': {k: str(Decimal(str(v))) for k, v in reading['data'].items()},
+        'accuracy': reading['accuracy'],
+        'expirationTime': 1713110400,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--batches', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    batches = [
+        make_batch(args.batch_size, rng, 1705334400000 + i * 60_000) for i in range(args.batches)
+    ]
+    readings = args.batches * args.batch_size
+
+    started = time.perf_counter()
+    blocks = [encode_readings(batch) for batch in batches]
+    encode_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for block in blocks:
+        decode_readings(block)
+    decode_seconds = time.perf_counter() - started
+
+    block_size = sum(len(block) for block in blocks)
+    json_size = sum(len(json.dumps(batch)) for batch in batches)
+    item_size = sum(item_bytes(reading) for batch in batches for reading in batch)
+
+    print(f"Readings:        {readings:,} in {args.batches} batches")
+    print(f"Encode:          {readings / encode_seconds:,.0f} readings/s")
+    print(f"Decode:          {readings / decode_seconds:,.0f} readings/s")
+    print(f"Block size:      {block_size / readings:.1f} bytes/reading")
+    print(f"vs JSON body:    {json_size / block_size:.1f}x smaller")
+    print(f"vs DynamoDB:     {item_size / block_size:.1f}x smaller")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Shared fixtures for the analysis benchmarks
+
+One synthetic cohort at full sampling rates is written to Parquet once per
+session. moto serves well under a thousand items per second, so the
+DynamoDB fixture loads a reduced-rate participant-day (about 8,500 items)
+instead of the full cohort.
+"""
+
+import boto3
+import pytest
+
+from osrp.analysis import OSRPData, ParquetBackend, SyntheticCohort
+from tests.analysis.conftest import REGION, create_tables
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto is a dev extra
+    mock_aws = None
+
+
+@pytest.fixture(scope='session')
+def cohort():
+    """Two participants over two days at 50 Hz accelerometer and 1 Hz heart rate"""
+    return SyntheticCohort(participants=2, days=2)
+
+
+@pytest.fixture(scope='session')
+def parquet_data(cohort, tmp_path_factory):
+    """OSRPData serving the cohort from an export-layout Parquet dataset"""
+    root = cohort.write_parquet(str(tmp_path_factory.mktemp('synthetic')))
+    return OSRPData(backend=ParquetBackend(root))
+
+
+@pytest.fixture(scope='session')
+def summary(cohort):
+    """One participant-day as returned by get_daily_summary"""
+    return cohort.daily_summary(cohort.user_ids[0], cohort.start)
+
+
+@pytest.fixture(scope='session')
+def dynamodb_data():
+    """OSRPData on moto with a reduced-rate participant-day loaded"""
+    if mock_aws is None:
+        pytest.skip('moto not installed')
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+        monkeypatch.setenv('AWS_DEFAULT_REGION', REGION)
+        with mock_aws():
+            resource = boto3.resource('dynamodb', region_name=REGION)
+            create_tables(resource)
+            cohort = SyntheticCohort(
+                participants=1, days=1, accelerometer_hz=0.02, heart_rate_hz=0.01
+            )
+            cohort.load_dynamodb(resource)
+            yield OSRPData(region=REGION), cohort
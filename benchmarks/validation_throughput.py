@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Sensor batch validation throughput
+
+Validates upload batches of synthetic 50 Hz accelerometer readings with the
+upload handler's compiled reading validator, and with the checks it replaced:
+the presence loop, and the original loop that validated each reading while
+converting it to a DynamoDB item (so a bad reading was found only after the
+readings before it were converted). Reports the time per 1,000-reading batch
+for a valid batch, a batch whose last reading is invalid, and a batch with
+ten invalid readings.
+
+Usage:
+    python benchmarks/validation_throughput.py [--batch-size 1000] [--repeat 200]
+"""
+
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from osrp.validation import MAX_SAFE_INTEGER, Field, compile_batch_validator
+
+# The upload handler's schema for readings of sensors without channel ranges
+validate_readings = compile_batch_validator([
+    Field('timestamp', 'integer', minimum=0, maximum=MAX_SAFE_INTEGER),
+    Field('data', 'object'),
+    Field('accuracy', 'number', required=False),
+], increasing='timestamp')
+
+
+def make_batch(size: int, rng: random.Random, start: int):
+    """One upload batch of jittered 50 Hz readings at the client's 3-decimal precision"""
+    timestamp, x = start, 0.0
+    readings = []
+    for _ in range(size):
+        timestamp += 20 + rng.choice([-1, 0, 0, 0, 1])
+        x = 0.9 * x + rng.gauss(0, 0.3)
+        readings.append({
+            'timestamp': timestamp,
+            'data': {'x': round(x, 3), 'y': round(-9.81 + rng.gauss(0, 0.05), 3), 'z': 0.156},
+            'accuracy': 3,
+        })
+    return readings
+
+
+def presence_loop(readings):
+    """The handler's checks before compiled validation: presence and int() timestamps"""
+    for reading in readings:
+        if 'timestamp' not in reading or 'data' not in reading:
+            return False
+        try:
+            int(reading['timestamp'])
+        except (TypeError, ValueError):
+            return False
+    return True
+
+
+def converting_loop(readings):
+    """The original loop, validating each reading as it built its DynamoDB item"""
+    def convert(obj):
+        if isinstance(obj, float):
+            return Decimal(str(obj))
+        if isinstance(obj, dict):
+            return {k: convert(v) for k, v in obj.items()}
+        return obj
+
+    items = []
+    for reading in readings:
+        if 'timestamp' not in reading or 'data' not in reading:
+            return False
+        items.append({
+            'userIdSensorType': 'user#accelerometer',
+            'timestamp': int(reading['timestamp']),
+            'groupCode': 'study',
+            'data': convert(reading['data']),
+            'accuracy': reading.get('accuracy'),
+        })
+    return True
+
+
+def per_batch(function, batch, repeat: int) -> float:
+    """Best time of `repeat` runs, in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(batch)
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    valid = make_batch(args.batch_size, rng, 1705334400000)
+    last_bad = [dict(reading) for reading in valid]
+    del last_bad[-1]['data']
+    ten_bad = [dict(reading) for reading in valid]
+    for index in rng.sample(range(args.batch_size), 10):
+        ten_bad[index]['timestamp'] = str(ten_bad[index]['timestamp'])
+
+    assert validate_readings(valid) == [] and len(validate_readings(ten_bad)) == 10
+
+    print(f"Batch of {args.batch_size:,} readings, best of {args.repeat} (µs per batch)")
+    print(f"{'':22}{'valid':>10}{'last bad':>10}{'10 bad':>10}")
+    for name, function in [
+        ('compiled validator', validate_readings),
+        ('presence loop', presence_loop),
+        ('converting loop', converting_loop),
+    ]:
+        times = [per_batch(function, batch, args.repeat) for batch in (valid, last_bad, ten_bad)]
+        print(f"{name:22}" + ''.join(f"{t:10,.0f}" for t in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -121,6 +121,8 @@ USER_POOL_ID=$(echo $OUTPUTS | jq -r '.[] | select(.OutputKey=="UserPoolId") | .
 USER_POOL_CLIENT_ID=$(echo $OUTPUTS | jq -r '.[] | select(.OutputKey=="UserPoolClientId") | .OutputValue')
 AUTH_LAMBDA=$(echo $OUTPUTS | jq -r '.[] | select(.OutputKey=="AuthLambdaFunctionName") | .OutputValue')
 DATA_LAMBDA=$(echo $OUTPUTS | jq -r '.[] | select(.OutputKey=="DataUploadLambdaFunctionName") | .OutputValue')
+DRAIN_LAMBDA=$(echo $OUTPUTS | jq -r '.[] | select(.OutputKey=="SpillDrainLambdaFunctionName") | .OutputValue')
+AUTHORIZER_LAMBDA=$(echo $OUTPUTS | jq -r '.[] | select(.OutputKey=="AuthorizerLambdaFunctionName") | .OutputValue')
 
 echo -e "${GREEN}✓ Outputs retrieved${NC}"
 echo ""
@@ -133,15 +135,33 @@ cd lambda
 if [ -f "auth_handler.py" ]; then
     echo "Packaging auth_handler.py..."
     zip -q auth_handler.zip auth_handler.py
+    # Shared embedded metric format logger and bulk enrollment (boto3 only)
+    zip -q -j auth_handler.zip ../../osrp/metrics.py ../../osrp/enrollment.py
     echo -e "${GREEN}✓ auth_handler.zip created${NC}"
 else
     echo -e "${YELLOW}Warning: auth_handler.py not found${NC}"
 fi
 
+# Token Authorizer Lambda
+if [ -f "authorizer_handler.py" ]; then
+    echo "Packaging authorizer_handler.py..."
+    zip -q authorizer_handler.zip authorizer_handler.py
+    # Shared token verifier and metrics logger (standard library only)
+    zip -q -j authorizer_handler.zip ../../osrp/tokens.py ../../osrp/metrics.py
+    echo -e "${GREEN}✓ authorizer_handler.zip created${NC}"
+else
+    echo -e "${YELLOW}Warning: authorizer_handler.py not found${NC}"
+fi
+
 # Data Upload Lambda
 if [ -f "data_upload_handler.py" ]; then
     echo "Packaging data_upload_handler.py..."
     zip -q data_upload_handler.zip data_upload_handler.py
+    # Shared sensor block codec, payload validation, metrics logger, profiler
+    # and token verifier (standard library only), importable as `codec`,
+    # `validation`, `metrics`, `profiling` and `tokens`
+    zip -q -j data_upload_handler.zip ../../osrp/codec.py ../../osrp/validation.py \
+        ../../osrp/metrics.py ../../osrp/profiling.py ../../osrp/tokens.py
     echo -e "${GREEN}✓ data_upload_handler.zip created${NC}"
 else
     echo -e "${YELLOW}Warning: data_upload_handler.py not found${NC}"
@@ -168,6 +188,21 @@ if [ -f "lambda/auth_handler.zip" ]; then
     echo -e "${GREEN}✓ Auth Lambda deployed${NC}"
 fi
 
+if [ -f "lambda/authorizer_handler.zip" ]; then
+    echo "Updating Token Authorizer Lambda function..."
+    aws lambda update-function-code \
+        --function-name $AUTHORIZER_LAMBDA \
+        --zip-file fileb://lambda/authorizer_handler.zip \
+        --region $REGION > /dev/null
+
+    echo "Waiting for Token Authorizer Lambda update..."
+    aws lambda wait function-updated \
+        --function-name $AUTHORIZER_LAMBDA \
+        --region $REGION
+
+    echo -e "${GREEN}✓ Token Authorizer Lambda deployed${NC}"
+fi
+
 if [ -f "lambda/data_upload_handler.zip" ]; then
     echo "Updating Data Upload Lambda function..."
     aws lambda update-function-code \
@@ -181,6 +216,20 @@ if [ -f "lambda/data_upload_handler.zip" ]; then
         --region $REGION
 
     echo -e "${GREEN}✓ Data Upload Lambda deployed${NC}"
+
+    # The spill drain runs drain_handler from the same package
+    echo "Updating Spill Drain Lambda function..."
+    aws lambda update-function-code \
+        --function-name $DRAIN_LAMBDA \
+        --zip-file fileb://lambda/data_upload_handler.zip \
+        --region $REGION > /dev/null
+
+    echo "Waiting for Spill Drain Lambda update..."
+    aws lambda wait function-updated \
+        --function-name $DRAIN_LAMBDA \
+        --region $REGION
+
+    echo -e "${GREEN}✓ Spill Drain Lambda deployed${NC}"
 fi
 
 # Cleanup zip files
@@ -202,6 +251,7 @@ echo ""
 echo -e "${BLUE}Lambda Functions:${NC}"
 echo "  Auth: $AUTH_LAMBDA"
 echo "  Data Upload: $DATA_LAMBDA"
+echo "  Token Authorizer: $AUTHORIZER_LAMBDA"
 echo ""
 echo -e "${BLUE}Next Steps:${NC}"
 echo "  1. Create a test user:"
@@ -5,16 +5,26 @@ Handles user authentication via AWS Cognito:
 - POST /auth/register - User registration
 - POST /auth/login - User sign in
 - POST /auth/refresh - Token refresh
+- POST /auth/enroll - Bulk participant enrollment (admins)
 """
 
 import json
 import logging
 import os
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+try:
+    # Packaged next to the handler by deploy.sh
+    import enrollment
+    import metrics
+except ImportError:
+    from osrp import enrollment, metrics
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -26,11 +36,94 @@ cognito_client = boto3.client('cognito-idp')
 USER_POOL_ID = os.environ['USER_POOL_ID']
 CLIENT_ID = os.environ['CLIENT_ID']
 
+# Bulk enrollment: Cognito group allowed to enroll, rows accepted per request,
+# concurrent AdminCreateUser calls, and seconds a request spends enrolling
+# before returning the rows it did not start (API Gateway times out at 29 s)
+ENROLL_ADMIN_GROUP = os.environ.get('ENROLL_ADMIN_GROUP', 'admins')
+ENROLL_MAX_ROWS = int(os.environ.get('ENROLL_MAX_ROWS', 500))
+ENROLL_CONCURRENCY = int(os.environ.get('ENROLL_CONCURRENCY', 8))
+ENROLL_TIME_BUDGET = float(os.environ.get('ENROLL_TIME_BUDGET', 24))
+# ParticipantStatus rows of enrolled participants are pre-created when set
+PARTICIPANT_TABLE_NAME = os.environ.get('PARTICIPANT_TABLE_NAME')
+
+# Enrollment calls are not retried by botocore, so throttles reach the
+# enroller's adaptive rate limiter
+enroll_cognito_client = boto3.client(
+    'cognito-idp', config=Config(retries={'mode': 'standard', 'max_attempts': 1})
+)
+participant_table = (
+    boto3.resource('dynamodb').Table(PARTICIPANT_TABLE_NAME) if PARTICIPANT_TABLE_NAME else None
+)
+
+# Embedded metric format records, one per invocation, written to stdout
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'OSRP')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+# Routes reported as the Route dimension; anything else is 'other'
+METRIC_ROUTES = {
+    'POST /auth/register', 'POST /auth/login', 'POST /auth/refresh', 'POST /auth/enroll'
+}
+
+emf = metrics.MetricsLogger(
+    METRICS_NAMESPACE,
+    {'Service': 'Auth', 'Environment': os.environ.get('ENVIRONMENT', 'dev')},
+    enabled=METRICS_ENABLED
+)
+# Whether this container has not handled an invocation yet
+cold_start = True
+
+
+def count_retries(parsed: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+    """
+    botocore after-call hook adding a Cognito call's retries to the invocation's metrics.
+
+    Args:
+        parsed: Parsed response, also of calls that failed after their retries
+    """
+    attempts = ((parsed or {}).get('ResponseMetadata') or {}).get('RetryAttempts', 0)
+    if attempts:
+        emf.put_metric('CognitoRetries', attempts)
+
+
+cognito_client.meta.events.register('after-call.cognito-idp', count_retries)
+
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda handler for authentication endpoints.
 
+    Handles the request and writes its metrics (latency, parse and Cognito
+    timings, retries, cold start) as one embedded metric format record.
+
+    Args:
+        event: API Gateway event
+        context: Lambda context
+
+    Returns:
+        API Gateway response
+    """
+    global cold_start
+    started = time.perf_counter()
+    emf.reset()
+    emf.put_metric('ColdStart', int(cold_start))
+    cold_start = False
+    request_id = getattr(context, 'aws_request_id', None)
+    if request_id:
+        emf.set_property('RequestId', request_id)
+    route = f"{event.get('httpMethod')} {event.get('path')}"
+    emf.put_dimension('Route', route if route in METRIC_ROUTES else 'other')
+
+    response = handle_request(event, context)
+
+    emf.put_metric('Latency', (time.perf_counter() - started) * 1000, 'Milliseconds')
+    emf.set_property('StatusCode', response['statusCode'])
+    emf.flush()
+    return response
+
+
+def handle_request(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """
+    Parse and route an API Gateway request.
+
     Args:
         event: API Gateway event
         context: Lambda context
@@ -42,7 +135,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Parse request
         http_method = event['httpMethod']
         path = event['path']
-        body = json.loads(event.get('body', '{}'))
+        with emf.timer('ParseTime'):
+            body = json.loads(event.get('body', '{}'))
 
         logger.info(f"Request: {http_method} {path}")
 
@@ -53,6 +147,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return handle_login(body)
         elif path == '/auth/refresh' and http_method == 'POST':
             return handle_refresh(body)
+        elif path == '/auth/enroll' and http_method == 'POST':
+            return handle_enroll(event, body, context)
         else:
             return error_response(404, 'Not Found')
 
@@ -90,16 +186,17 @@ def handle_register(body: Dict[str, Any]) -> Dict[str, Any]:
         logger.info(f"Registering user: {email}")
 
         # Sign up user in Cognito
-        response = cognito_client.sign_up(
-            ClientId=CLIENT_ID,
-            Username=email,
-            Password=password,
-            UserAttributes=[
-                {'Name': 'email', 'Value': email},
-                {'Name': 'custom:studyCode', 'Value': study_code},
-                {'Name': 'custom:participantId', 'Value': participant_id}
-            ]
-        )
+        with emf.timer('CognitoTime'):
+            response = cognito_client.sign_up(
+                ClientId=CLIENT_ID,
+                Username=email,
+                Password=password,
+                UserAttributes=[
+                    {'Name': 'email', 'Value': email},
+                    {'Name': 'custom:studyCode', 'Value': study_code},
+                    {'Name': 'custom:participantId', 'Value': participant_id}
+                ]
+            )
 
         logger.info(f"User registered successfully: {email}")
 
@@ -149,14 +246,15 @@ def handle_login(body: Dict[str, Any]) -> Dict[str, Any]:
         logger.info(f"Authenticating user: {email}")
 
         # Authenticate user
-        response = cognito_client.initiate_auth(
-            ClientId=CLIENT_ID,
-            AuthFlow='USER_PASSWORD_AUTH',
-            AuthParameters={
-                'USERNAME': email,
-                'PASSWORD': password
-            }
-        )
+        with emf.timer('CognitoTime'):
+            response = cognito_client.initiate_auth(
+                ClientId=CLIENT_ID,
+                AuthFlow='USER_PASSWORD_AUTH',
+                AuthParameters={
+                    'USERNAME': email,
+                    'PASSWORD': password
+                }
+            )
 
         # Check if challenge is required (e.g., NEW_PASSWORD_REQUIRED)
         if 'ChallengeName' in response:
@@ -214,13 +312,14 @@ def handle_refresh(body: Dict[str, Any]) -> Dict[str, Any]:
         logger.info("Refreshing access token")
 
         # Refresh tokens
-        response = cognito_client.initiate_auth(
-            ClientId=CLIENT_ID,
-            AuthFlow='REFRESH_TOKEN_AUTH',
-            AuthParameters={
-                'REFRESH_TOKEN': refresh_token
-            }
-        )
+        with emf.timer('CognitoTime'):
+            response = cognito_client.initiate_auth(
+                ClientId=CLIENT_ID,
+                AuthFlow='REFRESH_TOKEN_AUTH',
+                AuthParameters={
+                    'REFRESH_TOKEN': refresh_token
+                }
+            )
 
         # Extract new tokens
         auth_result = response['AuthenticationResult']
@@ -246,6 +345,81 @@ def handle_refresh(body: Dict[str, Any]) -> Dict[str, Any]:
             return error_response(500, f'Token refresh failed: {error_message}')
 
 
+def handle_enroll(
+    event: Dict[str, Any],
+    body: Dict[str, Any],
+    context: Any = None
+) -> Dict[str, Any]:
+    """
+    Handle bulk participant enrollment by a study admin.
+
+    Creates a Cognito user per roster row (emailing a temporary password)
+    with bounded concurrency and adaptive throttling, and pre-creates the
+    participants' ParticipantStatus rows. Rows not started within
+    ENROLL_TIME_BUDGET are returned as 'skipped' to be sent again.
+
+    Request body, a CSV roster or a list of rows:
+    {
+        "roster": "email,studyCode,participantId\\np1@example.com,depression_study_2026,P001"
+    }
+    {
+        "participants": [
+            {"email": "p1@example.com", "studyCode": "depression_study_2026",
+             "participantId": "P001"}
+        ]
+    }
+
+    Returns:
+        API Gateway response with a result per row and counts by status
+    """
+    authorizer = (event.get('requestContext') or {}).get('authorizer') or {}
+    groups = (authorizer.get('claims') or {}).get('cognito:groups') or ''
+    if ENROLL_ADMIN_GROUP not in groups.strip('[]').replace(',', ' ').split():
+        return error_response(403, f'Enrollment requires the {ENROLL_ADMIN_GROUP} group')
+
+    try:
+        if 'roster' in body:
+            rows = enrollment.read_roster(body['roster'])
+        else:
+            rows = [
+                {
+                    column: str(participant.get(column) or '').strip()
+                    for column in enrollment.ROSTER_COLUMNS
+                }
+                for participant in body['participants']
+            ]
+            for number, row in enumerate(rows, start=1):
+                row['row'] = number
+    except (AttributeError, TypeError, ValueError) as e:
+        return error_response(400, f'Invalid roster: {str(e)}')
+    if not rows:
+        return error_response(400, 'Roster has no rows')
+    if len(rows) > ENROLL_MAX_ROWS:
+        return error_response(
+            400, f'At most {ENROLL_MAX_ROWS} rows per request; send larger rosters in parts'
+        )
+
+    budget = ENROLL_TIME_BUDGET
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        budget = min(budget, context.get_remaining_time_in_millis() / 1000 - 3)
+    enroller = enrollment.BulkEnroller(
+        enroll_cognito_client, USER_POOL_ID, participant_table, concurrency=ENROLL_CONCURRENCY
+    )
+
+    logger.info(f"Enrolling {len(rows)} participants")
+    with emf.timer('EnrollTime'):
+        results = list(enroller.enroll(rows, deadline=time.monotonic() + budget))
+    summary = enrollment.summarize(results)
+    logger.info(f"Enrollment finished: {summary}")
+
+    emf.put_metric('RosterRows', len(rows))
+    emf.put_metric('EnrolledUsers', summary['created'])
+    emf.put_metric('EnrollFailures', summary['failed'] + summary['conflict'])
+    emf.put_metric('CognitoThrottles', enroller.limiter.throttles)
+
+    return success_response({'summary': summary, 'results': results})
+
+
 def success_response(data: Dict[str, Any], status_code: int = 200) -> Dict[str, Any]:
     """
     Create a successful API Gateway response.
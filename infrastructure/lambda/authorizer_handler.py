@@ -0,0 +1,117 @@
+"""
+OSRP Token Authorizer Lambda Handler
+
+API Gateway TOKEN authorizer for the /data endpoints. Verifies the Cognito
+token of the Authorization header locally against the user pool's JWKS
+(see osrp.tokens) instead of calling Cognito, and returns an IAM policy
+allowing every method of the stage, so API Gateway can cache the decision
+for the token (AuthorizerResultTtlInSeconds) across routes.
+
+The claims handed to the data Lambda (requestContext.authorizer) are the
+token's sub, cognito:username, email and token_use.
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict
+
+try:
+    # Packaged next to the handler by deploy.sh
+    import metrics
+    import tokens
+except ImportError:
+    from osrp import metrics, tokens
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Verifier of the pool's tokens; keys and decisions are cached per container
+token_verifier = tokens.verifier_from_environment()
+if token_verifier is None:
+    raise RuntimeError('USER_POOL_ID or TOKEN_ISSUER must be set')
+
+# Claims passed on to the backend in the authorizer context
+CONTEXT_CLAIMS = ('sub', 'cognito:username', 'email', 'token_use')
+
+# Embedded metric format records, one per invocation, written to stdout
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'OSRP')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+emf = metrics.MetricsLogger(
+    METRICS_NAMESPACE,
+    {'Service': 'Authorizer', 'Environment': os.environ.get('ENVIRONMENT', 'dev')},
+    enabled=METRICS_ENABLED
+)
+# Whether this container has not handled an invocation yet
+cold_start = True
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Main Lambda handler for the TOKEN authorizer.
+
+    Args:
+        event: Authorizer event with authorizationToken and methodArn
+        context: Lambda context
+
+    Returns:
+        Policy allowing the stage, with the token's claims as context
+
+    Raises:
+        Exception: 'Unauthorized', which API Gateway answers with 401
+    """
+    global cold_start
+    started = time.perf_counter()
+    emf.reset()
+    emf.put_metric('ColdStart', int(cold_start))
+    cold_start = False
+    hits, fetches = token_verifier.hits, token_verifier.jwks.fetches
+
+    try:
+        with emf.timer('VerifyTime'):
+            claims = token_verifier.verify(event.get('authorizationToken') or '')
+    except tokens.TokenError as e:
+        logger.info(f"Rejected token: {str(e)}")
+        emf.put_metric('Denied', 1)
+        raise Exception('Unauthorized')
+    finally:
+        emf.put_metric('CacheHits', token_verifier.hits - hits)
+        emf.put_metric('JWKSFetches', token_verifier.jwks.fetches - fetches)
+        emf.put_metric('Latency', (time.perf_counter() - started) * 1000, 'Milliseconds')
+        emf.flush()
+
+    return {
+        'principalId': claims['sub'],
+        'policyDocument': {
+            'Version': '2012-10-17',
+            'Statement': [{
+                'Action': 'execute-api:Invoke',
+                'Effect': 'Allow',
+                'Resource': stage_arn(event['methodArn']),
+            }],
+        },
+        'context': {
+            name: str(claims[name]) for name in CONTEXT_CLAIMS if claims.get(name) is not None
+        },
+    }
+
+
+def stage_arn(method_arn: str) -> str:
+    """
+    ARN of every method of the stage a method ARN belongs to.
+
+    arn:aws:execute-api:{region}:{account}:{api}/{stage}/{method}/{path}
+    becomes arn:aws:execute-api:{region}:{account}:{api}/{stage}/*/*, so a
+    cached Allow covers the token's requests to the other routes too.
+
+    Args:
+        method_arn: methodArn of the authorizer event
+
+    Returns:
+        Stage-wide ARN
+    """
+    arn, _, path = method_arn.partition('/')
+    stage = path.split('/', 1)[0]
+    return f"{arn}/{stage}/*/*"
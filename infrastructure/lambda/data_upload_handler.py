@@ -6,49 +6,343 @@ Handles data uploads from mobile apps:
 - POST /data/event - Upload discrete events
 - GET /data/presigned-url - Generate presigned S3 URLs
 - POST /data/device-state - Upload device state
+
+`drain_handler` is the entry point of the scheduled function that writes
+sensor batches spilled to S3 (async ingestion, throttling) into DynamoDB.
 """
 
+import base64
+import gzip
+import hashlib
 import json
 import logging
+import math
 import os
+import random
 import time
+import zlib
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Deque, Dict, Any, Callable, List, Optional, Tuple
 from decimal import Decimal
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+try:
+    # Packaged next to the handler by deploy.sh
+    import codec
+    import metrics
+    import profiling
+    import tokens
+    import validation
+except ImportError:
+    from osrp import codec, metrics, profiling, tokens, validation
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Attempts per DynamoDB call before a throttled upload is answered with 429;
+# botocore's legacy default of 10 keeps a request retrying for ~25 s
+DYNAMODB_MAX_ATTEMPTS = int(os.environ.get('DYNAMODB_MAX_ATTEMPTS', 3))
+
 # AWS clients
-dynamodb = boto3.resource('dynamodb')
+dynamodb = boto3.resource(
+    'dynamodb',
+    config=Config(retries={'mode': 'standard', 'max_attempts': DYNAMODB_MAX_ATTEMPTS})
+)
 s3_client = boto3.client('s3')
 
+# Embedded metric format records, one per invocation, written to stdout
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'OSRP')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+# Routes reported as the Route dimension; anything else is 'other'
+METRIC_ROUTES = {
+    'POST /data/sensor', 'POST /data/event', 'POST /data/device-state', 'GET /data/presigned-url'
+}
+# Retry counters of the AWS clients, by service
+RETRY_METRICS = {'dynamodb': 'DynamoDBRetries', 's3': 'S3Retries'}
+
+emf = metrics.MetricsLogger(
+    METRICS_NAMESPACE,
+    {'Service': 'DataUpload', 'Environment': os.environ.get('ENVIRONMENT', 'dev')},
+    enabled=METRICS_ENABLED
+)
+# Whether this container has not handled an invocation yet
+cold_start = True
+
+# Share of invocations run under profiling.SamplingProfiler, with their
+# profiles written to S3 for `osrp profiles` (0 disables, 1 profiles all)
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+
+# Verifier of Authorization bearer tokens for requests that reach the
+# handler without authorizer claims (USER_POOL_ID or TOKEN_ISSUER set);
+# None trusts API Gateway's authorizer alone
+token_verifier = tokens.verifier_from_environment()
+
 # Environment variables
 SENSOR_TABLE_NAME = os.environ['SENSOR_TABLE_NAME']
 EVENT_TABLE_NAME = os.environ['EVENT_TABLE_NAME']
 DEVICE_STATE_TABLE_NAME = os.environ['DEVICE_STATE_TABLE_NAME']
 PARTICIPANT_TABLE_NAME = os.environ['PARTICIPANT_TABLE_NAME']
 DATA_BUCKET_NAME = os.environ['DATA_BUCKET_NAME']
+UPLOAD_BATCH_TABLE_NAME = os.environ.get('UPLOAD_BATCH_TABLE_NAME')
+SENSOR_SUMMARY_TABLE_NAME = os.environ.get('SENSOR_SUMMARY_TABLE_NAME')
+LATEST_DEVICE_STATE_TABLE_NAME = os.environ.get('LATEST_DEVICE_STATE_TABLE_NAME')
+
+# Responses of completed batches are replayed for this long
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 60 * 60))
+# A batch still in progress after this long (longer than the Lambda timeout)
+# was abandoned, e.g. by a timed-out invocation, and may be retried
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+# Per-minute sensor summaries outlive the raw readings they summarize
+SUMMARY_TTL_DAYS = int(os.environ.get('SUMMARY_TTL_DAYS', 365))
+SUMMARY_BUCKET_MS = 60_000
+
+# DynamoDB error codes meaning the table or account is out of capacity
+THROTTLE_ERROR_CODES = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+}
+# Uploads within this window make up the container's throttle rate
+THROTTLE_WINDOW_SECONDS = 60
+# Retry-After grows from the minimum to the maximum with the throttle rate
+RETRY_AFTER_MIN_SECONDS = int(os.environ.get('RETRY_AFTER_MIN_SECONDS', 1))
+RETRY_AFTER_MAX_SECONDS = int(os.environ.get('RETRY_AFTER_MAX_SECONDS', 60))
+# Throttled sensor batches are accepted into S3 for a deferred write
+SPILL_THROTTLED_BATCHES = os.environ.get('SPILL_THROTTLED_BATCHES', 'false').lower() == 'true'
+SPILL_PREFIX = 'temp/spill/sensor/'
+
+# 'async' acknowledges validated sensor batches once spilled to S3, leaving
+# the DynamoDB write to drain_handler; 'sync' writes them before responding
+SENSOR_INGEST_MODE = os.environ.get('SENSOR_INGEST_MODE', 'sync').lower()
+# Readings drain_handler writes per second, and the time it leaves unused
+# before the function timeout
+DRAIN_ITEMS_PER_SECOND = float(os.environ.get('DRAIN_ITEMS_PER_SECOND', 500))
+DRAIN_TIME_RESERVE_SECONDS = 10
+
+# Outcomes of recent uploads handled by this container: (time, throttled)
+recent_uploads: Deque[Tuple[float, bool]] = deque(maxlen=10_000)
+
+# Spread each participant-sensor stream over this many partition keys so a
+# 50 Hz stream stays under the per-partition write limit; readers must be
+# configured with the same count (OSRPData(sensor_shards=...))
+SENSOR_WRITE_SHARDS = int(os.environ.get('SENSOR_WRITE_SHARDS', 1))
+
+# Upload payload schemas, compiled once per container (see osrp.validation)
+Field = validation.Field
+
+SENSOR_UPLOAD_FIELDS = [
+    Field('sensorType', 'string', min_length=1, max_length=64),
+    Field('studyCode', 'string', min_length=1, max_length=128),
+    Field('encoding', 'string', required=False),
+]
+
+# Ranges of the data channels of sensor types that have them
+SENSOR_DATA_FIELDS = {
+    'location': [
+        Field('latitude', 'number', required=False, minimum=-90, maximum=90),
+        Field('longitude', 'number', required=False, minimum=-180, maximum=180),
+    ],
+}
+
+EVENT_FIELDS = [
+    Field('eventType', 'string', min_length=1, max_length=128),
+    Field('timestamp', 'integer', minimum=0, maximum=validation.MAX_SAFE_INTEGER),
+    Field('studyCode', 'string', min_length=1, max_length=128),
+    Field('eventData', 'object', required=False),
+    Field('context', 'object', required=False),
+]
+
+DEVICE_STATE_FIELDS = [
+    Field('timestamp', 'integer', minimum=0, maximum=validation.MAX_SAFE_INTEGER),
+    Field('studyCode', 'string', min_length=1, max_length=128),
+    Field('batteryLevel', 'number', required=False, minimum=0, maximum=100),
+    Field('batteryCharging', 'boolean', required=False),
+    Field('networkType', 'string', required=False, max_length=64),
+    Field('storageAvailable', 'number', required=False, minimum=0),
+    Field('storageTotal', 'number', required=False, minimum=0),
+    Field('memoryAvailable', 'number', required=False, minimum=0),
+    Field('memoryTotal', 'number', required=False, minimum=0),
+    Field('appVersion', 'string', required=False, max_length=64),
+    Field('osVersion', 'string', required=False, max_length=64),
+]
+
+
+def compile_reading_validator(
+    data_fields: List[Field],
+    finite: bool
+) -> Callable[[List[Any]], List[Tuple[int, str]]]:
+    """
+    Compile the validator of a sensor type's readings.
+
+    Args:
+        data_fields: Schema of the readings' data channels
+        finite: Check data values for NaN and infinities, which JSON bodies
+            cannot carry (see parse_json_float) but codec blocks can
+
+    Returns:
+        Batch validator (see validation.compile_batch_validator)
+    """
+    return validation.compile_batch_validator([
+        Field('timestamp', 'integer', minimum=0, maximum=validation.MAX_SAFE_INTEGER),
+        Field('data', 'object', finite=finite, fields=data_fields),
+        Field('accuracy', 'number', required=False),
+    ], increasing='timestamp', name='validate_readings')
+
+
+validate_sensor_upload = validation.compile_object_validator(
+    SENSOR_UPLOAD_FIELDS, name='validate_sensor_upload'
+)
+validate_event = validation.compile_object_validator(EVENT_FIELDS, name='validate_event')
+validate_device_state = validation.compile_object_validator(
+    DEVICE_STATE_FIELDS, name='validate_device_state'
+)
+# Reading validators by (sensor type, from a codec block); None is any other type
+reading_validators = {
+    (sensor_type, decoded): compile_reading_validator(data_fields, finite=decoded)
+    for sensor_type, data_fields in [(None, []), *SENSOR_DATA_FIELDS.items()]
+    for decoded in (False, True)
+}
 
 # DynamoDB tables
 sensor_table = dynamodb.Table(SENSOR_TABLE_NAME)
 event_table = dynamodb.Table(EVENT_TABLE_NAME)
 device_state_table = dynamodb.Table(DEVICE_STATE_TABLE_NAME)
 participant_table = dynamodb.Table(PARTICIPANT_TABLE_NAME)
+upload_batch_table = dynamodb.Table(UPLOAD_BATCH_TABLE_NAME) if UPLOAD_BATCH_TABLE_NAME else None
+sensor_summary_table = (
+    dynamodb.Table(SENSOR_SUMMARY_TABLE_NAME) if SENSOR_SUMMARY_TABLE_NAME else None
+)
+latest_device_state_table = (
+    dynamodb.Table(LATEST_DEVICE_STATE_TABLE_NAME) if LATEST_DEVICE_STATE_TABLE_NAME else None
+)
+
+
+def count_retries(event_name: str, parsed: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+    """
+    botocore after-call hook adding a call's retries to the invocation's metrics.
+
+    Args:
+        event_name: botocore event, e.g. 'after-call.dynamodb.PutItem'
+        parsed: Parsed response, also of calls that failed after their retries
+    """
+    attempts = ((parsed or {}).get('ResponseMetadata') or {}).get('RetryAttempts', 0)
+    if attempts:
+        emf.put_metric(RETRY_METRICS[event_name.split('.')[1]], attempts)
+
+
+# Count the retries botocore makes inside every DynamoDB and S3 call
+dynamodb.meta.client.meta.events.register('after-call.dynamodb', count_retries)
+s3_client.meta.events.register('after-call.s3', count_retries)
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda handler for data upload endpoints.
 
+    Handles the request and writes its metrics (latency, phase timings,
+    batch size, retries, cold start) as one embedded metric format record.
+
     Args:
         event: API Gateway event
         context: Lambda context
 
+    Returns:
+        API Gateway response
+    """
+    started = time.perf_counter()
+    begin_invocation_metrics(context)
+    route = f"{event.get('httpMethod')} {event.get('path')}"
+    if route not in METRIC_ROUTES:
+        route = 'other'
+    emf.put_dimension('Route', route)
+
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        with profiling.SamplingProfiler() as profiler:
+            response = handle_request(event)
+        emf.set_property('Profiled', True)
+    else:
+        profiler = None
+        response = handle_request(event)
+
+    emf.put_metric('Latency', (time.perf_counter() - started) * 1000, 'Milliseconds')
+    emf.set_property('StatusCode', response['statusCode'])
+    emf.flush()
+
+    if profiler is not None:
+        save_profile(profiler, route, getattr(context, 'aws_request_id', None), response)
+    return response
+
+
+def begin_invocation_metrics(context: Any) -> None:
+    """
+    Start the metrics record of an invocation with its cold start flag.
+
+    Args:
+        context: Lambda context (None when invoked locally)
+    """
+    global cold_start
+    emf.reset()
+    emf.put_metric('ColdStart', int(cold_start))
+    cold_start = False
+    request_id = getattr(context, 'aws_request_id', None)
+    if request_id:
+        emf.set_property('RequestId', request_id)
+
+
+def save_profile(
+    profiler: profiling.SamplingProfiler,
+    route: str,
+    request_id: Optional[str],
+    response: Dict[str, Any]
+) -> None:
+    """
+    Write the profile of an invocation to S3 under profiling.PROFILE_PREFIX.
+
+    Written after the response's metrics, so the upload does not count
+    towards the invocation's latency.
+
+    Args:
+        profiler: Finished profiler
+        route: Route of the invocation
+        request_id: Lambda request ID (a random ID when invoked locally)
+        response: Response of the invocation
+    """
+    key = profiling.profile_key(
+        profiling.PROFILE_PREFIX, route, request_id or f"local-{random.getrandbits(64):016x}"
+    )
+    try:
+        s3_client.put_object(
+            Bucket=DATA_BUCKET_NAME,
+            Key=key,
+            Body=profiling.dumps(profiler.stacks),
+            ContentType='text/plain',
+            Metadata={
+                'route': route,
+                'status-code': str(response['statusCode']),
+                'samples': str(profiler.samples),
+                'elapsed-ms': f"{profiler.elapsed * 1000:.1f}"
+            }
+        )
+    except Exception as e:
+        # Profiles are diagnostics; the request already succeeded or failed
+        logger.warning(f"Failed to save profile {key}: {str(e)}")
+        return
+    logger.info(f"Saved profile of {profiler.samples} samples to {key}")
+
+
+def handle_request(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse, authorize and route an API Gateway request.
+
+    Args:
+        event: API Gateway event
+
     Returns:
         API Gateway response
     """
@@ -56,7 +350,15 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Parse request
         http_method = event['httpMethod']
         path = event['path']
-        body = json.loads(event.get('body', '{}')) if event.get('body') else {}
+        body = {}
+        if event.get('body'):
+            emf.put_metric('RequestBytes', len(event['body']), 'Bytes')
+            with emf.timer('ParseTime'):
+                body = json.loads(
+                    event['body'],
+                    parse_constant=reject_json_constant,
+                    parse_float=parse_json_float
+                )
         query_params = event.get('queryStringParameters', {}) or {}
 
         logger.info(f"Request: {http_method} {path}")
@@ -66,17 +368,17 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not user_id:
             return error_response(401, 'Unauthorized - Invalid token')
 
-        # Route to appropriate handler
-        if path == '/data/sensor' and http_method == 'POST':
-            return handle_sensor_upload(user_id, body)
-        elif path == '/data/event' and http_method == 'POST':
-            return handle_event_upload(user_id, body)
-        elif path == '/data/device-state' and http_method == 'POST':
-            return handle_device_state_upload(user_id, body)
-        elif path == '/data/presigned-url' and http_method == 'GET':
-            return handle_presigned_url(user_id, query_params)
-        else:
-            return error_response(404, 'Not Found')
+        # Retried uploads carrying the same Idempotency-Key are not reprocessed
+        idempotency_key = get_header(event, 'Idempotency-Key')
+        if idempotency_key and http_method == 'POST':
+            if len(idempotency_key) > 255:
+                return error_response(400, 'Idempotency-Key must be at most 255 characters')
+            return handle_idempotent_request(
+                user_id, idempotency_key, request_fingerprint(http_method, path, body),
+                lambda: route_request(http_method, path, user_id, body, query_params)
+            )
+
+        return route_request(http_method, path, user_id, body, query_params)
 
     except json.JSONDecodeError:
         return error_response(400, 'Invalid JSON')
@@ -87,10 +389,233 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return error_response(500, 'Internal server error')
 
 
+def reject_json_constant(name: str) -> None:
+    """
+    Reject the NaN and Infinity literals json.loads accepts by default.
+
+    DynamoDB cannot store them, and rejecting them while parsing spares the
+    validators a pass over every number of the body.
+
+    Raises:
+        json.JSONDecodeError: Always
+    """
+    raise json.JSONDecodeError(f'{name} is not a valid JSON number', name, 0)
+
+
+def parse_json_float(text: str) -> float:
+    """
+    Parse a JSON number, rejecting those that overflow to infinity (e.g. 1e999).
+
+    parse_constant only sees the NaN and Infinity literals; numbers out of
+    float range become infinities without it, in sensor data, eventData and
+    context alike.
+
+    Raises:
+        json.JSONDecodeError: If the number is not finite
+    """
+    value = float(text)
+    if not math.isfinite(value):
+        raise json.JSONDecodeError(f'{text} is out of range', text, 0)
+    return value
+
+
+def route_request(
+    http_method: str,
+    path: str,
+    user_id: str,
+    body: Dict[str, Any],
+    query_params: Dict[str, str]
+) -> Dict[str, Any]:
+    """
+    Dispatch a request to the handler for its endpoint.
+
+    Returns:
+        API Gateway response
+    """
+    if path == '/data/sensor' and http_method == 'POST':
+        return handle_sensor_upload(user_id, body)
+    elif path == '/data/event' and http_method == 'POST':
+        return handle_event_upload(user_id, body)
+    elif path == '/data/device-state' and http_method == 'POST':
+        return handle_device_state_upload(user_id, body)
+    elif path == '/data/presigned-url' and http_method == 'GET':
+        return handle_presigned_url(user_id, query_params)
+    else:
+        return error_response(404, 'Not Found')
+
+
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """
+    Case-insensitive request header lookup.
+
+    Args:
+        event: API Gateway event
+        name: Header name
+
+    Returns:
+        Header value, or None if absent
+    """
+    headers = event.get('headers') or {}
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def request_fingerprint(http_method: str, path: str, body: Dict[str, Any]) -> str:
+    """
+    Hash identifying a request, to detect an idempotency key reused for different data.
+
+    Returns:
+        Hex SHA-256 digest of the method, path and canonical JSON body
+    """
+    canonical = json.dumps(body, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f"{http_method} {path} {canonical}".encode('utf-8')).hexdigest()
+
+
+def handle_idempotent_request(
+    user_id: str,
+    idempotency_key: str,
+    fingerprint: str,
+    process: Callable[[], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Process a request at most once per (user, Idempotency-Key).
+
+    The first request claims the key with a conditional write; its response
+    is recorded once it succeeds. Replays of a completed request get the
+    recorded response without rewriting any items, replays while it is still
+    running get 409, and failed requests release the key so the client can
+    retry. Keys expire after IDEMPOTENCY_TTL_SECONDS.
+
+    Args:
+        user_id: Participant user ID
+        idempotency_key: Client-chosen key for the upload batch
+        fingerprint: Hash of the request (see request_fingerprint)
+        process: Handles the request and returns its response
+
+    Returns:
+        API Gateway response
+    """
+    if upload_batch_table is None:
+        return process()
+
+    batch_key = f"{user_id}#{idempotency_key}"
+    now = int(time.time())
+    try:
+        upload_batch_table.put_item(
+            Item={
+                'batchKey': batch_key,
+                'status': 'IN_PROGRESS',
+                'requestHash': fingerprint,
+                'lockedUntil': now + IDEMPOTENCY_LOCK_SECONDS,
+                'expirationTime': now + IDEMPOTENCY_TTL_SECONDS
+            },
+            # TTL deletion is lazy, so expired and abandoned keys are reclaimed here
+            ConditionExpression=(
+                'attribute_not_exists(batchKey) OR expirationTime < :now'
+                ' OR (#status = :in_progress AND lockedUntil < :now)'
+            ),
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':now': now, ':in_progress': 'IN_PROGRESS'}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return replay_response(batch_key, fingerprint)
+        # Without the batch table, processing again is safe: puts overwrite
+        logger.warning(f"Idempotency check failed, processing anyway: {str(e)}")
+        return process()
+
+    try:
+        response = process()
+    except Exception:
+        release_batch(batch_key)
+        raise
+
+    if 200 <= response['statusCode'] < 300:
+        complete_batch(batch_key, response)
+    else:
+        release_batch(batch_key)
+    return response
+
+
+def replay_response(batch_key: str, fingerprint: str) -> Dict[str, Any]:
+    """
+    Response for a request whose idempotency key is already claimed.
+
+    Args:
+        batch_key: Upload batch table key
+        fingerprint: Hash of the replayed request
+
+    Returns:
+        The recorded response, or an error response
+    """
+    record = upload_batch_table.get_item(
+        Key={'batchKey': batch_key}, ConsistentRead=True
+    ).get('Item')
+
+    if record is None or record['status'] != 'COMPLETED':
+        return error_response(409, 'A request with this Idempotency-Key is in progress')
+    if record['requestHash'] != fingerprint:
+        return error_response(422, 'Idempotency-Key was already used for a different request')
+
+    logger.info(f"Replaying recorded response for upload batch {batch_key}")
+    response = success_response({}, int(record['statusCode']))
+    response['headers']['Idempotent-Replayed'] = 'true'
+    response['body'] = record['responseBody']
+    return response
+
+
+def complete_batch(batch_key: str, response: Dict[str, Any]) -> None:
+    """
+    Record the response of a processed upload batch for replays.
+
+    Args:
+        batch_key: Upload batch table key
+        response: API Gateway response to replay
+    """
+    try:
+        upload_batch_table.update_item(
+            Key={'batchKey': batch_key},
+            UpdateExpression=(
+                'SET #status = :completed, statusCode = :code, responseBody = :body'
+                ' REMOVE lockedUntil'
+            ),
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':completed': 'COMPLETED',
+                ':code': response['statusCode'],
+                ':body': response['body']
+            }
+        )
+    except Exception as e:
+        # The upload succeeded; a replay would only be processed again
+        logger.warning(f"Failed to record upload batch {batch_key}: {str(e)}")
+
+
+def release_batch(batch_key: str) -> None:
+    """
+    Release the idempotency key of a failed request so it can be retried.
+
+    Args:
+        batch_key: Upload batch table key
+    """
+    try:
+        upload_batch_table.delete_item(Key={'batchKey': batch_key})
+    except Exception as e:
+        # The claim expires after IDEMPOTENCY_LOCK_SECONDS
+        logger.warning(f"Failed to release upload batch {batch_key}: {str(e)}")
+
+
 def extract_user_id(event: Dict[str, Any]) -> str:
     """
     Extract user ID from JWT token in Authorization header.
 
+    The claims come from API Gateway's authorizer: the Cognito authorizer
+    nests them under 'claims', the token authorizer (authorizer_handler)
+    passes them flat. Without authorizer claims, the bearer token is
+    verified here if a token_verifier is configured.
+
     Args:
         event: API Gateway event
 
@@ -99,9 +624,19 @@ def extract_user_id(event: Dict[str, Any]) -> str:
     """
     try:
         # Get user ID from authorizer context (set by API Gateway)
-        if 'requestContext' in event and 'authorizer' in event['requestContext']:
-            claims = event['requestContext']['authorizer'].get('claims', {})
-            return claims.get('sub') or claims.get('cognito:username')
+        authorizer = (event.get('requestContext') or {}).get('authorizer') or {}
+        claims = authorizer.get('claims') or authorizer
+        user_id = claims.get('sub') or claims.get('cognito:username')
+        if user_id or token_verifier is None:
+            return user_id
+
+        token = get_header(event, 'Authorization')
+        if not token:
+            return None
+        with emf.timer('TokenVerifyTime'):
+            return token_verifier.verify(token)['sub']
+    except tokens.TokenError as e:
+        logger.info(f"Rejected token: {str(e)}")
         return None
     except Exception as e:
         logger.warning(f"Failed to extract user ID: {str(e)}")
@@ -125,59 +660,76 @@ def handle_sensor_upload(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
         "studyCode": "depression_study_2026"
     }
 
+    Readings may instead be sent compressed, as a base64 osrp.codec block
+    (see codec.encode_readings):
+    {
+        "sensorType": "accelerometer",
+        "encoding": "gorilla",
+        "block": "T1NSRwEB...",
+        "studyCode": "depression_study_2026"
+    }
+
     Returns:
         API Gateway response
     """
     try:
-        # Validate required fields
+        # Validate the envelope before decoding anything
+        errors = validate_sensor_upload(body)
+        if errors:
+            return error_response(400, 'Invalid sensor upload', errors)
         sensor_type = body['sensorType']
-        readings = body['readings']
+        encoding = body.get('encoding', 'json')
+        if encoding == 'gorilla':
+            try:
+                block = base64.b64decode(body['block'], validate=True)
+                # Check the size before spending time decoding
+                if codec.block_count(block) > 1000:
+                    return error_response(400, 'Maximum 1000 readings per request')
+                with emf.timer('DecodeTime'):
+                    readings = codec.decode_readings(block)
+            except (TypeError, ValueError) as e:
+                return error_response(400, f'Invalid sensor block: {str(e)}')
+        elif encoding == 'json':
+            readings = body['readings']
+        else:
+            return error_response(400, f'Unsupported encoding: {encoding}')
         study_code = body['studyCode']
 
-        logger.info(f"Uploading {len(readings)} {sensor_type} readings for user {user_id}")
-
         # Validate readings
         if not isinstance(readings, list) or len(readings) == 0:
             return error_response(400, 'readings must be a non-empty array')
 
         if len(readings) > 1000:
             return error_response(400, 'Maximum 1000 readings per request')
+        emf.put_metric('BatchSize', len(readings))
 
-        # Prepare items for batch write
-        items = []
-        current_time = int(time.time())
-        ttl_days = 90
-        expiration_time = current_time + (ttl_days * 24 * 60 * 60)
+        # Every invalid reading is reported, before any conversion or write
+        decoded = encoding == 'gorilla'
+        validate_readings = reading_validators.get(
+            (sensor_type, decoded), reading_validators[(None, decoded)]
+        )
+        with emf.timer('ValidateTime'):
+            errors = validate_readings(readings)
+        if errors:
+            return error_response(400, 'Invalid readings', [
+                {'index': index, 'error': error} for index, error in errors
+            ])
 
-        for reading in readings:
-            # Validate reading structure
-            if 'timestamp' not in reading or 'data' not in reading:
-                return error_response(400, 'Each reading must have timestamp and data')
+        logger.info(f"Uploading {len(readings)} {sensor_type} readings for user {user_id}")
 
-            # Convert floats to Decimal for DynamoDB
-            data = convert_floats_to_decimal(reading['data'])
+        if SENSOR_INGEST_MODE == 'async':
+            if spill_sensor_batch(user_id, sensor_type, study_code, readings):
+                update_participant_last_seen(user_id, study_code)
+                return deferred_response(sensor_type, len(readings))
+            # S3 is unavailable: fall back to writing the batch now
 
-            item = {
-                'userIdSensorType': f"{user_id}#{sensor_type}",
-                'timestamp': int(reading['timestamp']),
-                'groupCode': study_code,
-                'data': data,
-                'accuracy': reading.get('accuracy'),
-                'expirationTime': expiration_time
-            }
-            items.append(item)
-
-        # Batch write to DynamoDB
-        write_count = 0
-        with sensor_table.batch_writer() as batch:
-            for item in items:
-                batch.put_item(Item=item)
-                write_count += 1
+        write_count = write_sensor_batch(user_id, sensor_type, study_code, readings)
 
         # Update participant last seen timestamp
         update_participant_last_seen(user_id, study_code)
 
         logger.info(f"Successfully uploaded {write_count} {sensor_type} readings")
+        record_upload_outcome(throttled=False)
 
         return success_response({
             'message': 'Sensor data uploaded successfully',
@@ -188,10 +740,77 @@ def handle_sensor_upload(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
     except ClientError as e:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
+        if is_throttling_error(e):
+            logger.warning(f"DynamoDB throttled {sensor_type} upload: {error_code}")
+            if SPILL_THROTTLED_BATCHES and spill_sensor_batch(
+                user_id, sensor_type, study_code, readings
+            ):
+                record_upload_outcome(throttled=True)
+                return deferred_response(sensor_type, len(readings))
+            return throttled_response()
         logger.error(f"DynamoDB error: {error_code} - {error_message}")
         return error_response(500, f'Database error: {error_message}')
 
 
+def write_sensor_batch(
+    user_id: str,
+    sensor_type: str,
+    study_code: str,
+    readings: List[Dict[str, Any]]
+) -> int:
+    """
+    Write validated sensor readings to DynamoDB and fold them into the summaries.
+
+    Args:
+        user_id: Participant user ID
+        sensor_type: Sensor type of the batch
+        study_code: Study code
+        readings: Validated readings of the batch
+
+    Returns:
+        Number of readings written
+
+    Raises:
+        ClientError: If DynamoDB rejects the batch write
+    """
+    # Prepare items for batch write
+    items = []
+    current_time = int(time.time())
+    ttl_days = 90
+    expiration_time = current_time + (ttl_days * 24 * 60 * 60)
+
+    with emf.timer('ConvertTime'):
+        for reading in readings:
+            # Convert floats to Decimal for DynamoDB
+            data = convert_floats_to_decimal(reading['data'])
+
+            item = {
+                'userIdSensorType': sensor_partition_key(
+                    user_id, sensor_type, int(reading['timestamp'])
+                ),
+                'timestamp': int(reading['timestamp']),
+                'groupCode': study_code,
+                'data': data,
+                'accuracy': reading.get('accuracy'),
+                'expirationTime': expiration_time
+            }
+            items.append(item)
+
+    # Batch write to DynamoDB
+    write_count = 0
+    with emf.timer('WriteTime'):
+        with sensor_table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+                write_count += 1
+
+    # Fold the batch into the per-minute summaries dashboards read
+    with emf.timer('SummaryTime'):
+        update_sensor_summaries(user_id, sensor_type, study_code, readings)
+
+    return write_count
+
+
 def handle_event_upload(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
     """
     Handle discrete event upload.
@@ -209,18 +828,21 @@ def handle_event_upload(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
         API Gateway response
     """
     try:
-        # Validate required fields
+        errors = validate_event(body)
+        if errors:
+            return error_response(400, 'Invalid event', errors)
         event_type = body['eventType']
-        timestamp = int(body['timestamp'])
+        timestamp = body['timestamp']
         study_code = body['studyCode']
-        event_data = body.get('eventData', {})
-        context = body.get('context', {})
+        event_data = body.get('eventData') or {}
+        context = body.get('context') or {}
 
         logger.info(f"Logging {event_type} event for user {user_id}")
 
         # Convert floats to Decimal
-        event_data = convert_floats_to_decimal(event_data)
-        context = convert_floats_to_decimal(context)
+        with emf.timer('ConvertTime'):
+            event_data = convert_floats_to_decimal(event_data)
+            context = convert_floats_to_decimal(context)
 
         # Set TTL (90 days)
         current_time = int(time.time())
@@ -237,12 +859,14 @@ def handle_event_upload(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
             'expirationTime': expiration_time
         }
 
-        event_table.put_item(Item=item)
+        with emf.timer('WriteTime'):
+            event_table.put_item(Item=item)
 
         # Update participant last seen
         update_participant_last_seen(user_id, study_code)
 
         logger.info(f"Successfully logged {event_type} event")
+        record_upload_outcome(throttled=False)
 
         return success_response({
             'message': 'Event logged successfully',
@@ -253,6 +877,9 @@ def handle_event_upload(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
     except ClientError as e:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
+        if is_throttling_error(e):
+            logger.warning(f"DynamoDB throttled upload: {error_code}")
+            return throttled_response()
         logger.error(f"DynamoDB error: {error_code} - {error_message}")
         return error_response(500, f'Database error: {error_message}')
 
@@ -278,14 +905,17 @@ def handle_device_state_upload(user_id: str, body: Dict[str, Any]) -> Dict[str,
         API Gateway response
     """
     try:
-        # Validate required fields
-        timestamp = int(body['timestamp'])
+        errors = validate_device_state(body)
+        if errors:
+            return error_response(400, 'Invalid device state', errors)
+        timestamp = body['timestamp']
         study_code = body['studyCode']
 
         logger.info(f"Uploading device state for user {user_id}")
 
         # Convert floats to Decimal
-        body_decimal = convert_floats_to_decimal(body)
+        with emf.timer('ConvertTime'):
+            body_decimal = convert_floats_to_decimal(body)
 
         # Set TTL (90 days)
         current_time = int(time.time())
@@ -308,12 +938,17 @@ def handle_device_state_upload(user_id: str, body: Dict[str, Any]) -> Dict[str,
             'expirationTime': expiration_time
         }
 
-        device_state_table.put_item(Item=item)
+        with emf.timer('WriteTime'):
+            device_state_table.put_item(Item=item)
+
+        # Keep the participant's current-state record up to date
+        update_latest_device_state(item)
 
         # Update participant last seen
         update_participant_last_seen(user_id, study_code)
 
         logger.info("Successfully uploaded device state")
+        record_upload_outcome(throttled=False)
 
         return success_response({
             'message': 'Device state uploaded successfully',
@@ -323,6 +958,9 @@ def handle_device_state_upload(user_id: str, body: Dict[str, Any]) -> Dict[str,
     except ClientError as e:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
+        if is_throttling_error(e):
+            logger.warning(f"DynamoDB throttled upload: {error_code}")
+            return throttled_response()
         logger.error(f"DynamoDB error: {error_code} - {error_message}")
         return error_response(500, f'Database error: {error_message}')
 
@@ -385,6 +1023,318 @@ def handle_presigned_url(user_id: str, query_params: Dict[str, str]) -> Dict[str
         return error_response(500, f'S3 error: {error_message}')
 
 
+def is_throttling_error(error: ClientError) -> bool:
+    """
+    Whether DynamoDB rejected a request for lack of capacity.
+
+    Args:
+        error: Error raised by a DynamoDB call (after botocore's retries)
+
+    Returns:
+        True for throttling and request limit errors
+    """
+    return error.response['Error']['Code'] in THROTTLE_ERROR_CODES
+
+
+def record_upload_outcome(throttled: bool, now: Optional[float] = None) -> None:
+    """
+    Add an upload to the rolling throttle rate of this container.
+
+    Args:
+        throttled: Whether DynamoDB throttled the upload's writes
+        now: Current time in seconds (defaults to time.time())
+    """
+    recent_uploads.append((time.time() if now is None else now, throttled))
+
+
+def throttle_rate(now: Optional[float] = None) -> float:
+    """
+    Share of this container's uploads throttled in the last THROTTLE_WINDOW_SECONDS.
+
+    Args:
+        now: Current time in seconds (defaults to time.time())
+
+    Returns:
+        Throttled fraction between 0 and 1 (0 without recent uploads)
+    """
+    cutoff = (time.time() if now is None else now) - THROTTLE_WINDOW_SECONDS
+    while recent_uploads and recent_uploads[0][0] < cutoff:
+        recent_uploads.popleft()
+    if not recent_uploads:
+        return 0.0
+    return sum(throttled for _, throttled in recent_uploads) / len(recent_uploads)
+
+
+def retry_after_seconds(rate: float) -> int:
+    """
+    Seconds a throttled client should wait before retrying.
+
+    The delay grows geometrically from RETRY_AFTER_MIN_SECONDS at a zero
+    throttle rate to RETRY_AFTER_MAX_SECONDS when every recent upload was
+    throttled, so clients back off harder the longer an overload lasts. Up
+    to 50% jitter is added so a throttled fleet does not retry in lockstep.
+
+    Args:
+        rate: Recent throttle rate (see throttle_rate)
+
+    Returns:
+        Whole seconds for the Retry-After header
+    """
+    low = max(1, RETRY_AFTER_MIN_SECONDS)
+    high = max(low, RETRY_AFTER_MAX_SECONDS)
+    delay = low * (high / low) ** rate
+    return min(high, math.ceil(delay * random.uniform(1.0, 1.5)))
+
+
+def throttled_response() -> Dict[str, Any]:
+    """
+    Record a throttled upload and ask the client to retry later.
+
+    Returns:
+        429 API Gateway response with a Retry-After header
+    """
+    record_upload_outcome(throttled=True)
+    emf.put_metric('Throttles', 1)
+    rate = throttle_rate()
+    response = error_response(429, 'Too many requests, retry later')
+    response['headers']['Retry-After'] = str(retry_after_seconds(rate))
+    logger.warning(f"Throttle rate {rate:.0%}, Retry-After {response['headers']['Retry-After']}s")
+    return response
+
+
+def deferred_response(sensor_type: str, count: int) -> Dict[str, Any]:
+    """
+    Acknowledge a sensor batch spilled to S3 for drain_handler to write.
+
+    Args:
+        sensor_type: Sensor type of the batch
+        count: Number of readings accepted
+
+    Returns:
+        202 API Gateway response
+    """
+    return success_response({
+        'message': 'Sensor data accepted for deferred write',
+        'count': count,
+        'sensorType': sensor_type,
+        'deferred': True
+    }, 202)
+
+
+def codec_lossless(reading: Dict[str, Any]) -> bool:
+    """
+    Whether the codec round-trips the stored fields of a reading exactly.
+
+    The codec holds numbers as doubles and drops missing values, so
+    booleans, None, NaN, integers beyond 2**53 and non-numeric values
+    (e.g. location provider names) must be stored otherwise.
+
+    Args:
+        reading: Validated reading
+
+    Returns:
+        True if timestamp, data channels and accuracy are plain numbers
+    """
+    def plain(value: Any) -> bool:
+        if type(value) is int:
+            return abs(value) < 1 << 53
+        return type(value) is float and not math.isnan(value)
+
+    data = reading['data']
+    if type(reading['timestamp']) is not int or not isinstance(data, dict):
+        return False
+    if 'accuracy' in data or not all(plain(value) for value in data.values()):
+        return False
+    return reading.get('accuracy') is None or plain(reading['accuracy'])
+
+
+def spill_sensor_batch(
+    user_id: str,
+    sensor_type: str,
+    study_code: str,
+    readings: List[Dict[str, Any]]
+) -> Optional[str]:
+    """
+    Store a validated sensor batch in S3 for a deferred write.
+
+    Readings are stored as a codec block (about 5 bytes per accelerometer
+    reading), or as gzipped JSON when they hold values the codec cannot
+    encode; the batch's participant, sensor and study travel as object
+    metadata. The key is derived from the content, so a client retrying the
+    same batch overwrites its earlier spill. Objects under temp/ expire
+    after 7 days.
+
+    Args:
+        user_id: Participant user ID
+        sensor_type: Sensor type of the batch
+        study_code: Study code
+        readings: Validated readings of the batch
+
+    Returns:
+        S3 key of the spilled batch, or None if it could not be stored
+    """
+    if all(map(codec_lossless, readings)):
+        body, extension = codec.encode_readings(readings), 'osrg'
+    else:
+        body = gzip.compress(json.dumps(readings, separators=(',', ':'), default=str).encode())
+        extension = 'json.gz'
+
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    day = time.strftime('%Y-%m-%d', time.gmtime())
+    key = f"{SPILL_PREFIX}{day}/{user_id}/{sensor_type}-{digest}.{extension}"
+    try:
+        with emf.timer('SpillTime'):
+            s3_client.put_object(
+                Bucket=DATA_BUCKET_NAME,
+                Key=key,
+                Body=body,
+                ContentType='application/octet-stream',
+                Metadata={
+                    'user-id': user_id, 'sensor-type': sensor_type, 'study-code': study_code
+                }
+            )
+    except Exception as e:
+        logger.warning(f"Failed to spill {sensor_type} batch: {str(e)}")
+        return None
+    emf.put_metric('SpilledBatches', 1)
+    logger.info(f"Spilled {len(readings)} {sensor_type} readings to {key}")
+    return key
+
+
+def load_spilled_batch(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a sensor batch written by spill_sensor_batch.
+
+    Args:
+        key: S3 key of the spilled batch
+
+    Returns:
+        Dict with userId, sensorType, studyCode and readings, or None if
+        the object no longer exists
+    """
+    try:
+        response = s3_client.get_object(Bucket=DATA_BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+
+    body = response['Body'].read()
+    if key.endswith('.osrg'):
+        readings = codec.decode_readings(body)
+    else:
+        readings = json.loads(gzip.decompress(body))
+    metadata = response['Metadata']
+    return {
+        'userId': metadata['user-id'],
+        'sensorType': metadata['sensor-type'],
+        'studyCode': metadata['study-code'],
+        'readings': readings
+    }
+
+
+def drain_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Scheduled Lambda handler writing spilled sensor batches to DynamoDB.
+
+    Runs until the spill prefix is empty, DynamoDB throttles or the function
+    is DRAIN_TIME_RESERVE_SECONDS from its timeout; the next invocation
+    continues where it stopped.
+
+    Args:
+        event: EventBridge schedule event
+        context: Lambda context
+
+    Returns:
+        Drain statistics (see drain_spilled_batches)
+    """
+    started = time.perf_counter()
+    begin_invocation_metrics(context)
+    emf.put_dimension('Route', 'drain')
+
+    deadline = None
+    if context is not None:
+        remaining = context.get_remaining_time_in_millis() / 1000
+        deadline = time.time() + remaining - DRAIN_TIME_RESERVE_SECONDS
+    stats = drain_spilled_batches(DRAIN_ITEMS_PER_SECOND, deadline)
+    logger.info(f"Drained spilled sensor batches: {json.dumps(stats)}")
+
+    emf.put_metric('DrainedBatches', stats['batches'])
+    emf.put_metric('DrainedReadings', stats['readings'])
+    emf.put_metric('FailedBatches', stats['failed'])
+    emf.put_metric('Throttles', int(stats['throttled']))
+    emf.put_metric('Latency', (time.perf_counter() - started) * 1000, 'Milliseconds')
+    emf.flush()
+    return stats
+
+
+def drain_spilled_batches(
+    items_per_second: Optional[float] = None,
+    deadline: Optional[float] = None,
+    max_batches: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Write spilled sensor batches to DynamoDB at a controlled rate.
+
+    Each batch is written with write_sensor_batch and its object deleted
+    afterwards, so a batch interrupted between the two is written again
+    (its readings overwrite themselves, its summaries count it twice).
+    Batches failing for reasons other
+    than throttling are logged and left for temp/ expiry.
+
+    Args:
+        items_per_second: Readings written per second at most (None: unpaced)
+        deadline: Epoch seconds after which no further batch is started
+        max_batches: Batches to write at most
+
+    Returns:
+        Dict with batches and readings written, failed batches, whether
+        DynamoDB throttled and whether the spill prefix was emptied
+    """
+    stats = {'batches': 0, 'readings': 0, 'failed': 0, 'throttled': False, 'complete': False}
+    started = time.monotonic()
+
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=DATA_BUCKET_NAME, Prefix=SPILL_PREFIX):
+        for obj in page.get('Contents', []):
+            if deadline is not None and time.time() >= deadline:
+                return stats
+            if max_batches is not None and stats['batches'] >= max_batches:
+                return stats
+
+            if items_per_second:
+                wait = started + stats['readings'] / items_per_second - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+
+            try:
+                batch = load_spilled_batch(obj['Key'])
+                if batch is None:
+                    continue
+                count = write_sensor_batch(
+                    batch['userId'], batch['sensorType'], batch['studyCode'], batch['readings']
+                )
+            except ClientError as e:
+                if is_throttling_error(e):
+                    logger.warning("DynamoDB throttled the drain, stopping until the next run")
+                    stats['throttled'] = True
+                    return stats
+                logger.error(f"Failed to drain {obj['Key']}: {str(e)}")
+                stats['failed'] += 1
+                continue
+            except Exception as e:
+                logger.error(f"Failed to drain {obj['Key']}: {str(e)}")
+                stats['failed'] += 1
+                continue
+
+            s3_client.delete_object(Bucket=DATA_BUCKET_NAME, Key=obj['Key'])
+            stats['batches'] += 1
+            stats['readings'] += count
+
+    stats['complete'] = stats['failed'] == 0
+    return stats
+
+
 def update_participant_last_seen(user_id: str, study_code: str) -> None:
     """
     Update participant's last seen timestamp.
@@ -395,19 +1345,208 @@ def update_participant_last_seen(user_id: str, study_code: str) -> None:
     """
     try:
         current_timestamp = int(time.time() * 1000)
-        participant_table.update_item(
-            Key={'userId': user_id},
-            UpdateExpression='SET lastSeenTimestamp = :ts, lastUploadTimestamp = :ts, groupCode = :gc',
-            ExpressionAttributeValues={
-                ':ts': current_timestamp,
-                ':gc': study_code
-            }
-        )
+        with emf.timer('ParticipantUpdateTime'):
+            participant_table.update_item(
+                Key={'userId': user_id},
+                UpdateExpression=(
+                    'SET lastSeenTimestamp = :ts, lastUploadTimestamp = :ts, groupCode = :gc'
+                ),
+                ExpressionAttributeValues={
+                    ':ts': current_timestamp,
+                    ':gc': study_code
+                }
+            )
     except Exception as e:
         # Don't fail the request if this update fails
         logger.warning(f"Failed to update participant last seen: {str(e)}")
 
 
+def update_latest_device_state(item: Dict[str, Any]) -> None:
+    """
+    Upsert a participant's latest device state record.
+
+    The history item is copied without its TTL, conditional on being newer
+    than the stored record, so reports arriving out of order (e.g. flushed
+    from an offline queue) never replace a more recent state.
+
+    Args:
+        item: DeviceState history item just written
+    """
+    if latest_device_state_table is None:
+        return
+
+    latest = {key: value for key, value in item.items() if key != 'expirationTime'}
+    try:
+        latest_device_state_table.put_item(
+            Item=latest,
+            ConditionExpression='attribute_not_exists(userId) OR #ts < :ts',
+            ExpressionAttributeNames={'#ts': 'timestamp'},
+            ExpressionAttributeValues={':ts': item['timestamp']}
+        )
+    except Exception as e:
+        if isinstance(e, ClientError) and (
+            e.response['Error']['Code'] == 'ConditionalCheckFailedException'
+        ):
+            # A newer report is already stored
+            return
+        # The history item is stored; the next report refreshes the record
+        logger.warning(f"Failed to update latest device state: {str(e)}")
+
+
+def sensor_partition_key(user_id: str, sensor_type: str, timestamp: int) -> str:
+    """
+    Partition key a sensor reading is stored under.
+
+    With SENSOR_WRITE_SHARDS > 1 a shard suffix derived from the timestamp is
+    appended. The suffix is a hash rather than a time bucket so concurrent
+    writes of one stream spread over every shard, and is deterministic so a
+    retried reading overwrites its earlier copy.
+
+    Args:
+        user_id: Participant ID
+        sensor_type: Type of sensor
+        timestamp: Reading timestamp in milliseconds
+
+    Returns:
+        userIdSensorType value
+    """
+    key = f"{user_id}#{sensor_type}"
+    if SENSOR_WRITE_SHARDS <= 1:
+        return key
+    return f"{key}#{zlib.crc32(str(timestamp).encode()) % SENSOR_WRITE_SHARDS}"
+
+
+def summarize_readings(readings: List[Dict[str, Any]]) -> Dict[int, Dict[str, Dict[str, float]]]:
+    """
+    Fold sensor readings into per-minute statistics.
+
+    Every numeric value of a reading's data map is a channel; readings with
+    x, y and z also get a `magnitude` channel, as in the analysis rollups.
+    Missing and non-finite values are skipped.
+
+    Args:
+        readings: Validated readings with timestamp and data
+
+    Returns:
+        {minute start in ms: {channel: {count, sum, sumsq, min, max}}}
+    """
+    summaries: Dict[int, Dict[str, Dict[str, float]]] = {}
+    for reading in readings:
+        data = reading['data']
+        if not isinstance(data, dict):
+            continue
+
+        values = {
+            channel: float(value) for channel, value in data.items()
+            if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+            and math.isfinite(value)
+        }
+        if 'x' in values and 'y' in values and 'z' in values:
+            values['magnitude'] = math.sqrt(
+                values['x'] ** 2 + values['y'] ** 2 + values['z'] ** 2
+            )
+
+        minute = int(reading['timestamp']) // SUMMARY_BUCKET_MS * SUMMARY_BUCKET_MS
+        channels = summaries.setdefault(minute, {})
+        for channel, value in values.items():
+            stats = channels.get(channel)
+            if stats is None:
+                channels[channel] = {
+                    'count': 1, 'sum': value, 'sumsq': value * value, 'min': value, 'max': value
+                }
+            else:
+                stats['count'] += 1
+                stats['sum'] += value
+                stats['sumsq'] += value * value
+                stats['min'] = min(stats['min'], value)
+                stats['max'] = max(stats['max'], value)
+    return summaries
+
+
+def update_sensor_summaries(
+    user_id: str,
+    sensor_type: str,
+    study_code: str,
+    readings: List[Dict[str, Any]]
+) -> None:
+    """
+    Add a sensor batch to the per-minute summary items of its stream.
+
+    Each minute is one item keyed by (`{userId}#{sensorType}`, minute start)
+    with `{channel}_count`, `_sum`, `_sumsq`, `_min` and `_max` attributes.
+    Counts and sums are atomic ADDs, so concurrent uploads to the same
+    minute combine correctly. A minute's first writer sets min and max, and
+    later batches lower or raise them with conditional updates only where
+    they extend the stored range. A batch retried without an
+    Idempotency-Key is added again.
+
+    Args:
+        user_id: Participant user ID
+        sensor_type: Sensor type of the batch
+        study_code: Study code
+        readings: Validated readings of the batch
+    """
+    if sensor_summary_table is None:
+        return
+
+    key_value = f"{user_id}#{sensor_type}"
+    expiration_time = int(time.time()) + SUMMARY_TTL_DAYS * 24 * 60 * 60
+    try:
+        for minute, channels in sorted(summarize_readings(readings).items()):
+            key = {'userIdSensorType': key_value, 'timestamp': minute}
+            names = {}
+            values = {':gc': study_code, ':exp': expiration_time}
+            adds = []
+            sets = ['groupCode = :gc', 'expirationTime = :exp']
+            for i, (channel, stats) in enumerate(sorted(channels.items())):
+                for stat in ('count', 'sum', 'sumsq'):
+                    names[f'#{stat}{i}'] = f'{channel}_{stat}'
+                    values[f':{stat}{i}'] = convert_floats_to_decimal(stats[stat])
+                    adds.append(f'#{stat}{i} :{stat}{i}')
+                for stat in ('min', 'max'):
+                    names[f'#{stat}{i}'] = f'{channel}_{stat}'
+                    values[f':{stat}{i}'] = convert_floats_to_decimal(stats[stat])
+                    sets.append(f'#{stat}{i} = if_not_exists(#{stat}{i}, :{stat}{i})')
+            if not adds:
+                continue
+
+            previous = sensor_summary_table.update_item(
+                Key=key,
+                UpdateExpression=f"ADD {', '.join(adds)} SET {', '.join(sets)}",
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_OLD'
+            ).get('Attributes', {})
+
+            # DynamoDB has no atomic min/max: extend the stored range only
+            # where this batch lies outside it, guarded against races
+            for channel, stats in channels.items():
+                for stat, condition in (('min', '#s > :v'), ('max', '#s < :v')):
+                    name = f'{channel}_{stat}'
+                    stored = previous.get(name)
+                    if stored is None:
+                        continue
+                    extends = stats[stat] < stored if stat == 'min' else stats[stat] > stored
+                    if not extends:
+                        continue
+                    try:
+                        sensor_summary_table.update_item(
+                            Key=key,
+                            UpdateExpression='SET #s = :v',
+                            ConditionExpression=condition,
+                            ExpressionAttributeNames={'#s': name},
+                            ExpressionAttributeValues={
+                                ':v': convert_floats_to_decimal(stats[stat])
+                            }
+                        )
+                    except ClientError as e:
+                        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                            raise
+    except Exception as e:
+        # The readings are stored; summaries can be rebuilt from them
+        logger.warning(f"Failed to update {sensor_type} summaries: {str(e)}")
+
+
 def convert_floats_to_decimal(obj: Any) -> Any:
     """
     Convert floats to Decimal for DynamoDB compatibility.
@@ -444,33 +1583,41 @@ def success_response(data: Dict[str, Any], status_code: int = 200) -> Dict[str,
         'headers': {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+            'Access-Control-Allow-Headers': 'Content-Type,Authorization,Idempotency-Key',
+            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+            'Access-Control-Expose-Headers': 'Retry-After'
         },
         'body': json.dumps(data, default=str)
     }
 
 
-def error_response(status_code: int, message: str) -> Dict[str, Any]:
+def error_response(
+    status_code: int,
+    message: str,
+    details: Optional[List[Any]] = None
+) -> Dict[str, Any]:
     """
     Create an error API Gateway response.
 
     Args:
         status_code: HTTP status code
         message: Error message
+        details: Individual problems, e.g. every invalid field of a payload
 
     Returns:
         API Gateway response
     """
+    body = {'error': message}
+    if details:
+        body['details'] = details
     return {
         'statusCode': status_code,
         'headers': {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+            'Access-Control-Allow-Headers': 'Content-Type,Authorization,Idempotency-Key',
+            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+            'Access-Control-Expose-Headers': 'Retry-After'
         },
-        'body': json.dumps({
-            'error': message
-        })
+        'body': json.dumps(body)
     }
@@ -84,23 +84,35 @@ module "lambda" {
   lambda_runtime              = var.lambda_runtime
   auth_lambda_memory          = var.auth_lambda_memory
   data_upload_lambda_memory   = var.data_upload_lambda_memory
+  sensor_write_shards         = var.sensor_write_shards
+  spill_throttled_batches     = var.spill_throttled_batches
+  sensor_ingest_mode          = var.sensor_ingest_mode
+  drain_items_per_second      = var.drain_items_per_second
+  profile_sample_rate         = var.profile_sample_rate
   lambda_timeout              = var.lambda_timeout
   lambda_log_retention        = var.lambda_log_retention
 
   # Dependencies from other modules
-  user_pool_id               = module.cognito.user_pool_id
-  user_pool_client_id        = module.cognito.user_pool_client_id
-  user_pool_arn              = module.cognito.user_pool_arn
-  sensor_table_name          = module.dynamodb.sensor_time_series_table_name
-  event_table_name           = module.dynamodb.event_log_table_name
-  device_state_table_name    = module.dynamodb.device_state_table_name
-  participant_table_name     = module.dynamodb.participant_status_table_name
-  sensor_table_arn           = module.dynamodb.sensor_time_series_table_arn
-  event_table_arn            = module.dynamodb.event_log_table_arn
-  device_state_table_arn     = module.dynamodb.device_state_table_arn
-  participant_table_arn      = module.dynamodb.participant_status_table_arn
-  data_bucket_name           = module.s3.data_bucket_name
-  data_bucket_arn            = module.s3.data_bucket_arn
+  user_pool_id                   = module.cognito.user_pool_id
+  user_pool_client_id            = module.cognito.user_pool_client_id
+  user_pool_arn                  = module.cognito.user_pool_arn
+  enroll_admin_group             = module.cognito.admins_group_name
+  sensor_table_name              = module.dynamodb.sensor_time_series_table_name
+  event_table_name               = module.dynamodb.event_log_table_name
+  device_state_table_name        = module.dynamodb.device_state_table_name
+  participant_table_name         = module.dynamodb.participant_status_table_name
+  sensor_table_arn               = module.dynamodb.sensor_time_series_table_arn
+  event_table_arn                = module.dynamodb.event_log_table_arn
+  device_state_table_arn         = module.dynamodb.device_state_table_arn
+  participant_table_arn          = module.dynamodb.participant_status_table_arn
+  upload_batches_table_name      = module.dynamodb.upload_batches_table_name
+  upload_batches_table_arn       = module.dynamodb.upload_batches_table_arn
+  sensor_summary_table_name      = module.dynamodb.sensor_summary_table_name
+  sensor_summary_table_arn       = module.dynamodb.sensor_summary_table_arn
+  latest_device_state_table_name = module.dynamodb.latest_device_state_table_name
+  latest_device_state_table_arn  = module.dynamodb.latest_device_state_table_arn
+  data_bucket_name               = module.s3.data_bucket_name
+  data_bucket_arn                = module.s3.data_bucket_arn
 
   tags = local.common_tags
 }
@@ -119,6 +131,10 @@ module "api_gateway" {
   auth_lambda_name       = module.lambda.auth_lambda_name
   data_upload_lambda_arn = module.lambda.data_upload_lambda_arn
   data_upload_lambda_name = module.lambda.data_upload_lambda_name
+  authorizer_lambda_invoke_arn = module.lambda.authorizer_lambda_invoke_arn
+  authorizer_lambda_name = module.lambda.authorizer_lambda_name
+  data_api_authorizer    = var.data_api_authorizer
+  authorizer_cache_ttl   = var.authorizer_cache_ttl
   throttle_burst_limit   = var.api_throttle_burst_limit
   throttle_rate_limit    = var.api_throttle_rate_limit
   enable_logging         = var.enable_api_logging
@@ -4,6 +4,14 @@
 
 locals {
   name_prefix = "${var.study_name}-${var.environment}"
+
+  # Authorizer of the /data methods
+  data_authorization = var.data_api_authorizer == "token" ? "CUSTOM" : "COGNITO_USER_POOLS"
+  data_authorizer_id = (
+    var.data_api_authorizer == "token"
+    ? aws_api_gateway_authorizer.token.id
+    : aws_api_gateway_authorizer.cognito.id
+  )
 }
 
 data "aws_region" "current" {}
@@ -30,7 +38,7 @@ resource "aws_api_gateway_rest_api" "main" {
 }
 
 # ============================================================================
-# Cognito Authorizer
+# Authorizers
 # ============================================================================
 
 resource "aws_api_gateway_authorizer" "cognito" {
@@ -41,6 +49,17 @@ resource "aws_api_gateway_authorizer" "cognito" {
   provider_arns   = [var.user_pool_arn]
 }
 
+# Verifies Cognito tokens against the pool's JWKS without calling Cognito;
+# its Allow covers the whole stage, so one cached decision serves every route
+resource "aws_api_gateway_authorizer" "token" {
+  name                             = "${local.name_prefix}-token-authorizer"
+  type                             = "TOKEN"
+  rest_api_id                      = aws_api_gateway_rest_api.main.id
+  identity_source                  = "method.request.header.Authorization"
+  authorizer_uri                   = var.authorizer_lambda_invoke_arn
+  authorizer_result_ttl_in_seconds = var.authorizer_cache_ttl
+}
+
 # ============================================================================
 # API Resources
 # ============================================================================
@@ -73,6 +92,13 @@ resource "aws_api_gateway_resource" "auth_refresh" {
   path_part   = "refresh"
 }
 
+# /auth/enroll
+resource "aws_api_gateway_resource" "auth_enroll" {
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  parent_id   = aws_api_gateway_resource.auth.id
+  path_part   = "enroll"
+}
+
 # /data
 resource "aws_api_gateway_resource" "data" {
   rest_api_id = aws_api_gateway_rest_api.main.id
@@ -128,6 +154,14 @@ resource "aws_lambda_permission" "data_upload" {
   source_arn    = "${aws_api_gateway_rest_api.main.execution_arn}/*/*/*"
 }
 
+resource "aws_lambda_permission" "authorizer" {
+  statement_id  = "AllowAPIGatewayInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = var.authorizer_lambda_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.main.execution_arn}/authorizers/${aws_api_gateway_authorizer.token.id}"
+}
+
 # ============================================================================
 # Auth Methods (No Authorization Required)
 # ============================================================================
@@ -183,8 +217,27 @@ resource "aws_api_gateway_integration" "auth_refresh" {
   uri                     = var.auth_lambda_arn
 }
 
+# POST /auth/enroll (study admins; always the Cognito authorizer, whose
+# claims carry the cognito:groups the handler checks)
+resource "aws_api_gateway_method" "auth_enroll" {
+  rest_api_id   = aws_api_gateway_rest_api.main.id
+  resource_id   = aws_api_gateway_resource.auth_enroll.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
+resource "aws_api_gateway_integration" "auth_enroll" {
+  rest_api_id             = aws_api_gateway_rest_api.main.id
+  resource_id             = aws_api_gateway_resource.auth_enroll.id
+  http_method             = aws_api_gateway_method.auth_enroll.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.auth_lambda_arn
+}
+
 # ============================================================================
-# Data Methods (Cognito Authorization Required)
+# Data Methods (Authorization Required)
 # ============================================================================
 
 # POST /data/sensor
@@ -192,8 +245,8 @@ resource "aws_api_gateway_method" "data_sensor" {
   rest_api_id   = aws_api_gateway_rest_api.main.id
   resource_id   = aws_api_gateway_resource.data_sensor.id
   http_method   = "POST"
-  authorization = "COGNITO_USER_POOLS"
-  authorizer_id = aws_api_gateway_authorizer.cognito.id
+  authorization = local.data_authorization
+  authorizer_id = local.data_authorizer_id
 }
 
 resource "aws_api_gateway_integration" "data_sensor" {
@@ -210,8 +263,8 @@ resource "aws_api_gateway_method" "data_event" {
   rest_api_id   = aws_api_gateway_rest_api.main.id
   resource_id   = aws_api_gateway_resource.data_event.id
   http_method   = "POST"
-  authorization = "COGNITO_USER_POOLS"
-  authorizer_id = aws_api_gateway_authorizer.cognito.id
+  authorization = local.data_authorization
+  authorizer_id = local.data_authorizer_id
 }
 
 resource "aws_api_gateway_integration" "data_event" {
@@ -228,8 +281,8 @@ resource "aws_api_gateway_method" "data_device_state" {
   rest_api_id   = aws_api_gateway_rest_api.main.id
   resource_id   = aws_api_gateway_resource.data_device_state.id
   http_method   = "POST"
-  authorization = "COGNITO_USER_POOLS"
-  authorizer_id = aws_api_gateway_authorizer.cognito.id
+  authorization = local.data_authorization
+  authorizer_id = local.data_authorizer_id
 }
 
 resource "aws_api_gateway_integration" "data_device_state" {
@@ -246,8 +299,8 @@ resource "aws_api_gateway_method" "data_presigned_url" {
   rest_api_id   = aws_api_gateway_rest_api.main.id
   resource_id   = aws_api_gateway_resource.data_presigned_url.id
   http_method   = "GET"
-  authorization = "COGNITO_USER_POOLS"
-  authorizer_id = aws_api_gateway_authorizer.cognito.id
+  authorization = local.data_authorization
+  authorizer_id = local.data_authorizer_id
 }
 
 resource "aws_api_gateway_integration" "data_presigned_url" {
@@ -259,6 +312,74 @@ resource "aws_api_gateway_integration" "data_presigned_url" {
   uri                     = var.data_upload_lambda_arn
 }
 
+# ============================================================================
+# Data Preflights (CORS)
+# ============================================================================
+
+locals {
+  # Browser clients send Idempotency-Key on upload retries
+  data_cors_methods = {
+    sensor        = { resource_id = aws_api_gateway_resource.data_sensor.id, methods = "POST,OPTIONS" }
+    event         = { resource_id = aws_api_gateway_resource.data_event.id, methods = "POST,OPTIONS" }
+    device_state  = { resource_id = aws_api_gateway_resource.data_device_state.id, methods = "POST,OPTIONS" }
+    presigned_url = { resource_id = aws_api_gateway_resource.data_presigned_url.id, methods = "GET,OPTIONS" }
+  }
+}
+
+resource "aws_api_gateway_method" "data_options" {
+  for_each = local.data_cors_methods
+
+  rest_api_id   = aws_api_gateway_rest_api.main.id
+  resource_id   = each.value.resource_id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "data_options" {
+  for_each = local.data_cors_methods
+
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  resource_id = each.value.resource_id
+  http_method = aws_api_gateway_method.data_options[each.key].http_method
+  type        = "MOCK"
+
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "data_options" {
+  for_each = local.data_cors_methods
+
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  resource_id = each.value.resource_id
+  http_method = aws_api_gateway_method.data_options[each.key].http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "data_options" {
+  for_each = local.data_cors_methods
+
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  resource_id = each.value.resource_id
+  http_method = aws_api_gateway_method.data_options[each.key].http_method
+  status_code = aws_api_gateway_method_response.data_options[each.key].status_code
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,Idempotency-Key'"
+    "method.response.header.Access-Control-Allow-Methods" = "'${each.value.methods}'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_integration.data_options]
+}
+
 # ============================================================================
 # API Deployment
 # ============================================================================
@@ -270,10 +391,12 @@ resource "aws_api_gateway_deployment" "main" {
     aws_api_gateway_integration.auth_register,
     aws_api_gateway_integration.auth_login,
     aws_api_gateway_integration.auth_refresh,
+    aws_api_gateway_integration.auth_enroll,
     aws_api_gateway_integration.data_sensor,
     aws_api_gateway_integration.data_event,
     aws_api_gateway_integration.data_device_state,
     aws_api_gateway_integration.data_presigned_url,
+    aws_api_gateway_integration_response.data_options,
   ]
 
   triggers = {
@@ -281,10 +404,12 @@ resource "aws_api_gateway_deployment" "main" {
       aws_api_gateway_integration.auth_register.id,
       aws_api_gateway_integration.auth_login.id,
       aws_api_gateway_integration.auth_refresh.id,
+      aws_api_gateway_integration.auth_enroll.id,
       aws_api_gateway_integration.data_sensor.id,
       aws_api_gateway_integration.data_event.id,
       aws_api_gateway_integration.data_device_state.id,
       aws_api_gateway_integration.data_presigned_url.id,
+      [for response in aws_api_gateway_integration_response.data_options : response.id],
     ]))
   }
 
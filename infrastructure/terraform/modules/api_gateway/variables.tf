@@ -33,6 +33,32 @@ variable "data_upload_lambda_name" {
   type        = string
 }
 
+variable "authorizer_lambda_invoke_arn" {
+  description = "Token authorizer Lambda invoke ARN"
+  type        = string
+}
+
+variable "authorizer_lambda_name" {
+  description = "Token authorizer Lambda function name"
+  type        = string
+}
+
+variable "data_api_authorizer" {
+  description = "Authorize /data requests with the Cognito authorizer (cognito) or the token authorizer Lambda verifying tokens locally (token)"
+  type        = string
+  default     = "cognito"
+  validation {
+    condition     = contains(["cognito", "token"], var.data_api_authorizer)
+    error_message = "data_api_authorizer must be cognito or token."
+  }
+}
+
+variable "authorizer_cache_ttl" {
+  description = "Seconds API Gateway caches the token authorizer's decision for a token (0 disables)"
+  type        = number
+  default     = 300
+}
+
 variable "throttle_burst_limit" {
   description = "API Gateway throttle burst limit"
   type        = number
@@ -166,6 +166,17 @@ resource "aws_cognito_user_pool_client" "mobile" {
   ]
 }
 
+# ============================================================================
+# Groups
+# ============================================================================
+
+# Study staff allowed to bulk-enroll participants (POST /auth/enroll)
+resource "aws_cognito_user_group" "admins" {
+  name         = "admins"
+  description  = "Study administrators"
+  user_pool_id = aws_cognito_user_pool.main.id
+}
+
 # ============================================================================
 # User Pool Domain
 # ============================================================================
@@ -28,6 +28,11 @@ output "user_pool_domain" {
   value       = "https://${aws_cognito_user_pool_domain.main.domain}.auth.${data.aws_region.current.name}.amazoncognito.com"
 }
 
+output "admins_group_name" {
+  description = "Cognito group allowed to bulk-enroll participants"
+  value       = aws_cognito_user_group.admins.name
+}
+
 output "authenticated_role_arn" {
   description = "IAM Role ARN for authenticated users"
   value       = aws_iam_role.cognito_authenticated.arn
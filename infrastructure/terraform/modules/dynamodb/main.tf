@@ -232,3 +232,100 @@ resource "aws_dynamodb_table" "device_state" {
     }
   )
 }
+
+# ============================================================================
+# UploadBatches Table
+# ============================================================================
+
+resource "aws_dynamodb_table" "upload_batches" {
+  name         = "${local.table_prefix}-UploadBatches"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "batchKey"
+
+  attribute {
+    name = "batchKey"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expirationTime"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = var.enable_encryption
+  }
+
+  tags = merge(
+    var.tags,
+    {
+      Name    = "${local.table_prefix}-UploadBatches"
+      Purpose = "Upload idempotency"
+    }
+  )
+}
+
+# ============================================================================
+# SensorSummary Table
+# ============================================================================
+
+resource "aws_dynamodb_table" "sensor_summary" {
+  name         = "${local.table_prefix}-SensorSummary"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "userIdSensorType"
+  range_key    = "timestamp"
+
+  attribute {
+    name = "userIdSensorType"
+    type = "S"
+  }
+
+  attribute {
+    name = "timestamp"
+    type = "N"
+  }
+
+  ttl {
+    attribute_name = "expirationTime"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = var.enable_encryption
+  }
+
+  tags = merge(
+    var.tags,
+    {
+      Name    = "${local.table_prefix}-SensorSummary"
+      Purpose = "Per-minute sensor summaries"
+    }
+  )
+}
+
+# ============================================================================
+# LatestDeviceState Table
+# ============================================================================
+
+resource "aws_dynamodb_table" "latest_device_state" {
+  name         = "${local.table_prefix}-LatestDeviceState"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "userId"
+
+  attribute {
+    name = "userId"
+    type = "S"
+  }
+
+  server_side_encryption {
+    enabled = var.enable_encryption
+  }
+
+  tags = merge(
+    var.tags,
+    {
+      Name    = "${local.table_prefix}-LatestDeviceState"
+      Purpose = "Latest device state"
+    }
+  )
+}
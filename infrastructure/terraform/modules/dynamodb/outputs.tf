@@ -37,3 +37,33 @@ output "device_state_table_arn" {
   description = "DeviceState table ARN"
   value       = aws_dynamodb_table.device_state.arn
 }
+
+output "upload_batches_table_name" {
+  description = "UploadBatches table name"
+  value       = aws_dynamodb_table.upload_batches.name
+}
+
+output "upload_batches_table_arn" {
+  description = "UploadBatches table ARN"
+  value       = aws_dynamodb_table.upload_batches.arn
+}
+
+output "sensor_summary_table_name" {
+  description = "SensorSummary table name"
+  value       = aws_dynamodb_table.sensor_summary.name
+}
+
+output "sensor_summary_table_arn" {
+  description = "SensorSummary table ARN"
+  value       = aws_dynamodb_table.sensor_summary.arn
+}
+
+output "latest_device_state_table_name" {
+  description = "LatestDeviceState table name"
+  value       = aws_dynamodb_table.latest_device_state.name
+}
+
+output "latest_device_state_table_arn" {
+  description = "LatestDeviceState table ARN"
+  value       = aws_dynamodb_table.latest_device_state.arn
+}
@@ -60,6 +60,27 @@ resource "aws_iam_role_policy" "auth_lambda_cognito" {
   })
 }
 
+# Bulk enrollment pre-creates participants' status rows
+resource "aws_iam_role_policy" "auth_lambda_dynamodb" {
+  name = "DynamoDBAccess"
+  role = aws_iam_role.auth_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:UpdateItem"
+        ]
+        Resource = var.participant_table_arn
+      }
+    ]
+  })
+}
+
 # ============================================================================
 # Auth Lambda Function
 # ============================================================================
@@ -77,9 +98,11 @@ resource "aws_lambda_function" "auth" {
 
   environment {
     variables = {
-      USER_POOL_ID        = var.user_pool_id
-      CLIENT_ID           = var.user_pool_client_id
-      ENVIRONMENT         = var.environment
+      USER_POOL_ID           = var.user_pool_id
+      CLIENT_ID              = var.user_pool_client_id
+      ENVIRONMENT            = var.environment
+      PARTICIPANT_TABLE_NAME = var.participant_table_name
+      ENROLL_ADMIN_GROUP     = var.enroll_admin_group
     }
   }
 
@@ -106,6 +129,81 @@ resource "aws_cloudwatch_log_group" "auth_lambda" {
   tags = var.tags
 }
 
+# ============================================================================
+# Token Authorizer Lambda Function
+# ============================================================================
+
+# Verifies Cognito tokens against the pool's JWKS; only needs its logs
+resource "aws_iam_role" "authorizer_lambda" {
+  name = "${local.name_prefix}-authorizer-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+        Action = "sts:AssumeRole"
+      }
+    ]
+  })
+
+  managed_policy_arns = [
+    "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
+  ]
+
+  tags = merge(
+    var.tags,
+    {
+      Name = "${local.name_prefix}-authorizer-lambda-role"
+    }
+  )
+}
+
+resource "aws_lambda_function" "authorizer" {
+  function_name = "${local.name_prefix}-authorizer"
+  role          = aws_iam_role.authorizer_lambda.arn
+  runtime       = var.lambda_runtime
+  handler       = "authorizer_handler.lambda_handler"
+  timeout       = 10
+  memory_size   = var.auth_lambda_memory
+
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  environment {
+    variables = {
+      USER_POOL_ID = var.user_pool_id
+      CLIENT_ID    = var.user_pool_client_id
+      ENVIRONMENT  = var.environment
+    }
+  }
+
+  tags = merge(
+    var.tags,
+    {
+      Name = "${local.name_prefix}-authorizer"
+    }
+  )
+
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+resource "aws_cloudwatch_log_group" "authorizer_lambda" {
+  name              = "/aws/lambda/${aws_lambda_function.authorizer.function_name}"
+  retention_in_days = var.lambda_log_retention
+
+  tags = var.tags
+}
+
 # ============================================================================
 # Data Upload Lambda Execution Role
 # ============================================================================
@@ -157,7 +255,21 @@ resource "aws_iam_role_policy" "data_upload_lambda_dynamodb" {
           var.sensor_table_arn,
           var.event_table_arn,
           var.device_state_table_arn,
-          var.participant_table_arn
+          var.participant_table_arn,
+          var.sensor_summary_table_arn,
+          var.latest_device_state_table_arn
+        ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:GetItem",
+          "dynamodb:DeleteItem"
+        ]
+        Resource = [
+          var.upload_batches_table_arn
         ]
       }
     ]
@@ -179,6 +291,13 @@ resource "aws_iam_role_policy" "data_upload_lambda_s3" {
         ]
         Resource = "${var.data_bucket_arn}/*"
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:DeleteObject"
+        ]
+        Resource = "${var.data_bucket_arn}/temp/spill/*"
+      },
       {
         Effect = "Allow"
         Action = [
@@ -207,12 +326,21 @@ resource "aws_lambda_function" "data_upload" {
 
   environment {
     variables = {
-      SENSOR_TABLE_NAME       = var.sensor_table_name
-      EVENT_TABLE_NAME        = var.event_table_name
-      DEVICE_STATE_TABLE_NAME = var.device_state_table_name
-      PARTICIPANT_TABLE_NAME  = var.participant_table_name
-      DATA_BUCKET_NAME        = var.data_bucket_name
-      ENVIRONMENT             = var.environment
+      SENSOR_TABLE_NAME              = var.sensor_table_name
+      EVENT_TABLE_NAME               = var.event_table_name
+      DEVICE_STATE_TABLE_NAME        = var.device_state_table_name
+      PARTICIPANT_TABLE_NAME         = var.participant_table_name
+      UPLOAD_BATCH_TABLE_NAME        = var.upload_batches_table_name
+      SENSOR_SUMMARY_TABLE_NAME      = var.sensor_summary_table_name
+      LATEST_DEVICE_STATE_TABLE_NAME = var.latest_device_state_table_name
+      SENSOR_WRITE_SHARDS            = var.sensor_write_shards
+      SPILL_THROTTLED_BATCHES        = tostring(var.spill_throttled_batches)
+      SENSOR_INGEST_MODE             = var.sensor_ingest_mode
+      PROFILE_SAMPLE_RATE            = var.profile_sample_rate
+      USER_POOL_ID                   = var.user_pool_id
+      CLIENT_ID                      = var.user_pool_client_id
+      DATA_BUCKET_NAME               = var.data_bucket_name
+      ENVIRONMENT                    = var.environment
     }
   }
 
@@ -238,3 +366,80 @@ resource "aws_cloudwatch_log_group" "data_upload_lambda" {
 
   tags = var.tags
 }
+
+# ============================================================================
+# Spill Drain Lambda Function
+# ============================================================================
+
+# Writes sensor batches spilled to temp/spill/sensor/ at a fixed rate. One
+# concurrent drain keeps the rate and per-minute summaries exact.
+resource "aws_lambda_function" "spill_drain" {
+  function_name                  = "${local.name_prefix}-spill-drain"
+  role                           = aws_iam_role.data_upload_lambda.arn
+  runtime                        = var.lambda_runtime
+  handler                        = "data_upload_handler.drain_handler"
+  timeout                        = 300
+  memory_size                    = var.data_upload_lambda_memory
+  reserved_concurrent_executions = 1
+
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  environment {
+    variables = {
+      SENSOR_TABLE_NAME         = var.sensor_table_name
+      EVENT_TABLE_NAME          = var.event_table_name
+      DEVICE_STATE_TABLE_NAME   = var.device_state_table_name
+      PARTICIPANT_TABLE_NAME    = var.participant_table_name
+      SENSOR_SUMMARY_TABLE_NAME = var.sensor_summary_table_name
+      SENSOR_WRITE_SHARDS       = var.sensor_write_shards
+      DRAIN_ITEMS_PER_SECOND    = var.drain_items_per_second
+      DATA_BUCKET_NAME          = var.data_bucket_name
+      ENVIRONMENT               = var.environment
+    }
+  }
+
+  tags = merge(
+    var.tags,
+    {
+      Name = "${local.name_prefix}-spill-drain"
+    }
+  )
+
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+resource "aws_cloudwatch_log_group" "spill_drain_lambda" {
+  name              = "/aws/lambda/${aws_lambda_function.spill_drain.function_name}"
+  retention_in_days = var.lambda_log_retention
+
+  tags = var.tags
+}
+
+resource "aws_cloudwatch_event_rule" "spill_drain" {
+  name                = "${local.name_prefix}-spill-drain"
+  description         = "Drain spilled sensor batches into DynamoDB"
+  schedule_expression = "rate(1 minute)"
+
+  tags = var.tags
+}
+
+resource "aws_cloudwatch_event_target" "spill_drain" {
+  rule      = aws_cloudwatch_event_rule.spill_drain.name
+  target_id = "SpillDrain"
+  arn       = aws_lambda_function.spill_drain.arn
+}
+
+resource "aws_lambda_permission" "spill_drain_schedule" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.spill_drain.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.spill_drain.arn
+}
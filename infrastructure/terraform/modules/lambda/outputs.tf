@@ -13,6 +13,16 @@ output "auth_lambda_invoke_arn" {
   value       = aws_lambda_function.auth.invoke_arn
 }
 
+output "authorizer_lambda_name" {
+  description = "Token authorizer Lambda function name"
+  value       = aws_lambda_function.authorizer.function_name
+}
+
+output "authorizer_lambda_invoke_arn" {
+  description = "Token authorizer Lambda invoke ARN"
+  value       = aws_lambda_function.authorizer.invoke_arn
+}
+
 output "data_upload_lambda_name" {
   description = "Data Upload Lambda function name"
   value       = aws_lambda_function.data_upload.function_name
@@ -23,6 +33,11 @@ output "data_upload_lambda_arn" {
   value       = aws_lambda_function.data_upload.arn
 }
 
+output "spill_drain_lambda_name" {
+  description = "Spill drain Lambda function name"
+  value       = aws_lambda_function.spill_drain.function_name
+}
+
 output "data_upload_lambda_invoke_arn" {
   description = "Data Upload Lambda invoke ARN"
   value       = aws_lambda_function.data_upload.invoke_arn
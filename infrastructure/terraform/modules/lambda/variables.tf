@@ -26,6 +26,44 @@ variable "data_upload_lambda_memory" {
   default     = 512
 }
 
+variable "sensor_write_shards" {
+  description = "Partition keys each participant-sensor stream is spread over (1 disables sharding)"
+  type        = number
+  default     = 1
+}
+
+variable "spill_throttled_batches" {
+  description = "Accept throttled sensor batches into S3 (temp/spill/) instead of answering 429"
+  type        = bool
+  default     = false
+}
+
+variable "sensor_ingest_mode" {
+  description = "Write sensor batches during the request (sync) or spill them to S3 for the drain (async)"
+  type        = string
+  default     = "sync"
+  validation {
+    condition     = contains(["sync", "async"], var.sensor_ingest_mode)
+    error_message = "sensor_ingest_mode must be sync or async."
+  }
+}
+
+variable "drain_items_per_second" {
+  description = "Sensor readings per second the spill drain writes to DynamoDB"
+  type        = number
+  default     = 500
+}
+
+variable "profile_sample_rate" {
+  description = "Share of upload invocations profiled to temp/debug/profiles/ for `osrp profiles` (0 disables)"
+  type        = number
+  default     = 0
+  validation {
+    condition     = var.profile_sample_rate >= 0 && var.profile_sample_rate <= 1
+    error_message = "profile_sample_rate must be between 0 and 1."
+  }
+}
+
 variable "lambda_timeout" {
   description = "Lambda timeout (seconds)"
   type        = number
@@ -54,6 +92,12 @@ variable "user_pool_arn" {
   type        = string
 }
 
+variable "enroll_admin_group" {
+  description = "Cognito group allowed to bulk-enroll participants"
+  type        = string
+  default     = "admins"
+}
+
 # DynamoDB variables
 variable "sensor_table_name" {
   description = "Sensor time series table name"
@@ -95,6 +139,36 @@ variable "participant_table_arn" {
   type        = string
 }
 
+variable "upload_batches_table_name" {
+  description = "Upload batch idempotency table name"
+  type        = string
+}
+
+variable "upload_batches_table_arn" {
+  description = "Upload batch idempotency table ARN"
+  type        = string
+}
+
+variable "sensor_summary_table_name" {
+  description = "Per-minute sensor summary table name"
+  type        = string
+}
+
+variable "sensor_summary_table_arn" {
+  description = "Per-minute sensor summary table ARN"
+  type        = string
+}
+
+variable "latest_device_state_table_name" {
+  description = "Latest device state table name"
+  type        = string
+}
+
+variable "latest_device_state_table_arn" {
+  description = "Latest device state table ARN"
+  type        = string
+}
+
 # S3 variables
 variable "data_bucket_name" {
   description = "Data bucket name"
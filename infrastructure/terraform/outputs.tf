@@ -89,6 +89,16 @@ output "data_upload_lambda_function_name" {
   value       = module.lambda.data_upload_lambda_name
 }
 
+output "spill_drain_lambda_function_name" {
+  description = "Spill drain Lambda function name"
+  value       = module.lambda.spill_drain_lambda_name
+}
+
+output "authorizer_lambda_function_name" {
+  description = "Token authorizer Lambda function name"
+  value       = module.lambda.authorizer_lambda_name
+}
+
 # ============================================================================
 # Next Steps Output
 # ============================================================================
@@ -101,6 +111,8 @@ output "next_steps" {
     1. Deploy Lambda code:
        aws lambda update-function-code --function-name ${module.lambda.auth_lambda_name} --zip-file fileb://auth_handler.zip
        aws lambda update-function-code --function-name ${module.lambda.data_upload_lambda_name} --zip-file fileb://data_upload_handler.zip
+       aws lambda update-function-code --function-name ${module.lambda.spill_drain_lambda_name} --zip-file fileb://data_upload_handler.zip
+       aws lambda update-function-code --function-name ${module.lambda.authorizer_lambda_name} --zip-file fileb://authorizer_handler.zip
 
     2. Test API endpoint:
        curl -X POST ${module.api_gateway.api_endpoint}/auth/register \
@@ -115,6 +115,64 @@ variable "data_upload_lambda_memory" {
   default     = 512
 }
 
+variable "sensor_write_shards" {
+  description = "Partition keys each participant-sensor stream is spread over (1 disables sharding)"
+  type        = number
+  default     = 1
+}
+
+variable "spill_throttled_batches" {
+  description = "Accept throttled sensor batches into S3 (temp/spill/) instead of answering 429"
+  type        = bool
+  default     = false
+}
+
+variable "sensor_ingest_mode" {
+  description = "Write sensor batches during the request (sync) or spill them to S3 for the drain (async)"
+  type        = string
+  default     = "sync"
+  validation {
+    condition     = contains(["sync", "async"], var.sensor_ingest_mode)
+    error_message = "sensor_ingest_mode must be sync or async."
+  }
+}
+
+variable "drain_items_per_second" {
+  description = "Sensor readings per second the spill drain writes to DynamoDB"
+  type        = number
+  default     = 500
+}
+
+variable "profile_sample_rate" {
+  description = "Share of upload invocations profiled to temp/debug/profiles/ for `osrp profiles` (0 disables)"
+  type        = number
+  default     = 0
+  validation {
+    condition     = var.profile_sample_rate >= 0 && var.profile_sample_rate <= 1
+    error_message = "profile_sample_rate must be between 0 and 1."
+  }
+}
+
+variable "data_api_authorizer" {
+  description = "Authorize /data requests with the Cognito authorizer (cognito) or the token authorizer Lambda verifying tokens locally (token)"
+  type        = string
+  default     = "cognito"
+  validation {
+    condition     = contains(["cognito", "token"], var.data_api_authorizer)
+    error_message = "data_api_authorizer must be cognito or token."
+  }
+}
+
+variable "authorizer_cache_ttl" {
+  description = "Seconds API Gateway caches the token authorizer's decision for a token (0 disables)"
+  type        = number
+  default     = 300
+  validation {
+    condition     = var.authorizer_cache_ttl >= 0 && var.authorizer_cache_ttl <= 3600
+    error_message = "authorizer_cache_ttl must be between 0 and 3600."
+  }
+}
+
 variable "lambda_timeout" {
   description = "Lambda function timeout (seconds)"
   type        = number
@@ -9,9 +9,17 @@ __email__ = "contact@osrp.io"
 
 # Import main classes for convenience
 from .analysis.utils.data_access import OSRPData, DataAggregator
+from .analysis.utils.async_data_access import AsyncOSRPData
+from .analysis.utils.query_cache import QueryCache
+from .analysis.utils.parquet_backend import ParquetBackend
+from .analysis.utils.arrow_cache import ArrowSessionCache
 
 __all__ = [
     "OSRPData",
     "DataAggregator",
+    "AsyncOSRPData",
+    "QueryCache",
+    "ParquetBackend",
+    "ArrowSessionCache",
     "__version__",
 ]
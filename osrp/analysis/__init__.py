@@ -3,6 +3,39 @@ OSRP Analysis Module
 Data access and aggregation utilities for OSRP
 """
 
-from osrp.analysis.utils.data_access import OSRPData, DataAggregator
+from osrp.analysis.utils.data_access import (
+    OSRPData,
+    DataAggregator,
+    StorageBackend,
+    DynamoDBBackend,
+)
+from osrp.analysis.utils.async_data_access import AsyncOSRPData
+from osrp.analysis.utils.query_cache import QueryCache
+from osrp.analysis.utils.features import ContextFeatureEngine, window_features
+from osrp.analysis.utils.export import StudyExporter
+from osrp.analysis.utils.parquet_backend import ParquetBackend
+from osrp.analysis.utils.arrow_cache import ArrowSessionCache
+from osrp.analysis.utils.timeseries import TimeSeries, window_edges
+from osrp.analysis.utils.rollups import RollupStore
+from osrp.analysis.utils.plotting import ResampledFigure, decimate
+from osrp.analysis.utils.synthetic import SyntheticCohort
 
-__all__ = ["OSRPData", "DataAggregator"]
+__all__ = [
+    "OSRPData",
+    "DataAggregator",
+    "AsyncOSRPData",
+    "QueryCache",
+    "ContextFeatureEngine",
+    "window_features",
+    "StudyExporter",
+    "StorageBackend",
+    "DynamoDBBackend",
+    "ParquetBackend",
+    "ArrowSessionCache",
+    "TimeSeries",
+    "window_edges",
+    "RollupStore",
+    "ResampledFigure",
+    "decimate",
+    "SyntheticCohort",
+]
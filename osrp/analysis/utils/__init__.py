@@ -3,6 +3,34 @@ OSRP Analysis Utilities
 Core data access and aggregation classes
 """
 
-from .data_access import OSRPData, DataAggregator
+from .data_access import OSRPData, DataAggregator, StorageBackend, DynamoDBBackend
+from .async_data_access import AsyncOSRPData
+from .query_cache import QueryCache
+from .features import ContextFeatureEngine, window_features
+from .export import StudyExporter
+from .parquet_backend import ParquetBackend
+from .arrow_cache import ArrowSessionCache
+from .timeseries import TimeSeries, window_edges
+from .rollups import RollupStore
+from .plotting import ResampledFigure, decimate
+from .synthetic import SyntheticCohort
 
-__all__ = ["OSRPData", "DataAggregator"]
+__all__ = [
+    "OSRPData",
+    "DataAggregator",
+    "AsyncOSRPData",
+    "QueryCache",
+    "ContextFeatureEngine",
+    "window_features",
+    "StudyExporter",
+    "StorageBackend",
+    "DynamoDBBackend",
+    "ParquetBackend",
+    "ArrowSessionCache",
+    "TimeSeries",
+    "window_edges",
+    "RollupStore",
+    "ResampledFigure",
+    "decimate",
+    "SyntheticCohort",
+]
@@ -0,0 +1,179 @@
+"""
+OSRP Arrow Session Cache
+Materializes loaded streams as memory-mapped Arrow IPC files so notebook
+sessions share one physical copy of the data
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from .export import JSON_COLUMNS_KEY, frame_to_table
+from .parquet_backend import _decode_json
+from .query_cache import DEFAULT_INGESTION_LAG
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), 'osrp-arrow-cache')
+
+
+class ArrowSessionCache:
+    """
+    Cache of query results stored as Arrow IPC files and read back by mmap
+
+    Every frame is written once to `{directory}/{digest}.arrow` and returned
+    as pandas views over the memory-mapped file, so numeric, timestamp and
+    string columns are not copied onto the Python heap. Re-running a cell,
+    or opening another notebook on the same cohort with a cache on the same
+    directory, maps the same file again and the operating system keeps a
+    single copy of it in the page cache.
+
+    Returned frames are read-only views: adding columns works as usual, but
+    call `.copy()` before modifying values in place. Nested maps and lists
+    are decoded from JSON on every read and are not shared.
+
+    Ranges ending within `ingestion_lag` seconds of now still receive data,
+    so OSRPData reads them from the source every time (see `settled`).
+
+    Example:
+        cache = ArrowSessionCache()
+        data = OSRPData(region='us-west-2', session_cache=cache)
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_age: Optional[float] = None,
+        ingestion_lag: float = DEFAULT_INGESTION_LAG,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            directory: Directory for the cache files; defaults to a shared
+                directory under the system temp dir
+            max_age: Optional age in seconds after which a file is read from
+                the source again, e.g. for late uploads to settled ranges
+            ingestion_lag: Seconds before now after which data may still
+                arrive; ranges ending later are not cached
+            clock: Current Unix time in seconds
+        """
+        if pa is None:
+            raise ImportError("ArrowSessionCache requires pyarrow: pip install 'osrp[parquet]'")
+
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.max_age = max_age
+        self.ingestion_lag = ingestion_lag
+        self.clock = clock
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Tables mapped by this process, with the mtime of the mapped file
+        self._tables: Dict[str, Tuple[float, Any]] = {}
+
+        # Lookups served from a cache file vs. needing a read from the source
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: Hashable) -> str:
+        """Cache file holding the frame for a key"""
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()[:40]
+        return os.path.join(self.directory, f'{digest}.arrow')
+
+    def settled(self, end: int) -> bool:
+        """Whether a range ending at `end` (milliseconds) is old enough to cache"""
+        return end <= (self.clock() - self.ingestion_lag) * 1000
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """
+        Return the cached frame for a key
+
+        Args:
+            key: Cache key, typically (source, partition value, start, end, columns)
+
+        Returns:
+            DataFrame viewing the mapped file, or None if not cached (or expired)
+        """
+        path = self.path(key)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        if self.max_age is not None and time.time() - mtime > self.max_age:
+            self._tables.pop(path, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return self._to_frame(self._map(path, mtime))
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Store a frame and return it as a view over the mapped file
+
+        The file is written under a temporary name and renamed into place,
+        so concurrent sessions never map a partially written file.
+
+        Args:
+            key: Cache key
+            df: Frame with datetime index, as returned by a StorageBackend
+
+        Returns:
+            Equal DataFrame backed by the cache file
+        """
+        path = self.path(key)
+        table = pa.table({}) if df.empty and len(df.columns) == 0 else frame_to_table(df)
+
+        partial = f'{path}.{uuid.uuid4().hex}.partial'
+        try:
+            with pa.OSFile(partial, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+        return self._to_frame(self._map(path, os.stat(path).st_mtime))
+
+    def clear(self) -> None:
+        """Remove every cache file in the directory"""
+        self._tables.clear()
+        for name in os.listdir(self.directory):
+            if name.endswith('.arrow'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _map(self, path: str, mtime: float) -> Any:
+        """Memory-map a cache file, reusing this process's mapping when current"""
+        mapped = self._tables.get(path)
+        if mapped is None or mapped[0] != mtime:
+            # Buffers keep the mapping alive for as long as frames reference them
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+            mapped = self._tables[path] = (mtime, table)
+        return mapped[1]
+
+    @staticmethod
+    def _to_frame(table: Any) -> pd.DataFrame:
+        """Zero-copy pandas view of a cached table"""
+        if table.num_columns == 0:
+            return pd.DataFrame()
+
+        df = table.to_pandas(split_blocks=True).set_index('timestamp')
+
+        json_columns = json.loads((table.schema.metadata or {}).get(JSON_COLUMNS_KEY, b'[]'))
+        for column in json_columns:
+            df[column] = df[column].map(_decode_json)
+
+        return df
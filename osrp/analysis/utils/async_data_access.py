@@ -0,0 +1,426 @@
+"""
+OSRP Async Data Access Layer
+Awaitable counterpart of OSRPData built on aiobotocore, so a single event
+loop (e.g. a Marimo notebook) can drive many DynamoDB and S3 requests at once
+"""
+
+import asyncio
+import io
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from PIL import Image
+
+from .data_access import (
+    EMA_ATTRIBUTES,
+    SENSOR_ATTRIBUTES,
+    WEARABLE_ATTRIBUTES,
+    _items_to_frame,
+    _projection,
+    _range_query,
+    _shard_keys,
+    _to_millis,
+    _with_columns,
+    _with_projection,
+)
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+except ImportError:  # pragma: no cover - optional dependency
+    AioConfig = None
+    get_session = None
+
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class AsyncOSRPData:
+    """
+    Asynchronous data access layer for OSRP
+
+    Mirrors the OSRPData getters as coroutines. Clients are created lazily on
+    first use and share a bounded connection pool; a semaphore caps the
+    number of queries in flight so hundreds of concurrent calls queue
+    instead of exhausting sockets.
+
+    Example:
+        data = AsyncOSRPData(region='us-west-2')
+        frames = await asyncio.gather(*[
+            data.get_sensor_data(uid, 'accelerometer', start, end)
+            for uid in participants
+        ])
+        await data.close()
+    """
+
+    def __init__(
+        self,
+        region: str = 'us-west-2',
+        sensor_table: str = 'SensorTimeSeries',
+        events_table: str = 'EventLog',
+        screenshots_table: str = 'ScreenshotMetadata',
+        ema_table: str = 'EMAResponse',
+        wearable_table: str = 'WearableData',
+        data_bucket: str = None,
+        endpoint_url: Optional[str] = None,
+        max_pool_connections: int = 50,
+        max_concurrency: int = 200,
+        sensor_shards: int = 1
+    ):
+        """
+        Args:
+            region: AWS region
+            sensor_table: Sensor time series table name
+            events_table: Event log table name
+            screenshots_table: Screenshot metadata table name
+            ema_table: EMA response table name
+            wearable_table: Wearable data table name
+            data_bucket: S3 bucket holding raw and processed data
+            endpoint_url: Optional endpoint override for local DynamoDB/S3
+                stand-ins (e.g. DynamoDB Local or moto server)
+            max_pool_connections: HTTP connection pool size per client
+            max_concurrency: Maximum number of requests in flight
+            sensor_shards: Write shard count of the sensor table; sensor
+                reads then query every shard concurrently
+        """
+        if get_session is None:
+            raise ImportError(
+                "AsyncOSRPData requires aiobotocore: pip install 'osrp[async]'"
+            )
+
+        self.region = region
+        self.endpoint_url = endpoint_url
+
+        # Table names
+        self.sensor_table = sensor_table
+        self.events_table = events_table
+        self.screenshots_table = screenshots_table
+        self.ema_table = ema_table
+        self.wearable_table = wearable_table
+        self.data_bucket = data_bucket
+        self.sensor_shards = sensor_shards
+
+        self._session = get_session()
+        self._config = AioConfig(max_pool_connections=max_pool_connections)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._clients: Dict[str, Any] = {}
+        self._client_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> 'AsyncOSRPData':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the underlying clients and release pooled connections"""
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            self._clients = {}
+
+    async def get_sensor_data(
+        self,
+        user_id: str,
+        sensor_type: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve sensor time series data
+
+        Args:
+            user_id: Participant ID
+            sensor_type: Type of sensor (accelerometer, gyroscope, location, etc.)
+            start_time: Start timestamp
+            end_time: End timestamp
+            columns: Optional columns to fetch (e.g. ['x', 'y', 'z'])
+
+        Returns:
+            DataFrame with sensor readings and datetime index
+        """
+        partition_values = _shard_keys(f"{user_id}#{sensor_type}", self.sensor_shards)
+        projection = _projection(columns, 'timestamp', 'data', SENSOR_ATTRIBUTES)
+        shards = await asyncio.gather(*[
+            self._query_range(
+                self.sensor_table, 'userIdSensorType', partition_value,
+                'timestamp', start_time, end_time, projection=projection
+            )
+            for partition_value in partition_values
+        ])
+
+        df = _items_to_frame(
+            [item for items in shards for item in items], expand='data', columns=columns
+        )
+        if len(partition_values) > 1:
+            df = df[~df.index.duplicated(keep='last')]
+        return df
+
+    async def get_screenshots(
+        self,
+        user_id: str,
+        start_time: datetime,
+        end_time: datetime,
+        load_images: bool = False,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve screenshot metadata (and optionally images)
+
+        Args:
+            user_id: Participant ID
+            start_time: Start timestamp
+            end_time: End timestamp
+            load_images: If True, download actual images from S3 concurrently
+            columns: Optional metadata columns to fetch (e.g. ['appName'])
+
+        Returns:
+            DataFrame with screenshot metadata and optional image data
+        """
+        fetch = _with_columns(columns, 's3Bucket', 's3Key') if load_images else columns
+
+        items = await self._query_range(
+            self.screenshots_table, 'userId', user_id,
+            'timestamp', start_time, end_time,
+            projection=_projection(fetch, 'timestamp')
+        )
+
+        df = _items_to_frame(items, columns=fetch)
+
+        if not df.empty and load_images:
+            df['image'] = await asyncio.gather(*[
+                self._load_image(bucket, key)
+                for bucket, key in zip(df['s3Bucket'], df['s3Key'])
+            ])
+            if columns is not None:
+                df = df[list(columns) + ['image']]
+
+        return df
+
+    async def get_events(
+        self,
+        user_id: str,
+        start_time: datetime,
+        end_time: datetime,
+        event_type: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve event log data
+
+        Args:
+            user_id: Participant ID
+            start_time: Start timestamp
+            end_time: End timestamp
+            event_type: Optional filter for specific event type
+            columns: Optional columns to fetch (e.g. ['eventType', 'eventData'])
+
+        Returns:
+            DataFrame with events
+        """
+        fetch = _with_columns(columns, 'eventType') if event_type else columns
+
+        items = await self._query_range(
+            self.events_table, 'userId', user_id,
+            'timestampEventType', start_time, end_time,
+            projection=_projection(fetch, 'timestampEventType')
+        )
+
+        df = _items_to_frame(items, sort_key='timestampEventType', columns=fetch)
+
+        if not df.empty and event_type:
+            df = df[df['eventType'] == event_type]
+            if columns is not None:
+                df = df[list(columns)]
+
+        return df
+
+    async def get_wearable_data(
+        self,
+        user_id: str,
+        source: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve wearable device data
+
+        Args:
+            user_id: Participant ID
+            source: Data source (googlefit, polar_h10, fitbit, etc.)
+            start_time: Start timestamp
+            end_time: End timestamp
+            columns: Optional columns to fetch (e.g. ['heartRate'])
+
+        Returns:
+            DataFrame with wearable data
+        """
+        items = await self._query_range(
+            self.wearable_table, 'userIdSource', f"{user_id}#{source}",
+            'timestamp', start_time, end_time,
+            projection=_projection(columns, 'timestamp', 'values', WEARABLE_ATTRIBUTES)
+        )
+
+        return _items_to_frame(items, expand='values', columns=columns)
+
+    async def get_ema_responses(
+        self,
+        user_id: str,
+        start_time: datetime,
+        end_time: datetime,
+        survey_id: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve EMA survey responses
+
+        Args:
+            user_id: Participant ID
+            start_time: Start timestamp
+            end_time: End timestamp
+            survey_id: Optional filter for specific survey
+            columns: Optional columns to fetch (e.g. ['mood', 'stress'])
+
+        Returns:
+            DataFrame with survey responses
+        """
+        fetch = _with_columns(columns, 'surveyId') if survey_id else columns
+
+        items = await self._query_range(
+            self.ema_table, 'userId', user_id,
+            'timestampSurveyId', start_time, end_time,
+            projection=_projection(fetch, 'timestampSurveyId', 'responses', EMA_ATTRIBUTES)
+        )
+
+        df = _items_to_frame(
+            items, sort_key='timestampSurveyId', expand='responses', columns=fetch
+        )
+
+        if not df.empty and survey_id:
+            df = df[df['surveyId'] == survey_id]
+            if columns is not None:
+                df = df[list(columns)]
+
+        return df
+
+    async def get_daily_summary(
+        self,
+        user_id: str,
+        date: datetime
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Get comprehensive daily summary for a participant
+
+        All data types for the day are fetched concurrently.
+
+        Args:
+            user_id: Participant ID
+            date: Date to retrieve (any time on that day)
+
+        Returns:
+            Dictionary with DataFrames for each data type
+        """
+        start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = start + timedelta(days=1)
+
+        requests = {
+            'screenshots': self.get_screenshots(user_id, start, end),
+            'accelerometer': self.get_sensor_data(user_id, 'accelerometer', start, end),
+            'gyroscope': self.get_sensor_data(user_id, 'gyroscope', start, end),
+            'location': self.get_sensor_data(user_id, 'location', start, end),
+            'activity': self.get_sensor_data(user_id, 'activity', start, end),
+            'events': self.get_events(user_id, start, end),
+            'heart_rate': self.get_wearable_data(user_id, 'polar_h10', start, end),
+            'steps': self.get_wearable_data(user_id, 'googlefit', start, end),
+            'ema_responses': self.get_ema_responses(user_id, start, end)
+        }
+
+        frames = await asyncio.gather(*requests.values())
+
+        return dict(zip(requests.keys(), frames))
+
+    async def _client(self, service: str) -> Any:
+        """Return the shared client for a service, creating it on first use"""
+        async with self._client_lock:
+            if service not in self._clients:
+                if self._exit_stack is None:
+                    self._exit_stack = AsyncExitStack()
+                self._clients[service] = await self._exit_stack.enter_async_context(
+                    self._session.create_client(
+                        service,
+                        region_name=self.region,
+                        endpoint_url=self.endpoint_url,
+                        config=self._config
+                    )
+                )
+            return self._clients[service]
+
+    async def _query_range(
+        self,
+        table_name: str,
+        partition_key: str,
+        partition_value: str,
+        sort_key: str,
+        start_time: datetime,
+        end_time: datetime,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch every item of one partition within a time range"""
+        return await self._query(
+            table_name,
+            _range_query(
+                partition_key, partition_value, sort_key,
+                _to_millis(start_time), _to_millis(end_time)
+            ),
+            projection
+        )
+
+    async def _query(
+        self,
+        table_name: str,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a DynamoDB query, following pagination to collect every item"""
+        client = await self._client('dynamodb')
+
+        kwargs = dict(_with_projection(query, projection), TableName=table_name)
+        kwargs['ExpressionAttributeValues'] = {
+            name: _serializer.serialize(value)
+            for name, value in query['ExpressionAttributeValues'].items()
+        }
+
+        items = []
+        async with self._semaphore:
+            while True:
+                response = await client.query(**kwargs)
+                items.extend(
+                    {key: _deserializer.deserialize(value) for key, value in item.items()}
+                    for item in response['Items']
+                )
+
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    return items
+                kwargs['ExclusiveStartKey'] = last_key
+
+    async def _load_image(self, bucket: str, key: str) -> Optional[Image.Image]:
+        """Load image from S3"""
+        client = await self._client('s3')
+
+        try:
+            async with self._semaphore:
+                response = await client.get_object(Bucket=bucket, Key=key)
+                async with response['Body'] as stream:
+                    image_data = await stream.read()
+            return Image.open(io.BytesIO(image_data))
+        except Exception as e:
+            print(f"Error loading image {key}: {e}")
+            return None
@@ -6,15 +6,485 @@ Provides unified interface to access data from DynamoDB and S3
 import boto3
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, List, Dict, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 import io
+import time
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import json
 
+from .features import ContextFeatureEngine
+from .query_cache import QueryCache
+
+if TYPE_CHECKING:
+    from .arrow_cache import ArrowSessionCache
+    from .rollups import RollupStore
+
+
+def _to_millis(dt: datetime) -> int:
+    """Convert a datetime to a Unix timestamp in milliseconds"""
+    return int(dt.timestamp() * 1000)
+
+
+def _item_millis(item: Dict[str, Any], sort_key: str = 'timestamp') -> int:
+    """Timestamp in milliseconds of a DynamoDB item"""
+    if sort_key == 'timestamp':
+        return int(item['timestamp'])
+    return int(item[sort_key].split('#')[0])
+
+
+def _range_query(
+    partition_key: str,
+    partition_value: str,
+    sort_key: str,
+    start_ms: int,
+    end_ms: int
+) -> Dict[str, Any]:
+    """
+    Build query arguments for a partition and time range
+    
+    Tables sorted by a numeric `timestamp` are queried directly; tables with
+    a `timestamp#suffix` string sort key are queried by string prefix range.
+    
+    Args:
+        partition_key: Name of the partition key attribute
+        partition_value: Partition key value to query
+        sort_key: Name of the sort key attribute
+        start_ms: Range start in milliseconds (inclusive)
+        end_ms: Range end in milliseconds (inclusive)
+        
+    Returns:
+        Keyword arguments for `Table.query`
+    """
+    if sort_key == 'timestamp':
+        return {
+            'KeyConditionExpression': f'{partition_key} = :pk AND #ts BETWEEN :start AND :end',
+            'ExpressionAttributeNames': {'#ts': 'timestamp'},
+            'ExpressionAttributeValues': {
+                ':pk': partition_value,
+                ':start': start_ms,
+                ':end': end_ms
+            }
+        }
+    
+    return {
+        'KeyConditionExpression': f'{partition_key} = :pk AND {sort_key} BETWEEN :start AND :end',
+        'ExpressionAttributeValues': {
+            ':pk': partition_value,
+            ':start': f"{start_ms}#",
+            ':end': f"{end_ms}#~"
+        }
+    }
+
+
+# Top-level attributes of tables whose readings live in a nested map; any
+# other requested column is read from inside the map (see TECHNICAL_SPECIFICATION.md)
+SENSOR_ATTRIBUTES = ('groupCode', 'accuracy', 'expirationTime')
+WEARABLE_ATTRIBUTES = ('groupCode', 'dataType', 'source', 'expirationTime')
+EMA_ATTRIBUTES = (
+    'groupCode', 'surveyId', 'triggerType', 'triggeredAt', 'respondedAt', 'context'
+)
+
+# Logical table -> key schema, nested map flattened into columns and the
+# table's known top-level attributes
+TABLES = {
+    'sensor': {
+        'partition_key': 'userIdSensorType',
+        'sort_key': 'timestamp',
+        'expand': 'data',
+        'attributes': SENSOR_ATTRIBUTES,
+    },
+    'screenshots': {
+        'partition_key': 'userId',
+        'sort_key': 'timestamp',
+        'expand': None,
+        'attributes': (),
+    },
+    'events': {
+        'partition_key': 'userId',
+        'sort_key': 'timestampEventType',
+        'expand': None,
+        'attributes': (),
+    },
+    'ema': {
+        'partition_key': 'userId',
+        'sort_key': 'timestampSurveyId',
+        'expand': 'responses',
+        'attributes': EMA_ATTRIBUTES,
+    },
+    'wearable': {
+        'partition_key': 'userIdSource',
+        'sort_key': 'timestamp',
+        'expand': 'values',
+        'attributes': WEARABLE_ATTRIBUTES,
+    },
+    'device_state': {
+        'partition_key': 'userId',
+        'sort_key': 'timestamp',
+        'expand': None,
+        'attributes': (),
+    },
+    'sensor_summary': {
+        'partition_key': 'userIdSensorType',
+        'sort_key': 'timestamp',
+        'expand': None,
+        'attributes': (),
+    },
+}
+
+# Bucket length of the summaries the upload handler materializes
+SUMMARY_BUCKET_MS = 60_000
+
+# Maximum keys of one BatchGetItem request
+BATCH_GET_KEYS = 100
+
+
+def _shard_keys(partition_value: str, shards: int) -> List[str]:
+    """
+    Partition key values a possibly write-sharded partition is stored under
+    
+    With N > 1 shards the upload handler writes `{key}#0` ... `{key}#N-1`;
+    the unsharded key is included for data written before sharding.
+    """
+    if shards <= 1:
+        return [partition_value]
+    return [partition_value] + [f"{partition_value}#{shard}" for shard in range(shards)]
+
+
+def _projection(
+    columns: Optional[List[str]],
+    sort_key: str,
+    expand: Optional[str] = None,
+    attributes: Tuple[str, ...] = ()
+) -> Optional[Dict[str, Any]]:
+    """
+    Translate requested output columns into a DynamoDB projection
+    
+    Columns listed in `attributes` (or every column, for tables without a
+    nested map) are projected as top-level attributes. Remaining columns are
+    projected as paths inside the `expand` map, with dots addressing deeper
+    levels as produced by `pd.json_normalize`. The sort key is always
+    projected so rows can be indexed by time.
+    
+    Args:
+        columns: Output columns to fetch, or None for full items
+        sort_key: Name of the sort key attribute
+        expand: Nested map attribute that `_items_to_frame` flattens
+        attributes: Known top-level attributes of the table
+        
+    Returns:
+        `ProjectionExpression` and `ExpressionAttributeNames` query
+        arguments, or None to fetch full items
+    """
+    if columns is None:
+        return None
+    
+    names = {'#sk': sort_key}
+    paths = ['#sk']
+    for i, column in enumerate(dict.fromkeys(columns)):
+        if expand is None or column in attributes:
+            names[f'#c{i}'] = column
+            paths.append(f'#c{i}')
+        else:
+            names['#nested'] = expand
+            parts = ['#nested']
+            for j, part in enumerate(column.split('.')):
+                names[f'#c{i}_{j}'] = part
+                parts.append(f'#c{i}_{j}')
+            paths.append('.'.join(parts))
+    
+    return {'ProjectionExpression': ', '.join(paths), 'ExpressionAttributeNames': names}
+
+
+def _with_columns(columns: Optional[List[str]], *required: str) -> Optional[List[str]]:
+    """Add columns needed internally (e.g. for filtering) to a projection"""
+    if columns is None:
+        return None
+    return list(columns) + [column for column in required if column not in columns]
+
+
+def _with_projection(
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Merge projection arguments into query arguments"""
+    kwargs = dict(query)
+    if projection is not None:
+        kwargs['ProjectionExpression'] = projection['ProjectionExpression']
+        kwargs['ExpressionAttributeNames'] = {
+            **query.get('ExpressionAttributeNames', {}),
+            **projection['ExpressionAttributeNames']
+        }
+    return kwargs
+
+
+def _sort_by_time(df: pd.DataFrame, sort_key: str = 'timestamp') -> pd.DataFrame:
+    """
+    Sort a frame by its timestamp index
+    
+    Rows sharing a timestamp keep the order of their composite sort key
+    (e.g. `timestamp#eventType`), so the result does not depend on the
+    order rows were read in.
+    """
+    if sort_key != 'timestamp' and sort_key in df.columns:
+        df = df.sort_values(sort_key, kind='stable')
+    return df.sort_index(kind='stable')
+
+
+def _items_to_frame(
+    items: List[Dict[str, Any]],
+    sort_key: str = 'timestamp',
+    expand: Optional[str] = None,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Decode DynamoDB items into a DataFrame with a datetime index
+    
+    Args:
+        items: Deserialized DynamoDB items
+        sort_key: Attribute holding the timestamp, either numeric
+            milliseconds or a `timestamp#suffix` composite string
+        expand: Optional map attribute to flatten into columns
+        columns: Optional output columns; the frame is trimmed to exactly
+            these (in order), missing ones filled with NaN
+        
+    Returns:
+        DataFrame sorted by timestamp, with Decimal values converted to floats
+    """
+    df = pd.DataFrame(items)
+    
+    if df.empty:
+        return df
+    
+    if sort_key == 'timestamp':
+        millis = df['timestamp'].astype('int64')
+    else:
+        millis = df[sort_key].map(lambda x: int(x.split('#')[0]))
+    df['timestamp'] = pd.to_datetime(millis, unit='ms')
+    df = _sort_by_time(df.set_index('timestamp'), sort_key)
+    
+    # Expand nested dictionary into columns aligned with the index
+    if expand and expand in df.columns:
+        expanded = pd.json_normalize(df[expand].tolist())
+        expanded.index = df.index
+        df = pd.concat([df.drop(expand, axis=1), expanded], axis=1)
+    
+    if columns is not None:
+        df = df.reindex(columns=list(columns))
+    
+    # DynamoDB returns every number as Decimal
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == object:
+            first = values.first_valid_index()
+            if first is not None and isinstance(values.loc[first], Decimal):
+                df[column] = pd.to_numeric(values)
+    
+    return df
+
+
+class StorageBackend:
+    """
+    Source of the frames returned by the OSRPData getters
+    
+    A backend reads one partition (participant, or participant and
+    sensor/source) of a logical table (see TABLES) within a time range and
+    returns the same frame `_items_to_frame` builds from DynamoDB items.
+    """
+    
+    def read(
+        self,
+        table: str,
+        partition_value: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Read one partition within a time range
+        
+        Args:
+            table: Logical table name, a key of TABLES
+            partition_value: Partition key value (e.g. 'user123#accelerometer')
+            start_time: Start timestamp (inclusive)
+            end_time: End timestamp (inclusive)
+            columns: Optional output columns, as for `_items_to_frame`
+            
+        Returns:
+            DataFrame with datetime index
+        """
+        raise NotImplementedError
+    
+    def source(self, table: str) -> Optional[str]:
+        """
+        Stable identifier of where a table is read from
+        
+        Used to key results shared between sessions (see ArrowSessionCache).
+        Backends returning None are never cached across sessions.
+        """
+        return None
+
+
+class DynamoDBBackend(StorageBackend):
+    """
+    Reads partitions with DynamoDB queries
+    
+    Requested columns become a `ProjectionExpression`, results are paginated
+    and, with a QueryCache, only time ranges not fetched before are queried.
+    Write-sharded tables are read scatter-gather: every shard of a partition
+    is queried in parallel and the results merged by timestamp.
+    """
+    
+    def __init__(
+        self,
+        dynamodb: Any,
+        table_names: Dict[str, str],
+        cache: Optional[QueryCache] = None,
+        shards: Optional[Dict[str, int]] = None,
+        max_workers: int = 16
+    ):
+        """
+        Args:
+            dynamodb: boto3 DynamoDB resource
+            table_names: Physical table name for each logical table
+            cache: Optional QueryCache for query results
+            shards: Write shard count per logical table (default 1)
+            max_workers: Maximum shard queries in flight per read
+        """
+        self.dynamodb = dynamodb
+        self.table_names = table_names
+        self.cache = cache
+        self.shards = shards or {}
+        self.max_workers = max_workers
+    
+    def read(
+        self,
+        table: str,
+        partition_value: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        spec = TABLES[table]
+        partition_values = _shard_keys(partition_value, self.shards.get(table, 1))
+        items = self._query_range(
+            self.table_names[table], spec['partition_key'], partition_values,
+            spec['sort_key'], start_time, end_time,
+            projection=_projection(
+                columns, spec['sort_key'], spec['expand'], spec['attributes']
+            )
+        )
+        
+        df = _items_to_frame(
+            items, sort_key=spec['sort_key'], expand=spec['expand'], columns=columns
+        )
+        if len(partition_values) > 1 and spec['sort_key'] == 'timestamp':
+            # A reading re-sent after sharding was enabled exists twice
+            df = df[~df.index.duplicated(keep='last')]
+        return df
+    
+    def source(self, table: str) -> Optional[str]:
+        meta = self.dynamodb.meta.client.meta
+        return f"dynamodb:{meta.region_name}:{meta.endpoint_url}:{self.table_names[table]}"
+    
+    def _query_range(
+        self,
+        table_name: str,
+        partition_key: str,
+        partition_values: List[str],
+        sort_key: str,
+        start_time: datetime,
+        end_time: datetime,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch every item of one or more partitions within a time range
+        
+        With a cache configured, only the sub-ranges not fetched before are
+        queried and the rest is served from memory. Projected and full-item
+        results are cached separately. The queries of several partitions or
+        gaps run in parallel; the cache is only touched from this thread.
+        """
+        start_ms, end_ms = _to_millis(start_time), _to_millis(end_time)
+        
+        suffix: Tuple = ()
+        if projection is not None:
+            suffix = (projection['ProjectionExpression'],
+                      tuple(sorted(projection['ExpressionAttributeNames'].items())))
+        
+        requests = []
+        for partition_value in partition_values:
+            gaps = [(start_ms, end_ms)] if self.cache is None else self.cache.missing(
+                (table_name, partition_value) + suffix, start_ms, end_ms
+            )
+            requests.extend((partition_value, gap_start, gap_end) for gap_start, gap_end in gaps)
+        
+        def fetch(request: Tuple[str, int, int]) -> List[Dict[str, Any]]:
+            partition_value, gap_start, gap_end = request
+            return self._query(
+                table_name,
+                _range_query(partition_key, partition_value, sort_key, gap_start, gap_end),
+                projection
+            )
+        
+        if len(requests) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(requests), self.max_workers)) as pool:
+                results = list(pool.map(fetch, requests))
+        else:
+            results = [fetch(request) for request in requests]
+        
+        if self.cache is None:
+            return [item for items in results for item in items]
+        
+        fetched: Dict[str, List[Tuple[int, int, List[Dict[str, Any]]]]] = {}
+        for (partition_value, gap_start, gap_end), items in zip(requests, results):
+            fetched.setdefault(partition_value, []).append((gap_start, gap_end, items))
+        
+        # Shards of this read are not evicted by each other's additions
+        # before their cached items are collected
+        keys = [(table_name, partition_value) + suffix for partition_value in partition_values]
+        merged = []
+        for partition_value, key in zip(partition_values, keys):
+            # Items too recent to cache follow the cached ones
+            recent = []
+            for gap_start, gap_end, items in fetched.get(partition_value, []):
+                times = [_item_millis(item, sort_key) for item in items]
+                recent.extend(self.cache.add(key, gap_start, gap_end, items, times, keep=keys))
+            merged.extend(self.cache.get(key, start_ms, end_ms))
+            merged.extend(recent)
+        return merged
+    
+    def _query(
+        self,
+        table_name: str,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a DynamoDB query, following pagination to collect every item"""
+        # The resource's client is thread-safe and converts Python types
+        client = self.dynamodb.meta.client
+        
+        items = []
+        kwargs = dict(_with_projection(query, projection), TableName=table_name)
+        while True:
+            response = client.query(**kwargs)
+            items.extend(response['Items'])
+            
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                return items
+            kwargs['ExclusiveStartKey'] = last_key
+
+
 class OSRPData:
     """
     Unified data access layer for OSRP (Open Sensing Research Platform)
+    
+    Reads from DynamoDB by default; pass a different StorageBackend (e.g.
+    ParquetBackend over an `osrp export`) to serve the same frames from
+    Parquet instead.
     """
     
     def __init__(
@@ -25,11 +495,49 @@ class OSRPData:
         screenshots_table: str = 'ScreenshotMetadata',
         ema_table: str = 'EMAResponse',
         wearable_table: str = 'WearableData',
-        data_bucket: str = None
+        summary_table: str = 'SensorSummary',
+        latest_state_table: str = 'LatestDeviceState',
+        data_bucket: str = None,
+        endpoint_url: Optional[str] = None,
+        cache: Optional[QueryCache] = None,
+        backend: Optional[StorageBackend] = None,
+        session_cache: Optional['ArrowSessionCache'] = None,
+        rollups: Optional['RollupStore'] = None,
+        sensor_shards: int = 1
     ):
-        self.dynamodb = boto3.resource('dynamodb', region_name=region)
-        self.s3 = boto3.client('s3', region_name=region)
+        """
+        Args:
+            region: AWS region
+            sensor_table: Sensor time series table name
+            events_table: Event log table name
+            screenshots_table: Screenshot metadata table name
+            ema_table: EMA response table name
+            wearable_table: Wearable data table name
+            summary_table: Per-minute sensor summary table name
+            latest_state_table: Latest device state table name
+            data_bucket: S3 bucket holding raw and processed data
+            endpoint_url: Optional endpoint override for local DynamoDB/S3
+                stand-ins (e.g. DynamoDB Local or moto)
+            cache: Optional QueryCache; overlapping time-range queries then
+                only fetch the parts not already held in memory
+            backend: Optional StorageBackend to read from instead of
+                DynamoDB (table names and cache then do not apply)
+            session_cache: Optional ArrowSessionCache; loaded frames are
+                then memory-mapped views shared by re-run cells and other
+                sessions using the same cache directory
+            rollups: Optional RollupStore for `get_rollups`; defaults to
+                processed/rollups/ in `data_bucket`
+            sensor_shards: Write shard count of the sensor table
+                (SENSOR_WRITE_SHARDS of the upload handler); sensor reads
+                then query every shard in parallel
+        """
+        self.dynamodb = boto3.resource('dynamodb', region_name=region, endpoint_url=endpoint_url)
+        self.s3 = boto3.client('s3', region_name=region, endpoint_url=endpoint_url)
         self.region = region
+        self.endpoint_url = endpoint_url
+        self.cache = cache
+        self.session_cache = session_cache
+        self.rollups = rollups
         
         # Table names
         self.sensor_table = sensor_table
@@ -37,14 +545,52 @@ class OSRPData:
         self.screenshots_table = screenshots_table
         self.ema_table = ema_table
         self.wearable_table = wearable_table
+        self.summary_table = summary_table
+        self.latest_state_table = latest_state_table
         self.data_bucket = data_bucket
         
+        self.backend = backend or DynamoDBBackend(self.dynamodb, {
+            'sensor': sensor_table,
+            'screenshots': screenshots_table,
+            'events': events_table,
+            'ema': ema_table,
+            'wearable': wearable_table,
+            'sensor_summary': summary_table,
+        }, cache, shards={'sensor': sensor_shards})
+        
+    def _read(
+        self,
+        table: str,
+        partition_value: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Read through the backend, materializing results in the session cache"""
+        source = self.backend.source(table) if self.session_cache is not None else None
+        end_ms = _to_millis(end_time)
+        # Ranges reaching the present still receive data and are never frozen
+        if source is None or not self.session_cache.settled(end_ms):
+            return self.backend.read(table, partition_value, start_time, end_time, columns)
+        
+        key = (
+            source, partition_value, _to_millis(start_time), end_ms,
+            None if columns is None else tuple(columns)
+        )
+        df = self.session_cache.get(key)
+        if df is None:
+            df = self.session_cache.put(
+                key, self.backend.read(table, partition_value, start_time, end_time, columns)
+            )
+        return df
+    
     def get_sensor_data(
         self, 
         user_id: str, 
         sensor_type: str,
         start_time: datetime,
-        end_time: datetime
+        end_time: datetime,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Retrieve sensor time series data
@@ -54,41 +600,23 @@ class OSRPData:
             sensor_type: Type of sensor (accelerometer, gyroscope, location, etc.)
             start_time: Start timestamp
             end_time: End timestamp
+            columns: Optional columns to fetch (e.g. ['x', 'y', 'z']); only
+                these attributes are read from DynamoDB
             
         Returns:
             DataFrame with sensor readings and datetime index
         """
-        table = self.dynamodb.Table(self.sensor_table)
-        
-        response = table.query(
-            KeyConditionExpression='userIdSensorType = :pk AND #ts BETWEEN :start AND :end',
-            ExpressionAttributeNames={'#ts': 'timestamp'},
-            ExpressionAttributeValues={
-                ':pk': f"{user_id}#{sensor_type}",
-                ':start': int(start_time.timestamp() * 1000),
-                ':end': int(end_time.timestamp() * 1000)
-            }
+        return self._read(
+            'sensor', f"{user_id}#{sensor_type}", start_time, end_time, columns
         )
-        
-        df = pd.DataFrame(response['Items'])
-        
-        if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df.set_index('timestamp').sort_index()
-            
-            # Expand nested data dictionary
-            if 'data' in df.columns:
-                data_df = pd.json_normalize(df['data'])
-                df = pd.concat([df.drop('data', axis=1), data_df], axis=1)
-        
-        return df
     
     def get_screenshots(
         self,
         user_id: str,
         start_time: datetime,
         end_time: datetime,
-        load_images: bool = False
+        load_images: bool = False,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Retrieve screenshot metadata (and optionally images)
@@ -98,33 +626,22 @@ class OSRPData:
             start_time: Start timestamp
             end_time: End timestamp
             load_images: If True, download actual images from S3
+            columns: Optional metadata columns to fetch (e.g. ['appName'])
             
         Returns:
             DataFrame with screenshot metadata and optional image data
         """
-        table = self.dynamodb.Table(self.screenshots_table)
-        
-        response = table.query(
-            KeyConditionExpression='userId = :uid AND #ts BETWEEN :start AND :end',
-            ExpressionAttributeNames={'#ts': 'timestamp'},
-            ExpressionAttributeValues={
-                ':uid': user_id,
-                ':start': int(start_time.timestamp() * 1000),
-                ':end': int(end_time.timestamp() * 1000)
-            }
-        )
+        fetch = _with_columns(columns, 's3Bucket', 's3Key') if load_images else columns
         
-        df = pd.DataFrame(response['Items'])
+        df = self._read('screenshots', user_id, start_time, end_time, fetch)
         
-        if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df.set_index('timestamp').sort_index()
-            
-            if load_images:
-                df['image'] = df.apply(
-                    lambda row: self._load_image(row['s3Bucket'], row['s3Key']),
-                    axis=1
-                )
+        if not df.empty and load_images:
+            df['image'] = df.apply(
+                lambda row: self._load_image(row['s3Bucket'], row['s3Key']),
+                axis=1
+            )
+            if columns is not None:
+                df = df[list(columns) + ['image']]
         
         return df
     
@@ -133,7 +650,8 @@ class OSRPData:
         user_id: str,
         start_time: datetime,
         end_time: datetime,
-        event_type: Optional[str] = None
+        event_type: Optional[str] = None,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Retrieve event log data
@@ -143,36 +661,19 @@ class OSRPData:
             start_time: Start timestamp
             end_time: End timestamp
             event_type: Optional filter for specific event type
+            columns: Optional columns to fetch (e.g. ['eventType', 'eventData'])
             
         Returns:
             DataFrame with events
         """
-        table = self.dynamodb.Table(self.events_table)
-        
-        key_condition = 'userId = :uid AND timestampEventType BETWEEN :start AND :end'
-        expression_values = {
-            ':uid': user_id,
-            ':start': f"{int(start_time.timestamp() * 1000)}#",
-            ':end': f"{int(end_time.timestamp() * 1000)}#~"
-        }
-        
-        response = table.query(
-            KeyConditionExpression=key_condition,
-            ExpressionAttributeValues=expression_values
-        )
+        fetch = _with_columns(columns, 'eventType') if event_type else columns
         
-        df = pd.DataFrame(response['Items'])
+        df = self._read('events', user_id, start_time, end_time, fetch)
         
-        if not df.empty:
-            # Parse timestamp from composite key
-            df['timestamp'] = df['timestampEventType'].apply(
-                lambda x: int(x.split('#')[0])
-            )
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df.set_index('timestamp').sort_index()
-            
-            if event_type:
-                df = df[df['eventType'] == event_type]
+        if not df.empty and event_type:
+            df = df[df['eventType'] == event_type]
+            if columns is not None:
+                df = df[list(columns)]
         
         return df
     
@@ -181,7 +682,8 @@ class OSRPData:
         user_id: str,
         source: str,
         start_time: datetime,
-        end_time: datetime
+        end_time: datetime,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Retrieve wearable device data
@@ -191,41 +693,22 @@ class OSRPData:
             source: Data source (googlefit, polar_h10, fitbit, etc.)
             start_time: Start timestamp
             end_time: End timestamp
+            columns: Optional columns to fetch (e.g. ['heartRate'])
             
         Returns:
             DataFrame with wearable data
         """
-        table = self.dynamodb.Table(self.wearable_table)
-        
-        response = table.query(
-            KeyConditionExpression='userIdSource = :pk AND #ts BETWEEN :start AND :end',
-            ExpressionAttributeNames={'#ts': 'timestamp'},
-            ExpressionAttributeValues={
-                ':pk': f"{user_id}#{source}",
-                ':start': int(start_time.timestamp() * 1000),
-                ':end': int(end_time.timestamp() * 1000)
-            }
+        return self._read(
+            'wearable', f"{user_id}#{source}", start_time, end_time, columns
         )
-        
-        df = pd.DataFrame(response['Items'])
-        
-        if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df.set_index('timestamp').sort_index()
-            
-            # Expand values dictionary
-            if 'values' in df.columns:
-                values_df = pd.json_normalize(df['values'])
-                df = pd.concat([df.drop('values', axis=1), values_df], axis=1)
-        
-        return df
     
     def get_ema_responses(
         self,
         user_id: str,
         start_time: datetime,
         end_time: datetime,
-        survey_id: Optional[str] = None
+        survey_id: Optional[str] = None,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Retrieve EMA survey responses
@@ -235,39 +718,229 @@ class OSRPData:
             start_time: Start timestamp
             end_time: End timestamp
             survey_id: Optional filter for specific survey
+            columns: Optional columns to fetch (e.g. ['mood', 'stress'])
             
         Returns:
             DataFrame with survey responses
         """
-        table = self.dynamodb.Table(self.ema_table)
+        fetch = _with_columns(columns, 'surveyId') if survey_id else columns
         
-        response = table.query(
-            KeyConditionExpression='userId = :uid AND timestampSurveyId BETWEEN :start AND :end',
-            ExpressionAttributeValues={
-                ':uid': user_id,
-                ':start': f"{int(start_time.timestamp() * 1000)}#",
-                ':end': f"{int(end_time.timestamp() * 1000)}#~"
-            }
+        df = self._read('ema', user_id, start_time, end_time, fetch)
+        
+        if not df.empty and survey_id:
+            df = df[df['surveyId'] == survey_id]
+            if columns is not None:
+                df = df[list(columns)]
+        
+        return df
+    
+    def get_rollups(
+        self,
+        user_id: str,
+        stream: str,
+        start_time: datetime,
+        end_time: datetime,
+        resolution: str = '1min',
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve precomputed rollups of a numeric stream
+        
+        Reads the coarsest stored level (1s, 1min, 15min or 1h) that divides
+        the requested resolution, so long ranges are plotted from a few rows
+        per bucket instead of every raw reading.
+        
+        Args:
+            user_id: Participant ID
+            stream: 'sensor_{type}' or 'wearable_{source}' (e.g.
+                'sensor_accelerometer', 'wearable_polar_h10')
+            start_time: Start timestamp
+            end_time: End timestamp
+            resolution: Bucket length (e.g. '5min', '1h')
+            columns: Optional value columns (e.g. ['magnitude'])
+            
+        Returns:
+            DataFrame indexed by bucket start with count/sum/sumsq/min/max/mean
+            per value column; empty if no rollups were built for the range
+        """
+        if self.rollups is None:
+            from .rollups import RollupStore
+            
+            if not self.data_bucket:
+                raise ValueError("get_rollups needs a RollupStore or data_bucket")
+            self.rollups = RollupStore(
+                f"s3://{self.data_bucket}/processed/rollups",
+                region=self.region,
+                endpoint_url=self.endpoint_url
+            )
+        
+        return self.rollups.read(user_id, stream, start_time, end_time, resolution, columns)
+    
+    def get_sensor_summaries(
+        self,
+        user_id: str,
+        sensor_type: str,
+        start_time: datetime,
+        end_time: datetime,
+        resolution: str = '1min',
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve sensor statistics materialized at upload time
+        
+        The upload handler adds every sensor batch to per-minute summary
+        items, so a participant-day at any whole-minute resolution is read
+        from at most 1,440 items instead of the raw readings.
+        
+        Args:
+            user_id: Participant ID
+            sensor_type: Type of sensor (accelerometer, location, etc.)
+            start_time: Start timestamp
+            end_time: End timestamp
+            resolution: Bucket length, a whole number of minutes (e.g. '1h')
+            columns: Optional value columns (e.g. ['magnitude'])
+            
+        Returns:
+            DataFrame indexed by bucket start with count/sum/sumsq/min/max/mean
+            per value column, as `get_rollups`; empty if nothing was summarized
+        """
+        from .rollups import STATS, _resolution_ms, _with_means, combine
+        
+        millis = _resolution_ms(resolution)
+        if millis % SUMMARY_BUCKET_MS:
+            raise ValueError(f"Resolution {resolution} is not a whole number of minutes")
+        
+        # Start at the bucket containing the start time
+        start_ms = _to_millis(start_time)
+        start_ms -= start_ms % millis
+        fetch = None if columns is None else [
+            f'{column}_{stat}' for column in columns for stat in STATS
+        ]
+        df = self._read(
+            'sensor_summary', f"{user_id}#{sensor_type}",
+            datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc), end_time, fetch
         )
         
-        df = pd.DataFrame(response['Items'])
+        names = [name for name in df.columns if name.rpartition('_')[2] in STATS]
+        df = df[names].dropna(how='all')
+        if df.empty:
+            return pd.DataFrame()
+        
+        # Channels missing from a minute have no readings there
+        for name in names:
+            stat = name.rpartition('_')[2]
+            if stat == 'count':
+                df[name] = df[name].fillna(0).astype('int64')
+            elif stat in ('sum', 'sumsq'):
+                df[name] = df[name].fillna(0.0).astype(float)
+            else:
+                df[name] = df[name].astype(float)
         
-        if not df.empty:
-            df['timestamp'] = df['timestampSurveyId'].apply(
-                lambda x: int(x.split('#')[0])
+        if millis != SUMMARY_BUCKET_MS:
+            df = combine(df, millis)
+        
+        return _with_means(df)
+    
+    def get_cohort_summaries(
+        self,
+        sensor_type: str,
+        start_time: datetime,
+        end_time: datetime,
+        resolution: str = '1h',
+        user_ids: Optional[List[str]] = None,
+        group_code: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve upload-time sensor statistics of many participants
+        
+        Example:
+            hourly = data.get_cohort_summaries(
+                'accelerometer', start, end, '1h', group_code='depression_study_2026'
             )
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df.set_index('timestamp').sort_index()
+            hourly.groupby('userId')['magnitude_mean'].mean()
+        
+        Args:
+            sensor_type: Type of sensor
+            start_time: Start timestamp
+            end_time: End timestamp
+            resolution: Bucket length, a whole number of minutes
+            user_ids: Participants to read; defaults to `get_participant_list`
+            group_code: Study group of the default participant list
+            columns: Optional value columns
             
-            if survey_id:
-                df = df[df['surveyId'] == survey_id]
-                
-            # Expand responses dictionary
-            if 'responses' in df.columns:
-                responses_df = pd.json_normalize(df['responses'])
-                df = pd.concat([df.drop('responses', axis=1), responses_df], axis=1)
+        Returns:
+            `get_sensor_summaries` frames of every participant with data,
+            concatenated with a `userId` column
+        """
+        if user_ids is None:
+            user_ids = self.get_participant_list(group_code)
         
-        return df
+        frames = []
+        for user_id in user_ids:
+            df = self.get_sensor_summaries(
+                user_id, sensor_type, start_time, end_time, resolution, columns
+            )
+            if not df.empty:
+                df.insert(0, 'userId', user_id)
+                frames.append(df)
+        
+        return pd.concat(frames) if frames else pd.DataFrame()
+    
+    def get_latest_device_states(
+        self,
+        user_ids: Optional[List[str]] = None,
+        group_code: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve the current device state of many participants
+        
+        Reads the per-participant records the upload handler keeps of the
+        newest device state report, with one BatchGetItem per 100
+        participants instead of querying every device's history.
+        
+        Example:
+            fleet = data.get_latest_device_states(group_code='depression_study_2026')
+            fleet[fleet['batteryLevel'] < 20]
+        
+        Args:
+            user_ids: Participants to read; defaults to `get_participant_list`
+            group_code: Study group of the default participant list
+            columns: Optional state columns (e.g. ['batteryLevel', 'appVersion'])
+            
+        Returns:
+            DataFrame indexed by userId with the report `timestamp` and state
+            columns; participants that never reported are omitted
+        """
+        if user_ids is None:
+            user_ids = self.get_participant_list(group_code)
+        user_ids = list(dict.fromkeys(user_ids))
+        
+        fetch = _with_columns(columns, 'userId')
+        request = {}
+        projection = _projection(fetch, 'timestamp')
+        if projection is not None:
+            request.update(projection)
+        
+        items = []
+        for i in range(0, len(user_ids), BATCH_GET_KEYS):
+            keys = [{'userId': user_id} for user_id in user_ids[i:i + BATCH_GET_KEYS]]
+            pending = {self.latest_state_table: dict(request, Keys=keys)}
+            attempt = 0
+            while pending:
+                if attempt:
+                    # Unprocessed keys signal throttling; back off before retrying
+                    time.sleep(min(0.05 * 2 ** attempt, 2.0))
+                response = self.dynamodb.batch_get_item(RequestItems=pending)
+                items.extend(response['Responses'].get(self.latest_state_table, []))
+                pending = response.get('UnprocessedKeys') or {}
+                attempt += 1
+        
+        df = _items_to_frame(items, columns=fetch)
+        if df.empty:
+            return pd.DataFrame()
+        return df.reset_index().set_index('userId').sort_index()
     
     def get_daily_summary(
         self,
@@ -394,8 +1067,8 @@ class OSRPData:
             if df.empty:
                 continue
                 
-            # Resample to common frequency
-            resampled = df.resample(freq).mean()
+            # Resample numeric columns to common frequency
+            resampled = df.resample(freq).mean(numeric_only=True)
             
             # Add prefix to column names
             resampled.columns = [f"{name}_{col}" for col in resampled.columns]
@@ -408,9 +1081,9 @@ class OSRPData:
         
         # Fill missing values
         if method == 'ffill':
-            aligned = aligned.fillna(method='ffill')
+            aligned = aligned.ffill()
         elif method == 'bfill':
-            aligned = aligned.fillna(method='bfill')
+            aligned = aligned.bfill()
         elif method == 'interpolate':
             aligned = aligned.interpolate()
         
@@ -427,9 +1100,126 @@ class OSRPData:
             return None
 
 
+HOUR_NS = 3_600_000_000_000
+
+
+def _user_days(
+    frames: List[pd.DataFrame],
+    user_column: str
+) -> Tuple[List[np.ndarray], List[Tuple[Any, pd.Timestamp]]]:
+    """
+    Assign every row of several frames to a shared (participant, day) group
+    
+    Args:
+        frames: DataFrames with datetime index
+        user_column: Column holding the participant ID
+        
+    Returns:
+        Group code of each row per frame, and the (user ID, day) key of each
+        group code
+    """
+    non_empty = [df for df in frames if not df.empty]
+    for df in non_empty:
+        if user_column not in df.columns:
+            raise ValueError(f"DataFrame has no '{user_column}' column")
+    if not non_empty:
+        return [np.empty(0, dtype=np.int64) for _ in frames], []
+    
+    users = np.concatenate([df[user_column].to_numpy() for df in non_empty])
+    days = non_empty[0].index.normalize().append(
+        [df.index.normalize() for df in non_empty[1:]]
+    )
+    user_codes, user_labels = pd.factorize(users)
+    day_codes, day_labels = pd.factorize(days)
+    
+    codes, pairs = pd.factorize(user_codes.astype(np.int64) * len(day_labels) + day_codes)
+    keys = list(zip(
+        np.asarray(user_labels, dtype=object)[pairs // len(day_labels)].tolist(),
+        day_labels[pairs % len(day_labels)]
+    ))
+    
+    split = np.cumsum([len(df) for df in non_empty])[:-1]
+    parts = iter(np.split(codes, split))
+    return [
+        next(parts) if not df.empty else np.empty(0, dtype=np.int64) for df in frames
+    ], keys
+
+
+def _ranked_counts(
+    groups: np.ndarray,
+    n_groups: int,
+    values: pd.Series,
+    limit: Optional[int] = None
+) -> List[Dict[Any, int]]:
+    """
+    Count distinct values per group in one pass over categorical codes
+    
+    Values are factorized once, each (group, value) pair is encoded as a
+    single integer and counted with `np.bincount`. Missing values are
+    skipped.
+    
+    Args:
+        groups: Group code of each row (0 <= code < n_groups)
+        n_groups: Number of groups
+        values: Values to count
+        limit: Optional number of most frequent values to keep per group
+        
+    Returns:
+        Per group, {value: count} ordered like `Series.value_counts()`
+        (descending count, ties in order of first appearance)
+    """
+    codes, labels = pd.factorize(values)
+    if len(labels) == 0:
+        return [{} for _ in range(n_groups)]
+    labels = np.asarray(labels, dtype=object)
+    
+    valid = codes >= 0
+    pair_codes, pairs = pd.factorize(
+        groups[valid].astype(np.int64) * len(labels) + codes[valid]
+    )
+    counts = np.bincount(pair_codes, minlength=len(pairs))
+    owner = pairs // len(labels)
+    
+    # lexsort is stable, so ties keep their first-appearance order
+    order = np.lexsort((-counts, owner))
+    names = labels[pairs[order] % len(labels)].tolist()
+    counts = counts[order].tolist()
+    bounds = np.searchsorted(owner[order], np.arange(n_groups + 1)).tolist()
+    
+    ranked = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        ranked.append(dict(zip(names[lo:hi], counts[lo:hi])))
+    return ranked
+
+
+def _hourly_counts(
+    groups: np.ndarray,
+    n_groups: int,
+    index: pd.DatetimeIndex
+) -> List[Dict[int, int]]:
+    """Rows per hour of day for each group, omitting hours without rows"""
+    counts = np.bincount(
+        groups.astype(np.int64) * 24 + index.hour.to_numpy(),
+        minlength=n_groups * 24
+    ).reshape(n_groups, 24)
+    
+    hourly: List[Dict[int, int]] = [{} for _ in range(n_groups)]
+    rows, hours = np.nonzero(counts)
+    for group, hour, count in zip(rows.tolist(), hours.tolist(), counts[rows, hours].tolist()):
+        hourly[group][hour] = count
+    return hourly
+
+
 class DataAggregator:
     """
     Higher-level aggregations and feature extraction
+    
+    Summaries are computed from integer codes with `np.bincount` rather than
+    per-column `value_counts`/`groupby` calls, and the batched variants
+    summarize every (participant, day) of a concatenated study frame in a
+    single pass.
     """
     
     @staticmethod
@@ -439,54 +1229,168 @@ class DataAggregator:
     ) -> Dict:
         """
         Compute daily activity summary statistics
+        
+        Args:
+            activity_df: Activity recognition readings with 'activityType'
+            steps_df: Step counts with 'steps'
+            
+        Returns:
+            Dictionary with activity distribution, activity minutes (assuming
+            1-min samples), total steps and mean steps per hour
         """
         if activity_df.empty and steps_df.empty:
             return {}
         
-        summary = {}
+        activity_groups = np.zeros(len(activity_df), dtype=np.int64)
+        steps_groups = np.zeros(len(steps_df), dtype=np.int64)
         
-        # Activity recognition
-        if not activity_df.empty and 'activityType' in activity_df.columns:
-            activity_counts = activity_df['activityType'].value_counts()
-            summary['activity_distribution'] = activity_counts.to_dict()
-            
-            # Time spent in each activity
-            activity_time = activity_df.groupby('activityType').size()
-            summary['activity_minutes'] = (activity_time * 1).to_dict()  # Assuming 1-min samples
+        return DataAggregator._activity_summaries(
+            activity_df, steps_df, activity_groups, steps_groups, 1
+        )[0]
+    
+    @staticmethod
+    def daily_activity_summaries(
+        activity_df: pd.DataFrame,
+        steps_df: pd.DataFrame,
+        user_column: str = 'userId'
+    ) -> Dict[Tuple[Any, pd.Timestamp], Dict]:
+        """
+        Compute `daily_activity_summary` for every participant-day at once
         
-        # Steps
-        if not steps_df.empty and 'steps' in steps_df.columns:
-            summary['total_steps'] = steps_df['steps'].sum()
-            summary['avg_steps_per_hour'] = steps_df.resample('1H')['steps'].sum().mean()
+        Args:
+            activity_df: Activity readings of many participants and days
+            steps_df: Step counts of many participants and days
+            user_column: Column holding the participant ID in both frames
+            
+        Returns:
+            Dictionary of {(user ID, day): summary}, sorted by key
+        """
+        (activity_groups, steps_groups), keys = _user_days([activity_df, steps_df], user_column)
         
-        return summary
+        summaries = DataAggregator._activity_summaries(
+            activity_df, steps_df, activity_groups, steps_groups, len(keys)
+        )
+        return dict(sorted(zip(keys, summaries), key=lambda pair: pair[0]))
     
     @staticmethod
     def app_usage_summary(screenshots_df: pd.DataFrame) -> Dict:
         """
         Compute app usage summary statistics
+        
+        Args:
+            screenshots_df: Screenshot metadata with datetime index
+            
+        Returns:
+            Dictionary with top 10 apps, category distribution and screenshots
+            per hour of day; the input frame is not modified
         """
         if screenshots_df.empty:
             return {}
         
-        summary = {}
+        groups = np.zeros(len(screenshots_df), dtype=np.int64)
+        return DataAggregator._app_usage_summaries(screenshots_df, groups, 1)[0]
+    
+    @staticmethod
+    def app_usage_summaries(
+        screenshots_df: pd.DataFrame,
+        user_column: str = 'userId'
+    ) -> Dict[Tuple[Any, pd.Timestamp], Dict]:
+        """
+        Compute `app_usage_summary` for every participant-day at once
+        
+        Example:
+            screenshots = pd.concat([
+                data.get_screenshots(uid, start, end) for uid in participants
+            ])
+            summaries = DataAggregator.app_usage_summaries(screenshots)
+            summaries[('user123', pd.Timestamp('2026-01-15'))]['top_apps']
+        
+        Args:
+            screenshots_df: Screenshot metadata of many participants and days
+            user_column: Column holding the participant ID
+            
+        Returns:
+            Dictionary of {(user ID, day): summary}, sorted by key
+        """
+        (groups,), keys = _user_days([screenshots_df], user_column)
+        
+        summaries = DataAggregator._app_usage_summaries(screenshots_df, groups, len(keys))
+        return dict(sorted(zip(keys, summaries), key=lambda pair: pair[0]))
+    
+    @staticmethod
+    def _activity_summaries(
+        activity_df: pd.DataFrame,
+        steps_df: pd.DataFrame,
+        activity_groups: np.ndarray,
+        steps_groups: np.ndarray,
+        n_groups: int
+    ) -> List[Dict]:
+        """Activity summaries for rows already assigned to groups"""
+        summaries: List[Dict] = [{} for _ in range(n_groups)]
+        
+        # Activity recognition
+        if not activity_df.empty and 'activityType' in activity_df.columns:
+            present = np.bincount(activity_groups, minlength=n_groups) > 0
+            counts = _ranked_counts(activity_groups, n_groups, activity_df['activityType'])
+            for summary, has_rows, distribution in zip(summaries, present, counts):
+                if has_rows:
+                    summary['activity_distribution'] = distribution
+                    # Time spent in each activity, assuming 1-min samples
+                    summary['activity_minutes'] = dict(sorted(distribution.items()))
+        
+        # Steps
+        if not steps_df.empty and 'steps' in steps_df.columns:
+            steps = steps_df['steps'].to_numpy(dtype=float, na_value=np.nan)
+            totals = np.bincount(
+                steps_groups, weights=np.nan_to_num(steps), minlength=n_groups
+            )
+            
+            # Hourly sums span every hour between the first and last reading
+            hours = pd.DatetimeIndex(steps_df.index).as_unit('ns').asi8 // HOUR_NS
+            first = np.full(n_groups, np.iinfo(np.int64).max)
+            last = np.full(n_groups, np.iinfo(np.int64).min)
+            np.minimum.at(first, steps_groups, hours)
+            np.maximum.at(last, steps_groups, hours)
+            
+            integral = pd.api.types.is_integer_dtype(steps_df['steps'].dtype)
+            for group, summary in enumerate(summaries):
+                if last[group] < first[group]:
+                    continue
+                total = totals[group]
+                summary['total_steps'] = int(total) if integral else float(total)
+                summary['avg_steps_per_hour'] = float(
+                    total / (last[group] - first[group] + 1)
+                )
+        
+        return summaries
+    
+    @staticmethod
+    def _app_usage_summaries(
+        screenshots_df: pd.DataFrame,
+        groups: np.ndarray,
+        n_groups: int
+    ) -> List[Dict]:
+        """App usage summaries for rows already assigned to groups"""
+        summaries: List[Dict] = [{} for _ in range(n_groups)]
         
         if 'appName' in screenshots_df.columns:
             # Most used apps
-            app_counts = screenshots_df['appName'].value_counts()
-            summary['top_apps'] = app_counts.head(10).to_dict()
+            top_apps = _ranked_counts(groups, n_groups, screenshots_df['appName'], limit=10)
+            for summary, apps in zip(summaries, top_apps):
+                summary['top_apps'] = apps
             
             # App categories
             if 'appCategory' in screenshots_df.columns:
-                category_counts = screenshots_df['appCategory'].value_counts()
-                summary['category_distribution'] = category_counts.to_dict()
+                categories = _ranked_counts(groups, n_groups, screenshots_df['appCategory'])
+                for summary, distribution in zip(summaries, categories):
+                    summary['category_distribution'] = distribution
         
         # Temporal patterns
-        screenshots_df['hour'] = screenshots_df.index.hour
-        hourly_usage = screenshots_df.groupby('hour').size()
-        summary['hourly_pattern'] = hourly_usage.to_dict()
+        hourly = _hourly_counts(groups, n_groups, pd.DatetimeIndex(screenshots_df.index))
+        for summary, pattern in zip(summaries, hourly):
+            summary['hourly_pattern'] = pattern
         
-        return summary
+        return summaries
     
     @staticmethod
     def context_features(
@@ -501,30 +1405,13 @@ class DataAggregator:
         - Location stability (from GPS)
         - Activity intensity
         - Device usage frequency
-        """
-        features = pd.DataFrame()
         
-        # Accelerometer features
-        if 'accelerometer' in sensor_data and not sensor_data['accelerometer'].empty:
-            accel = sensor_data['accelerometer']
-            
-            # Movement magnitude
-            if all(col in accel.columns for col in ['x', 'y', 'z']):
-                accel['magnitude'] = np.sqrt(accel['x']**2 + accel['y']**2 + accel['z']**2)
-                
-                # Aggregate over time windows
-                features['movement_mean'] = accel['magnitude'].resample(window).mean()
-                features['movement_std'] = accel['magnitude'].resample(window).std()
-        
-        # Location features
-        if 'location' in sensor_data and not sensor_data['location'].empty:
-            location = sensor_data['location']
-            
-            if all(col in location.columns for col in ['latitude', 'longitude']):
-                # Location change (simplified)
-                location_resampled = location[['latitude', 'longitude']].resample(window).mean()
-                lat_diff = location_resampled['latitude'].diff()
-                lon_diff = location_resampled['longitude'].diff()
-                features['location_change'] = np.sqrt(lat_diff**2 + lon_diff**2)
-        
-        return features
+        Features are computed in a single vectorized pass per stream without
+        modifying the input frames; `location_change` is the haversine
+        distance in meters between consecutive window mean locations. Use
+        ContextFeatureEngine directly to keep features current as new data
+        arrives.
+        """
+        engine = ContextFeatureEngine(window=window)
+        engine.update(sensor_data)
+        return engine.features()
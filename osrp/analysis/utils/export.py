@@ -0,0 +1,583 @@
+"""
+OSRP Study Export
+Bulk DynamoDB-to-Parquet export of every table of a study into a
+Hive-partitioned dataset under exports/{studyId}/{exportId}/
+"""
+
+import io
+import json
+import os
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import boto3
+import pandas as pd
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from .data_access import TABLES, _item_millis, _items_to_frame, _to_millis
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+
+# Exported table (see TABLES) -> stream name; {suffix} is the part of the
+# partition key after '#' (sensor type or wearable source)
+STREAMS = {
+    'sensor': 'sensor_{suffix}',
+    'screenshots': 'screenshots',
+    'events': 'events',
+    'ema': 'ema',
+    'wearable': 'wearable_{suffix}',
+    'device_state': 'device_state',
+    'sensor_summary': 'sensor_summary_{suffix}',
+}
+
+# GSI used to query a study by time instead of scanning the whole table
+TIME_INDEX = 'groupCode-timestamp-index'
+
+# Schema metadata key listing columns stored as JSON strings
+JSON_COLUMNS_KEY = b'osrp.json_columns'
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def _json_default(value: Any) -> Any:
+    """Encode DynamoDB types json does not know about"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, bytes):
+        return value.decode('latin-1')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value: Any) -> Any:
+    """Flatten a DynamoDB value for a CSV cell"""
+    if isinstance(value, (dict, list, set)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, Decimal):
+        return _json_default(value)
+    return value
+
+
+def stream_partition(table: str, partition_value: str) -> Tuple[str, str]:
+    """
+    Map a partition key value of an exported table to (stream, user ID)
+
+    Args:
+        table: Key of STREAMS
+        partition_value: Partition key value, e.g. 'user123#accelerometer',
+            possibly with a write shard suffix ('user123#accelerometer#3')
+
+    Returns:
+        Stream name (e.g. 'sensor_accelerometer') and participant ID
+    """
+    stream = STREAMS[table]
+    if '{suffix}' not in stream:
+        return stream, partition_value
+    user_id, _, suffix = partition_value.partition('#')
+    return stream.format(suffix=suffix.split('#')[0]), user_id
+
+
+def partition_path(study_id: str, stream: str, user_id: str, date: str) -> str:
+    """Hive partition directory of one stream, participant and day"""
+    values = [('study', study_id), ('stream', stream), ('user', user_id), ('date', date)]
+    return '/'.join(f"{key}={quote(str(value), safe='')}" for key, value in values)
+
+
+def frame_to_table(df: pd.DataFrame) -> 'pa.Table':
+    """
+    Convert a frame from `_items_to_frame` into an Arrow table
+
+    The timestamp index becomes a column. Nested maps and lists that are not
+    expanded into columns are stored as JSON strings and listed in the schema
+    metadata so readers can decode them again.
+    """
+    df = df.reset_index()
+    json_columns = []
+    for column in df.columns:
+        values = df[column]
+        if values.dtype != object:
+            continue
+        nested = values.map(lambda v: isinstance(v, (dict, list, set)))
+        if nested.any():
+            df[column] = values.map(
+                lambda v: None if v is None else json.dumps(v, default=_json_default)
+            )
+            json_columns.append(column)
+        elif values.map(lambda v: isinstance(v, Decimal)).any():
+            df[column] = values.map(lambda v: _json_default(v) if isinstance(v, Decimal) else v)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[JSON_COLUMNS_KEY] = json.dumps(json_columns).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+class _Sink:
+    """Writes export files to a local directory or an S3 prefix"""
+
+    def __init__(
+        self,
+        destination: str,
+        region: str = 'us-west-2',
+        endpoint_url: Optional[str] = None
+    ):
+        """
+        Args:
+            destination: Local directory or s3://bucket/prefix URI
+            region: AWS region
+            endpoint_url: Optional S3 endpoint override
+        """
+        self.destination = destination.rstrip('/')
+        self.s3 = None
+        if self.destination.startswith('s3://'):
+            self.bucket, _, self.prefix = self.destination[len('s3://'):].partition('/')
+            self.s3 = boto3.client('s3', region_name=region, endpoint_url=endpoint_url)
+
+    def write(self, key: str, data: bytes) -> None:
+        """Write (or overwrite) one file"""
+        if self.s3 is not None:
+            self.s3.put_object(Bucket=self.bucket, Key=self._s3_key(key), Body=data)
+            return
+
+        path = os.path.join(self.destination, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so a crash never leaves a truncated file behind;
+        # the dot prefix keeps dataset discovery from picking it up
+        partial = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.partial")
+        with open(partial, 'wb') as f:
+            f.write(data)
+        os.replace(partial, path)
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Read one file, or None if it does not exist"""
+        if self.s3 is not None:
+            try:
+                response = self.s3.get_object(Bucket=self.bucket, Key=self._s3_key(key))
+            except self.s3.exceptions.NoSuchKey:
+                return None
+            return response['Body'].read()
+
+        path = os.path.join(self.destination, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _s3_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+
+def _time_condition(sort_key: str, start_ms: int, end_ms: int) -> Tuple[str, Dict, Dict]:
+    """Expression, names and values restricting a sort key to a time range"""
+    if sort_key == 'timestamp':
+        return '#ts BETWEEN :start AND :end', {'#ts': 'timestamp'}, {
+            ':start': start_ms, ':end': end_ms
+        }
+    return '#ts BETWEEN :start AND :end', {'#ts': sort_key}, {
+        ':start': f"{start_ms}#", ':end': f"{end_ms}#~"
+    }
+
+
+def _unit_request(unit: Dict[str, Any], study_id: str) -> Dict[str, Any]:
+    """Scan or query arguments for one unit of work"""
+    spec = TABLES[unit['table']]
+    values: Dict[str, Any] = {':study': study_id}
+    names: Dict[str, str] = {}
+
+    time_range = None
+    if unit.get('start') is not None:
+        time_range = _time_condition(spec['sort_key'], unit['start'], unit['end'])
+        names.update(time_range[1])
+        values.update(time_range[2])
+
+    if 'index' in unit:
+        request = {
+            'IndexName': unit['index'],
+            'KeyConditionExpression': 'groupCode = :study AND ' + time_range[0],
+        }
+    else:
+        condition = 'groupCode = :study'
+        if time_range is not None:
+            condition += ' AND ' + time_range[0]
+        request = {
+            'FilterExpression': condition,
+            'Segment': unit['segment'],
+            'TotalSegments': unit['total_segments'],
+        }
+
+    request['ExpressionAttributeValues'] = values
+    if names:
+        request['ExpressionAttributeNames'] = names
+    return request
+
+
+def _flush_partitions(
+    sink: _Sink,
+    study_id: str,
+    unit: Dict[str, Any],
+    part: int,
+    buffers: Dict[Tuple[str, str, str], List[Dict[str, Any]]],
+    row_group_size: int
+) -> Dict[str, int]:
+    """Write one Parquet file per buffered partition; returns rows per stream"""
+    spec = TABLES[unit['table']]
+    rows: Dict[str, int] = defaultdict(int)
+
+    for (stream, user_id, date), items in buffers.items():
+        df = _items_to_frame(items, sort_key=spec['sort_key'], expand=spec['expand'])
+        buffer = io.BytesIO()
+        pq.write_table(frame_to_table(df), buffer, row_group_size=row_group_size)
+
+        directory = partition_path(study_id, stream, user_id, date)
+        sink.write(f"{directory}/part-{unit['id']}-{part:05d}.parquet", buffer.getvalue())
+        rows[stream] += len(df)
+
+    return rows
+
+
+_local = threading.local()
+
+
+def _worker_clients(config: Dict[str, Any]) -> Tuple[Any, _Sink]:
+    """
+    DynamoDB resource and sink for the current worker
+
+    boto3 resources are not thread-safe and are slow to create, so each
+    worker thread (or process) builds its own once and reuses it for every
+    unit it runs.
+    """
+    key = (config['region'], config['endpoint_url'], config['destination'])
+    if getattr(_local, 'key', None) != key:
+        session = boto3.session.Session(region_name=config['region'])
+        _local.dynamodb = session.resource('dynamodb', endpoint_url=config['endpoint_url'])
+        _local.sink = _Sink(config['destination'], config['region'], config['endpoint_url'])
+        _local.key = key
+    return _local.dynamodb, _local.sink
+
+
+def _export_unit(config: Dict[str, Any], unit: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Export one scan segment or query slice, resuming from its checkpoint
+
+    Items are buffered per (stream, user, date) partition and flushed to
+    Parquet once `flush_rows` items are held or the unit is exhausted. The
+    checkpoint (pagination key and part number) is only advanced after a
+    flush, so a restart refetches at most the unflushed pages and overwrites
+    any partially written part.
+
+    Runs in a worker process or thread (see `_worker_clients`).
+    """
+    dynamodb, sink = _worker_clients(config)
+    table = dynamodb.Table(unit['table_name'])
+    spec = TABLES[unit['table']]
+    study_id = config['study_id']
+
+    checkpoint_key = f"_checkpoints/{unit['id']}.json"
+    saved = sink.read(checkpoint_key)
+    state = json.loads(saved) if saved else {
+        'unit': unit['id'], 'last_key': None, 'part': 0, 'rows': {}, 'done': False
+    }
+    if state['done']:
+        return state
+
+    request = _unit_request(unit, study_id)
+    if config['page_size']:
+        request['Limit'] = config['page_size']
+    if state['last_key']:
+        request['ExclusiveStartKey'] = {
+            name: _deserializer.deserialize(value) for name, value in state['last_key'].items()
+        }
+    read = table.query if 'index' in unit else table.scan
+
+    buffers: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+    buffered = 0
+    while True:
+        response = read(**request)
+        for item in response['Items']:
+            stream, user_id = stream_partition(unit['table'], item[spec['partition_key']])
+            millis = _item_millis(item, spec['sort_key'])
+            date = datetime.fromtimestamp(millis / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+            buffers[(stream, user_id, date)].append(item)
+        buffered += len(response['Items'])
+
+        last_key = response.get('LastEvaluatedKey')
+        if buffered >= config['flush_rows'] or not last_key:
+            written = _flush_partitions(
+                sink, study_id, unit, state['part'], buffers, config['row_group_size']
+            )
+            for stream, rows in written.items():
+                state['rows'][stream] = state['rows'].get(stream, 0) + rows
+            state['part'] += 1
+            state['last_key'] = (
+                {name: _serializer.serialize(value) for name, value in last_key.items()}
+                if last_key else None
+            )
+            state['done'] = not last_key
+            sink.write(checkpoint_key, json.dumps(state).encode())
+            buffers.clear()
+            buffered = 0
+
+        if not last_key:
+            return state
+        request['ExclusiveStartKey'] = last_key
+
+
+class StudyExporter:
+    """
+    Export every OSRP table of a study to Hive-partitioned Parquet
+
+    Tables are read with parallel scan segments filtered on `groupCode`, or,
+    when a time range is given and the table has a groupCode-timestamp GSI,
+    with parallel queries over equal time slices. Each unit of work runs in
+    its own worker process (or thread), holds at most `flush_rows` items in
+    memory and checkpoints after every flush, so an interrupted export is
+    resumed by running it again with the same export ID.
+
+    Output layout under the destination:
+        study={studyId}/stream={stream}/user={userId}/date={YYYY-MM-DD}/part-*.parquet
+        participants.csv
+        metadata.json
+        _checkpoints/
+
+    Example:
+        exporter = StudyExporter('depression_study_2026', bucket='osrp-data-dev')
+        metadata = exporter.run()
+        print(metadata['exportId'], metadata['rows'])
+    """
+
+    def __init__(
+        self,
+        study_id: str,
+        bucket: Optional[str] = None,
+        output: Optional[str] = None,
+        export_id: Optional[str] = None,
+        region: str = 'us-west-2',
+        sensor_table: str = 'SensorTimeSeries',
+        events_table: str = 'EventLog',
+        screenshots_table: str = 'ScreenshotMetadata',
+        ema_table: str = 'EMAResponse',
+        wearable_table: str = 'WearableData',
+        device_state_table: str = 'DeviceState',
+        participant_table: str = 'ParticipantStatus',
+        endpoint_url: Optional[str] = None,
+        segments: int = 8,
+        workers: Optional[int] = None,
+        processes: bool = True,
+        flush_rows: int = 100_000,
+        row_group_size: int = 64 * 1024,
+        page_size: Optional[int] = None
+    ):
+        """
+        Args:
+            study_id: Study (group) code to export
+            bucket: Data bucket; output goes to s3://bucket/exports/{studyId}/{exportId}/
+            output: Local directory to export to instead of S3; output goes
+                to {output}/{studyId}/{exportId}/
+            export_id: ID of a previous export to resume (new ID if omitted)
+            region: AWS region
+            sensor_table: Sensor time series table name
+            events_table: Event log table name
+            screenshots_table: Screenshot metadata table name
+            ema_table: EMA response table name
+            wearable_table: Wearable data table name
+            device_state_table: Device state table name
+            participant_table: Participant status table name
+            endpoint_url: Optional endpoint override for local DynamoDB/S3
+            segments: Scan segments (or query time slices) per table
+            workers: Concurrent workers (defaults to the CPU count)
+            processes: Run workers as processes (True) or threads (False)
+            flush_rows: Items each worker buffers before writing Parquet
+            row_group_size: Rows per Parquet row group
+            page_size: Optional item limit per scan/query request, to spread
+                read capacity use more evenly
+        """
+        if pq is None:
+            raise ImportError("StudyExporter requires pyarrow: pip install 'osrp[parquet]'")
+        if (bucket is None) == (output is None):
+            raise ValueError("Specify exactly one of bucket or output")
+
+        self.study_id = study_id
+        self.export_id = export_id or (
+            datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ') + '-' + uuid.uuid4().hex[:8]
+        )
+        if bucket is not None:
+            self.destination = f"s3://{bucket}/exports/{study_id}/{self.export_id}"
+        else:
+            self.destination = os.path.join(output, study_id, self.export_id)
+
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.tables = {
+            'sensor': sensor_table,
+            'screenshots': screenshots_table,
+            'events': events_table,
+            'ema': ema_table,
+            'wearable': wearable_table,
+            'device_state': device_state_table,
+        }
+        self.participant_table = participant_table
+        self.segments = segments
+        self.workers = workers or os.cpu_count() or 1
+        self.processes = processes
+        self.flush_rows = flush_rows
+        self.row_group_size = row_group_size
+        self.page_size = page_size
+
+        self.dynamodb = boto3.resource('dynamodb', region_name=region, endpoint_url=endpoint_url)
+        self.sink = _Sink(self.destination, region, endpoint_url)
+
+    def plan(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Split the export into independent units of work
+
+        Tables that do not exist in the account are skipped.
+
+        Args:
+            start_time: Optional start of the exported time range
+            end_time: Optional end of the exported time range
+
+        Returns:
+            List of units, each a scan segment or a time-slice query
+        """
+        if (start_time is None) != (end_time is None):
+            raise ValueError("Specify both start_time and end_time, or neither")
+        start_ms = _to_millis(start_time) if start_time else None
+        end_ms = _to_millis(end_time) if end_time else None
+
+        units = []
+        for name, table_name in self.tables.items():
+            try:
+                description = self.dynamodb.meta.client.describe_table(TableName=table_name)
+            except self.dynamodb.meta.client.exceptions.ResourceNotFoundException:
+                continue
+
+            indexes = {
+                index['IndexName']
+                for index in description['Table'].get('GlobalSecondaryIndexes', [])
+            }
+            use_index = (
+                start_ms is not None
+                and TIME_INDEX in indexes
+                and TABLES[name]['sort_key'] == 'timestamp'
+            )
+
+            for i in range(self.segments):
+                unit = {'table': name, 'table_name': table_name, 'start': start_ms, 'end': end_ms}
+                if use_index:
+                    # Equal, non-overlapping closed slices of [start_ms, end_ms]
+                    span = end_ms - start_ms + 1
+                    unit.update(
+                        id=f"{name}-query-{i:03d}",
+                        index=TIME_INDEX,
+                        start=start_ms + span * i // self.segments,
+                        end=start_ms + span * (i + 1) // self.segments - 1,
+                    )
+                    if unit['start'] > unit['end']:
+                        continue
+                else:
+                    unit.update(
+                        id=f"{name}-scan-{i:03d}", segment=i, total_segments=self.segments
+                    )
+                units.append(unit)
+
+        return units
+
+    def run(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run (or resume) the export
+
+        Args:
+            start_time: Optional start of the exported time range
+            end_time: Optional end of the exported time range
+            progress: Optional callback receiving each finished unit's state
+
+        Returns:
+            Export metadata, as written to metadata.json
+        """
+        units = self.plan(start_time, end_time)
+        config = {
+            'study_id': self.study_id,
+            'destination': self.destination,
+            'region': self.region,
+            'endpoint_url': self.endpoint_url,
+            'flush_rows': self.flush_rows,
+            'row_group_size': self.row_group_size,
+            'page_size': self.page_size,
+        }
+
+        executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        rows: Dict[str, int] = defaultdict(int)
+        with executor_class(max_workers=self.workers) as executor:
+            futures = [executor.submit(_export_unit, config, unit) for unit in units]
+            for future in as_completed(futures):
+                state = future.result()
+                for stream, count in state['rows'].items():
+                    rows[stream] += count
+                if progress is not None:
+                    progress(state)
+
+        participants = self._export_participants()
+
+        metadata = {
+            'studyId': self.study_id,
+            'exportId': self.export_id,
+            'createdAt': datetime.now(timezone.utc).isoformat(),
+            'startTime': start_time.isoformat() if start_time else None,
+            'endTime': end_time.isoformat() if end_time else None,
+            'partitioning': ['study', 'stream', 'user', 'date'],
+            'tables': sorted({unit['table_name'] for unit in units}),
+            'participants': participants,
+            'rows': dict(sorted(rows.items())),
+        }
+        self.sink.write('metadata.json', json.dumps(metadata, indent=2).encode())
+        return metadata
+
+    def _export_participants(self) -> int:
+        """Write participants.csv for the study; returns the participant count"""
+        table = self.dynamodb.Table(self.participant_table)
+        request: Dict[str, Any] = {
+            'FilterExpression': 'groupCode = :study',
+            'ExpressionAttributeValues': {':study': self.study_id},
+        }
+
+        items = []
+        try:
+            while True:
+                response = table.scan(**request)
+                items.extend(response['Items'])
+                if not response.get('LastEvaluatedKey'):
+                    break
+                request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except self.dynamodb.meta.client.exceptions.ResourceNotFoundException:
+            pass
+
+        df = pd.DataFrame(items)
+        for column in df.columns:
+            df[column] = df[column].map(_csv_value)
+        if not df.empty:
+            df = df.sort_values('userId')
+        self.sink.write('participants.csv', df.to_csv(index=False).encode())
+        return len(df)
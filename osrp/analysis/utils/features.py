@@ -0,0 +1,356 @@
+"""
+OSRP Feature Engine
+Incremental, vectorized windowed features over multi-modal sensor streams
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .timeseries import TimeSeries, window_edges
+
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def haversine(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray
+) -> np.ndarray:
+    """
+    Great-circle distance between coordinate arrays
+
+    Args:
+        lat1, lon1: Start coordinates in degrees
+        lat2, lon2: End coordinates in degrees
+
+    Returns:
+        Distances in meters (NaN where any input is NaN)
+    """
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class WindowAccumulator:
+    """
+    Running count, sum and sum of squares per time window
+
+    Windows are stored as sorted integer IDs (timestamp // window length) with
+    one row of moments per window. Adding a batch touches only the windows the
+    batch falls into, so appending live data never revisits history. Values
+    are shifted by the first observation before accumulating to keep the
+    one-pass variance numerically stable.
+    """
+
+    def __init__(self, channels: int = 1):
+        """
+        Args:
+            channels: Number of value columns accumulated per window
+        """
+        self.windows = np.empty(0, dtype=np.int64)
+        self.count = np.empty(0, dtype=np.int64)
+        self.sums = np.empty((0, channels))
+        self.sumsq = np.empty((0, channels))
+        self.shift: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+    def add(self, window_ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Fold a batch of observations into the per-window moments
+
+        Args:
+            window_ids: Window ID of each observation
+            values: Observations, shape (n,) or (n, channels); rows with NaN
+                are ignored
+
+        Returns:
+            Sorted IDs of the windows that changed
+        """
+        values = np.asarray(values, dtype=float).reshape(len(window_ids), -1)
+        valid = ~np.isnan(values).any(axis=1)
+        window_ids, values = np.asarray(window_ids)[valid], values[valid]
+        if len(window_ids) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        if self.shift is None:
+            self.shift = values[0].copy()
+        shifted = values - self.shift
+
+        ids, inverse = np.unique(window_ids, return_inverse=True)
+        count = np.bincount(inverse, minlength=len(ids))
+        sums = np.column_stack([
+            np.bincount(inverse, weights=column, minlength=len(ids)) for column in shifted.T
+        ])
+        sumsq = np.column_stack([
+            np.bincount(inverse, weights=column * column, minlength=len(ids))
+            for column in shifted.T
+        ])
+
+        # Update windows already present, then insert the new ones in order
+        position = np.searchsorted(self.windows, ids)
+        existing = position < len(self.windows)
+        existing[existing] = self.windows[position[existing]] == ids[existing]
+
+        target = position[existing]
+        self.count[target] += count[existing]
+        self.sums[target] += sums[existing]
+        self.sumsq[target] += sumsq[existing]
+
+        new = ~existing
+        if new.any():
+            at = position[new]
+            self.windows = np.insert(self.windows, at, ids[new])
+            self.count = np.insert(self.count, at, count[new])
+            self.sums = np.insert(self.sums, at, sums[new], axis=0)
+            self.sumsq = np.insert(self.sumsq, at, sumsq[new], axis=0)
+
+        return ids
+
+    def mean(self) -> np.ndarray:
+        """Per-window mean, shape (windows, channels)"""
+        return self.shift + self.sums / self.count[:, None]
+
+    def std(self) -> np.ndarray:
+        """Per-window sample standard deviation (NaN for single observations)"""
+        n = self.count[:, None].astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (self.sumsq - self.sums ** 2 / n) / (n - 1)
+        return np.sqrt(np.clip(var, 0.0, None))
+
+
+class ContextFeatureEngine:
+    """
+    Incremental context feature extraction
+
+    Keeps per-window running moments for accelerometer magnitude and mean
+    location, so feeding new readings only updates the windows they fall
+    into. The same engine can be primed from a cached cohort and then kept
+    current with live data without recomputing history.
+
+    Features per window:
+        - movement_mean / movement_std: accelerometer magnitude moments
+        - location_change: haversine distance in meters between the mean
+          locations of consecutive windows
+
+    Example:
+        engine = ContextFeatureEngine(window='5min')
+        engine.update({'accelerometer': accel_history, 'location': gps_history})
+        engine.update({'accelerometer': latest_accel})
+        features = engine.features()
+    """
+
+    def __init__(self, window: str = '5min'):
+        """
+        Args:
+            window: Window length as a pandas offset string; windows are
+                aligned to the Unix epoch (matching `resample` for lengths
+                that divide a day)
+        """
+        self.window = window
+        self.window_ns = pd.Timedelta(window).value
+        self.movement = WindowAccumulator(channels=1)
+        self.location = WindowAccumulator(channels=2)
+        self._watermarks: Dict[str, int] = {}
+        self._tz = None
+
+    def update(self, sensor_data: Dict[str, pd.DataFrame]) -> pd.DatetimeIndex:
+        """
+        Fold new sensor readings into the window state
+
+        Rows at or before the latest timestamp already seen for a stream are
+        skipped, so overlapping fetches of live data are not double counted.
+        Input frames are never modified.
+
+        Args:
+            sensor_data: Dict of {stream: DataFrame} with datetime index;
+                uses 'accelerometer' (x, y, z) and 'location'
+                (latitude, longitude)
+
+        Returns:
+            Start times of the windows that changed
+        """
+        changed = []
+
+        accel = self._new_rows('accelerometer', sensor_data, ['x', 'y', 'z'])
+        if accel is not None:
+            times, values = accel
+            magnitude = np.sqrt(np.einsum('ij,ij->i', values, values))
+            changed.append(self.movement.add(times // self.window_ns, magnitude))
+
+        location = self._new_rows('location', sensor_data, ['latitude', 'longitude'])
+        if location is not None:
+            times, values = location
+            changed.append(self.location.add(times // self.window_ns, values))
+
+        ids = np.unique(np.concatenate(changed)) if changed else np.empty(0, dtype=np.int64)
+        return self._index(ids)
+
+    def features(self) -> pd.DataFrame:
+        """
+        Materialize features for every window seen so far
+
+        Returns:
+            DataFrame indexed by window start, with empty windows between the
+            first and last observation as NaN
+        """
+        accumulators = [acc for acc in (self.movement, self.location) if len(acc)]
+        if not accumulators:
+            return pd.DataFrame()
+
+        first = min(acc.windows[0] for acc in accumulators)
+        last = max(acc.windows[-1] for acc in accumulators)
+        grid = np.arange(first, last + 1, dtype=np.int64)
+        features = pd.DataFrame(index=self._index(grid))
+
+        if len(self.movement):
+            rows = self.movement.windows - first
+            features['movement_mean'] = self._on_grid(grid, rows, self.movement.mean()[:, 0])
+            features['movement_std'] = self._on_grid(grid, rows, self.movement.std()[:, 0])
+
+        if len(self.location):
+            rows = self.location.windows - first
+            means = self.location.mean()
+            lat = self._on_grid(grid, rows, means[:, 0])
+            lon = self._on_grid(grid, rows, means[:, 1])
+            change = np.full(len(grid), np.nan)
+            change[1:] = haversine(lat[:-1], lon[:-1], lat[1:], lon[1:])
+            features['location_change'] = change
+
+        return features
+
+    def _new_rows(
+        self,
+        stream: str,
+        sensor_data: Dict[str, pd.DataFrame],
+        columns: list
+    ) -> Optional[tuple]:
+        """Timestamps (ns) and values of rows newer than the stream watermark"""
+        df = sensor_data.get(stream)
+        if df is None or df.empty or not all(col in df.columns for col in columns):
+            return None
+
+        index = pd.DatetimeIndex(df.index)
+        if self._tz is None and index.tz is not None:
+            self._tz = index.tz
+        times = index.as_unit('ns').asi8
+        values = df[columns].to_numpy(dtype=float)
+
+        watermark = self._watermarks.get(stream)
+        if watermark is not None:
+            newer = times > watermark
+            times, values = times[newer], values[newer]
+        if len(times) == 0:
+            return None
+
+        self._watermarks[stream] = int(times.max())
+        return times, values
+
+    def _index(self, ids: np.ndarray) -> pd.DatetimeIndex:
+        """Window start times for window IDs"""
+        index = pd.DatetimeIndex(ids * self.window_ns, name='timestamp')
+        if self._tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self._tz)
+        return index
+
+    @staticmethod
+    def _on_grid(grid: np.ndarray, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Scatter per-window values onto the contiguous window grid"""
+        out = np.full(len(grid), np.nan)
+        out[rows] = values
+        return out
+
+
+def window_features(
+    daily_data: Dict[str, pd.DataFrame],
+    date: Union[datetime, pd.Timestamp],
+    window: str = '1h',
+    user_id: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Per-window model features of one participant-day
+
+    The feature engineering step of the ML pipeline notebook: every stream
+    is reduced over all windows of the day at once with `TimeSeries`
+    instead of being masked once per window.
+
+    Features per window:
+        - hour_of_day / day_of_week
+        - screen_count / unique_apps: screenshots and distinct apps
+        - movement_mean / movement_std: accelerometer magnitude (0 without readings)
+        - hr_mean / hr_std / hr_max: heart rate
+        - steps: step count
+        - label / has_label: high stress (stress_level >= 4) in the latest
+          EMA of the window, NaN / False without one
+
+    Args:
+        daily_data: Frames as returned by `OSRPData.get_daily_summary`
+        date: Day (midnight) the frames cover
+        window: Window length as a pandas offset string
+        user_id: Optional participant ID added as a column
+
+    Returns:
+        DataFrame indexed by window start
+    """
+    start_time = pd.Timestamp(date)
+    edges = window_edges(start_time, start_time + pd.Timedelta(days=1), window)
+
+    screenshots = TimeSeries.from_frame(daily_data['screenshots'])
+    accelerometer = TimeSeries.from_frame(daily_data['accelerometer'])
+    heart_rate = TimeSeries.from_frame(daily_data['heart_rate'])
+    steps = TimeSeries.from_frame(daily_data['steps'])
+    ema = TimeSeries.from_frame(daily_data['ema_responses'])
+
+    windows = pd.DataFrame(index=pd.to_datetime(edges[:-1], unit='ms'))
+    windows['user_id'] = user_id
+    windows['timestamp'] = windows.index
+    windows['hour_of_day'] = windows.index.hour
+    windows['day_of_week'] = windows.index.dayofweek
+
+    # Screen activity features
+    windows['screen_count'] = screenshots.reduce(edges)
+    windows['unique_apps'] = (
+        screenshots.reduce(edges, 'appName', 'nunique') if 'appName' in screenshots else 0
+    )
+
+    # Movement features
+    if all(c in accelerometer for c in ['x', 'y', 'z']):
+        x, y, z = (accelerometer[c].astype(float) for c in ['x', 'y', 'z'])
+        movement = accelerometer.assign(magnitude=np.sqrt(x**2 + y**2 + z**2))
+        windows['movement_mean'] = movement.reduce(edges, 'magnitude', 'mean')
+        windows['movement_std'] = movement.reduce(edges, 'magnitude', 'std')
+        empty = movement.reduce(edges) == 0
+        windows.loc[empty, ['movement_mean', 'movement_std']] = 0
+    else:
+        windows['movement_mean'] = 0
+        windows['movement_std'] = 0
+
+    # Heart rate features
+    for name, how in [('hr_mean', 'mean'), ('hr_std', 'std'), ('hr_max', 'max')]:
+        windows[name] = (
+            heart_rate.reduce(edges, 'heartRate', how) if 'heartRate' in heart_rate else np.nan
+        )
+
+    windows['steps'] = steps.reduce(edges, 'steps', 'sum') if 'steps' in steps else 0
+
+    # Label from the most recent EMA stress rating (1-5) in the window
+    if 'stress_level' in ema:
+        stress = ema.reduce(edges, 'stress_level', 'last')
+        labeled = ~np.isnan(stress)
+        windows['label'] = np.where(labeled, stress >= 4, np.nan)
+        windows['has_label'] = labeled
+    else:
+        windows['label'] = np.nan
+        windows['has_label'] = False
+
+    return windows
@@ -0,0 +1,205 @@
+"""
+OSRP Parquet Backend
+Serves the OSRPData getters from a Hive-partitioned Parquet dataset, such
+as one written by `osrp export`, instead of DynamoDB
+"""
+
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from .data_access import TABLES, StorageBackend, _sort_by_time, _to_millis
+from .export import JSON_COLUMNS_KEY, stream_partition
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    ds = None
+    pafs = None
+
+
+def _utc_date(millis: int) -> str:
+    """UTC calendar date of a millisecond timestamp, as used for partitions"""
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def _filesystem(
+    root: str,
+    region: str = 'us-west-2',
+    endpoint_url: Optional[str] = None,
+    filesystem: Optional[Any] = None
+) -> Tuple[Any, str]:
+    """pyarrow filesystem and path for a local directory or s3:// URI"""
+    if filesystem is None:
+        if root.startswith('s3://'):
+            filesystem = pafs.S3FileSystem(region=region, endpoint_override=endpoint_url)
+            root = root[len('s3://'):]
+        else:
+            filesystem = pafs.LocalFileSystem()
+    return filesystem, root.rstrip('/')
+
+
+def _decode_json(value: Any) -> Any:
+    """Decode a JSON column value, with numbers as Decimal like boto3 returns them"""
+    if not isinstance(value, str):
+        return value  # missing
+    return json.loads(value, parse_float=Decimal, parse_int=Decimal)
+
+
+class ParquetBackend(StorageBackend):
+    """
+    Reads partitions from a study/stream/user/date Parquet dataset
+
+    Predicates are pushed down as far as the layout allows: the participant
+    and the days of the time range select partition directories, the exact
+    time range is evaluated against row group statistics of the `timestamp`
+    column, and only requested columns are decoded. Frames are identical to
+    those the DynamoDB backend returns for the same data.
+
+    The file listing of each stream is cached on first use; create a new
+    backend to pick up files written later.
+
+    Example:
+        backend = ParquetBackend('s3://osrp-data-dev/exports/my_study/20260115T120000Z-1a2b3c4d')
+        data = OSRPData(backend=backend)
+        accel = data.get_sensor_data('user123', 'accelerometer', start, end)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        study_id: Optional[str] = None,
+        region: str = 'us-west-2',
+        endpoint_url: Optional[str] = None,
+        filesystem: Optional[Any] = None
+    ):
+        """
+        Args:
+            root: Dataset root (local path or s3:// URI) holding study=... directories
+            study_id: Study to read; may be omitted if the root holds one study
+            region: AWS region for s3:// roots
+            endpoint_url: Optional S3 endpoint override
+            filesystem: Optional pyarrow filesystem; `root` is then a path on it
+        """
+        if pa is None:
+            raise ImportError("ParquetBackend requires pyarrow: pip install 'osrp[parquet]'")
+
+        self.filesystem, self.root = _filesystem(root, region, endpoint_url, filesystem)
+        self.study_id = study_id or self._find_study()
+        self._datasets: Dict[str, Any] = {}
+
+    def read(
+        self,
+        table: str,
+        partition_value: str,
+        start_time: datetime,
+        end_time: datetime,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        spec = TABLES[table]
+        stream, user_id = stream_partition(table, partition_value)
+        start_ms, end_ms = _to_millis(start_time), _to_millis(end_time)
+
+        dataset = self._dataset(stream)
+        if dataset is None:
+            return pd.DataFrame()
+
+        # Partition pruning: one participant, only the days in range
+        fragments = sorted(
+            dataset.get_fragments(filter=(
+                (ds.field('user') == user_id)
+                & (ds.field('date') >= _utc_date(start_ms))
+                & (ds.field('date') <= _utc_date(end_ms))
+            )),
+            key=lambda fragment: fragment.path
+        )
+        if not fragments:
+            return pd.DataFrame()
+
+        schemas = [fragment.physical_schema for fragment in fragments]
+        schema = pa.unify_schemas(schemas, promote_options='permissive')
+        json_columns = set()
+        for fragment_schema in schemas:
+            json_columns.update(json.loads((fragment_schema.metadata or {}).get(
+                JSON_COLUMNS_KEY, b'[]'
+            )))
+
+        read_columns = None
+        if columns is not None:
+            wanted = ['timestamp', spec['sort_key'], *columns]
+            read_columns = [name for name in dict.fromkeys(wanted) if name in schema.names]
+
+        # Row group pruning on the exact time range via column statistics
+        timestamp_type = schema.field('timestamp').type
+        start, end = (
+            pa.scalar(millis, pa.timestamp('ms')).cast(timestamp_type)
+            for millis in (start_ms, end_ms)
+        )
+        subset = ds.dataset(
+            [fragment.path for fragment in fragments],
+            schema=schema,
+            format='parquet',
+            filesystem=self.filesystem
+        )
+        df = subset.to_table(
+            columns=read_columns,
+            filter=(ds.field('timestamp') >= start) & (ds.field('timestamp') <= end)
+        ).to_pandas()
+
+        if df.empty:
+            return pd.DataFrame()
+
+        df = _sort_by_time(df.set_index('timestamp'), spec['sort_key'])
+
+        for column in json_columns.intersection(df.columns):
+            df[column] = df[column].map(_decode_json)
+
+        if columns is not None:
+            df = df.reindex(columns=list(columns))
+
+        return df
+
+    def source(self, table: str) -> Optional[str]:
+        return f"parquet:{self.filesystem.type_name}:{self.root}:{self.study_id}:{table}"
+
+    def _find_study(self) -> str:
+        """The single study=... directory under the root"""
+        selector = pafs.FileSelector(self.root)
+        studies = [
+            unquote(info.base_name[len('study='):])
+            for info in self.filesystem.get_file_info(selector)
+            if info.type == pafs.FileType.Directory and info.base_name.startswith('study=')
+        ]
+        if len(studies) != 1:
+            raise ValueError(
+                f"Expected one study under {self.root}, found {len(studies)}; pass study_id"
+            )
+        return studies[0]
+
+    def _dataset(self, stream: str) -> Optional[Any]:
+        """Dataset of one stream partitioned by user and date, or None if absent"""
+        if stream not in self._datasets:
+            path = (
+                f"{self.root}/study={quote(self.study_id, safe='')}"
+                f"/stream={quote(stream, safe='')}"
+            )
+            if self.filesystem.get_file_info(path).type != pafs.FileType.Directory:
+                self._datasets[stream] = None
+            else:
+                self._datasets[stream] = ds.dataset(
+                    path,
+                    format='parquet',
+                    filesystem=self.filesystem,
+                    partitioning=ds.partitioning(
+                        pa.schema([('user', pa.string()), ('date', pa.string())]),
+                        flavor='hive'
+                    )
+                )
+        return self._datasets[stream]
@@ -0,0 +1,330 @@
+"""
+OSRP Plotting
+Visual-fidelity downsampling of long time series for Plotly traces
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Points per trace after decimation; about two per horizontal pixel of a
+# full-width notebook chart
+DEFAULT_MAX_POINTS = 4000
+
+# Traces with more points than this are drawn with WebGL (go.Scattergl)
+WEBGL_THRESHOLD = 10_000
+
+METHODS = ('minmax', 'lttb')
+
+
+def _positions(x: pd.Index) -> np.ndarray:
+    """Numeric x positions (datetimes as int64 in the index unit), relative to the first"""
+    if isinstance(x, pd.DatetimeIndex):
+        values = x.asi8.astype(float)
+    else:
+        values = np.asarray(x, dtype=float)
+    return values - values[0] if len(values) else values
+
+
+def _first_per_bucket(positions: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """First of the sorted positions in every bucket"""
+    buckets = labels[positions]
+    return positions[np.r_[True, buckets[1:] != buckets[:-1]]] if len(positions) else positions
+
+
+def minmax_indices(x: pd.Index, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of every pixel column
+
+    The x range is split into n_out / 2 equal-width buckets; keeping the
+    extremes of each preserves spikes and the visual envelope exactly.
+    Runs in O(n) with `reduceat`.
+
+    Args:
+        x: Sorted x values
+        y: Values (NaN is skipped)
+        n_out: Maximum number of points to keep
+
+    Returns:
+        Sorted row indices
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    positions = _positions(x)
+    buckets = max(n_out // 2 - 1, 1)
+    if positions[-1] > 0:
+        edges = np.linspace(0, positions[-1], buckets + 1)[1:-1]
+        starts = np.unique(np.r_[0, np.searchsorted(positions, edges, 'left')])
+    else:
+        starts = np.linspace(0, n, buckets, endpoint=False).astype(np.int64)
+    starts = starts[starts < n]
+
+    labels = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    lowest = np.fmin.reduceat(y, starts)[labels]
+    highest = np.fmax.reduceat(y, starts)[labels]
+
+    keep = np.r_[
+        0, n - 1,
+        _first_per_bucket(np.flatnonzero(y == lowest), labels),
+        _first_per_bucket(np.flatnonzero(y == highest), labels),
+    ]
+    return np.unique(keep)
+
+
+def lttb_indices(x: pd.Index, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection
+
+    Keeps the first and last points and, from each of n_out - 2 equal-count
+    buckets, the point forming the largest triangle with the previously
+    kept point and the mean of the next bucket. Preserves the shape of
+    smooth signals better than min/max with fewer points.
+
+    Args:
+        x: Sorted x values
+        y: Values without NaN
+        n_out: Number of points to keep (at least 3)
+
+    Returns:
+        Sorted row indices
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    positions = _positions(x)
+    y = np.asarray(y, dtype=float)
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    # Mean point of every bucket, then the final point as the last "next bucket"
+    counts = np.diff(bounds)
+    mean_x = np.r_[np.add.reduceat(positions[:n - 1], bounds[:-1])[1:] / counts[1:],
+                   positions[-1]]
+    mean_y = np.r_[np.add.reduceat(y[:n - 1], bounds[:-1])[1:] / counts[1:], y[-1]]
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    kept = 0
+    for bucket in range(n_out - 2):
+        lo, hi = bounds[bucket], bounds[bucket + 1]
+        ax, ay = positions[kept], y[kept]
+        area = np.abs(
+            (ax - mean_x[bucket]) * (y[lo:hi] - ay)
+            - (ax - positions[lo:hi]) * (mean_y[bucket] - ay)
+        )
+        kept = lo + int(np.argmax(area))
+        out[bucket + 1] = kept
+    return out
+
+
+def decimate(
+    x: Any,
+    y: Any,
+    max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    method: str = 'minmax'
+) -> Tuple[pd.Index, np.ndarray]:
+    """
+    Reduce a series to at most `max_points` visually representative points
+
+    Args:
+        x: Sorted x values (e.g. a DatetimeIndex)
+        y: Values
+        max_points: Maximum points to keep; None keeps every point
+        method: 'minmax' (per-pixel extremes, for spiky signals such as
+            accelerometer magnitude) or 'lttb' (shape-preserving, for
+            smooth signals such as heart rate)
+
+    Returns:
+        (x, y) of the kept points
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown decimation method '{method}'; expected one of {METHODS}")
+
+    x = pd.Index(x)
+    y = np.asarray(y, dtype=float)
+    if len(x) != len(y):
+        raise ValueError(f"x has {len(x)} values but y has {len(y)}")
+
+    if method == 'lttb':
+        valid = ~np.isnan(y)
+        if not valid.all():
+            x, y = x[valid], y[valid]
+
+    if max_points is None or len(y) <= max_points:
+        return x, y
+
+    select = minmax_indices if method == 'minmax' else lttb_indices
+    indices = select(x, y, max_points)
+    return x.take(indices), y[indices]
+
+
+def scatter(
+    x: Any,
+    y: Any,
+    max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    method: str = 'minmax',
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    **kwargs: Any
+) -> Any:
+    """
+    Decimated Plotly scatter trace, using WebGL when it stays large
+
+    Args:
+        x: Sorted x values
+        y: Values
+        max_points: Maximum points to draw; None draws every point
+        method: 'minmax' or 'lttb', see `decimate`
+        webgl_threshold: Draw with go.Scattergl above this many points
+        **kwargs: Passed to the trace (name, line, mode, ...)
+
+    Returns:
+        go.Scatter or go.Scattergl
+    """
+    x, y = decimate(x, y, max_points, method)
+    trace = go.Scattergl if len(y) > webgl_threshold else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+
+class ResampledFigure:
+    """
+    Plotly figure whose traces are re-decimated for the visible x range
+
+    Full-resolution data stays in Python; each trace only ever holds about
+    `max_points` points. `update_range` re-selects points for a zoomed
+    range (e.g. from a marimo slider), and `widget()` returns a
+    FigureWidget that does the same whenever the user zooms or pans.
+
+    Example:
+        fig = ResampledFigure(make_subplots(rows=2, cols=1, shared_xaxes=True))
+        fig.add_trace(accel.index, magnitude, row=1, col=1, name='Movement')
+        fig.add_trace(hr.index, hr['heartRate'], method='lttb', row=2, col=1)
+        fig.update_range(start, start + timedelta(hours=1))
+        fig.figure
+    """
+
+    def __init__(
+        self,
+        figure: Optional[Any] = None,
+        max_points: Optional[int] = DEFAULT_MAX_POINTS,
+        webgl_threshold: int = WEBGL_THRESHOLD
+    ):
+        """
+        Args:
+            figure: Figure to add traces to (e.g. from make_subplots)
+            max_points: Points per trace after decimation
+            webgl_threshold: Draw with go.Scattergl above this many points
+        """
+        self.figure = figure if figure is not None else go.Figure()
+        self.max_points = max_points
+        self.webgl_threshold = webgl_threshold
+        self._series: List[Dict[str, Any]] = []
+
+    def add_trace(
+        self,
+        x: Any,
+        y: Any,
+        method: str = 'minmax',
+        row: Optional[int] = None,
+        col: Optional[int] = None,
+        **kwargs: Any
+    ) -> None:
+        """
+        Add a decimated trace, keeping the full series for later zooms
+
+        Args:
+            x: Sorted x values
+            y: Values
+            method: 'minmax' or 'lttb', see `decimate`
+            row: Optional subplot row
+            col: Optional subplot column
+            **kwargs: Passed to the trace
+        """
+        x = pd.Index(x)
+        y = np.asarray(y, dtype=float)
+        self.figure.add_trace(
+            scatter(x, y, self.max_points, method, self.webgl_threshold, **kwargs),
+            row=row, col=col
+        )
+        trace = self.figure.data[-1]
+        self._series.append({
+            'trace': len(self.figure.data) - 1,
+            'axis': trace.xaxis or 'x',
+            'x': x,
+            'y': y,
+            'method': method,
+        })
+
+    def update_range(self, start: Any = None, end: Any = None, axis: Optional[str] = None) -> None:
+        """
+        Re-decimate traces for an x range and zoom the figure to it
+
+        Args:
+            start: Range start (None for the start of the data)
+            end: Range end (None for the end of the data)
+            axis: Optional x axis ('x', 'x2', ...) to update; default all
+        """
+        self._apply(self.figure, start, end, axis)
+        if start is not None and end is not None:
+            if axis is None:
+                self.figure.update_xaxes(range=[start, end])
+            else:
+                self.figure.layout[self._layout_axis(axis)].range = [start, end]
+
+    def widget(self) -> Any:
+        """
+        FigureWidget that re-decimates its traces on every zoom and pan
+
+        Returns:
+            go.FigureWidget (requires anywidget, or ipywidgets on Plotly 5)
+        """
+        try:
+            widget = go.FigureWidget(self.figure)
+        except ImportError as e:
+            raise ImportError(
+                f"ResampledFigure.widget requires anywidget: pip install anywidget ({e})"
+            )
+
+        axes = sorted({series['axis'] for series in self._series})
+
+        def on_range(layout: Any, *ranges: Any) -> None:
+            with widget.batch_update():
+                for axis, visible in zip(axes, ranges):
+                    start, end = visible if visible else (None, None)
+                    self._apply(widget, start, end, axis)
+
+        widget.layout.on_change(on_range, *[f'{self._layout_axis(axis)}.range' for axis in axes])
+        return widget
+
+    def _apply(self, figure: Any, start: Any, end: Any, axis: Optional[str]) -> None:
+        """Replace trace data with the decimated points within [start, end]"""
+        for series in self._series:
+            if axis is not None and series['axis'] != axis:
+                continue
+            x = series['x']
+            lo = 0 if start is None else x.searchsorted(_like(x, start), 'left')
+            hi = len(x) if end is None else x.searchsorted(_like(x, end), 'right')
+            # One point either side keeps the line running to the edges
+            lo, hi = max(lo - 1, 0), min(hi + 1, len(x))
+            visible_x, visible_y = decimate(
+                x[lo:hi], series['y'][lo:hi], self.max_points, series['method']
+            )
+            trace = figure.data[series['trace']]
+            trace.x, trace.y = visible_x, visible_y
+
+    @staticmethod
+    def _layout_axis(axis: str) -> str:
+        """Layout property of a trace axis reference ('x2' -> 'xaxis2')"""
+        return 'xaxis' + axis[1:]
+
+
+def _like(x: pd.Index, value: Any) -> Any:
+    """Convert a range bound (e.g. a Plotly date string) to the index type"""
+    if isinstance(x, pd.DatetimeIndex):
+        value = pd.Timestamp(value)
+        if x.tz is not None and value.tzinfo is None:
+            value = value.tz_localize(x.tz)
+    return value
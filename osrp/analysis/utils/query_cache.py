@@ -0,0 +1,269 @@
+"""
+OSRP Query Cache
+In-process memoization of DynamoDB query results with time-range coverage
+tracking, so overlapping notebook queries only fetch the uncovered gaps
+"""
+
+import bisect
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Collection, Dict, Hashable, List, Optional, Tuple
+
+# Closed interval of Unix timestamps in milliseconds
+Interval = Tuple[int, int]
+
+# Seconds before now after which data may still arrive and is not cached
+DEFAULT_INGESTION_LAG = 300.0
+
+
+def _estimate_size(value: Any) -> int:
+    """Rough in-memory footprint of a deserialized DynamoDB value in bytes"""
+    if isinstance(value, dict):
+        return 64 + sum(len(k) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 56 + sum(_estimate_size(v) for v in value)
+    if isinstance(value, (str, bytes)):
+        return 49 + len(value)
+    if isinstance(value, Decimal):
+        return 104
+    return 28
+
+
+class _CacheEntry:
+    """Items cached for one (table, partition key) pair, ordered by time"""
+
+    __slots__ = ('intervals', 'times', 'items', 'size')
+
+    def __init__(self):
+        self.intervals: List[List[int]] = []
+        self.times: List[int] = []
+        self.items: List[Dict[str, Any]] = []
+        self.size = 0
+
+    def missing(self, start: int, end: int) -> List[Interval]:
+        """Sub-intervals of [start, end] not covered yet"""
+        gaps = []
+        cursor = start
+        for lo, hi in self.intervals:
+            if hi < cursor:
+                continue
+            if lo > end:
+                break
+            if lo > cursor:
+                gaps.append((cursor, lo - 1))
+            cursor = max(cursor, hi + 1)
+            if cursor > end:
+                return gaps
+        gaps.append((cursor, end))
+        return gaps
+
+    def cover(self, start: int, end: int) -> None:
+        """Mark [start, end] as covered, merging adjacent intervals"""
+        merged = []
+        for lo, hi in self.intervals:
+            if hi < start - 1 or lo > end + 1:
+                merged.append([lo, hi])
+            else:
+                start, end = min(start, lo), max(end, hi)
+        merged.append([start, end])
+        merged.sort()
+        self.intervals = merged
+
+    def insert(self, times: List[int], items: List[Dict[str, Any]]) -> int:
+        """
+        Insert items fetched for one gap
+
+        Gaps never overlap covered intervals, so the new (sorted) items always
+        slot into the existing arrays at a single position.
+
+        Returns:
+            Estimated number of bytes added
+        """
+        if not items:
+            return 0
+        order = sorted(range(len(times)), key=times.__getitem__)
+        times = [times[i] for i in order]
+        items = [items[i] for i in order]
+
+        position = bisect.bisect_left(self.times, times[0])
+        self.times[position:position] = times
+        self.items[position:position] = items
+
+        added = sum(_estimate_size(item) + 8 for item in items)
+        self.size += added
+        return added
+
+    def select(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Cached items with timestamps in [start, end]"""
+        lo = bisect.bisect_left(self.times, start)
+        hi = bisect.bisect_right(self.times, end)
+        return self.items[lo:hi]
+
+
+class QueryCache:
+    """
+    LRU cache of query results keyed by (table, partition key)
+
+    Each entry remembers which closed millisecond intervals have already been
+    fetched. A lookup returns the uncovered gaps so the caller only queries
+    DynamoDB for data it has never seen, and sub-ranges of covered intervals
+    are served straight from memory. Entries are evicted least recently used
+    first once the estimated byte budget (or optional entry limit) is exceeded.
+
+    Data keeps arriving for recent times, so coverage stops at the settled
+    horizon, `ingestion_lag` seconds before now: items newer than that are
+    returned by add() but not cached, and are queried again on the next call.
+
+    Example:
+        cache = QueryCache(max_bytes=256 * 1024 ** 2)
+        data = OSRPData(region='us-west-2', cache=cache)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024 ** 2,
+        max_entries: Optional[int] = None,
+        ingestion_lag: float = DEFAULT_INGESTION_LAG,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            max_bytes: Approximate memory budget for cached items
+            max_entries: Optional cap on the number of cached partitions
+            ingestion_lag: Seconds before now after which data may still arrive
+                (delayed uploads, offline queues) and is never cached
+            clock: Current Unix time in seconds
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ingestion_lag = ingestion_lag
+        self.clock = clock
+        self._entries: 'OrderedDict[Hashable, _CacheEntry]' = OrderedDict()
+        self._size = 0
+
+        # Lookups served entirely from memory vs. needing a fetch
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        """Estimated bytes held by the cache"""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def missing(self, key: Hashable, start: int, end: int) -> List[Interval]:
+        """
+        Find the parts of a time range that still need to be fetched
+
+        Args:
+            key: Cache key, typically (table name, partition key value)
+            start: Range start in milliseconds (inclusive)
+            end: Range end in milliseconds (inclusive)
+
+        Returns:
+            Sorted list of uncovered (start, end) intervals
+        """
+        entry = self._entries.get(key)
+        gaps = entry.missing(start, end) if entry else [(start, end)]
+
+        if gaps:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return gaps
+
+    def add(
+        self,
+        key: Hashable,
+        start: int,
+        end: int,
+        items: List[Dict[str, Any]],
+        times: List[int],
+        keep: Collection[Hashable] = ()
+    ) -> List[Dict[str, Any]]:
+        """
+        Store the complete result of querying one uncovered interval
+
+        Only the part up to the settled horizon is covered and stored.
+
+        Args:
+            key: Cache key, typically (table name, partition key value)
+            start: Queried range start in milliseconds (inclusive)
+            end: Queried range end in milliseconds (inclusive)
+            items: Every item the query returned
+            times: Timestamp in milliseconds of each item
+            keep: Other keys not to evict, e.g. the other shards of a read
+                whose cached items are yet to be collected
+
+        Returns:
+            Items past the settled horizon, ordered by timestamp; they come
+            after every cached item of the range and are not cached
+        """
+        settled = min(end, int((self.clock() - self.ingestion_lag) * 1000))
+        recent = [(t, i) for i, t in enumerate(times) if t > settled]
+        if recent:
+            recent.sort()
+            fresh = [items[i] for _, i in recent]
+            kept = [(t, item) for t, item in zip(times, items) if t <= settled]
+            times = [t for t, _ in kept]
+            items = [item for _, item in kept]
+        else:
+            fresh = []
+        if settled < start:
+            return fresh
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _CacheEntry()
+
+        self._size += entry.insert(times, items)
+        entry.cover(start, settled)
+        self._entries.move_to_end(key)
+        self._evict(keep={key, *keep})
+        return fresh
+
+    def get(self, key: Hashable, start: int, end: int) -> List[Dict[str, Any]]:
+        """
+        Return cached items for a covered time range
+
+        Args:
+            key: Cache key, typically (table name, partition key value)
+            start: Range start in milliseconds (inclusive)
+            end: Range end in milliseconds (inclusive)
+
+        Returns:
+            Items ordered by timestamp (empty if the key was evicted)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return []
+        self._entries.move_to_end(key)
+        return entry.select(start, end)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single partition from the cache"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def clear(self) -> None:
+        """Drop all cached data and reset counters"""
+        self._entries.clear()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self, keep: Collection[Hashable]) -> None:
+        """Evict least recently used entries, other than `keep`, until within budget"""
+        for key in [key for key in self._entries if key not in keep]:
+            if self._size <= self.max_bytes and (
+                self.max_entries is None or len(self._entries) <= self.max_entries
+            ):
+                break
+            self._size -= self._entries.pop(key).size
@@ -0,0 +1,353 @@
+"""
+OSRP Rollups
+Multi-resolution count/sum/sumsq/min/max rollups of numeric sensor streams,
+stored under processed/rollups/ so dashboards can plot long time ranges
+without reading full-rate data
+"""
+
+import io
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from .data_access import _to_millis
+from .parquet_backend import _filesystem
+
+try:
+    import pyarrow as pa
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pafs = None
+    pq = None
+
+# Stored levels, finest first, in milliseconds
+LEVELS = {
+    '1s': 1_000,
+    '1min': 60_000,
+    '15min': 900_000,
+    '1h': 3_600_000,
+}
+
+STATS = ('count', 'sum', 'sumsq', 'min', 'max')
+
+DAY_MS = 86_400_000
+
+
+def _resolution_ms(resolution: Union[str, timedelta, pd.Timedelta]) -> int:
+    """Resolution as whole milliseconds"""
+    millis = pd.Timedelta(resolution).value // 1_000_000
+    if millis <= 0:
+        raise ValueError(f"Invalid resolution: {resolution}")
+    return millis
+
+
+def select_level(resolution: Union[str, timedelta, pd.Timedelta]) -> str:
+    """
+    Coarsest stored level that can be combined into a requested resolution
+
+    Args:
+        resolution: Requested bucket length (e.g. '5min')
+
+    Returns:
+        Key of LEVELS whose buckets evenly divide the requested resolution
+    """
+    millis = _resolution_ms(resolution)
+    levels = [level for level, size in LEVELS.items() if size <= millis and millis % size == 0]
+    if not levels:
+        raise ValueError(
+            f"Resolution {resolution} is finer than the finest rollup ({next(iter(LEVELS))})"
+        )
+    return levels[-1]
+
+
+def _value_columns(df: pd.DataFrame) -> List[str]:
+    """Numeric (non-boolean) columns of a raw stream"""
+    return [
+        column for column in df.columns
+        if pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column])
+    ]
+
+
+def _bucket_starts(keys: np.ndarray) -> np.ndarray:
+    """Positions where a sorted key array changes value"""
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else keys[:0]
+
+
+def rollup_frame(df: pd.DataFrame, resolution_ms: int = LEVELS['1s']) -> pd.DataFrame:
+    """
+    Reduce a raw stream to per-bucket statistics
+
+    Every numeric column `c` becomes `c_count`, `c_sum`, `c_sumsq`, `c_min`
+    and `c_max`; streams with x, y and z also get `magnitude`. Buckets are
+    aligned to the Unix epoch and only buckets with readings are kept.
+    Missing values are skipped.
+
+    Args:
+        df: Frame with datetime index as returned by the OSRPData getters
+        resolution_ms: Bucket length in milliseconds
+
+    Returns:
+        DataFrame indexed by bucket start ('timestamp')
+    """
+    columns = _value_columns(df)
+    if df.empty or not columns:
+        return pd.DataFrame()
+
+    values = {column: df[column].to_numpy(dtype=float) for column in columns}
+    if all(axis in values for axis in ('x', 'y', 'z')):
+        x, y, z = values['x'], values['y'], values['z']
+        values['magnitude'] = np.sqrt(x * x + y * y + z * z)
+
+    times = pd.DatetimeIndex(df.index).as_unit('ns').asi8 // 1_000_000
+    order = np.argsort(times, kind='stable')
+    buckets = times[order] // resolution_ms
+    starts = _bucket_starts(buckets)
+
+    out = {}
+    for column, column_values in values.items():
+        column_values = column_values[order]
+        valid = ~np.isnan(column_values)
+        present = np.where(valid, column_values, 0.0)
+        out[f'{column}_count'] = np.add.reduceat(valid.astype(np.int64), starts)
+        out[f'{column}_sum'] = np.add.reduceat(present, starts)
+        out[f'{column}_sumsq'] = np.add.reduceat(present * present, starts)
+        out[f'{column}_min'] = np.fmin.reduceat(column_values, starts)
+        out[f'{column}_max'] = np.fmax.reduceat(column_values, starts)
+
+    return pd.DataFrame(out, index=_index(buckets[starts] * resolution_ms))
+
+
+def combine(rollup: pd.DataFrame, resolution_ms: int) -> pd.DataFrame:
+    """
+    Merge rollup buckets into coarser buckets
+
+    Args:
+        rollup: Frame from `rollup_frame` (or a stored level)
+        resolution_ms: Coarser bucket length, a multiple of the input's
+
+    Returns:
+        Rollup frame at the coarser resolution
+    """
+    if rollup.empty:
+        return rollup
+
+    times = pd.DatetimeIndex(rollup.index).as_unit('ns').asi8 // 1_000_000
+    buckets = times // resolution_ms
+    starts = _bucket_starts(buckets)
+
+    out = {}
+    for name in rollup.columns:
+        stat = name.rsplit('_', 1)[1]
+        values = rollup[name].to_numpy()
+        if stat == 'min':
+            out[name] = np.fmin.reduceat(values, starts)
+        elif stat == 'max':
+            out[name] = np.fmax.reduceat(values, starts)
+        else:
+            out[name] = np.add.reduceat(values, starts)
+
+    return pd.DataFrame(out, index=_index(buckets[starts] * resolution_ms))
+
+
+def _index(millis: np.ndarray) -> pd.DatetimeIndex:
+    """Bucket start index in the frame convention of the OSRPData getters"""
+    return pd.DatetimeIndex(pd.to_datetime(millis, unit='ms'), name='timestamp')
+
+
+def _with_means(rollup: pd.DataFrame) -> pd.DataFrame:
+    """Add `c_mean` for every rolled-up column"""
+    for name in [name for name in rollup.columns if name.endswith('_count')]:
+        column = name[:-len('_count')]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rollup[f'{column}_mean'] = rollup[f'{column}_sum'] / rollup[name]
+    return rollup
+
+
+def read_stream(
+    data: Any,
+    stream: str,
+    user_id: str,
+    start: datetime,
+    end: datetime
+) -> pd.DataFrame:
+    """
+    Read raw readings of a numeric stream through OSRPData
+
+    Args:
+        data: OSRPData instance
+        stream: 'sensor_{type}' or 'wearable_{source}', as in exports
+        user_id: Participant ID
+        start: Start timestamp (inclusive)
+        end: End timestamp (inclusive)
+
+    Returns:
+        DataFrame with datetime index
+    """
+    kind, _, name = stream.partition('_')
+    if kind == 'sensor' and name:
+        return data.get_sensor_data(user_id, name, start, end)
+    if kind == 'wearable' and name:
+        return data.get_wearable_data(user_id, name, start, end)
+    raise ValueError(f"Unsupported rollup stream '{stream}'; expected sensor_* or wearable_*")
+
+
+class RollupStore:
+    """
+    Rollup pyramid of sensor streams under a processed/ prefix
+
+    Each participant-day of a stream is stored once per level as
+    `{stream}/{userId}/{level}/{date}.parquet`. Levels are built from the
+    raw readings once (1 s) and then from each other, and reads combine the
+    coarsest level that divides the requested resolution, so a month at
+    hourly resolution is read from 24 rows per day-file.
+
+    Example:
+        store = RollupStore('s3://osrp-data-dev/processed/rollups')
+        store.build(data, 'user123', 'sensor_accelerometer', start, end)
+        hourly = store.read('user123', 'sensor_accelerometer', start, end, '1h')
+    """
+
+    def __init__(
+        self,
+        root: str,
+        region: str = 'us-west-2',
+        endpoint_url: Optional[str] = None,
+        filesystem: Optional[Any] = None
+    ):
+        """
+        Args:
+            root: Local directory or s3:// URI of the rollup pyramid
+            region: AWS region for s3:// roots
+            endpoint_url: Optional S3 endpoint override
+            filesystem: Optional pyarrow filesystem; `root` is then a path on it
+        """
+        if pa is None:
+            raise ImportError("RollupStore requires pyarrow: pip install 'osrp[parquet]'")
+
+        self.filesystem, self.root = _filesystem(root, region, endpoint_url, filesystem)
+
+    def path(self, user_id: str, stream: str, level: str, date: str) -> str:
+        """File holding one participant-day of a stream at one level"""
+        segments = [stream, user_id, level, f'{date}.parquet']
+        return '/'.join([self.root] + [quote(segment, safe='') for segment in segments])
+
+    def build(
+        self,
+        data: Any,
+        user_id: str,
+        stream: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[str, int]:
+        """
+        Compute and store every level for the UTC days overlapping a range
+
+        Whole days are always rebuilt, so re-running after late uploads
+        replaces the affected day-files.
+
+        Args:
+            data: OSRPData instance to read raw readings from
+            user_id: Participant ID
+            stream: 'sensor_{type}' or 'wearable_{source}'
+            start_time: Start timestamp
+            end_time: End timestamp
+
+        Returns:
+            Number of buckets written per level
+        """
+        written = {level: 0 for level in LEVELS}
+        first_day = _to_millis(start_time) // DAY_MS
+        last_day = _to_millis(end_time) // DAY_MS
+
+        for day in range(first_day, last_day + 1):
+            day_start = datetime.fromtimestamp(day * DAY_MS / 1000, tz=timezone.utc)
+            raw = read_stream(
+                data, stream, user_id,
+                day_start, day_start + timedelta(milliseconds=DAY_MS - 1)
+            )
+
+            rollup = rollup_frame(raw, LEVELS['1s'])
+            if rollup.empty:
+                continue
+
+            date = day_start.strftime('%Y-%m-%d')
+            for level, size in LEVELS.items():
+                rollup = combine(rollup, size)
+                self._write(self.path(user_id, stream, level, date), rollup)
+                written[level] += len(rollup)
+
+        return written
+
+    def read(
+        self,
+        user_id: str,
+        stream: str,
+        start_time: datetime,
+        end_time: datetime,
+        resolution: Union[str, timedelta] = '1min',
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Rolled-up statistics of a stream at a resolution
+
+        Args:
+            user_id: Participant ID
+            stream: 'sensor_{type}' or 'wearable_{source}'
+            start_time: Start timestamp (inclusive)
+            end_time: End timestamp (inclusive)
+            resolution: Bucket length; served from the coarsest stored level
+                that divides it
+            columns: Optional value columns to keep (e.g. ['magnitude'])
+
+        Returns:
+            DataFrame indexed by bucket start with `c_count`, `c_sum`,
+            `c_sumsq`, `c_min`, `c_max` and `c_mean` per value column; empty
+            if nothing was rolled up
+        """
+        level = select_level(resolution)
+        start_ms, end_ms = _to_millis(start_time), _to_millis(end_time)
+
+        frames = []
+        for day in range(start_ms // DAY_MS, end_ms // DAY_MS + 1):
+            date = datetime.fromtimestamp(day * DAY_MS / 1000, tz=timezone.utc)
+            frame = self._read(self.path(user_id, stream, level, date.strftime('%Y-%m-%d')))
+            if frame is not None:
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame()
+
+        rollup = pd.concat(frames)
+        if columns is not None:
+            names = [f'{column}_{stat}' for column in columns for stat in STATS]
+            rollup = rollup[[name for name in names if name in rollup.columns]]
+
+        # Keep the bucket containing the start time
+        millis = _resolution_ms(resolution)
+        index = rollup.index.as_unit('ns').asi8 // 1_000_000
+        rollup = rollup[(index >= start_ms - start_ms % millis) & (index <= end_ms)]
+
+        if millis != LEVELS[level]:
+            rollup = combine(rollup, millis)
+
+        return _with_means(rollup)
+
+    def _write(self, path: str, rollup: pd.DataFrame) -> None:
+        """Write one day-file"""
+        self.filesystem.create_dir(path.rsplit('/', 1)[0], recursive=True)
+        table = pa.Table.from_pandas(rollup.reset_index(), preserve_index=False)
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        with self.filesystem.open_output_stream(path) as sink:
+            sink.write(buffer.getvalue())
+
+    def _read(self, path: str) -> Optional[pd.DataFrame]:
+        """Read one day-file, or None if it does not exist"""
+        if self.filesystem.get_file_info(path).type != pafs.FileType.File:
+            return None
+        table = pq.read_table(path, filesystem=self.filesystem)
+        return table.to_pandas().set_index('timestamp')
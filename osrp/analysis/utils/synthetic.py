@@ -0,0 +1,528 @@
+"""
+OSRP Synthetic Cohorts
+Realistic multi-day participant data for benchmarks and demos, loadable
+into DynamoDB (or a local stand-in) and into an export-layout Parquet dataset
+"""
+
+import io
+import os
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .data_access import TABLES, _items_to_frame
+from .export import frame_to_table, partition_path, stream_partition
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pq = None
+
+
+DAY_MS = 86_400_000
+
+# Apps participants use, with their category and relative popularity
+APPS = [
+    ('Chrome', 'browser', 0.18),
+    ('Instagram', 'social', 0.16),
+    ('WhatsApp', 'communication', 0.15),
+    ('YouTube', 'video', 0.12),
+    ('Gmail', 'communication', 0.08),
+    ('Spotify', 'music', 0.07),
+    ('Maps', 'navigation', 0.06),
+    ('Reddit', 'social', 0.06),
+    ('Kindle', 'reading', 0.06),
+    ('Settings', 'system', 0.06),
+]
+
+# Hours of the day scheduled EMA surveys are triggered at
+EMA_HOURS = (9, 12, 15, 18, 21)
+
+# Screenshot cadence during a screen session, in seconds
+SCREENSHOT_INTERVAL = 5
+
+# Default DynamoDB table names, as OSRPData uses them
+TABLE_NAMES = {
+    'sensor': 'SensorTimeSeries',
+    'screenshots': 'ScreenshotMetadata',
+    'events': 'EventLog',
+    'ema': 'EMAResponse',
+    'wearable': 'WearableData',
+    'participants': 'ParticipantStatus',
+}
+
+# get_daily_summary key -> (table, partition key suffix); None for streams
+# the generator does not produce
+SUMMARY_STREAMS = {
+    'screenshots': ('screenshots', None),
+    'accelerometer': ('sensor', 'accelerometer'),
+    'gyroscope': None,
+    'location': ('sensor', 'location'),
+    'activity': None,
+    'events': ('events', None),
+    'heart_rate': ('wearable', 'polar_h10'),
+    'steps': ('wearable', 'googlefit'),
+    'ema_responses': ('ema', None),
+}
+
+
+class SyntheticCohort:
+    """
+    Deterministic synthetic study of several participants over several days
+
+    Each participant-day has a sleep period, walking bouts and screen
+    sessions that the streams agree on: accelerometer (50 Hz by default)
+    with gait oscillation while walking, heart rate (1 Hz, Polar H10) that
+    rises with activity, per-minute step counts (Google Fit) and GPS
+    location, screenshots every 5 s during screen sessions, screen and app
+    events, and five scheduled EMA surveys whose stress ratings track the
+    day's screen time.
+
+    The same seed always produces the same data, so benchmark runs are
+    comparable. Streams are generated vectorized per participant-day and
+    never held for the whole cohort at once.
+
+    Example:
+        cohort = SyntheticCohort(participants=4, days=2)
+        root = cohort.write_parquet('/tmp/synthetic')
+        data = OSRPData(backend=ParquetBackend(root))
+        summary = data.get_daily_summary(cohort.user_ids[0], cohort.start)
+    """
+
+    def __init__(
+        self,
+        participants: int = 4,
+        days: int = 2,
+        start: datetime = datetime(2026, 1, 15),
+        study_id: str = 'synthetic_study',
+        accelerometer_hz: float = 50.0,
+        heart_rate_hz: float = 1.0,
+        seed: int = 0
+    ):
+        """
+        Args:
+            participants: Number of participants
+            days: Number of days per participant
+            start: First day (UTC midnight is used)
+            study_id: Study (group) code of every item
+            accelerometer_hz: Accelerometer sampling rate
+            heart_rate_hz: Heart rate sampling rate
+            seed: Random seed
+        """
+        self.participants = participants
+        self.days = days
+        self.start = start.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        self.study_id = study_id
+        self.accelerometer_hz = accelerometer_hz
+        self.heart_rate_hz = heart_rate_hz
+        self.seed = seed
+        self.user_ids = [f"synthetic-{i:03d}" for i in range(participants)]
+
+    @property
+    def dates(self) -> List[datetime]:
+        """Days of the study"""
+        return [self.start + timedelta(days=day) for day in range(self.days)]
+
+    def frames(self, user_id: str, date: datetime) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        Stored frames of one participant-day
+
+        Frames are exactly those a storage backend returns for the day,
+        keyed by (table, partition key value) as in `StorageBackend.read`.
+
+        Args:
+            user_id: Participant ID (one of `user_ids`)
+            date: Day (any time on that day)
+
+        Returns:
+            Dict of {(table, partition value): DataFrame}
+        """
+        frames = {}
+        for (table, partition_value), stream in self._generate(user_id, date).items():
+            if 'frame' in stream:
+                frames[(table, partition_value)] = stream['frame']
+            else:
+                spec = TABLES[table]
+                frames[(table, partition_value)] = _items_to_frame(
+                    stream['items'], sort_key=spec['sort_key'], expand=spec['expand']
+                )
+        return frames
+
+    def daily_summary(self, user_id: str, date: datetime) -> Dict[str, pd.DataFrame]:
+        """
+        Frames in the shape `OSRPData.get_daily_summary` returns them
+
+        Args:
+            user_id: Participant ID
+            date: Day (any time on that day)
+
+        Returns:
+            Dictionary with DataFrames for each data type
+        """
+        frames = self.frames(user_id, date)
+        summary = {}
+        for name, source in SUMMARY_STREAMS.items():
+            if source is None:
+                summary[name] = pd.DataFrame()
+                continue
+            table, suffix = source
+            partition_value = f"{user_id}#{suffix}" if suffix else user_id
+            summary[name] = frames.get((table, partition_value), pd.DataFrame())
+        return summary
+
+    def items(self, user_id: str, date: datetime) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        DynamoDB items of one participant-day
+
+        Args:
+            user_id: Participant ID
+            date: Day (any time on that day)
+
+        Yields:
+            (table, item) with numbers as Decimal, ready for `put_item`
+        """
+        for (table, _), stream in self._generate(user_id, date).items():
+            if 'items' in stream:
+                for item in stream['items']:
+                    yield table, item
+            else:
+                yield from ((table, item) for item in _frame_items(stream))
+
+    def load_dynamodb(self, dynamodb: Any, table_names: Optional[Dict[str, str]] = None) -> int:
+        """
+        Write the cohort into DynamoDB tables
+
+        At 50 Hz a participant-day is over four million accelerometer items;
+        use a lower `accelerometer_hz` for cohorts loaded into a stand-in.
+
+        Args:
+            dynamodb: boto3 DynamoDB resource (e.g. on DynamoDB Local or moto)
+            table_names: Optional overrides of TABLE_NAMES
+
+        Returns:
+            Number of items written
+        """
+        names = dict(TABLE_NAMES, **(table_names or {}))
+        written = 0
+        with ExitStack() as stack:
+            writers = {
+                table: stack.enter_context(dynamodb.Table(names[table]).batch_writer())
+                for table in ('sensor', 'screenshots', 'events', 'ema', 'wearable')
+            }
+            for user_id in self.user_ids:
+                for date in self.dates:
+                    for table, item in self.items(user_id, date):
+                        writers[table].put_item(Item=item)
+                        written += 1
+
+        participants = dynamodb.Table(names['participants'])
+        last_seen = int((self.start + timedelta(days=self.days)).timestamp() * 1000) - 1
+        for user_id in self.user_ids:
+            participants.put_item(Item={
+                'userId': user_id,
+                'groupCode': self.study_id,
+                'lastSeenTimestamp': last_seen,
+            })
+        return written + len(self.user_ids)
+
+    def write_parquet(self, root: str, row_group_size: int = 64 * 1024) -> str:
+        """
+        Write the cohort as a study/stream/user/date Parquet dataset
+
+        The layout and schemas match `osrp export`, so `ParquetBackend(root)`
+        serves the same frames as DynamoDB would.
+
+        Args:
+            root: Local directory of the dataset
+            row_group_size: Rows per Parquet row group
+
+        Returns:
+            The dataset root
+        """
+        if pq is None:
+            raise ImportError(
+                "SyntheticCohort.write_parquet requires pyarrow: pip install 'osrp[parquet]'"
+            )
+
+        for user_id in self.user_ids:
+            for date in self.dates:
+                for (table, partition_value), df in self.frames(user_id, date).items():
+                    stream, _ = stream_partition(table, partition_value)
+                    directory = os.path.join(
+                        root, partition_path(self.study_id, stream, user_id, f"{date:%Y-%m-%d}")
+                    )
+                    os.makedirs(directory, exist_ok=True)
+                    buffer = io.BytesIO()
+                    pq.write_table(frame_to_table(df), buffer, row_group_size=row_group_size)
+                    with open(os.path.join(directory, 'part-synthetic-00000.parquet'), 'wb') as f:
+                        f.write(buffer.getvalue())
+        return root
+
+    def _generate(self, user_id: str, date: datetime) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Streams of one participant-day, keyed by (table, partition value)"""
+        participant = self.user_ids.index(user_id)
+        day = (date.replace(hour=0, minute=0, second=0, microsecond=0) - self.start).days
+        rng = np.random.default_rng([self.seed, participant, day])
+        start_ms = int(pd.Timestamp(self.start + timedelta(days=day)).value // 1_000_000)
+
+        walking = _walking_seconds(rng)
+        sessions = _screen_sessions(rng)
+        study = self.study_id
+
+        streams: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        streams[('sensor', f"{user_id}#accelerometer")] = _accelerometer(
+            rng, user_id, study, start_ms, self.accelerometer_hz, walking
+        )
+        streams[('sensor', f"{user_id}#location")] = _location(
+            rng, user_id, study, start_ms, walking, participant
+        )
+        streams[('wearable', f"{user_id}#polar_h10")] = _heart_rate(
+            rng, user_id, study, start_ms, self.heart_rate_hz, walking
+        )
+        streams[('wearable', f"{user_id}#googlefit")] = _steps(
+            rng, user_id, study, start_ms, walking
+        )
+        streams[('screenshots', user_id)] = _screenshots(rng, user_id, study, start_ms, sessions)
+        streams[('events', user_id)] = _events(rng, user_id, study, start_ms, sessions)
+        streams[('ema', user_id)] = _ema(rng, user_id, study, start_ms, sessions)
+        return streams
+
+
+def _walking_seconds(rng: np.random.Generator) -> np.ndarray:
+    """Boolean per second of the day: walking bouts between 07:00 and 22:00"""
+    walking = np.zeros(86_400, dtype=bool)
+    for _ in range(rng.poisson(10)):
+        begin = int(rng.uniform(7, 22) * 3600)
+        walking[begin:begin + int(rng.exponential(8 * 60)) + 60] = True
+    return walking
+
+
+def _screen_sessions(rng: np.random.Generator) -> List[Tuple[int, int, int]]:
+    """Non-overlapping (start second, end second, app) screen sessions while awake"""
+    weights = np.array([weight for _, _, weight in APPS])
+    starts = np.sort(rng.uniform(7.5 * 3600, 23.5 * 3600, rng.poisson(45)).astype(int))
+    sessions = []
+    free_from = 0
+    for begin in starts:
+        begin = max(int(begin), free_from)
+        end = min(begin + int(rng.exponential(4 * 60)) + 15, 86_399)
+        if begin >= end:
+            continue
+        sessions.append((begin, end, int(rng.choice(len(APPS), p=weights / weights.sum()))))
+        free_from = end + 30
+    return sessions
+
+
+def _per_sample(per_second: np.ndarray, offsets_ms: np.ndarray) -> np.ndarray:
+    """Look up a per-second array for sample offsets in milliseconds"""
+    return per_second[np.minimum(offsets_ms // 1000, len(per_second) - 1)]
+
+
+def _sample_offsets(rng: np.random.Generator, hz: float, jitter: bool) -> np.ndarray:
+    """Sample times in milliseconds from midnight, strictly increasing within the day"""
+    period = 1000.0 / hz
+    offsets = np.round(np.arange(int(86_400 * hz)) * period).astype(np.int64)
+    if jitter and period >= 4:
+        offsets += rng.integers(-1, 2, len(offsets))
+        offsets[0] = max(offsets[0], 0)
+    return offsets
+
+
+def _accelerometer(rng, user_id, study, start_ms, hz, walking) -> Dict[str, Any]:
+    """Gravity on y, noise that drops during sleep, ~2 Hz gait oscillation while walking"""
+    offsets = _sample_offsets(rng, hz, jitter=True)
+    n = len(offsets)
+    moving = _per_sample(walking, offsets)
+    hour = offsets / 3_600_000
+    asleep = (hour < 7) | (hour >= 23)
+
+    scale = np.where(asleep, 0.02, 0.15)
+    gait = np.where(moving, 1.5 * np.sin(2 * np.pi * 1.9 * offsets / 1000), 0.0)
+    x = gait + rng.normal(0, 1, n) * scale
+    y = -9.81 + 0.5 * gait + rng.normal(0, 1, n) * scale
+    z = 0.8 * gait + rng.normal(0, 1, n) * scale
+
+    # Float rounding to 3 decimals, like the mobile client
+    return _numeric_stream('sensor', f"{user_id}#accelerometer", start_ms + offsets, {
+        'groupCode': study,
+    }, {
+        'x': np.round(x, 3), 'y': np.round(y, 3), 'z': np.round(z, 3),
+    }, {'accuracy': 3})
+
+
+def _location(rng, user_id, study, start_ms, walking, participant) -> Dict[str, Any]:
+    """One GPS fix per minute, wandering from home only while walking"""
+    offsets = np.arange(0, DAY_MS, 60_000, dtype=np.int64)
+    moving = np.add.reduceat(walking.astype(float), np.arange(0, 86_400, 60)) / 60
+    home = np.array([47.6062 + 0.01 * participant, -122.3321 - 0.01 * participant])
+    steps = rng.normal(0, 1, (len(offsets), 2)) * 0.0008 * moving[:, None]
+    position = home + np.cumsum(steps, axis=0) + rng.normal(0, 0.00003, (len(offsets), 2))
+    return _numeric_stream('sensor', f"{user_id}#location", start_ms + offsets, {
+        'groupCode': study,
+    }, {
+        'latitude': np.round(position[:, 0], 6), 'longitude': np.round(position[:, 1], 6),
+    }, {'accuracy': 10})
+
+
+def _heart_rate(rng, user_id, study, start_ms, hz, walking) -> Dict[str, Any]:
+    """Resting heart rate, lower asleep, rising smoothly during walking bouts"""
+    offsets = _sample_offsets(rng, hz, jitter=False)
+    seconds = np.arange(86_400)
+    hour = seconds / 3600
+    base = np.where((hour < 7) | (hour >= 23), 56.0, 70.0) + rng.normal(0, 4)
+    # Exponential smoothing of the walking effort over about a minute
+    effort = pd.Series(walking.astype(float)).ewm(halflife=30).mean().to_numpy()
+    bpm = base + 35 * effort
+    values = np.round(_per_sample(bpm, offsets) + rng.normal(0, 2, len(offsets)))
+    return _numeric_stream('wearable', f"{user_id}#polar_h10", start_ms + offsets, {
+        'groupCode': study, 'dataType': 'heartRate', 'source': 'polar_h10',
+    }, {'heartRate': values})
+
+
+def _steps(rng, user_id, study, start_ms, walking) -> Dict[str, Any]:
+    """Steps per minute (Google Fit buckets)"""
+    offsets = np.arange(0, DAY_MS, 60_000, dtype=np.int64)
+    walking_seconds = np.add.reduceat(walking.astype(np.int64), np.arange(0, 86_400, 60))
+    steps = rng.poisson(walking_seconds * 1.8 + 0.2).astype(float)
+    return _numeric_stream('wearable', f"{user_id}#googlefit", start_ms + offsets, {
+        'groupCode': study, 'dataType': 'steps', 'source': 'googlefit',
+    }, {'steps': steps})
+
+
+def _screenshots(rng, user_id, study, start_ms, sessions) -> Dict[str, Any]:
+    """Screenshot metadata every SCREENSHOT_INTERVAL seconds of every session"""
+    items = []
+    battery = 100.0
+    for begin, end, app in sessions:
+        name, category, _ = APPS[app]
+        for second in range(begin, end + 1, SCREENSHOT_INTERVAL):
+            timestamp = start_ms + second * 1000 + int(rng.integers(0, 1000))
+            battery = max(battery - 0.05, 5.0)
+            items.append({
+                'userId': user_id,
+                'timestamp': Decimal(timestamp),
+                'groupCode': study,
+                's3Key': f"screenshots/{user_id}/{timestamp}_0.png",
+                's3Bucket': 'osrp-data-synthetic',
+                'fileSize': Decimal(int(rng.integers(40_000, 400_000))),
+                'appName': name,
+                'appCategory': category,
+                'batteryLevel': Decimal(int(battery)),
+            })
+    return {'items': items}
+
+
+def _events(rng, user_id, study, start_ms, sessions) -> Dict[str, Any]:
+    """screen_on, app_launch and screen_off around every screen session"""
+    items = []
+    for begin, end, app in sessions:
+        name = APPS[app][0]
+        battery = Decimal(int(rng.integers(20, 100)))
+        for second, event_type, event_data in (
+            (begin, 'screen_on', {}),
+            (begin, 'app_launch', {'app': name}),
+            (end, 'screen_off', {}),
+        ):
+            timestamp = start_ms + second * 1000
+            items.append({
+                'userId': user_id,
+                'timestampEventType': f"{timestamp}#{event_type}",
+                'groupCode': study,
+                'eventType': event_type,
+                'eventData': event_data,
+                'context': {'batteryLevel': battery},
+            })
+    return {'items': items}
+
+
+def _ema(rng, user_id, study, start_ms, sessions) -> Dict[str, Any]:
+    """Scheduled stress/mood surveys; stress rises with screen time since the last one"""
+    items = []
+    previous = 0
+    for hour in EMA_HOURS:
+        triggered = hour * 3600
+        screen_minutes = sum(
+            min(end, triggered) - max(begin, previous)
+            for begin, end, _ in sessions if begin < triggered and end > previous
+        ) / 60
+        previous = triggered
+        if rng.random() < 0.15:
+            continue  # missed survey
+        stress = int(np.clip(round(1.5 + screen_minutes / 20 + rng.normal(0, 0.8)), 1, 5))
+        responded = start_ms + (triggered + int(rng.integers(30, 900))) * 1000
+        items.append({
+            'userId': user_id,
+            'timestampSurveyId': f"{responded}#daily_stress",
+            'groupCode': study,
+            'surveyId': 'daily_stress',
+            'triggerType': 'scheduled',
+            'triggeredAt': Decimal(start_ms + triggered * 1000),
+            'respondedAt': Decimal(responded),
+            'responses': {
+                'stress_level': Decimal(stress),
+                'mood': Decimal(int(np.clip(8 - stress + rng.integers(-1, 2), 1, 7))),
+            },
+        })
+    return {'items': items}
+
+
+def _numeric_stream(
+    table: str,
+    partition_value: str,
+    millis: np.ndarray,
+    attributes: Dict[str, str],
+    values: Dict[str, np.ndarray],
+    numbers: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    High-rate stream built as a frame directly instead of from items
+
+    Column order and dtypes are those `_items_to_frame` produces for the
+    items `_frame_items` yields: the partition key, string attributes,
+    numeric attributes, then the expanded map values.
+    """
+    spec = TABLES[table]
+    numbers = numbers or {}
+    columns: Dict[str, Any] = {spec['partition_key']: partition_value}
+    columns.update(attributes)
+    columns.update({name: float(value) for name, value in numbers.items()})
+    frame = pd.DataFrame(
+        {name: np.full(len(millis), value) if not isinstance(value, str) else value
+         for name, value in columns.items()},
+        index=pd.Index(pd.to_datetime(millis, unit='ms'), name='timestamp')
+    )
+    for name, column in values.items():
+        frame[name] = np.asarray(column, dtype=float)
+    return {
+        'frame': frame,
+        'millis': millis,
+        'expand': spec['expand'],
+        'attributes': list(attributes),
+        'numbers': list(numbers),
+        'values': list(values),
+    }
+
+
+def _frame_items(stream: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """DynamoDB items of a stream built by `_numeric_stream`"""
+    frame = stream['frame']
+    partition_key = frame.columns[0]
+    partition_value = frame[partition_key].iloc[0]
+    attributes = {name: frame[name].iloc[0] for name in stream['attributes']}
+    numbers = {name: _decimal(frame[name].iloc[0]) for name in stream['numbers']}
+    values = {name: frame[name].to_numpy() for name in stream['values']}
+    for row, millis in enumerate(stream['millis'].tolist()):
+        item = {partition_key: partition_value, 'timestamp': Decimal(millis)}
+        item.update(attributes)
+        item[stream['expand']] = {name: _decimal(column[row]) for name, column in values.items()}
+        item.update(numbers)
+        yield item
+
+
+def _decimal(value: float) -> Decimal:
+    """DynamoDB number for a float, exact for the rounded values generated here"""
+    return Decimal(str(value)) if value != int(value) else Decimal(int(value))
@@ -0,0 +1,316 @@
+"""
+OSRP Time Series
+Sorted-array container for binary-search window slicing and vectorized
+per-window reductions
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+TimeLike = Union[int, datetime, str, pd.Timestamp]
+
+REDUCTIONS = ('count', 'sum', 'mean', 'std', 'var', 'min', 'max', 'first', 'last', 'nunique')
+
+
+def _millis(value: TimeLike) -> int:
+    """Unix milliseconds of a timestamp; naive values are taken as UTC like the frame index"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return timestamp.as_unit('ns').value // 1_000_000
+
+
+def _millis_array(values) -> np.ndarray:
+    """Unix milliseconds of an array of timestamps (integers pass through)"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'iu':
+        return values.astype(np.int64, copy=False)
+    index = pd.DatetimeIndex(values)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.as_unit('ns').asi8 // 1_000_000
+
+
+def window_edges(start: TimeLike, end: TimeLike, freq: str) -> np.ndarray:
+    """
+    Edges of consecutive fixed-length windows covering [start, end)
+
+    Args:
+        start: First window start
+        end: End of the last window; a final shorter window is kept when
+            the range is not a multiple of `freq`
+        freq: Window length as a pandas offset string (e.g. '5min')
+
+    Returns:
+        Sorted int64 millisecond edges; window i is [edges[i], edges[i + 1])
+    """
+    start_ms, end_ms = _millis(start), _millis(end)
+    step = pd.Timedelta(freq).value // 1_000_000
+    edges = np.arange(start_ms, end_ms, step, dtype=np.int64)
+    return np.append(edges, np.int64(end_ms))
+
+
+class TimeSeries:
+    """
+    Sorted int64 millisecond timestamps with columnar value arrays
+
+    Range slicing is a binary search on the timestamps and returns views of
+    the same arrays, so nothing is copied. Reductions over arbitrary window
+    edges locate every window with one `searchsorted` and aggregate all
+    windows together in O(n + windows), instead of masking the full series
+    once per window.
+
+    Example:
+        accel = TimeSeries.from_frame(data.get_sensor_data(user, 'accelerometer', start, end))
+        hour = accel.slice(start, start + timedelta(hours=1))
+
+        edges = window_edges(start, end, '5min')
+        features = accel.aggregate(edges, x_mean=('x', 'mean'), x_max=('x', 'max'))
+    """
+
+    def __init__(
+        self,
+        times: np.ndarray,
+        columns: Optional[Dict[str, np.ndarray]] = None,
+        tz: Optional[str] = None
+    ):
+        """
+        Args:
+            times: Sorted Unix timestamps in milliseconds
+            columns: Value arrays aligned with `times`
+            tz: Optional timezone restored on frames built from the series
+        """
+        self.times = np.asarray(times, dtype=np.int64)
+        self.columns = {name: np.asarray(values) for name, values in (columns or {}).items()}
+        self.tz = tz
+
+        for name, values in self.columns.items():
+            if len(values) != len(self.times):
+                raise ValueError(
+                    f"Column '{name}' has {len(values)} values for {len(self.times)} timestamps"
+                )
+        if len(self.times) > 1 and (np.diff(self.times) < 0).any():
+            raise ValueError("Timestamps must be sorted")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: Optional[List[str]] = None) -> 'TimeSeries':
+        """
+        Build a series from a frame with datetime index
+
+        Columns are taken without copying where pandas allows (numeric
+        columns without missing values); unsorted frames are stably sorted.
+
+        Args:
+            df: Frame as returned by the OSRPData getters
+            columns: Optional subset of columns to keep
+
+        Returns:
+            TimeSeries over the frame's rows
+        """
+        names = list(df.columns) if columns is None else list(columns)
+        if len(df.index) == 0:
+            return cls(np.empty(0, dtype=np.int64), {
+                name: df[name].to_numpy() if name in df.columns else np.empty(0)
+                for name in names
+            })
+
+        index = pd.DatetimeIndex(df.index)
+        tz = None if index.tz is None else str(index.tz)
+        times = _millis_array(index)
+        values = {name: df[name].to_numpy() for name in names}
+
+        if (np.diff(times) < 0).any():
+            order = np.argsort(times, kind='stable')
+            times = times[order]
+            values = {name: column[order] for name, column in values.items()}
+
+        return cls(times, values, tz)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def assign(self, **columns: np.ndarray) -> 'TimeSeries':
+        """New series sharing the timestamps and existing columns, plus `columns`"""
+        return TimeSeries(self.times, {**self.columns, **columns}, self.tz)
+
+    def slice(
+        self,
+        start: Optional[TimeLike] = None,
+        end: Optional[TimeLike] = None
+    ) -> 'TimeSeries':
+        """
+        Rows with start <= time < end, as views of this series
+
+        Args:
+            start: Optional inclusive lower bound
+            end: Optional exclusive upper bound
+
+        Returns:
+            TimeSeries sharing memory with this one
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.times, _millis(start), 'left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.times, _millis(end), 'left'))
+        hi = max(lo, hi)
+        return TimeSeries(
+            self.times[lo:hi],
+            {name: values[lo:hi] for name, values in self.columns.items()},
+            self.tz
+        )
+
+    def bounds(self, edges) -> np.ndarray:
+        """
+        Row positions of window edges
+
+        Args:
+            edges: Sorted window edges (timestamps or int64 milliseconds)
+
+        Returns:
+            Positions; rows of window i are bounds[i]:bounds[i + 1]
+        """
+        edges = _millis_array(edges)
+        if len(edges) > 1 and (np.diff(edges) < 0).any():
+            raise ValueError("Window edges must be sorted")
+        return np.searchsorted(self.times, edges, 'left')
+
+    def reduce(self, edges, column: Optional[str] = None, how: str = 'count') -> np.ndarray:
+        """
+        Reduce a column over every window [edges[i], edges[i + 1])
+
+        Missing values are skipped like in pandas. `first` and `last` are
+        positional and return the value of the first/last row in the window.
+        Without a column, `count` is the number of rows per window.
+
+        Args:
+            edges: Sorted window edges (timestamps or int64 milliseconds)
+            column: Column to reduce
+            how: One of count, sum, mean, std, var, min, max, first, last,
+                nunique
+
+        Returns:
+            Array with one value per window; empty windows give 0 for count,
+            sum and nunique, NaN (or None) otherwise
+        """
+        if how not in REDUCTIONS:
+            raise ValueError(f"Unknown reduction '{how}'; expected one of {', '.join(REDUCTIONS)}")
+
+        bounds = self.bounds(edges)
+        if len(bounds) < 2:
+            bounds = np.zeros(1, dtype=np.intp)  # no windows
+        n_windows = len(bounds) - 1
+        sizes = np.diff(bounds)
+
+        if column is None:
+            if how != 'count':
+                raise ValueError(f"Reduction '{how}' needs a column")
+            return sizes
+
+        values = self.columns[column][bounds[0]:bounds[-1]]
+        labels = np.repeat(np.arange(n_windows), sizes)
+
+        if how in ('first', 'last'):
+            return self._positional(values, bounds - bounds[0], sizes, how)
+        if how == 'nunique':
+            return self._nunique(values, labels, n_windows)
+        return self._numeric(values, labels, bounds - bounds[0], sizes, how)
+
+    def aggregate(self, edges, **reductions: Tuple[Optional[str], str]) -> pd.DataFrame:
+        """
+        Several window reductions as a frame indexed by window start
+
+        Args:
+            edges: Sorted window edges (timestamps or int64 milliseconds)
+            **reductions: Output column -> (column, how), as for `reduce`
+
+        Returns:
+            DataFrame with one row per window
+        """
+        edges = _millis_array(edges)
+        index = pd.DatetimeIndex(pd.to_datetime(edges[:-1], unit='ms'), name='timestamp')
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+
+        return pd.DataFrame({
+            name: self.reduce(edges, column, how) for name, (column, how) in reductions.items()
+        }, index=index)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Frame with datetime index viewing this series' arrays"""
+        index = pd.DatetimeIndex(self.times.view('datetime64[ms]'), name='timestamp')
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return pd.DataFrame(self.columns, index=index)
+
+    @staticmethod
+    def _positional(
+        values: np.ndarray,
+        offsets: np.ndarray,
+        sizes: np.ndarray,
+        how: str
+    ) -> np.ndarray:
+        """First or last row of every window"""
+        numeric = values.dtype.kind in 'biuf'
+        out = np.full(len(sizes), np.nan if numeric else None, dtype=float if numeric else object)
+        filled = sizes > 0
+        rows = offsets[:-1][filled] if how == 'first' else offsets[1:][filled] - 1
+        out[filled] = values[rows]
+        return out
+
+    @staticmethod
+    def _nunique(values: np.ndarray, labels: np.ndarray, n_windows: int) -> np.ndarray:
+        """Distinct non-missing values per window, by hashing (window, value) pairs"""
+        codes, uniques = pd.factorize(values)
+        valid = codes >= 0
+        pairs = labels[valid] * max(len(uniques), 1) + codes[valid]
+        distinct = pd.unique(pairs)
+        return np.bincount(distinct // max(len(uniques), 1), minlength=n_windows)
+
+    @staticmethod
+    def _numeric(
+        values: np.ndarray,
+        labels: np.ndarray,
+        offsets: np.ndarray,
+        sizes: np.ndarray,
+        how: str
+    ) -> np.ndarray:
+        """Count, sum, moments and extrema per window with bincount/reduceat"""
+        n_windows = len(sizes)
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        labels, present = labels[valid], values[valid]
+
+        count = np.bincount(labels, minlength=n_windows)
+        if how == 'count':
+            return count
+
+        if how in ('min', 'max'):
+            out = np.full(n_windows, np.nan)
+            filled = sizes > 0
+            if filled.any():
+                reducer = np.fmin if how == 'min' else np.fmax
+                out[filled] = reducer.reduceat(values, offsets[:-1][filled])
+            return out
+
+        total = np.bincount(labels, weights=present, minlength=n_windows)
+        if how == 'sum':
+            return total
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            if how == 'mean':
+                return mean
+
+            # Two-pass variance around each window's mean
+            deviation = present - mean[labels]
+            squares = np.bincount(labels, weights=deviation * deviation, minlength=n_windows)
+            var = np.where(count > 1, squares / (count - 1), np.nan)
+        return var if how == 'var' else np.sqrt(var)
@@ -11,6 +11,7 @@ import subprocess
 from pathlib import Path
 from rich.console import Console
 from rich.panel import Panel
+from rich.progress import Progress
 from rich.table import Table
 
 console = Console()
@@ -302,6 +303,514 @@ def status(region):
         console.print(f"[red]✗[/red] Error checking status: {e.stderr}", style="red")
         sys.exit(1)
 
+@main.command()
+@click.argument('study_id')
+@click.option('--bucket', help='Data bucket; writes to s3://BUCKET/exports/STUDY_ID/EXPORT_ID/')
+@click.option('--output', type=click.Path(), help='Local directory to export to instead of S3')
+@click.option('--export-id', help='Resume a previous export with this ID')
+@click.option('--region', default='us-west-2', help='AWS region')
+@click.option('--table-prefix', default='', help="Table name prefix (e.g. 'osrp-')")
+@click.option('--table-suffix', default='', help="Table name suffix (e.g. '-dev')")
+@click.option('--start', type=click.DateTime(), help='Only export data from this time')
+@click.option('--end', type=click.DateTime(), help='Only export data up to this time')
+@click.option('--segments', default=8, help='Parallel scan segments per table')
+@click.option('--workers', type=int, help='Concurrent workers (default: CPU count)')
+@click.option('--threads', is_flag=True, help='Run workers as threads instead of processes')
+@click.option('--endpoint-url', help='Endpoint override for local DynamoDB/S3')
+def export(study_id, bucket, output, export_id, region, table_prefix, table_suffix,
+           start, end, segments, workers, threads, endpoint_url):
+    """
+    Export a study to Hive-partitioned Parquet
+
+    STUDY_ID: Study (group) code to export
+    """
+    from .analysis.utils.export import StudyExporter
+
+    if (bucket is None) == (output is None):
+        console.print("[red]✗[/red] Specify exactly one of --bucket or --output", style="red")
+        sys.exit(1)
+
+    def table(name):
+        return f"{table_prefix}{name}{table_suffix}"
+
+    try:
+        exporter = StudyExporter(
+            study_id,
+            bucket=bucket,
+            output=output,
+            export_id=export_id,
+            region=region,
+            sensor_table=table('SensorTimeSeries'),
+            events_table=table('EventLog'),
+            screenshots_table=table('ScreenshotMetadata'),
+            ema_table=table('EMAResponse'),
+            wearable_table=table('WearableData'),
+            device_state_table=table('DeviceState'),
+            participant_table=table('ParticipantStatus'),
+            endpoint_url=endpoint_url,
+            segments=segments,
+            workers=workers,
+            processes=not threads,
+        )
+    except ImportError as e:
+        console.print(f"[red]✗[/red] {e}", style="red")
+        sys.exit(1)
+
+    console.print(Panel.fit(
+        f"[bold cyan]Exporting Study: {study_id}[/bold cyan]\n"
+        f"Export ID: {exporter.export_id}\n"
+        f"Destination: {exporter.destination}",
+        border_style="cyan"
+    ))
+
+    try:
+        units = exporter.plan(start, end)
+        with Progress(console=console) as progress:
+            task = progress.add_task("Exporting", total=len(units))
+            metadata = exporter.run(start, end, progress=lambda state: progress.advance(task))
+    except Exception as e:
+        console.print(f"[red]✗[/red] Export failed: {str(e)}", style="red")
+        console.print(f"Re-run with --export-id {exporter.export_id} to resume")
+        sys.exit(1)
+
+    table_view = Table(title="Exported Rows", show_header=True, header_style="bold cyan")
+    table_view.add_column("Stream")
+    table_view.add_column("Rows", justify="right")
+    for stream, rows in metadata['rows'].items():
+        table_view.add_row(stream, f"{rows:,}")
+    console.print(table_view)
+    console.print(f"\n[green]✓[/green] Exported {metadata['participants']} participants "
+                  f"to {exporter.destination}")
+
+
+@main.command()
+@click.argument('study_id')
+@click.option('--stream', 'streams', multiple=True, required=True,
+              help="Stream to roll up, e.g. sensor_accelerometer or wearable_polar_h10")
+@click.option('--start', type=click.DateTime(), required=True, help='First day to roll up')
+@click.option('--end', type=click.DateTime(), required=True, help='Last day to roll up')
+@click.option('--user', 'users', multiple=True,
+              help='Participant to roll up (default: every participant of the study)')
+@click.option('--bucket', help='Data bucket; writes to s3://BUCKET/processed/rollups/')
+@click.option('--output', type=click.Path(), help='Local directory to write to instead of S3')
+@click.option('--region', default='us-west-2', help='AWS region')
+@click.option('--table-prefix', default='', help="Table name prefix (e.g. 'osrp-')")
+@click.option('--table-suffix', default='', help="Table name suffix (e.g. '-dev')")
+@click.option('--endpoint-url', help='Endpoint override for local DynamoDB/S3')
+def rollup(study_id, streams, start, end, users, bucket, output, region, table_prefix,
+           table_suffix, endpoint_url):
+    """
+    Build 1s/1min/15min/1h rollups of sensor streams
+
+    STUDY_ID: Study (group) code whose participants are rolled up
+    """
+    from .analysis.utils.data_access import OSRPData
+    from .analysis.utils.rollups import LEVELS, RollupStore
+
+    if (bucket is None) == (output is None):
+        console.print("[red]✗[/red] Specify exactly one of --bucket or --output", style="red")
+        sys.exit(1)
+
+    def table(name):
+        return f"{table_prefix}{name}{table_suffix}"
+
+    data = OSRPData(
+        region=region,
+        sensor_table=table('SensorTimeSeries'),
+        wearable_table=table('WearableData'),
+        endpoint_url=endpoint_url,
+    )
+    try:
+        store = RollupStore(
+            output or f"s3://{bucket}/processed/rollups",
+            region=region,
+            endpoint_url=endpoint_url
+        )
+    except ImportError as e:
+        console.print(f"[red]✗[/red] {e}", style="red")
+        sys.exit(1)
+
+    if not users:
+        participants = data.dynamodb.Table(table('ParticipantStatus'))
+        query = {
+            'IndexName': 'groupCode-lastSeen-index',
+            'KeyConditionExpression': 'groupCode = :gc',
+            'ExpressionAttributeValues': {':gc': study_id},
+        }
+        users = []
+        while True:
+            response = participants.query(**query)
+            users.extend(item['userId'] for item in response['Items'])
+            if 'LastEvaluatedKey' not in response:
+                break
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    totals = {level: 0 for level in LEVELS}
+    try:
+        with Progress(console=console) as progress:
+            task = progress.add_task("Rolling up", total=len(users) * len(streams))
+            for user_id in users:
+                for stream in streams:
+                    written = store.build(data, user_id, stream, start, end)
+                    for level, buckets in written.items():
+                        totals[level] += buckets
+                    progress.advance(task)
+    except Exception as e:
+        console.print(f"[red]✗[/red] Rollup failed: {str(e)}", style="red")
+        sys.exit(1)
+
+    table_view = Table(title="Rollup Buckets", show_header=True, header_style="bold cyan")
+    table_view.add_column("Level")
+    table_view.add_column("Buckets", justify="right")
+    for level, buckets in totals.items():
+        table_view.add_row(level, f"{buckets:,}")
+    console.print(table_view)
+    console.print(f"\n[green]✓[/green] Rolled up {len(users)} participants")
+
+
+@main.command()
+@click.option('--devices', default=10, help='Number of simulated devices')
+@click.option('--duration', default=300.0, help='Simulated seconds of device activity')
+@click.option('--sensor', 'sensors', multiple=True,
+              help="Sensor and sampling rate in Hz, e.g. accelerometer=50 (default: "
+                   "accelerometer=50, light=0.2)")
+@click.option('--upload-interval', default=60.0, help='Seconds between sensor uploads')
+@click.option('--events-per-hour', default=30.0, help='Mean discrete events per device-hour')
+@click.option('--screenshot-interval', default=300.0, help='Seconds between screenshots (0: none)')
+@click.option('--device-state-interval', default=900.0,
+              help='Seconds between device state snapshots (0: none)')
+@click.option('--offline-probability', default=0.05,
+              help='Chance a device goes offline at each upload and queues its requests')
+@click.option('--offline-seconds', default=600.0, help='Length of an offline period')
+@click.option('--encoding', type=click.Choice(['json', 'gorilla']), default='json',
+              help='Sensor request encoding')
+@click.option('--concurrency', default=1, help='Concurrent handler instances')
+@click.option('--speedup', type=float, help='Replay at this multiple of real time '
+                                            '(default: as fast as possible)')
+@click.option('--lost-responses', default=0.0,
+              help='Share of successful responses the device never receives and retries')
+@click.option('--max-attempts', default=5, help='Attempts per request')
+@click.option('--no-idempotency', is_flag=True, help='Send requests without Idempotency-Key')
+@click.option('--ingest-mode', type=click.Choice(['sync', 'async']), default='sync',
+              help='Write sensor batches directly, or spill them to S3 and drain afterwards')
+@click.option('--seed', default=0, help='Random seed of the fleet')
+@click.option('--handler', type=click.Path(exists=True, dir_okay=False),
+              help='data_upload_handler.py to load (default: this checkout)')
+@click.option('--region', default='us-west-2', help='AWS region')
+@click.option('--endpoint-url', help='Running DynamoDB/S3 stand-in to use instead of moto')
+@click.option('--json', 'json_path', type=click.Path(dir_okay=False),
+              help='Also write the report as JSON to this file')
+def loadtest(devices, duration, sensors, upload_interval, events_per_hour, screenshot_interval,
+             device_state_interval, offline_probability, offline_seconds, encoding, concurrency,
+             speedup, lost_responses, max_attempts, no_idempotency, ingest_mode, seed, handler,
+             region, endpoint_url, json_path):
+    """
+    Load test the data upload handler with a simulated device fleet
+
+    Runs the handler in-process against local DynamoDB and S3 and reports
+    throughput, latency percentiles, items written and retries.
+    """
+    import json
+
+    from .loadtest import DeviceProfile, LoadTest
+
+    sensor_rates = None
+    if sensors:
+        sensor_rates = {}
+        for sensor in sensors:
+            name, _, rate = sensor.partition('=')
+            try:
+                sensor_rates[name] = float(rate)
+            except ValueError:
+                console.print(f"[red]✗[/red] Expected SENSOR=HZ, got '{sensor}'", style="red")
+                sys.exit(1)
+
+    profile = DeviceProfile(
+        sensor_rates=sensor_rates,
+        upload_interval=upload_interval,
+        events_per_hour=events_per_hour,
+        screenshot_interval=screenshot_interval or None,
+        device_state_interval=device_state_interval or None,
+        offline_probability=offline_probability,
+        offline_seconds=offline_seconds,
+        encoding=encoding,
+    )
+    test = LoadTest(
+        devices=devices,
+        duration=duration,
+        profile=profile,
+        concurrency=concurrency,
+        speedup=speedup,
+        lost_response_rate=lost_responses,
+        max_attempts=max_attempts,
+        idempotency=not no_idempotency,
+        ingest_mode=ingest_mode,
+        seed=seed,
+        handler_path=handler,
+        region=region,
+        endpoint_url=endpoint_url,
+    )
+    requests = test.schedule()
+
+    console.print(Panel.fit(
+        f"[bold cyan]Load Test: {devices} devices, {duration:g}s simulated[/bold cyan]\n"
+        f"Requests: {len(requests):,}\n"
+        f"Stand-in: {endpoint_url or 'moto (in-process)'}",
+        border_style="cyan"
+    ))
+
+    try:
+        with Progress(console=console) as progress:
+            task = progress.add_task("Uploading", total=len(requests))
+            report = test.run(progress=lambda state: progress.advance(task))
+    except (ImportError, FileNotFoundError) as e:
+        console.print(f"[red]✗[/red] {e}", style="red")
+        sys.exit(1)
+
+    summary = Table(title="Throughput", show_header=True, header_style="bold cyan")
+    summary.add_column("Metric")
+    summary.add_column("Value", justify="right")
+    summary.add_row("Requests", f"{report.requests:,}")
+    summary.add_row("Requests/s", f"{report.throughput:,.1f}")
+    summary.add_row("Items/s", f"{report.items_per_second():,.0f}")
+    summary.add_row("Queued offline", f"{report.queued:,}")
+    summary.add_row("Retries", f"{report.retries:,}")
+    summary.add_row("Replayed", f"{report.replayed:,}")
+    summary.add_row("Failed", f"{report.failed:,}")
+    if report.drain is not None:
+        summary.add_row("Drained batches", f"{report.drain['batches']:,}")
+        summary.add_row("Drain seconds", f"{report.drain['elapsed']:,.1f}")
+    console.print(summary)
+
+    latency = Table(title="Handler Latency (ms)", show_header=True, header_style="bold cyan")
+    latency.add_column("Endpoint")
+    for column in ('p50', 'p95', 'p99', 'max'):
+        latency.add_column(column, justify="right")
+    for endpoint in [None, *sorted(report.latencies)]:
+        values = report.percentiles(endpoint)
+        latency.add_row(endpoint or "all", *[f"{values[column]:.1f}" for column in values])
+    console.print(latency)
+
+    items = Table(title="Items Written", show_header=True, header_style="bold cyan")
+    items.add_column("Endpoint")
+    items.add_column("Expected", justify="right")
+    items.add_column("Written", justify="right")
+    for endpoint, written in report.items_written.items():
+        items.add_row(endpoint, f"{report.expected_items.get(endpoint, 0):,}", f"{written:,}")
+    console.print(items)
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(report.to_dict(), f, indent=2)
+        console.print(f"Report written to {json_path}")
+
+    if report.failed:
+        console.print(f"\n[yellow]![/yellow] {report.failed} requests failed")
+        sys.exit(1)
+    console.print("\n[green]✓[/green] Load test complete")
+
+
+@main.command()
+@click.argument('bucket')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='First day of profiles (default: today, UTC)')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Last day of profiles (default: --start)')
+@click.option('--route', help="Only profiles of this route, e.g. 'POST /data/sensor'")
+@click.option('--limit', type=int, help='Merge at most this many profiles')
+@click.option('--output', type=click.Path(dir_okay=False), default='flamegraph.svg',
+              help='SVG flame graph to write')
+@click.option('--folded', type=click.Path(dir_okay=False),
+              help='Also write the merged folded stacks (for flamegraph.pl or speedscope)')
+@click.option('--top', default=15, help='Functions listed by total samples')
+@click.option('--prefix', default=None, help='Key prefix of the profiles')
+@click.option('--region', default='us-west-2', help='AWS region')
+@click.option('--endpoint-url', help='Endpoint override for local S3')
+def profiles(bucket, start, end, route, limit, output, folded, top, prefix, region,
+             endpoint_url):
+    """
+    Merge Lambda invocation profiles into a flame graph
+
+    BUCKET: Data bucket the upload Lambda writes profiles to
+    (set PROFILE_SAMPLE_RATE on the function to collect them)
+    """
+    from collections import Counter
+    from datetime import datetime, timezone
+    from itertools import islice
+
+    import boto3
+
+    from . import profiling
+
+    start = start.date() if start else datetime.now(timezone.utc).date()
+    end = end.date() if end else start
+    s3 = boto3.client('s3', region_name=region, endpoint_url=endpoint_url)
+
+    try:
+        keys = list(islice(
+            profiling.profile_keys(
+                s3, bucket, prefix or profiling.PROFILE_PREFIX, start, end, route
+            ),
+            limit
+        ))
+        if not keys:
+            console.print(f"[yellow]![/yellow] No profiles from {start} to {end}")
+            sys.exit(1)
+        with Progress(console=console) as progress:
+            task = progress.add_task("Fetching profiles", total=len(keys))
+            stacks = Counter()
+            for key in keys:
+                stacks.update(profiling.fetch_profiles(s3, bucket, [key]))
+                progress.advance(task)
+    except Exception as e:
+        console.print(f"[red]✗[/red] Fetching profiles failed: {str(e)}", style="red")
+        sys.exit(1)
+
+    total = sum(stacks.values())
+    if not total:
+        console.print(f"[yellow]![/yellow] The {len(keys)} profiles hold no samples")
+        sys.exit(1)
+
+    title = f"{route or 'All routes'}, {start}" + (f" to {end}" if end != start else '')
+    with open(output, 'w') as f:
+        f.write(profiling.render_flamegraph(stacks, title=title))
+    if folded:
+        with open(folded, 'w') as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    table = Table(title="Hottest Functions", show_header=True, header_style="bold cyan")
+    table.add_column("Function")
+    table.add_column("Total %", justify="right")
+    table.add_column("Self %", justify="right")
+    for function, own, samples in profiling.function_totals(stacks)[:top]:
+        table.add_row(function, f"{100 * samples / total:.1f}", f"{100 * own / total:.1f}")
+    console.print(table)
+    console.print(f"\n[green]✓[/green] Merged {len(keys)} profiles ({total:,} samples) "
+                  f"into {output}")
+
+
+@main.command()
+@click.argument('roster', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--user-pool-id', envvar='USER_POOL_ID', required=True,
+              help='Cognito user pool to enroll in (default: $USER_POOL_ID)')
+@click.option('--participant-table', help='ParticipantStatus table name '
+              '(default: --table-prefix/--table-suffix around ParticipantStatus)')
+@click.option('--table-prefix', default='', help="Table name prefix (e.g. 'osrp-')")
+@click.option('--table-suffix', default='', help="Table name suffix (e.g. '-dev')")
+@click.option('--no-participant-rows', is_flag=True,
+              help='Only create Cognito users, without ParticipantStatus rows')
+@click.option('--concurrency', default=8, help='Concurrent AdminCreateUser calls')
+@click.option('--rate', default=10.0, help='Initial AdminCreateUser calls per second')
+@click.option('--max-rate', default=50.0,
+              help="Highest calls per second (Cognito's default user creation quota is 50)")
+@click.option('--no-invitation', is_flag=True,
+              help='Do not email temporary passwords (e.g. for test pools)')
+@click.option('--output', type=click.Path(dir_okay=False),
+              help='CSV of per-row results, written as rows complete')
+@click.option('--region', default='us-west-2', help='AWS region')
+@click.option('--endpoint-url', help='Endpoint override for a local Cognito/DynamoDB stand-in')
+def enroll(roster, user_pool_id, participant_table, table_prefix, table_suffix,
+           no_participant_rows, concurrency, rate, max_rate, no_invitation, output, region,
+           endpoint_url):
+    """
+    Enroll a cohort from a roster CSV
+
+    ROSTER: CSV with email, studyCode and participantId columns. Each row
+    becomes a Cognito user with a temporary password emailed to them and a
+    ParticipantStatus row. Re-running a roster skips enrolled participants.
+    """
+    import csv
+    import time
+
+    import boto3
+    from botocore.config import Config
+
+    from .enrollment import STATUSES, AdaptiveRateLimiter, BulkEnroller, read_roster
+
+    try:
+        rows = read_roster(roster)
+    except (ValueError, csv.Error) as e:
+        console.print(f"[red]✗[/red] {e}", style="red")
+        sys.exit(1)
+    if not rows:
+        console.print("[yellow]![/yellow] The roster has no rows")
+        sys.exit(1)
+
+    # Throttles are retried by the enroller's rate limiter, not botocore
+    cognito = boto3.client(
+        'cognito-idp', region_name=region, endpoint_url=endpoint_url,
+        config=Config(retries={'mode': 'standard', 'max_attempts': 1})
+    )
+    table = None
+    if not no_participant_rows:
+        dynamodb = boto3.resource('dynamodb', region_name=region, endpoint_url=endpoint_url)
+        table = dynamodb.Table(
+            participant_table or f"{table_prefix}ParticipantStatus{table_suffix}"
+        )
+    try:
+        limiter = AdaptiveRateLimiter(rate=min(rate, max_rate), min_rate=min(1.0, rate),
+                                      max_rate=max_rate)
+        enroller = BulkEnroller(cognito, user_pool_id, table, concurrency=concurrency,
+                                limiter=limiter, send_invitation=not no_invitation)
+    except ValueError as e:
+        console.print(f"[red]✗[/red] {e}", style="red")
+        sys.exit(1)
+
+    console.print(Panel.fit(
+        f"[bold cyan]Enrolling {len(rows):,} participants[/bold cyan]\n"
+        f"User pool: {user_pool_id}\n"
+        f"ParticipantStatus: {table.name if table is not None else '-'}",
+        border_style="cyan"
+    ))
+
+    styles = {'created': 'green', 'exists': 'dim', 'skipped': 'yellow'}
+    counts = dict.fromkeys(STATUSES, 0)
+    columns = ['row', 'email', 'studyCode', 'participantId', 'status', 'userSub', 'attempts',
+               'error']
+    output_file = open(output, 'w', newline='') if output else None
+    started = time.perf_counter()
+    try:
+        writer = csv.DictWriter(output_file, columns, extrasaction='ignore') if output else None
+        if writer:
+            writer.writeheader()
+        for result in enroller.enroll(rows):
+            counts[result['status']] += 1
+            style = styles.get(result['status'], 'red')
+            detail = result.get('userSub') or ''
+            if result.get('error'):
+                detail = f"{detail} {result['error']}".strip()
+            console.print(f"[{style}]{result['status']:>8}[/{style}] row {result['row']:>5} "
+                          f"{result['email']} ({result['participantId']}) {detail}")
+            if writer:
+                writer.writerow(result)
+                output_file.flush()
+    except Exception as e:
+        console.print(f"[red]✗[/red] Enrollment failed: {str(e)}", style="red")
+        console.print("Re-run the roster to continue; enrolled participants are skipped")
+        sys.exit(1)
+    finally:
+        if output_file:
+            output_file.close()
+    elapsed = time.perf_counter() - started
+
+    summary = Table(title="Enrollment", show_header=True, header_style="bold cyan")
+    summary.add_column("Status")
+    summary.add_column("Rows", justify="right")
+    for status, count in counts.items():
+        summary.add_row(status, f"{count:,}")
+    summary.add_row("Seconds", f"{elapsed:,.1f}")
+    summary.add_row("Final rate (calls/s)", f"{enroller.limiter.rate:,.1f}")
+    summary.add_row("Throttled calls", f"{enroller.limiter.throttles:,}")
+    console.print(summary)
+
+    unsuccessful = counts['conflict'] + counts['invalid'] + counts['failed']
+    if unsuccessful:
+        console.print(f"\n[yellow]![/yellow] {unsuccessful} rows were not enrolled")
+        sys.exit(1)
+    console.print(f"\n[green]✓[/green] Enrolled {counts['created']:,} participants "
+                  f"({counts['exists']:,} already enrolled)")
+
+
 @main.command()
 def info():
     """
@@ -0,0 +1,457 @@
+"""
+OSRP Bulk Enrollment
+Concurrent Cognito enrollment of a participant roster with adaptive throttling
+
+Standard library and boto3 only, so the auth Lambda can ship it next to its
+handler (see infrastructure/deploy.sh).
+
+A roster is a CSV of email, studyCode and participantId. BulkEnroller
+creates a Cognito user per row with AdminCreateUser, which emails the
+participant a temporary password, from a bounded thread pool. An
+AdaptiveRateLimiter spaces the calls: it starts below Cognito's user
+creation quota, adds to the rate while calls succeed and halves it when
+Cognito throttles, retrying the throttled rows. Enrolled participants get
+their ParticipantStatus rows in batch writes of 25.
+
+Results are yielded per row as they complete, so callers can stream them:
+
+    enroller = BulkEnroller(cognito, 'us-west-2_AbC123', participant_table)
+    for result in enroller.enroll(read_roster(text)):
+        print(result['row'], result['status'], result.get('userSub'))
+
+Rows already enrolled (e.g. on a re-run after an interruption) are
+reported as 'exists' and get any missing ParticipantStatus fields, so
+running a roster again completes it.
+"""
+
+import csv
+import io
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+ROSTER_COLUMNS = ('email', 'studyCode', 'participantId')
+# Accepted spellings of the roster columns
+COLUMN_ALIASES = {
+    'email': 'email',
+    'studycode': 'studyCode',
+    'study_code': 'studyCode',
+    'participantid': 'participantId',
+    'participant_id': 'participantId',
+}
+
+# Outcomes of a roster row
+STATUSES = ('created', 'exists', 'conflict', 'invalid', 'failed', 'skipped')
+
+# Cognito errors answered by slowing down and retrying
+THROTTLING_ERRORS = {'TooManyRequestsException', 'ThrottlingException'}
+
+# Items per DynamoDB BatchWriteItem request
+BATCH_SIZE = 25
+
+
+def read_roster(source: Any) -> List[Dict[str, str]]:
+    """
+    Parse a roster CSV.
+
+    Args:
+        source: CSV text or a text file with a header naming email, studyCode
+            and participantId (snake_case and any case accepted)
+
+    Returns:
+        Rows with the three roster columns, each with its 1-based 'row' number
+
+    Raises:
+        ValueError: If a roster column is missing from the header
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    reader = csv.DictReader(source)
+    columns = {
+        name: COLUMN_ALIASES[name.strip().lower()]
+        for name in reader.fieldnames or []
+        if name and name.strip().lower() in COLUMN_ALIASES
+    }
+    missing = set(ROSTER_COLUMNS) - set(columns.values())
+    if missing:
+        raise ValueError(f"Roster is missing columns: {', '.join(sorted(missing))}")
+
+    rows = []
+    for number, record in enumerate(reader, start=1):
+        row = {column: (record.get(name) or '').strip() for name, column in columns.items()}
+        row['row'] = number
+        rows.append(row)
+    return rows
+
+
+def validate_rows(rows: Iterable[Dict[str, Any]]) -> Dict[int, str]:
+    """
+    Find roster rows that cannot be enrolled.
+
+    Args:
+        rows: Roster rows (see read_roster)
+
+    Returns:
+        {row number: reason} for incomplete rows, malformed emails and
+        emails or participant IDs repeated within a study
+    """
+    invalid = {}
+    emails: Set[str] = set()
+    participants: Set[Any] = set()
+    for row in rows:
+        missing = [column for column in ROSTER_COLUMNS if not row.get(column)]
+        email = row.get('email', '').lower()
+        if missing:
+            invalid[row['row']] = f"Missing {', '.join(missing)}"
+        elif '@' not in email.strip('@') or any(c.isspace() for c in email):
+            invalid[row['row']] = 'Invalid email'
+        elif email in emails:
+            invalid[row['row']] = 'Duplicate email in roster'
+        elif (row['studyCode'], row['participantId']) in participants:
+            invalid[row['row']] = 'Duplicate participantId in study'
+        emails.add(email)
+        participants.add((row.get('studyCode'), row.get('participantId')))
+    return invalid
+
+
+class AdaptiveRateLimiter:
+    """
+    Space calls to a rate that adapts to throttling (additive increase, multiplicative decrease).
+
+    Every success adds `increase / rate` to the rate, about `increase` calls
+    per second more for each second of calls; a throttle halves it, at most
+    once per `cooldown` seconds so one burst of throttled in-flight calls
+    counts once.
+
+    Attributes:
+        rate: Current calls per second
+        throttles: Throttled calls reported
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        min_rate: float = 1.0,
+        max_rate: float = 50.0,
+        increase: float = 1.0,
+        cooldown: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Args:
+            rate: Initial calls per second
+            min_rate: Lowest rate throttling can reduce it to
+            max_rate: Highest rate successes can raise it to
+            increase: Calls per second added per second of successful calls
+            cooldown: Seconds after a decrease in which throttles are not counted again
+            clock: Monotonic time in seconds
+            sleep: Waits a number of seconds
+        """
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("Rates must satisfy 0 < min_rate <= rate <= max_rate")
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.cooldown = cooldown
+        self.clock = clock
+        self.sleep = sleep
+        self.throttles = 0
+        self._next = float('-inf')
+        self._decreased = float('-inf')
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """
+        Wait for the next call slot.
+
+        Args:
+            deadline: clock() time; a slot at or after it is not taken
+
+        Returns:
+            False, without waiting or taking the slot, if it falls past the deadline
+        """
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next)
+            if deadline is not None and slot >= deadline:
+                return False
+            self._next = slot + 1 / self.rate
+        if slot > now:
+            self.sleep(slot - now)
+        return True
+
+    def success(self) -> None:
+        """Report a call that was not throttled"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def throttled(self) -> None:
+        """Report a throttled call"""
+        with self._lock:
+            self.throttles += 1
+            now = self.clock()
+            if now - self._decreased >= self.cooldown:
+                self._decreased = now
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._next = now + 1 / self.rate
+
+
+class BulkEnroller:
+    """
+    Enroll roster rows in a Cognito user pool and pre-create their ParticipantStatus rows.
+
+    Attributes:
+        limiter: Rate limiter of the AdminCreateUser calls
+    """
+
+    def __init__(
+        self,
+        cognito_client: Any,
+        user_pool_id: str,
+        participant_table: Any = None,
+        concurrency: int = 8,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        max_attempts: int = 6,
+        send_invitation: bool = True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            cognito_client: boto3 cognito-idp client; give it few or no retries
+                of its own so throttles reach the limiter
+            user_pool_id: User pool to enroll in
+            participant_table: boto3 ParticipantStatus Table (None: Cognito only)
+            concurrency: Concurrent AdminCreateUser calls at most
+            limiter: Rate limiter (default: 10/s adapting between 1 and 50/s)
+            max_attempts: Attempts per row when Cognito throttles
+            send_invitation: Email participants their temporary password
+                (False suppresses the message, e.g. for test pools)
+            clock: Monotonic time in seconds, compared with enroll deadlines
+                (the limiter must use the same clock)
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.cognito = cognito_client
+        self.user_pool_id = user_pool_id
+        self.participant_table = participant_table
+        self.concurrency = concurrency
+        self.limiter = limiter or AdaptiveRateLimiter(clock=clock)
+        self.max_attempts = max_attempts
+        self.send_invitation = send_invitation
+        self.clock = clock
+
+    def enroll(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        deadline: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Enroll roster rows, yielding each row's result as it completes.
+
+        Created users are yielded once their ParticipantStatus rows are
+        written, in batches of up to 25.
+
+        Args:
+            rows: Roster rows (see read_roster)
+            deadline: clock() time after which no further rows are started;
+                they are yielded as 'skipped' to be sent again
+
+        Yields:
+            Row results: the roster columns and 'row', with 'status' (see
+            STATUSES), 'userSub' for created and existing users, 'attempts'
+            and an 'error' message for unsuccessful rows
+        """
+        rows = list(rows)
+        invalid = validate_rows(rows)
+        pending: List[Dict[str, Any]] = []
+        for row in rows:
+            if row['row'] in invalid:
+                yield self._result(row, 'invalid', error=invalid[row['row']])
+            else:
+                pending.append(row)
+
+        created: List[Dict[str, Any]] = []
+        queue = iter(pending)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            running: Set[Future] = set()
+            while True:
+                # Keep the pool busy without queuing rows a deadline would skip
+                while len(running) < 2 * self.concurrency:
+                    row = next(queue, None)
+                    if row is None:
+                        break
+                    if deadline is not None and self.clock() >= deadline:
+                        yield self._result(row, 'skipped', attempts=0, error='Deadline reached')
+                        continue
+                    running.add(executor.submit(self._create_user, row, deadline))
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result['status'] == 'created':
+                        created.append(result)
+                        if len(created) >= BATCH_SIZE:
+                            yield from self._write_participants(created)
+                            created = []
+                    elif result['status'] == 'exists':
+                        yield self._complete_participant(result)
+                    else:
+                        yield result
+        yield from self._write_participants(created)
+
+    def _create_user(self, row: Dict[str, Any], deadline: Optional[float]) -> Dict[str, Any]:
+        """Create a row's Cognito user, retrying throttled calls"""
+        attempts = 0
+        while True:
+            # Rows past the deadline neither wait for nor take a rate slot
+            if deadline is not None and self.clock() >= deadline:
+                return self._result(row, 'skipped', attempts=attempts, error='Deadline reached')
+            if not self.limiter.acquire(deadline):
+                return self._result(row, 'skipped', attempts=attempts, error='Deadline reached')
+            attempts += 1
+            try:
+                response = self.cognito.admin_create_user(**self._create_request(row))
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code in THROTTLING_ERRORS:
+                    self.limiter.throttled()
+                    if attempts < self.max_attempts:
+                        continue
+                    return self._result(row, 'failed', attempts=attempts, error=code)
+                if code == 'UsernameExistsException':
+                    return self._existing_user(row, attempts)
+                message = e.response['Error'].get('Message', code)
+                return self._result(row, 'failed', attempts=attempts, error=f"{code}: {message}")
+            self.limiter.success()
+            return self._result(
+                row, 'created', attempts=attempts,
+                userSub=_attributes(response['User'].get('Attributes', [])).get('sub')
+            )
+
+    def _create_request(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """AdminCreateUser parameters of a roster row"""
+        request = {
+            'UserPoolId': self.user_pool_id,
+            'Username': row['email'],
+            'UserAttributes': [
+                {'Name': 'email', 'Value': row['email']},
+                # The study team vouches for roster addresses
+                {'Name': 'email_verified', 'Value': 'true'},
+                {'Name': 'custom:studyCode', 'Value': row['studyCode']},
+                {'Name': 'custom:participantId', 'Value': row['participantId']},
+            ],
+        }
+        if self.send_invitation:
+            request['DesiredDeliveryMediums'] = ['EMAIL']
+        else:
+            request['MessageAction'] = 'SUPPRESS'
+        return request
+
+    def _existing_user(self, row: Dict[str, Any], attempts: int) -> Dict[str, Any]:
+        """Result of a row whose email is already a user, 'conflict' if of another study"""
+        try:
+            response = self.cognito.admin_get_user(
+                UserPoolId=self.user_pool_id, Username=row['email']
+            )
+        except ClientError as e:
+            return self._result(
+                row, 'failed', attempts=attempts,
+                error=f"User exists but could not be read: {e.response['Error']['Code']}"
+            )
+        attributes = _attributes(response.get('UserAttributes', []))
+        for column in ('studyCode', 'participantId'):
+            existing = attributes.get(f'custom:{column}')
+            if existing and existing != row[column]:
+                return self._result(
+                    row, 'conflict', attempts=attempts, userSub=attributes.get('sub'),
+                    error=f"User exists with {column} {existing}"
+                )
+        return self._result(row, 'exists', attempts=attempts, userSub=attributes.get('sub'))
+
+    def _write_participants(self, results: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Batch-write ParticipantStatus rows of created users, then yield their results"""
+        if results and self.participant_table is not None:
+            enrolled_at = int(time.time() * 1000)
+            try:
+                with self.participant_table.batch_writer() as batch:
+                    for result in results:
+                        batch.put_item(Item=_participant_item(result, enrolled_at))
+            except Exception as e:
+                logger.warning(f"Failed to write {len(results)} participant rows: {str(e)}")
+                for result in results:
+                    # Running the roster again completes these rows as 'exists'
+                    result['status'] = 'failed'
+                    result['error'] = f"User created, ParticipantStatus write failed: {str(e)}"
+        yield from results
+
+    def _complete_participant(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the fields an existing user's ParticipantStatus row is missing"""
+        if self.participant_table is None or not result.get('userSub'):
+            return result
+        item = _participant_item(result, int(time.time() * 1000))
+        del item['userId']
+        try:
+            self.participant_table.update_item(
+                Key={'userId': result['userSub']},
+                UpdateExpression='SET ' + ', '.join(
+                    f"{name} = if_not_exists({name}, :{name})" for name in item
+                ),
+                ExpressionAttributeValues={f':{name}': value for name, value in item.items()}
+            )
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = f"ParticipantStatus update failed: {str(e)}"
+        return result
+
+    @staticmethod
+    def _result(row: Dict[str, Any], status: str, **fields: Any) -> Dict[str, Any]:
+        """Result of a row"""
+        result = {
+            'row': row['row'],
+            'email': row.get('email', ''),
+            'studyCode': row.get('studyCode', ''),
+            'participantId': row.get('participantId', ''),
+            'status': status,
+        }
+        result.update(fields)
+        return result
+
+
+def summarize(results: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """Count results by status, every status included"""
+    counts = dict.fromkeys(STATUSES, 0)
+    for result in results:
+        counts[result['status']] += 1
+    return counts
+
+
+def _attributes(attributes: List[Dict[str, str]]) -> Dict[str, str]:
+    """Cognito attribute list as a dict"""
+    return {attribute['Name']: attribute['Value'] for attribute in attributes}
+
+
+def _participant_item(result: Dict[str, Any], enrolled_at: int) -> Dict[str, Any]:
+    """
+    ParticipantStatus item of an enrolled participant
+
+    lastSeenTimestamp starts at the enrollment time so the row is in
+    groupCode-lastSeen-index before the first upload; uploads overwrite it.
+    """
+    return {
+        'userId': result['userSub'],
+        'groupCode': result['studyCode'],
+        'email': result['email'],
+        'participantId': result['participantId'],
+        'enrolledAt': enrolled_at,
+        'lastSeenTimestamp': enrolled_at,
+        'dataCollectionStatus': 'enrolled',
+    }
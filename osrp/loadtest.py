@@ -0,0 +1,696 @@
+"""
+OSRP Ingestion Load Test
+Simulated device fleet driving the data upload Lambda handler in-process
+against a local DynamoDB/S3 stand-in
+"""
+
+import base64
+import heapq
+import importlib.util
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+import numpy as np
+
+from .codec import encode_readings
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto is a dev extra
+    mock_aws = None
+
+
+# Handler source in a repository checkout
+DEFAULT_HANDLER = (
+    Path(__file__).resolve().parent.parent / 'infrastructure' / 'lambda' / 'data_upload_handler.py'
+)
+
+# Sensor type -> sampling rate in Hz
+DEFAULT_SENSOR_RATES = {'accelerometer': 50.0, 'light': 0.2}
+
+# Readings accepted per POST /data/sensor request
+MAX_READINGS = 1000
+
+# Statuses a device retries: handler errors, throttling and keys still in progress
+RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+
+# Handler environment variable -> (table, partition key, sort key, sort key type)
+TABLES = {
+    'SENSOR_TABLE_NAME': ('SensorTimeSeries', 'userIdSensorType', 'timestamp', 'N'),
+    'EVENT_TABLE_NAME': ('EventLog', 'userId', 'timestampEventType', 'S'),
+    'DEVICE_STATE_TABLE_NAME': ('DeviceState', 'userId', 'timestamp', 'N'),
+    'PARTICIPANT_TABLE_NAME': ('ParticipantStatus', 'userId', None, None),
+    'UPLOAD_BATCH_TABLE_NAME': ('UploadBatches', 'batchKey', None, None),
+    'SENSOR_SUMMARY_TABLE_NAME': ('SensorSummary', 'userIdSensorType', 'timestamp', 'N'),
+    'LATEST_DEVICE_STATE_TABLE_NAME': ('LatestDeviceState', 'userId', None, None),
+}
+
+EVENT_TYPES = ('app_launch', 'app_close', 'screen_on', 'screen_off', 'notification', 'unlock')
+
+
+class DeviceProfile:
+    """
+    Upload behaviour of one simulated device
+
+    Sensor readings are buffered and uploaded every `upload_interval`
+    seconds in requests of at most 1,000 readings; events, screenshots and
+    device state snapshots are sent as they happen. While offline a device
+    queues every request and flushes the queue when it reconnects, the
+    burst pattern that follows a commute or a dead battery.
+    """
+
+    def __init__(
+        self,
+        sensor_rates: Optional[Dict[str, float]] = None,
+        upload_interval: float = 60.0,
+        events_per_hour: float = 30.0,
+        screenshot_interval: Optional[float] = 300.0,
+        screenshot_bytes: int = 50_000,
+        device_state_interval: Optional[float] = 900.0,
+        offline_probability: float = 0.05,
+        offline_seconds: float = 600.0,
+        encoding: str = 'json'
+    ):
+        """
+        Args:
+            sensor_rates: Sensor type -> sampling rate in Hz
+            upload_interval: Seconds between sensor uploads
+            events_per_hour: Mean rate of discrete events (Poisson)
+            screenshot_interval: Seconds between screenshots; None disables them
+            screenshot_bytes: Size of each uploaded screenshot
+            device_state_interval: Seconds between device state snapshots; None disables them
+            offline_probability: Chance of going offline at each upload
+            offline_seconds: Length of an offline period
+            encoding: Sensor request encoding, 'json' or 'gorilla' (osrp.codec blocks)
+        """
+        if encoding not in ('json', 'gorilla'):
+            raise ValueError(f"Unknown encoding '{encoding}'; expected 'json' or 'gorilla'")
+        self.sensor_rates = dict(DEFAULT_SENSOR_RATES if sensor_rates is None else sensor_rates)
+        self.upload_interval = upload_interval
+        self.events_per_hour = events_per_hour
+        self.screenshot_interval = screenshot_interval
+        self.screenshot_bytes = screenshot_bytes
+        self.device_state_interval = device_state_interval
+        self.offline_probability = offline_probability
+        self.offline_seconds = offline_seconds
+        self.encoding = encoding
+
+
+class SimulatedDevice:
+    """One participant's device, producing timed upload requests"""
+
+    def __init__(
+        self,
+        user_id: str,
+        study_code: str,
+        profile: DeviceProfile,
+        seed: int = 0,
+        start_ms: Optional[int] = None
+    ):
+        """
+        Args:
+            user_id: Participant user ID (Cognito sub)
+            study_code: Study code sent with every upload
+            profile: Upload behaviour
+            seed: Random seed for readings, events and offline periods
+            start_ms: Epoch milliseconds of simulated time zero (default: now)
+        """
+        self.user_id = user_id
+        self.study_code = study_code
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.start_ms = int(time.time() * 1000) if start_ms is None else start_ms
+
+    def requests(self, duration: float) -> List[Dict[str, Any]]:
+        """
+        Requests the device sends in `duration` simulated seconds
+
+        Args:
+            duration: Simulated seconds
+
+        Returns:
+            Requests sorted by send time ('at', seconds from the start)
+        """
+        profile = self.profile
+        created: List[Tuple[float, Dict[str, Any]]] = []
+
+        interval = profile.upload_interval
+        uploads = np.arange(interval, duration + 1e-9, interval).tolist()
+        for at in uploads:
+            for sensor_type, rate in profile.sensor_rates.items():
+                readings = self._readings(sensor_type, rate, at - interval, at)
+                for i in range(0, len(readings), MAX_READINGS):
+                    batch = readings[i:i + MAX_READINGS]
+                    created.append((at, self._sensor_request(sensor_type, batch)))
+
+        if profile.events_per_hour > 0:
+            rate = profile.events_per_hour / 3600
+            at = self.rng.expovariate(rate)
+            while at < duration:
+                created.append((at, self._event_request(at)))
+                at += self.rng.expovariate(rate)
+
+        for every, make in ((profile.screenshot_interval, self._screenshot_request),
+                            (profile.device_state_interval, self._device_state_request)):
+            if every:
+                times = np.arange(every, duration, every).tolist()
+                created.extend((at, make(at)) for at in times)
+
+        created.sort(key=lambda request: request[0])
+        return self._with_offline_queue(created, uploads)
+
+    def _with_offline_queue(
+        self,
+        created: List[Tuple[float, Dict[str, Any]]],
+        uploads: List[float]
+    ) -> List[Dict[str, Any]]:
+        """Set send times, holding requests made while offline until reconnecting"""
+        # Offline periods start at uploads; overlapping periods are merged
+        offline: List[List[float]] = []
+        for at in uploads:
+            if self.rng.random() < self.profile.offline_probability:
+                if offline and at <= offline[-1][1]:
+                    offline[-1][1] = at + self.profile.offline_seconds
+                else:
+                    offline.append([at, at + self.profile.offline_seconds])
+
+        requests = []
+        for at, request in created:
+            send_at = at
+            for went_offline, reconnected in offline:
+                if went_offline <= at < reconnected:
+                    send_at = reconnected
+                    break
+            request['at'] = send_at
+            request['queued'] = send_at > at
+            requests.append(request)
+        requests.sort(key=lambda request: request['at'])
+        return requests
+
+    def _readings(self, sensor_type: str, rate: float, start: float, end: float) -> List[Dict]:
+        """Readings sampled at `rate` Hz with timing jitter over [start, end) seconds"""
+        if rate <= 0:
+            return []
+        period_ms = 1000.0 / rate
+        count = int(round((end - start) * rate))
+        rng = self.rng
+        base = self.start_ms + start * 1000
+        if sensor_type in ('accelerometer', 'gyroscope', 'magnetometer'):
+            gravity = -9.81 if sensor_type == 'accelerometer' else 0.0
+            return [
+                {
+                    'timestamp': int(base + i * period_ms + rng.choice((-1, 0, 0, 1))),
+                    'data': {
+                        'x': round(rng.gauss(0, 0.3), 3),
+                        'y': round(gravity + rng.gauss(0, 0.05), 3),
+                        'z': round(rng.gauss(0, 0.2), 3),
+                    },
+                    'accuracy': 3,
+                }
+                for i in range(count)
+            ]
+        return [
+            {
+                'timestamp': int(base + i * period_ms),
+                'data': {'value': round(rng.uniform(0, 500), 1)},
+            }
+            for i in range(count)
+        ]
+
+    def _sensor_request(self, sensor_type: str, readings: List[Dict]) -> Dict[str, Any]:
+        """POST /data/sensor for one batch of readings"""
+        body: Dict[str, Any] = {'sensorType': sensor_type, 'studyCode': self.study_code}
+        if self.profile.encoding == 'gorilla':
+            body['encoding'] = 'gorilla'
+            body['block'] = base64.b64encode(encode_readings(readings)).decode('ascii')
+        else:
+            body['readings'] = readings
+        return {
+            'endpoint': 'sensor', 'method': 'POST', 'path': '/data/sensor',
+            'body': json.dumps(body), 'items': len(readings),
+        }
+
+    def _event_request(self, at: float) -> Dict[str, Any]:
+        """POST /data/event for one event"""
+        body = {
+            'eventType': self.rng.choice(EVENT_TYPES),
+            'timestamp': int(self.start_ms + at * 1000),
+            'eventData': {'sessionId': uuid.UUID(int=self.rng.getrandbits(128)).hex[:12]},
+            'context': {'batteryLevel': self.rng.randint(5, 100), 'networkType': 'wifi'},
+            'studyCode': self.study_code,
+        }
+        return {
+            'endpoint': 'event', 'method': 'POST', 'path': '/data/event',
+            'body': json.dumps(body), 'items': 1,
+        }
+
+    def _screenshot_request(self, at: float) -> Dict[str, Any]:
+        """GET /data/presigned-url, followed by the screenshot upload to S3"""
+        timestamp = int(self.start_ms + at * 1000)
+        date = time.strftime('%Y-%m-%d', time.gmtime(timestamp / 1000))
+        return {
+            'endpoint': 'screenshot', 'method': 'GET', 'path': '/data/presigned-url',
+            'query': {
+                'key': f"raw/screenshots/{self.user_id}/{date}/{timestamp}.png",
+                'contentType': 'image/png',
+            },
+            'items': 1,
+        }
+
+    def _device_state_request(self, at: float) -> Dict[str, Any]:
+        """POST /data/device-state for one snapshot"""
+        body = {
+            'timestamp': int(self.start_ms + at * 1000),
+            'studyCode': self.study_code,
+            'batteryLevel': self.rng.randint(5, 100),
+            'batteryCharging': self.rng.random() < 0.3,
+            'networkType': self.rng.choice(('wifi', 'cellular')),
+            'storageAvailable': 5368709120,
+            'storageTotal': 10737418240,
+            'appVersion': '0.3.0',
+            'osVersion': 'Fire OS 8',
+        }
+        return {
+            'endpoint': 'device-state', 'method': 'POST', 'path': '/data/device-state',
+            'body': json.dumps(body), 'items': 1,
+        }
+
+
+class LoadTestReport:
+    """Outcome of a load test run"""
+
+    def __init__(self, devices: int, duration: float):
+        self.devices = devices
+        self.duration = duration
+        self.elapsed = 0.0
+        self.requests = 0
+        self.queued = 0
+        self.retries = 0
+        self.replayed = 0
+        self.failed = 0
+        self.statuses: Dict[int, int] = {}
+        self.latencies: Dict[str, List[float]] = {}
+        self.expected_items: Dict[str, int] = {}
+        self.items_written: Dict[str, int] = {}
+        self.drain: Optional[Dict[str, Any]] = None
+
+    @property
+    def throughput(self) -> float:
+        """Requests completed per wall-clock second"""
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def items_per_second(self) -> float:
+        """Items written per wall-clock second"""
+        return sum(self.items_written.values()) / self.elapsed if self.elapsed else 0.0
+
+    def percentiles(self, endpoint: Optional[str] = None) -> Dict[str, float]:
+        """
+        Handler latency percentiles in milliseconds
+
+        Args:
+            endpoint: 'sensor', 'event', 'screenshot' or 'device-state'; default all
+
+        Returns:
+            {'p50': ..., 'p95': ..., 'p99': ..., 'max': ...}
+        """
+        if endpoint is None:
+            samples = [value for values in self.latencies.values() for value in values]
+        else:
+            samples = self.latencies.get(endpoint, [])
+        if not samples:
+            return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+        p50, p95, p99 = (np.percentile(samples, [50, 95, 99]) * 1000).tolist()
+        return {'p50': p50, 'p95': p95, 'p99': p99, 'max': max(samples) * 1000}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable summary, for comparing runs"""
+        return {
+            'devices': self.devices,
+            'duration': self.duration,
+            'elapsed': self.elapsed,
+            'requests': self.requests,
+            'queued': self.queued,
+            'retries': self.retries,
+            'replayed': self.replayed,
+            'failed': self.failed,
+            'throughput': self.throughput,
+            'items_per_second': self.items_per_second(),
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'latency_ms': {
+                endpoint or 'all': self.percentiles(endpoint)
+                for endpoint in [None, *sorted(self.latencies)]
+            },
+            'expected_items': dict(self.expected_items),
+            'items_written': dict(self.items_written),
+            'drain': self.drain,
+        }
+
+
+class LoadTest:
+    """
+    Drive the data upload handler with a simulated device fleet
+
+    Each of `concurrency` worker threads owns a separately loaded copy of
+    the handler module, like a warm Lambda instance, and replays the merged
+    request schedule of every device either as fast as possible or at
+    `speedup` times real time. Requests carry an Idempotency-Key and are
+    retried on 409/429/5xx and on injected lost responses, the way the
+    mobile client retries. By default DynamoDB and S3 are moto's in-process
+    stand-ins; `endpoint_url` targets e.g. DynamoDB Local or LocalStack.
+    With `ingest_mode='async'` sensor batches are spilled to S3 and written
+    by the drain worker once the fleet is done, timing it separately.
+
+    Example:
+        loadtest = LoadTest(devices=20, duration=600, concurrency=4)
+        report = loadtest.run()
+        report.throughput, report.percentiles('sensor')
+    """
+
+    def __init__(
+        self,
+        devices: int = 10,
+        duration: float = 300.0,
+        profile: Optional[DeviceProfile] = None,
+        concurrency: int = 1,
+        speedup: Optional[float] = None,
+        lost_response_rate: float = 0.0,
+        max_attempts: int = 5,
+        retry_delay: float = 0.0,
+        idempotency: bool = True,
+        ingest_mode: str = 'sync',
+        study_code: str = 'loadtest',
+        seed: int = 0,
+        handler_path: Optional[str] = None,
+        region: str = 'us-west-2',
+        endpoint_url: Optional[str] = None
+    ):
+        """
+        Args:
+            devices: Number of simulated devices
+            duration: Simulated seconds of device activity
+            profile: Upload behaviour shared by every device
+            concurrency: Concurrent handler instances
+            speedup: Replay at this multiple of real time; None sends as fast as possible
+            lost_response_rate: Share of successful responses the device never
+                receives, so it retries with the same Idempotency-Key
+            max_attempts: Attempts per request before the device gives up
+            retry_delay: Seconds before the first retry, doubled on each further
+                retry; a Retry-After response header takes precedence
+            idempotency: Send Idempotency-Key headers on POST requests
+            ingest_mode: Handler SENSOR_INGEST_MODE, 'sync' or 'async'
+            study_code: Study code of the simulated participants
+            seed: Random seed of the fleet
+            handler_path: data_upload_handler.py to load (default: this checkout's)
+            region: AWS region
+            endpoint_url: Endpoint of a running DynamoDB/S3 stand-in instead of moto
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if ingest_mode not in ('sync', 'async'):
+            raise ValueError(f"Unknown ingest_mode '{ingest_mode}'; expected 'sync' or 'async'")
+        self.devices = devices
+        self.duration = duration
+        self.profile = profile or DeviceProfile()
+        self.concurrency = concurrency
+        self.speedup = speedup
+        self.lost_response_rate = lost_response_rate
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.idempotency = idempotency
+        self.ingest_mode = ingest_mode
+        self.study_code = study_code
+        self.seed = seed
+        self.handler_path = Path(handler_path) if handler_path else DEFAULT_HANDLER
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.run_id = uuid.uuid4().hex[:8]
+        self.start_ms = int(time.time() * 1000)
+        self._schedule: Optional[List[Dict[str, Any]]] = None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def schedule(self) -> List[Dict[str, Any]]:
+        """
+        Requests of the whole fleet in send order (generated once per run)
+
+        Returns:
+            Request dicts with 'user_id', 'endpoint', 'at' (simulated seconds)
+            and 'items' (readings or records the request writes)
+        """
+        if self._schedule is None:
+            rng = random.Random(self.seed)
+            fleet = []
+            for device in range(self.devices):
+                user_id = f"{self.region}:{uuid.UUID(int=rng.getrandbits(128))}"
+                simulated = SimulatedDevice(
+                    user_id, self.study_code, self.profile, seed=rng.getrandbits(32),
+                    start_ms=self.start_ms
+                )
+                requests = simulated.requests(self.duration)
+                for request in requests:
+                    request['user_id'] = user_id
+                fleet.append(requests)
+            self._schedule = list(heapq.merge(*fleet, key=lambda request: request['at']))
+        return self._schedule
+
+    def run(self, progress: Optional[Any] = None) -> LoadTestReport:
+        """
+        Create the tables and bucket, replay the schedule and count what was written
+
+        Args:
+            progress: Optional callable invoked after every completed request
+
+        Returns:
+            LoadTestReport
+        """
+        if self.endpoint_url is None and mock_aws is None:
+            raise ImportError(
+                "LoadTest requires moto for its DynamoDB/S3 stand-in: pip install 'osrp[dev]'"
+                " (or pass endpoint_url)"
+            )
+        if not self.handler_path.exists():
+            raise FileNotFoundError(f"Upload handler not found: {self.handler_path}")
+
+        requests = self.schedule()
+        report = LoadTestReport(self.devices, self.duration)
+        report.queued = sum(request['queued'] for request in requests)
+        for request in requests:
+            expected = report.expected_items
+            expected[request['endpoint']] = expected.get(request['endpoint'], 0) + request['items']
+
+        with ExitStack() as stack:
+            # Loading the handler sets the root log level, as on Lambda
+            stack.callback(logging.getLogger().setLevel, logging.getLogger().level)
+            stack.callback(_restore_environ, dict(os.environ))
+            os.environ.update(self._environment())
+            if self.endpoint_url is None:
+                stack.enter_context(mock_aws())
+            else:
+                os.environ['AWS_ENDPOINT_URL'] = self.endpoint_url
+                stack.callback(self._delete_resources)
+
+            self._create_resources()
+            handlers = [self._load_handler(instance) for instance in range(self.concurrency)]
+            self._drive(handlers, requests, report, progress)
+            if self.ingest_mode == 'async':
+                started = time.perf_counter()
+                report.drain = handlers[0].drain_spilled_batches()
+                report.drain['elapsed'] = time.perf_counter() - started
+            self._count_items(report)
+        return report
+
+    def _environment(self) -> Dict[str, str]:
+        """Handler environment variables naming this run's tables and bucket"""
+        environment = {
+            variable: f"loadtest-{self.run_id}-{table}"
+            for variable, (table, _, _, _) in TABLES.items()
+        }
+        environment['DATA_BUCKET_NAME'] = f"osrp-loadtest-{self.run_id}"
+        environment['AWS_DEFAULT_REGION'] = self.region
+        environment['SENSOR_INGEST_MODE'] = self.ingest_mode
+        # Keep per-request metric records out of the report output
+        environment['METRICS_ENABLED'] = 'false'
+        return environment
+
+    def _create_resources(self) -> None:
+        """Create the handler's tables and the data bucket"""
+        dynamodb = boto3.client('dynamodb', region_name=self.region)
+        for variable, (_, partition_key, sort_key, sort_type) in TABLES.items():
+            key_schema = [{'AttributeName': partition_key, 'KeyType': 'HASH'}]
+            attributes = [{'AttributeName': partition_key, 'AttributeType': 'S'}]
+            if sort_key:
+                key_schema.append({'AttributeName': sort_key, 'KeyType': 'RANGE'})
+                attributes.append({'AttributeName': sort_key, 'AttributeType': sort_type})
+            dynamodb.create_table(
+                TableName=os.environ[variable],
+                KeySchema=key_schema,
+                AttributeDefinitions=attributes,
+                BillingMode='PAY_PER_REQUEST'
+            )
+        for variable in TABLES:
+            dynamodb.get_waiter('table_exists').wait(TableName=os.environ[variable])
+
+        s3 = boto3.client('s3', region_name=self.region)
+        bucket = {'Bucket': os.environ['DATA_BUCKET_NAME']}
+        # us-east-1 rejects its own name as a location constraint
+        if self.region != 'us-east-1':
+            bucket['CreateBucketConfiguration'] = {'LocationConstraint': self.region}
+        s3.create_bucket(**bucket)
+
+    def _delete_resources(self) -> None:
+        """Remove this run's tables and bucket from an external stand-in"""
+        dynamodb = boto3.client('dynamodb', region_name=self.region)
+        for variable in TABLES:
+            dynamodb.delete_table(TableName=os.environ[variable])
+
+        bucket = boto3.resource('s3', region_name=self.region).Bucket(
+            os.environ['DATA_BUCKET_NAME']
+        )
+        bucket.objects.all().delete()
+        bucket.delete()
+
+    def _load_handler(self, instance: int) -> Any:
+        """Load a private copy of the handler module, like a fresh Lambda instance"""
+        spec = importlib.util.spec_from_file_location(
+            f"_osrp_loadtest_handler_{instance}", self.handler_path
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    def _drive(
+        self,
+        handlers: List[Any],
+        requests: List[Dict[str, Any]],
+        report: LoadTestReport,
+        progress: Optional[Any]
+    ) -> None:
+        """Send every request through the handler instances"""
+        instances = list(handlers)
+        s3 = boto3.client('s3', region_name=self.region)
+        screenshot = b'\x89PNG\r\n\x1a\n' + bytes(max(self.profile.screenshot_bytes - 8, 0))
+
+        def send(request: Dict[str, Any]) -> None:
+            with self._lock:
+                handler = instances.pop()
+            try:
+                response = self._send(handler, request, report)
+            finally:
+                with self._lock:
+                    instances.append(handler)
+
+            # The device uploads the screenshot to the presigned URL itself
+            if request['endpoint'] == 'screenshot' and response['statusCode'] == 200:
+                s3.put_object(
+                    Bucket=os.environ['DATA_BUCKET_NAME'],
+                    Key=request['query']['key'],
+                    Body=screenshot,
+                    ContentType='image/png'
+                )
+            if progress is not None:
+                with self._lock:
+                    progress(report)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = []
+            for request in requests:
+                if self.speedup:
+                    delay = started + request['at'] / self.speedup - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(executor.submit(send, request))
+            for future in futures:
+                future.result()
+        report.elapsed = time.perf_counter() - started
+
+    def _send(
+        self,
+        handler: Any,
+        request: Dict[str, Any],
+        report: LoadTestReport
+    ) -> Dict[str, Any]:
+        """Invoke the handler for one request, retrying like the mobile client"""
+        event = {
+            'httpMethod': request['method'],
+            'path': request['path'],
+            'headers': {'Content-Type': 'application/json'},
+            'queryStringParameters': request.get('query'),
+            'body': request.get('body'),
+            'requestContext': {'authorizer': {'claims': {'sub': request['user_id']}}},
+        }
+        if self.idempotency and request['method'] == 'POST':
+            event['headers']['Idempotency-Key'] = str(uuid.UUID(int=self._random_bits()))
+
+        endpoint = request['endpoint']
+        for attempt in range(self.max_attempts):
+            started = time.perf_counter()
+            response = handler.lambda_handler(event, None)
+            latency = time.perf_counter() - started
+
+            status = response['statusCode']
+            replayed = (response.get('headers') or {}).get('Idempotent-Replayed') == 'true'
+            lost = status < 300 and self._random() < self.lost_response_rate
+            with self._lock:
+                report.latencies.setdefault(endpoint, []).append(latency)
+                report.statuses[status] = report.statuses.get(status, 0) + 1
+                report.retries += attempt > 0
+                report.replayed += replayed
+
+            if not lost and status not in RETRY_STATUSES:
+                break
+            if self.retry_delay and attempt + 1 < self.max_attempts:
+                retry_after = (response.get('headers') or {}).get('Retry-After')
+                time.sleep(float(retry_after) if retry_after else self.retry_delay * 2 ** attempt)
+
+        with self._lock:
+            report.requests += 1
+            report.failed += lost or status >= 300
+        return response
+
+    def _random(self) -> float:
+        """Shared fleet randomness, safe across worker threads"""
+        with self._lock:
+            return self._rng.random()
+
+    def _random_bits(self) -> int:
+        """128 random bits for an Idempotency-Key"""
+        with self._lock:
+            return self._rng.getrandbits(128)
+
+    def _count_items(self, report: LoadTestReport) -> None:
+        """Count the items and objects the run wrote"""
+        dynamodb = boto3.client('dynamodb', region_name=self.region)
+        paginator = dynamodb.get_paginator('scan')
+        for endpoint, variable in (('sensor', 'SENSOR_TABLE_NAME'), ('event', 'EVENT_TABLE_NAME'),
+                                   ('device-state', 'DEVICE_STATE_TABLE_NAME')):
+            report.items_written[endpoint] = sum(
+                page['Count']
+                for page in paginator.paginate(TableName=os.environ[variable], Select='COUNT')
+            )
+
+        s3 = boto3.client('s3', region_name=self.region)
+        report.items_written['screenshot'] = sum(
+            page.get('KeyCount', 0)
+            for page in s3.get_paginator('list_objects_v2').paginate(
+                Bucket=os.environ['DATA_BUCKET_NAME'], Prefix='raw/screenshots/'
+            )
+        )
+
+
+def _restore_environ(saved: Dict[str, str]) -> None:
+    """Put os.environ back the way it was"""
+    os.environ.clear()
+    os.environ.update(saved)
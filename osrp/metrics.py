@@ -0,0 +1,167 @@
+"""
+OSRP Lambda Metrics
+CloudWatch Embedded Metric Format (EMF) records for the Lambda handlers
+
+Standard library only, so the Lambdas can ship it next to their handlers
+(see infrastructure/deploy.sh).
+
+A MetricsLogger collects the metrics of one invocation - latency, phase
+timings, batch sizes, retries - and flush() prints them as a single JSON
+line on stdout. Lambda forwards stdout to CloudWatch Logs, where the `_aws`
+metadata of the record turns its values into CloudWatch metrics without any
+PutMetricData calls. Locally, the records can be read by capturing stdout.
+
+    metrics = MetricsLogger('OSRP/Ingestion', {'Service': 'DataUpload'})
+    metrics.put_dimension('Route', 'POST /data/sensor')
+    with metrics.timer('WriteTime'):
+        ...
+    metrics.put_metric('BatchSize', 1000)
+    metrics.flush()
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+# Values one metric may carry in a record (an EMF limit)
+MAX_VALUES_PER_METRIC = 100
+# Dimensions a record may have (a CloudWatch limit)
+MAX_DIMENSIONS = 30
+
+UNITS = frozenset({
+    'Seconds', 'Microseconds', 'Milliseconds', 'Bytes', 'Kilobytes', 'Megabytes',
+    'Count', 'Percent', 'Count/Second', 'None',
+})
+
+
+class MetricsLogger:
+    """
+    Collects metrics, dimensions and properties into EMF records.
+
+    Metrics recorded more than once before a flush keep every value (e.g. the
+    write time of each batch a drain run writes), and CloudWatch aggregates
+    them as separate samples. Dimensions set with put_dimension and all
+    properties last until the next flush; the default dimensions are kept.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        dimensions: Optional[Dict[str, str]] = None,
+        stream: Optional[TextIO] = None,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            namespace: CloudWatch metric namespace
+            dimensions: Dimensions of every record, e.g. {'Service': 'DataUpload'}
+            stream: Where records are written (default: sys.stdout at flush time)
+            enabled: Whether flush writes records at all
+        """
+        self.namespace = namespace
+        self.default_dimensions = dict(dimensions or {})
+        self.stream = stream
+        self.enabled = enabled
+        self.dimensions: Dict[str, str] = {}
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+        self.properties: Dict[str, Any] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop everything recorded since the last flush"""
+        self.dimensions = dict(self.default_dimensions)
+        self.metrics = {}
+        self.properties = {}
+
+    def put_dimension(self, name: str, value: str) -> None:
+        """
+        Add a dimension to the metrics of the current record.
+
+        Dimension values become separate CloudWatch metrics, so they must
+        come from a small fixed set (routes, not user IDs).
+        """
+        if name not in self.dimensions and len(self.dimensions) >= MAX_DIMENSIONS:
+            raise ValueError(f"A record has at most {MAX_DIMENSIONS} dimensions")
+        self.dimensions[name] = str(value)
+
+    def put_metric(self, name: str, value: float, unit: str = 'Count') -> None:
+        """
+        Record a metric value.
+
+        A metric holding MAX_VALUES_PER_METRIC values flushes the record
+        first, so long-running invocations emit several records.
+
+        Args:
+            name: Metric name
+            value: Metric value
+            unit: CloudWatch unit (see UNITS)
+        """
+        if unit not in UNITS:
+            raise ValueError(f"Unknown metric unit: {unit}")
+        metric = self.metrics.get(name)
+        if metric is not None and len(metric['values']) >= MAX_VALUES_PER_METRIC:
+            self.flush(reset=False)
+            metric = None
+        if metric is None:
+            metric = self.metrics[name] = {'unit': unit, 'values': []}
+        metric['values'].append(value)
+
+    def set_property(self, name: str, value: Any) -> None:
+        """Attach a value that is searchable in the logs but not a metric"""
+        self.properties[name] = value
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Record the run time of the block as a millisecond metric, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put_metric(name, (time.perf_counter() - started) * 1000, 'Milliseconds')
+
+    def record(self) -> Optional[Dict[str, Any]]:
+        """
+        The EMF record of what was recorded since the last flush.
+
+        Returns:
+            JSON-serializable record, or None if no metric was recorded
+        """
+        if not self.metrics:
+            return None
+        record: Dict[str, Any] = dict(self.properties)
+        record.update(self.dimensions)
+        for name, metric in self.metrics.items():
+            values: List[float] = metric['values']
+            record[name] = values[0] if len(values) == 1 else values
+        record['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': self.namespace,
+                'Dimensions': [sorted(self.dimensions)],
+                'Metrics': [
+                    {'Name': name, 'Unit': metric['unit']}
+                    for name, metric in self.metrics.items()
+                ],
+            }],
+        }
+        return record
+
+    def flush(self, reset: bool = True) -> None:
+        """
+        Write the current record as one line and start the next.
+
+        Args:
+            reset: Also drop dimensions and properties (False keeps them for
+                the rest of the invocation)
+        """
+        record = self.record()
+        if record is not None and self.enabled:
+            stream = self.stream or sys.stdout
+            stream.write(json.dumps(record, separators=(',', ':'), default=str) + '\n')
+            stream.flush()
+        if reset:
+            self.reset()
+        else:
+            self.metrics = {}
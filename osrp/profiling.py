@@ -0,0 +1,371 @@
+"""
+OSRP Lambda Profiling
+Sampling profiler for selected Lambda invocations, and flame graphs of its profiles
+
+Standard library only, so the upload Lambda can ship it next to its handler
+(see infrastructure/deploy.sh).
+
+While a SamplingProfiler is active, a background thread records the stack
+of the profiled thread every few milliseconds. Stacks are kept in the folded
+format of Brendan Gregg's flame graph tools - one `outer;inner;leaf count`
+line per distinct stack - so a profile of an invocation is a few kilobytes,
+and profiles of many invocations merge by adding their counts. Sampling
+adds the same small cost to every function, where cProfile's per-call
+overhead would inflate exactly the many-small-calls code (e.g. Decimal
+conversion) a profile is meant to weigh against the DynamoDB writes.
+
+    with SamplingProfiler() as profiler:
+        handle(event)
+    body = dumps(profiler.stacks)
+
+    stacks = merge(loads(body) for body in fetched)
+    svg = render_flamegraph(stacks, title='POST /data/sensor')
+"""
+
+import gzip
+import os
+import re
+import sys
+import threading
+import time
+import typing
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+# Seconds between stack samples; sampling needs the GIL, which a busy
+# thread hands over every sys.getswitchinterval() (5 ms by default)
+DEFAULT_INTERVAL = 0.005
+
+# Where the upload handler writes profiles; temp/ objects expire after 7 days
+PROFILE_PREFIX = 'temp/debug/profiles/'
+PROFILE_SUFFIX = '.folded.gz'
+
+# Samples per folded stack ('outer;...;leaf' -> count)
+Stacks = typing.Counter[str]
+
+
+def frame_label(code: Any) -> str:
+    """
+    Label of a function in folded stacks.
+
+    Args:
+        code: Code object of the function
+
+    Returns:
+        'function (file.py:line)', without the semicolons that separate frames
+    """
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+class SamplingProfiler:
+    """
+    Sample the stacks of the thread that enters the profiler.
+
+    Stacks start at the function that entered the profiler, so the frames of
+    the Lambda runtime above the handler are left out.
+
+    Attributes:
+        stacks: Samples per folded stack ('outer;...;leaf' -> count)
+        samples: Number of samples taken
+        elapsed: Seconds the profiler was active
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.stacks: Stacks = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._root = None
+        self._thread_id = 0
+        self._started = 0.0
+
+    def __enter__(self) -> 'SamplingProfiler':
+        self._root = sys._getframe(1)
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='osrp-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        self._root = None
+
+    def _run(self) -> None:
+        """Sample until stopped"""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._sample(frame)
+
+    def _sample(self, frame: Any) -> None:
+        """Add the stack ending in a frame, up to the profiler's entry frame"""
+        labels = self._labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = frame_label(code)
+            stack.append(label)
+            if frame is self._root:
+                break
+            frame = frame.f_back
+        else:
+            # Sampled after the profiled block returned
+            return
+        stack.reverse()
+        self.stacks[';'.join(stack)] += 1
+        self.samples += 1
+
+
+def dumps(stacks: Stacks) -> bytes:
+    """
+    Serialize folded stacks as gzipped text, heaviest stack first.
+
+    Args:
+        stacks: Samples per folded stack
+
+    Returns:
+        Gzipped 'stack count' lines
+    """
+    lines = ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    return gzip.compress(lines.encode('utf-8'))
+
+
+def loads(body: bytes) -> Stacks:
+    """
+    Parse gzipped (or plain) folded stacks written by dumps or flame graph tools.
+
+    Args:
+        body: Serialized profile
+
+    Returns:
+        Samples per folded stack
+    """
+    if body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    stacks: Stacks = Counter()
+    for line in body.decode('utf-8').splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+
+def merge(profiles: Iterable[Stacks]) -> Stacks:
+    """Add up the samples of several profiles"""
+    merged: Stacks = Counter()
+    for stacks in profiles:
+        merged.update(stacks)
+    return merged
+
+
+def route_slug(route: str) -> str:
+    """
+    Key segment of a route, e.g. 'POST /data/sensor' -> 'post-data-sensor'.
+
+    Args:
+        route: Method and path, or an already slugged route
+
+    Returns:
+        Lower-case route with runs of other characters replaced by '-'
+    """
+    return re.sub(r'[^a-z0-9]+', '-', route.lower()).strip('-')
+
+
+def profile_key(prefix: str, route: str, request_id: str, day: Optional[date] = None) -> str:
+    """
+    S3 key of an invocation's profile: {prefix}{YYYY-MM-DD}/{route}/{request id}.folded.gz
+
+    Args:
+        prefix: Key prefix ending in '/'
+        route: Route of the invocation
+        request_id: Lambda request ID
+        day: UTC day of the invocation (default: today)
+
+    Returns:
+        S3 key
+    """
+    day = day or datetime.now(timezone.utc).date()
+    return f"{prefix}{day.isoformat()}/{route_slug(route)}/{request_id}{PROFILE_SUFFIX}"
+
+
+def profile_keys(
+    s3_client: Any,
+    bucket: str,
+    prefix: str,
+    start: date,
+    end: date,
+    route: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Keys of the profiles written on the days from start to end.
+
+    Args:
+        s3_client: boto3 S3 client
+        bucket: Bucket the profiles are in
+        prefix: Key prefix the handler writes profiles under
+        start: First day
+        end: Last day
+        route: Only profiles of this route (method and path, or its slug)
+
+    Yields:
+        S3 keys
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    day = start
+    while day <= end:
+        day_prefix = f"{prefix}{day.isoformat()}/"
+        if route:
+            day_prefix += f"{route_slug(route)}/"
+        for page in paginator.paginate(Bucket=bucket, Prefix=day_prefix):
+            for obj in page.get('Contents', []):
+                if obj['Key'].endswith(PROFILE_SUFFIX):
+                    yield obj['Key']
+        day += timedelta(days=1)
+
+
+def fetch_profiles(s3_client: Any, bucket: str, keys: Iterable[str]) -> Stacks:
+    """
+    Download profiles and merge their samples.
+
+    Args:
+        s3_client: boto3 S3 client
+        bucket: Bucket the profiles are in
+        keys: Profile keys (see profile_keys)
+
+    Returns:
+        Samples per folded stack over all profiles
+    """
+    merged: Stacks = Counter()
+    for key in keys:
+        body = s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+        merged.update(loads(body))
+    return merged
+
+
+def function_totals(stacks: Stacks) -> List[Tuple[str, int, int]]:
+    """
+    Samples per function, heaviest first.
+
+    Args:
+        stacks: Samples per folded stack
+
+    Returns:
+        (function, self samples, total samples) tuples; self samples were
+        taken in the function itself, total samples anywhere below it
+        (counted once per stack under recursion)
+    """
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return sorted(
+        ((frame, own[frame], samples) for frame, samples in total.items()),
+        key=lambda row: (-row[2], -row[1], row[0])
+    )
+
+
+def _tree(stacks: Stacks) -> Dict[str, Any]:
+    """Call tree of folded stacks: {'value': samples, 'children': {name: node}}"""
+    root: Dict[str, Any] = {'value': 0, 'children': {}}
+    for stack, count in stacks.items():
+        node = root
+        node['value'] += count
+        for frame in stack.split(';'):
+            node = node['children'].setdefault(frame, {'value': 0, 'children': {}})
+            node['value'] += count
+    return root
+
+
+def _color(name: str) -> str:
+    """Stable warm color of a function, as in the original flame graphs"""
+    digest = sum(ord(c) * (i + 1) for i, c in enumerate(name))
+    return f"rgb({205 + digest % 50},{(digest // 50) % 180 + 50},{(digest // 9000) % 55})"
+
+
+def render_flamegraph(
+    stacks: Stacks,
+    title: str = 'Flame Graph',
+    width: int = 1200,
+    row_height: int = 16,
+    min_width: float = 0.5
+) -> str:
+    """
+    Render folded stacks as an SVG flame graph.
+
+    Each box is a function, as wide as its share of the samples and stacked
+    on its caller; hovering shows the function and its samples.
+
+    Args:
+        stacks: Samples per folded stack
+        title: Heading of the graph
+        width: Width in pixels
+        row_height: Height of a stack level in pixels
+        min_width: Boxes narrower than this many pixels are left out
+
+    Returns:
+        SVG document
+    """
+    root = _tree(stacks)
+    total = root['value']
+    margin, heading = 10, 40
+
+    boxes = []
+    depth_max = 0
+    if total:
+        scale = (width - 2 * margin) / total
+        pending = [(root, 0, margin)]
+        while pending:
+            node, depth, x = pending.pop()
+            for name, child in sorted(node['children'].items()):
+                box_width = child['value'] * scale
+                if box_width >= min_width:
+                    boxes.append((name, child['value'], depth, x, box_width))
+                    depth_max = max(depth_max, depth + 1)
+                    pending.append((child, depth + 1, x))
+                x += box_width
+
+    height = heading + (depth_max + 1) * row_height + margin
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="Verdana, sans-serif" font-size="11">',
+        f'<rect width="{width}" height="{height}" fill="#fdfdf6"/>',
+        f'<text x="{width / 2:.0f}" y="24" font-size="16" text-anchor="middle">'
+        f'{escape(title)} ({total:,} samples)</text>',
+    ]
+    for name, value, depth, x, box_width in boxes:
+        y = height - margin - (depth + 1) * row_height
+        label = escape(name)
+        lines.append(
+            f'<g><title>{label} ({value:,} samples, {100 * value / total:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{box_width:.1f}" height="{row_height - 1}" '
+            f'fill="{_color(name)}" rx="2"/>'
+        )
+        characters = int((box_width - 6) / 7)
+        if characters >= 3:
+            text = name if len(name) <= characters else name[:characters - 2] + '..'
+            lines.append(
+                f'<text x="{x + 3:.1f}" y="{y + row_height - 4}">{escape(text)}</text>'
+            )
+        lines.append('</g>')
+    lines.append('</svg>')
+    return '\n'.join(lines) + '\n'
+
@@ -0,0 +1,365 @@
+"""
+OSRP Token Verification
+Local verification of Cognito JSON Web Tokens against the user pool's JWKS
+
+Standard library only, so the Lambdas can ship it next to their handlers
+(see infrastructure/deploy.sh). RS256 signatures are checked with the RSA
+public key arithmetic of RFC 8017 (RSASSA-PKCS1-v1_5), which needs no
+private key operations and so no cryptography package.
+
+A TokenVerifier checks a token the way Cognito documents it: signature by a
+key of the pool's JWKS, expiry, issuer, `token_use`, and audience (ID
+tokens) or `client_id` (access tokens). The JWKS is fetched once and kept
+for an hour; a token signed by an unknown key ID refetches it (at most
+every 30 seconds), which picks up rotated keys. Decisions are cached by
+token hash, valid tokens until they expire and rejected ones briefly, so a
+device uploading every few seconds costs one signature check per token.
+
+    verifier = TokenVerifier(
+        cognito_issuer('us-west-2', 'us-west-2_AbC123'), client_ids=['1example23456789']
+    )
+    claims = verifier.verify(token)   # raises TokenError
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ASN.1 DigestInfo prefix of a SHA-256 digest (RFC 8017, section 9.2)
+_SHA256_DIGEST_INFO = bytes.fromhex('3031300d060960864801650304020105000420')
+
+TOKEN_USES = ('id', 'access')
+
+
+class TokenError(ValueError):
+    """Raised for tokens that are malformed, forged, expired or for another pool or client"""
+
+
+def cognito_issuer(region: str, user_pool_id: str) -> str:
+    """Issuer (`iss`) of a Cognito user pool's tokens"""
+    return f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+
+
+def b64url_decode(value: str) -> bytes:
+    """
+    Decode unpadded base64url, as used by JWTs and JWKs.
+
+    Raises:
+        ValueError: If the value is not base64url
+    """
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+
+def rsa_verify(n: int, e: int, message: bytes, signature: bytes) -> bool:
+    """
+    Check an RSASSA-PKCS1-v1_5 SHA-256 signature (the JWS RS256 algorithm).
+
+    Args:
+        n: Public key modulus
+        e: Public key exponent
+        message: Signed bytes (`header.payload` of a JWT)
+        signature: Signature bytes
+
+    Returns:
+        Whether the signature is valid for the message
+    """
+    k = (n.bit_length() + 7) // 8
+    digest_info = _SHA256_DIGEST_INFO + hashlib.sha256(message).digest()
+    if len(signature) != k or k < len(digest_info) + 11:
+        return False
+    s = int.from_bytes(signature, 'big')
+    if s >= n:
+        return False
+    encoded = pow(s, e, n).to_bytes(k, 'big')
+    expected = b'\x00\x01' + b'\xff' * (k - len(digest_info) - 3) + b'\x00' + digest_info
+    return hmac.compare_digest(encoded, expected)
+
+
+def fetch_json(url: str, timeout: float = 3.0) -> Any:
+    """Fetch and parse a JSON document (https:// or, offline, file:// URLs)"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.load(response)
+
+
+def parse_jwks(document: Mapping[str, Any]) -> Dict[str, Tuple[int, int]]:
+    """
+    RSA signing keys of a JWKS document.
+
+    Args:
+        document: {'keys': [{'kid', 'kty', 'n', 'e', ...}]}
+
+    Returns:
+        {key ID: (modulus, exponent)}; keys of other types or uses are skipped
+    """
+    keys = {}
+    for jwk in document.get('keys', []):
+        if jwk.get('kty') != 'RSA' or jwk.get('use', 'sig') != 'sig':
+            continue
+        if jwk.get('alg', 'RS256') != 'RS256' or 'kid' not in jwk:
+            continue
+        try:
+            keys[jwk['kid']] = (
+                int.from_bytes(b64url_decode(jwk['n']), 'big'),
+                int.from_bytes(b64url_decode(jwk['e']), 'big'),
+            )
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Skipping malformed JWK {jwk.get('kid')}")
+    return keys
+
+
+class JWKSCache:
+    """
+    Signing keys of a user pool, fetched on first use and refreshed periodically.
+
+    A key ID missing from the cached set triggers a refetch, at most every
+    `min_refresh_interval` seconds so forged key IDs cannot flood the
+    endpoint. When a refresh fails the previous keys stay in use.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl: float = 3600.0,
+        min_refresh_interval: float = 30.0,
+        fetch: Callable[[str], Any] = fetch_json,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            url: JWKS URL, e.g. '{issuer}/.well-known/jwks.json'
+            ttl: Seconds the keys are used before they are refetched
+            min_refresh_interval: Seconds between refetches for unknown key IDs
+            fetch: Returns the JWKS document of a URL
+            clock: Current time in seconds
+        """
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.fetch = fetch
+        self.clock = clock
+        self.keys: Optional[Dict[str, Tuple[int, int]]] = None
+        self.fetches = 0
+        self._fetched_at = float('-inf')
+        self._expires_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def key(self, kid: Any) -> Tuple[int, int]:
+        """
+        Public key of a key ID.
+
+        Args:
+            kid: `kid` of a token header
+
+        Returns:
+            (modulus, exponent)
+
+        Raises:
+            TokenError: If no current key has the ID, or the JWKS cannot be fetched
+        """
+        with self._lock:
+            now = self.clock()
+            if self.keys is None or now >= self._expires_at:
+                self._refresh(now)
+            if kid not in self.keys and now - self._fetched_at >= self.min_refresh_interval:
+                # The pool may have rotated its keys since the last fetch
+                self._refresh(now)
+            key = self.keys.get(kid)
+        if key is None:
+            raise TokenError(f"Unknown signing key: {kid}")
+        return key
+
+    def _refresh(self, now: float) -> None:
+        """Refetch the keys, keeping the previous ones if that fails"""
+        self._fetched_at = now
+        try:
+            keys = parse_jwks(self.fetch(self.url))
+            self.fetches += 1
+        except Exception as e:
+            if self.keys is None:
+                raise TokenError(f"Could not fetch signing keys: {str(e)}")
+            logger.warning(f"Failed to refresh signing keys, keeping cached ones: {str(e)}")
+            self._expires_at = now + self.min_refresh_interval
+            return
+        self.keys = keys
+        self._expires_at = now + self.ttl
+
+
+class TokenVerifier:
+    """
+    Verify Cognito tokens locally, caching decisions by token hash.
+
+    Attributes:
+        hits: Decisions answered from the cache
+        misses: Tokens verified
+    """
+
+    def __init__(
+        self,
+        issuer: str,
+        client_ids: Iterable[str] = (),
+        jwks: Optional[JWKSCache] = None,
+        token_use: Iterable[str] = TOKEN_USES,
+        leeway: float = 60.0,
+        cache_size: int = 10_000,
+        rejection_ttl: float = 30.0,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            issuer: Expected `iss` (see cognito_issuer)
+            client_ids: App client IDs tokens must be issued to (empty: any)
+            jwks: Signing keys (default: the issuer's /.well-known/jwks.json)
+            token_use: Accepted `token_use` values
+            leeway: Seconds of clock skew tolerated for `exp` and `iat`
+            cache_size: Decisions cached at most, least recently used dropped first
+            rejection_ttl: Seconds a rejected token is answered from the cache
+            clock: Current time in seconds
+        """
+        unknown = set(token_use) - set(TOKEN_USES)
+        if unknown:
+            raise ValueError(f"Unknown token_use: {', '.join(sorted(unknown))}")
+        self.issuer = issuer.rstrip('/')
+        self.client_ids = frozenset(client_ids)
+        self.jwks = jwks or JWKSCache(f"{self.issuer}/.well-known/jwks.json", clock=clock)
+        self.token_use = frozenset(token_use)
+        self.leeway = leeway
+        self.cache_size = cache_size
+        self.rejection_ttl = rejection_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        # sha256(token) -> (cached until, claims or the TokenError raised)
+        self._decisions: 'OrderedDict[bytes, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a token and return its claims.
+
+        Args:
+            token: Compact JWT, with or without a 'Bearer ' prefix
+
+        Returns:
+            Claims of the token (a copy; callers may modify it)
+
+        Raises:
+            TokenError: If the token is not valid now
+        """
+        if token[:7].lower() == 'bearer ':
+            token = token[7:]
+        token = token.strip()
+        digest = hashlib.sha256(token.encode('utf-8', 'replace')).digest()
+        now = self.clock()
+
+        with self._lock:
+            decision = self._decisions.get(digest)
+            if decision is not None and now < decision[0]:
+                self._decisions.move_to_end(digest)
+                self.hits += 1
+                result = decision[1]
+            else:
+                result = None
+        if result is not None:
+            if isinstance(result, TokenError):
+                raise TokenError(str(result))
+            return dict(result)
+
+        self.misses += 1
+        try:
+            claims = self._verify(token, now)
+        except TokenError as e:
+            self._remember(digest, now + self.rejection_ttl, e)
+            raise
+        self._remember(digest, claims['exp'] + self.leeway, claims)
+        return dict(claims)
+
+    def _remember(self, digest: bytes, until: float, result: Any) -> None:
+        """Cache a decision, evicting the least recently used beyond cache_size"""
+        with self._lock:
+            self._decisions[digest] = (until, result)
+            self._decisions.move_to_end(digest)
+            while len(self._decisions) > self.cache_size:
+                self._decisions.popitem(last=False)
+
+    def _verify(self, token: str, now: float) -> Dict[str, Any]:
+        """Check a token's signature and claims, uncached"""
+        parts = token.split('.')
+        if len(parts) != 3:
+            raise TokenError('Malformed token')
+        try:
+            header = json.loads(b64url_decode(parts[0]))
+            claims = json.loads(b64url_decode(parts[1]))
+            signature = b64url_decode(parts[2])
+        except ValueError:
+            raise TokenError('Malformed token')
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            raise TokenError('Malformed token')
+
+        if header.get('alg') != 'RS256':
+            raise TokenError(f"Unsupported algorithm: {header.get('alg')}")
+        n, e = self.jwks.key(header.get('kid'))
+        if not rsa_verify(n, e, f"{parts[0]}.{parts[1]}".encode('ascii'), signature):
+            raise TokenError('Invalid signature')
+
+        expires = claims.get('exp')
+        if not isinstance(expires, (int, float)) or isinstance(expires, bool):
+            raise TokenError('Token has no expiry')
+        if now > expires + self.leeway:
+            raise TokenError('Token expired')
+        issued = claims.get('iat')
+        if isinstance(issued, (int, float)) and issued > now + self.leeway:
+            raise TokenError('Token issued in the future')
+        if claims.get('iss') != self.issuer:
+            raise TokenError('Token issued by another user pool')
+
+        token_use = claims.get('token_use')
+        if token_use not in self.token_use:
+            raise TokenError(f"Token use not accepted: {token_use}")
+        if self.client_ids:
+            client_id = claims.get('aud') if token_use == 'id' else claims.get('client_id')
+            if client_id not in self.client_ids:
+                raise TokenError('Token issued to another app client')
+        if not claims.get('sub'):
+            raise TokenError('Token has no subject')
+        return claims
+
+
+def verifier_from_environment(environ: Mapping[str, str] = os.environ) -> Optional[TokenVerifier]:
+    """
+    Token verifier configured by a Lambda's environment variables.
+
+    USER_POOL_ID (with AWS_REGION) or TOKEN_ISSUER names the issuer,
+    CLIENT_ID the comma-separated accepted app clients, and
+    JWKS_URL overrides where keys are fetched (e.g. a file:// URL offline).
+
+    Args:
+        environ: Environment variables
+
+    Returns:
+        TokenVerifier, or None if no issuer is configured
+    """
+    issuer = environ.get('TOKEN_ISSUER')
+    if not issuer and environ.get('USER_POOL_ID'):
+        region = environ.get('AWS_REGION') or environ.get('AWS_DEFAULT_REGION', 'us-west-2')
+        issuer = cognito_issuer(region, environ['USER_POOL_ID'])
+    if not issuer:
+        return None
+
+    client_ids = [
+        client_id.strip() for client_id in environ.get('CLIENT_ID', '').split(',')
+        if client_id.strip()
+    ]
+    jwks = None
+    if environ.get('JWKS_URL'):
+        jwks = JWKSCache(environ['JWKS_URL'])
+    return TokenVerifier(issuer, client_ids=client_ids, jwks=jwks)
@@ -0,0 +1,372 @@
+"""
+OSRP Payload Validation
+Upload payload schemas compiled into single-pass validators
+
+Standard library only, so the upload Lambda can ship it next to its handler
+(see infrastructure/deploy.sh).
+
+A schema is a sequence of `Field`s, compiled once (the upload handler does
+so at cold start) into a validator specialised to it:
+
+    validate = compile_batch_validator([
+        Field('timestamp', 'integer', minimum=0),
+        Field('data', 'object'),
+    ], increasing='timestamp')
+    validate(readings)  # [(3, "'timestamp' is required"), ...]
+
+Batch validators first screen the batch a column at a time with built-in
+functions (one C-level pass per check, e.g. `map(itemgetter('timestamp'),
+items)` and `all(map(lt, ts, ts[1:]))`), which is all a valid batch costs.
+Only a batch failing the screen is walked item by item, by a function
+generated from the schema with every lookup, type test and bound inlined,
+to report the first problem of each invalid item. Object validators are
+generated the same way and report every invalid field. Keys a schema does
+not name are allowed.
+"""
+
+import math
+from bisect import bisect_left
+from itertools import chain, islice, repeat
+from operator import itemgetter, lt
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+KINDS = ('integer', 'number', 'string', 'boolean', 'object')
+
+# Largest integer that JSON clients and DynamoDB numbers round-trip exactly
+MAX_SAFE_INTEGER = (1 << 53) - 1
+
+# Classes each kind admits (bool is an int subclass, so checks compare classes)
+_CLASSES = {
+    'integer': frozenset({int}),
+    'number': frozenset({int, float}),
+    'string': frozenset({str}),
+    'boolean': frozenset({bool}),
+    'object': frozenset({dict}),
+}
+
+_TYPE_TESTS = {
+    'integer': ('{v}.__class__ is not int', 'an integer'),
+    'number': ('{v}.__class__ is not float and {v}.__class__ is not int', 'a number'),
+    'string': ('{v}.__class__ is not str', 'a string'),
+    'boolean': ('{v}.__class__ is not bool', 'a boolean'),
+    'object': ('{v}.__class__ is not dict', 'an object'),
+}
+
+# Raised by the column screen for values it cannot check in bulk
+_SCREEN_ERRORS = (KeyError, TypeError, AttributeError, OverflowError)
+
+
+class Field:
+    """One key of a payload schema"""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        required: bool = True,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None,
+        finite: bool = False,
+        fields: Sequence['Field'] = ()
+    ):
+        """
+        Args:
+            name: Key of the field
+            kind: 'integer', 'number', 'string', 'boolean' or 'object'
+            required: Reject payloads without the field; optional fields may
+                be missing or null
+            minimum: Inclusive lower bound of an integer or number
+            maximum: Inclusive upper bound of an integer or number
+            min_length: Minimum length of a string
+            max_length: Maximum length of a string
+            finite: Reject NaN and infinite float values of an object
+                (numbers are always checked)
+            fields: Schema of an object's own keys
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind '{kind}'; expected one of {', '.join(KINDS)}")
+        if (fields or finite) and kind != 'object':
+            raise ValueError(f"Only object fields have fields or finite values, not '{name}'")
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.minimum = minimum
+        self.maximum = maximum
+        self.min_length = min_length
+        self.max_length = max_length
+        self.finite = finite
+        self.fields = tuple(fields)
+
+    def __repr__(self) -> str:
+        return f"Field({self.name!r}, {self.kind!r})"
+
+
+# ============================================================================
+# Item-by-item validation (generated code)
+# ============================================================================
+
+class _Source:
+    """Lines of generated code and a counter for variable names"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.names = 0
+
+    def add(self, indent: int, line: str) -> None:
+        self.lines.append('    ' * indent + line)
+
+    def variable(self) -> str:
+        self.names += 1
+        return f"v{self.names}"
+
+
+def _emit_fields(
+    source: _Source,
+    fields: Sequence[Field],
+    container: str,
+    prefix: str,
+    indent: int,
+    fail: str
+) -> Dict[str, str]:
+    """
+    Emit the checks of `fields` of the dict bound to `container`
+
+    `fail` formats an error message into the statement(s) recording it.
+    Returns the variables the field values are bound to, by field name.
+    """
+    bound = {}
+    for field in fields:
+        path = prefix + field.name
+        value = source.variable()
+        bound[field.name] = value
+        source.add(indent, f"{value} = {container}.get({field.name!r})")
+
+        # One if/elif chain per field: its first failing check is reported
+        source.add(indent, f"if {value} is None:")
+        if field.required:
+            source.add(indent + 1, fail.format(repr(f"'{path}' is required")))
+        else:
+            source.add(indent + 1, "pass")
+
+        test, noun = _TYPE_TESTS[field.kind]
+        source.add(indent, f"elif {test.format(v=value)}:")
+        source.add(indent + 1, fail.format(repr(f"'{path}' must be {noun}")))
+
+        if field.kind == 'number':
+            # NaN and infinities are the only floats for which x - x is not 0
+            source.add(indent, f"elif {value}.__class__ is float and {value} - {value}:")
+            source.add(indent + 1, fail.format(repr(f"'{path}' must be finite")))
+        if field.minimum is not None:
+            source.add(indent, f"elif {value} < {field.minimum!r}:")
+            source.add(indent + 1, fail.format(repr(f"'{path}' must be at least {field.minimum}")))
+        if field.maximum is not None:
+            source.add(indent, f"elif {value} > {field.maximum!r}:")
+            source.add(indent + 1, fail.format(repr(f"'{path}' must be at most {field.maximum}")))
+        if field.min_length is not None:
+            message = (
+                f"'{path}' must not be empty" if field.min_length == 1
+                else f"'{path}' must be at least {field.min_length} characters"
+            )
+            source.add(indent, f"elif len({value}) < {field.min_length!r}:")
+            source.add(indent + 1, fail.format(repr(message)))
+        if field.max_length is not None:
+            source.add(indent, f"elif len({value}) > {field.max_length!r}:")
+            source.add(indent + 1, fail.format(
+                repr(f"'{path}' must be at most {field.max_length} characters")
+            ))
+
+        if field.finite or field.fields:
+            source.add(indent, "else:")
+            nested = indent + 1
+            if field.finite:
+                source.add(nested, "finite = True")
+                source.add(nested, f"for element in {value}.values():")
+                source.add(nested + 1, "if element.__class__ is float and element - element:")
+                source.add(nested + 2, "finite = False")
+                source.add(nested + 2, "break")
+                source.add(nested, "if not finite:")
+                source.add(nested + 1, fail.format(repr(f"'{path}' values must be finite")))
+                if field.fields:
+                    source.add(nested, "else:")
+                    nested += 1
+            if field.fields:
+                _emit_fields(source, field.fields, value, path + '.', nested, fail)
+    return bound
+
+
+def _build(source: _Source, name: str, namespace: Dict[str, Any]) -> Callable:
+    """Compile generated source and return the function it defines"""
+    text = '\n'.join(source.lines)
+    exec(compile(text, f"<osrp.validation {name}>", 'exec'), namespace)
+    function = namespace[name]
+    function.__source__ = text
+    return function
+
+
+# ============================================================================
+# Column screen
+# ============================================================================
+
+def _column_check(field: Field, increasing: bool) -> Callable[[List[Any]], bool]:
+    """
+    Build a check of one field's values across a batch
+
+    The check returns False, or raises one of _SCREEN_ERRORS, when it cannot
+    confirm every value is valid; the batch is then validated item by item.
+    """
+    classes = _CLASSES[field.kind]
+    minimum, maximum = field.minimum, field.maximum
+    min_length, max_length = field.min_length, field.max_length
+    nested = _screen(field.fields) if field.fields else None
+
+    def check(values: List[Any]) -> bool:
+        if not values:
+            return True
+        if increasing:
+            # Strictly increasing values put their bounds at the ends, and
+            # summing finds floats and non-numbers in one pass
+            if not all(map(lt, values, islice(values, 1, None))):
+                return False
+            if field.kind == 'integer':
+                if sum(values).__class__ is not int:
+                    return False
+                # Only 0 and 1 can be booleans, and they are adjacent
+                start = bisect_left(values, 0)
+                if not set(map(type, values[start:start + 2])) <= classes:
+                    return False
+            elif not set(map(type, values)) <= classes:
+                return False
+            low, high = values[0], values[-1]
+        else:
+            if not set(map(type, values)) <= classes:
+                return False
+            low = min(values) if minimum is not None else None
+            high = max(values) if maximum is not None else None
+        # A NaN or infinity makes the sum non-finite (so may an overflow,
+        # which only costs the item-by-item pass)
+        if field.kind == 'number' and not math.isfinite(sum(values, 0.0)):
+            return False
+        if minimum is not None and low < minimum:
+            return False
+        if maximum is not None and high > maximum:
+            return False
+        if min_length is not None and min(map(len, values)) < min_length:
+            return False
+        if max_length is not None and max(map(len, values)) > max_length:
+            return False
+        if field.finite:
+            elements = chain.from_iterable(map(dict.values, values))
+            if not math.isfinite(sum(elements, 0.0)):
+                return False
+        if nested is not None and not nested(values):
+            return False
+        return True
+
+    return check
+
+
+def _screen(fields: Sequence[Field], increasing: Optional[str] = None) -> Callable[[Any], bool]:
+    """Build a check that every item of a batch is valid, a column at a time"""
+    columns = []
+    for field in fields:
+        check = _column_check(field, field.name == increasing)
+        columns.append((field.name, field.required, field.kind == 'object', check))
+
+    def screen(items: Sequence[Any]) -> bool:
+        try:
+            for name, required, is_object, check in columns:
+                if required:
+                    values = list(map(itemgetter(name), items))
+                elif is_object:
+                    values = [value for value in map(dict.get, items, repeat(name))
+                              if value is not None]
+                else:
+                    # Optional scalars are often constant (e.g. accuracy)
+                    values = set(map(dict.get, items, repeat(name)))
+                    values.discard(None)
+                    values = list(values)
+                if not check(values):
+                    return False
+        except _SCREEN_ERRORS:
+            return False
+        return True
+
+    return screen
+
+
+# ============================================================================
+# Compilers
+# ============================================================================
+
+def compile_object_validator(
+    fields: Sequence[Field],
+    name: str = 'validate'
+) -> Callable[[Any], List[str]]:
+    """
+    Compile a validator for single-object payloads such as events
+
+    Args:
+        fields: Schema of the payload's keys
+        name: Name of the generated function, shown in tracebacks
+
+    Returns:
+        Function taking a payload and returning error messages, one per
+        invalid field (empty if the payload is valid)
+    """
+    source = _Source()
+    source.add(0, f"def {name}(payload):")
+    source.add(1, "if payload.__class__ is not dict:")
+    source.add(2, "return ['payload must be an object']")
+    source.add(1, "errors = []")
+    _emit_fields(source, fields, 'payload', '', 1, 'errors.append({})')
+    source.add(1, "return errors")
+    return _build(source, name, {})
+
+
+def compile_batch_validator(
+    fields: Sequence[Field],
+    increasing: Optional[str] = None,
+    name: str = 'validate'
+) -> Callable[[Sequence[Any]], List[Tuple[int, str]]]:
+    """
+    Compile a validator for the items of a batch, such as sensor readings
+
+    Args:
+        fields: Schema of every item's keys
+        increasing: Name of a required integer or number field whose values
+            must strictly increase from item to item (e.g. 'timestamp', so
+            no two readings of a batch share a DynamoDB key)
+        name: Name of the generated function, shown in tracebacks
+
+    Returns:
+        Function taking a list of items and returning (index, message)
+        pairs, one per invalid item, in item order (empty if all are valid)
+    """
+    if increasing is not None:
+        field = next((field for field in fields if field.name == increasing), None)
+        if field is None or not field.required or field.kind not in ('integer', 'number'):
+            raise ValueError(f"'{increasing}' must be a required integer or number field")
+
+    source = _Source()
+    source.add(0, f"def {name}(items):")
+    source.add(1, "if screen(items):")
+    source.add(2, "return []")
+    source.add(1, "errors = []")
+    source.add(1, "previous = NEGATIVE_INFINITY")
+    source.add(1, "for index, item in enumerate(items):")
+    source.add(2, "if item.__class__ is not dict:")
+    source.add(3, "errors.append((index, 'must be an object'))")
+    source.add(3, "continue")
+    bound = _emit_fields(source, fields, 'item', '', 2, 'errors.append((index, {})); continue')
+    if increasing is not None:
+        value = bound[increasing]
+        source.add(2, f"if {value} <= previous:")
+        source.add(3, "errors.append((index, {}))".format(
+            repr(f"'{increasing}' must be greater than the previous item's")
+        ))
+        source.add(2, f"previous = {value}")
+    source.add(1, "return errors")
+    namespace = {'screen': _screen(fields, increasing), 'NEGATIVE_INFINITY': float('-inf')}
+    return _build(source, name, namespace)
@@ -49,9 +49,19 @@ setup(
         "dev": [
             "pytest>=7.0",
             "pytest-cov>=4.0",
+            "pytest-benchmark>=4.0",
             "black>=23.0",
             "flake8>=6.0",
             "mypy>=1.0",
+            "moto[server]>=5.0",
+            "aiobotocore>=2.9.0",
+            "pyarrow>=14.0",
+        ],
+        "async": [
+            "aiobotocore>=2.9.0",
+        ],
+        "parquet": [
+            "pyarrow>=14.0",
         ],
         "analysis": [
             "marimo>=0.9.0",
@@ -0,0 +1,96 @@
+"""
+Shared fixtures for analysis tests
+
+Provides local DynamoDB/S3 stand-ins backed by moto, with the OSRP tables
+created using the key schemas from infrastructure/DYNAMODB_SCHEMA.md.
+"""
+
+import socket
+
+import boto3
+import pytest
+
+try:
+    from moto import mock_aws
+    from moto.server import ThreadedMotoServer
+except ImportError:  # moto is a dev extra
+    mock_aws = ThreadedMotoServer = None
+
+REGION = 'us-west-2'
+
+# Table name -> (partition key, sort key, sort key type)
+TABLE_SCHEMAS = {
+    'SensorTimeSeries': ('userIdSensorType', 'timestamp', 'N'),
+    'ScreenshotMetadata': ('userId', 'timestamp', 'N'),
+    'EventLog': ('userId', 'timestampEventType', 'S'),
+    'WearableData': ('userIdSource', 'timestamp', 'N'),
+    'EMAResponse': ('userId', 'timestampSurveyId', 'S'),
+    'DeviceState': ('userId', 'timestamp', 'N'),
+    'SensorSummary': ('userIdSensorType', 'timestamp', 'N'),
+    'LatestDeviceState': ('userId', None, None),
+    'ParticipantStatus': ('userId', None, None),
+}
+
+
+def create_tables(dynamodb) -> None:
+    """Create every OSRP table on a DynamoDB resource"""
+    for name, (partition_key, sort_key, sort_type) in TABLE_SCHEMAS.items():
+        key_schema = [{'AttributeName': partition_key, 'KeyType': 'HASH'}]
+        attributes = [{'AttributeName': partition_key, 'AttributeType': 'S'}]
+        if sort_key:
+            key_schema.append({'AttributeName': sort_key, 'KeyType': 'RANGE'})
+            attributes.append({'AttributeName': sort_key, 'AttributeType': sort_type})
+
+        dynamodb.create_table(
+            TableName=name,
+            KeySchema=key_schema,
+            AttributeDefinitions=attributes,
+            BillingMode='PAY_PER_REQUEST'
+        )
+
+
+@pytest.fixture
+def aws_credentials(monkeypatch):
+    """Fake credentials so no request can reach a real account"""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', REGION)
+
+
+@pytest.fixture
+def dynamodb(aws_credentials):
+    """In-process DynamoDB stand-in with the OSRP tables"""
+    if mock_aws is None:
+        pytest.skip('moto not installed')
+
+    with mock_aws():
+        resource = boto3.resource('dynamodb', region_name=REGION)
+        create_tables(resource)
+        yield resource
+
+
+@pytest.fixture(scope='session')
+def moto_server():
+    """Standalone moto server for clients that bypass botocore's HTTP stack"""
+    if ThreadedMotoServer is None:
+        pytest.skip('moto not installed')
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    yield f'http://127.0.0.1:{port}'
+    server.stop()
+
+
+@pytest.fixture
+def server_dynamodb(aws_credentials, moto_server):
+    """DynamoDB resource on the moto server, reset and populated with tables"""
+    resource = boto3.resource('dynamodb', region_name=REGION, endpoint_url=moto_server)
+    for table in resource.tables.all():
+        table.delete()
+    create_tables(resource)
+    yield resource
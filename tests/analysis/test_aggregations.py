@@ -0,0 +1,186 @@
+"""
+Unit tests for DataAggregator usage and activity summaries
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils.data_access import DataAggregator
+
+APPS = ['Instagram', 'Chrome', 'Messages', 'Maps', 'Spotify', 'Gmail', 'Slack', 'YouTube',
+        'Camera', 'Clock', 'Photos', 'Calendar']
+CATEGORIES = {app: ['social', 'productivity', 'media'][i % 3] for i, app in enumerate(APPS)}
+ACTIVITIES = ['still', 'walking', 'running', 'in_vehicle']
+
+
+def make_screenshots(users=('user1', 'user2'), days=3, per_day=400, seed=0):
+    """Screenshot metadata for several participants over several days"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for user in users:
+        for day in range(days):
+            offsets = np.sort(rng.integers(0, 86_400_000, per_day))
+            index = pd.DatetimeIndex(
+                pd.Timestamp('2026-01-15') + pd.Timedelta(days=day)
+                + pd.to_timedelta(offsets, unit='ms'),
+                name='timestamp'
+            )
+            apps = rng.choice(APPS, per_day, p=np.linspace(2, 1, len(APPS)) / 18)
+            frames.append(pd.DataFrame({
+                'userId': user,
+                'appName': apps,
+                'appCategory': [CATEGORIES[app] for app in apps],
+            }, index=index))
+    return pd.concat(frames)
+
+
+def make_activity(users=('user1', 'user2'), days=2, seed=1):
+    """Minute-level activity recognition and hourly-gapped step counts"""
+    rng = np.random.default_rng(seed)
+    activity, steps = [], []
+    for user in users:
+        for day in range(days):
+            start = pd.Timestamp('2026-01-15 07:00') + pd.Timedelta(days=day)
+            index = pd.date_range(start, periods=600, freq='1min', name='timestamp')
+            activity.append(pd.DataFrame({
+                'userId': user,
+                'activityType': rng.choice(ACTIVITIES, len(index)),
+            }, index=index))
+            index = pd.date_range(start, periods=40, freq='17min', name='timestamp')
+            steps.append(pd.DataFrame({
+                'userId': user,
+                'steps': rng.integers(0, 500, len(index)),
+            }, index=index))
+    return pd.concat(activity), pd.concat(steps)
+
+
+def reference_app_usage(df):
+    """The original value_counts/groupby implementation"""
+    df = df.copy()
+    summary = {
+        'top_apps': df['appName'].value_counts().head(10).to_dict(),
+        'category_distribution': df['appCategory'].value_counts().to_dict(),
+    }
+    df['hour'] = df.index.hour
+    summary['hourly_pattern'] = df.groupby('hour').size().to_dict()
+    return summary
+
+
+class TestAppUsageSummary:
+    """Test app usage summaries"""
+
+    def test_matches_value_counts(self):
+        """Test counts and ordering match pandas value_counts"""
+        df = make_screenshots(users=('user1',), days=1)
+        summary = DataAggregator.app_usage_summary(df)
+        expected = reference_app_usage(df)
+
+        assert summary == expected
+        assert list(summary['top_apps']) == list(expected['top_apps'])
+        assert list(summary['category_distribution']) == list(
+            expected['category_distribution']
+        )
+
+    def test_ties_keep_first_appearance_order(self):
+        """Test equal counts are ordered like value_counts"""
+        index = pd.date_range('2026-01-15', periods=7, freq='1h', name='timestamp')
+        df = pd.DataFrame({'appName': ['b', 'a', 'c', 'a', 'b', 'd', 'c']}, index=index)
+
+        summary = DataAggregator.app_usage_summary(df)
+
+        assert list(summary['top_apps'].items()) == list(
+            df['appName'].value_counts().to_dict().items()
+        )
+
+    def test_does_not_mutate_input(self):
+        """Test no hour column is added to the caller's frame"""
+        df = make_screenshots(users=('user1',), days=1)
+        before = df.copy()
+
+        DataAggregator.app_usage_summary(df)
+
+        pd.testing.assert_frame_equal(df, before)
+
+    def test_missing_values_are_skipped(self):
+        """Test missing app names are not counted"""
+        index = pd.date_range('2026-01-15', periods=4, freq='1h', name='timestamp')
+        df = pd.DataFrame({'appName': ['a', None, 'a', 'b']}, index=index)
+
+        summary = DataAggregator.app_usage_summary(df)
+
+        assert summary['top_apps'] == {'a': 2, 'b': 1}
+        assert summary['hourly_pattern'] == {0: 1, 1: 1, 2: 1, 3: 1}
+
+    def test_empty(self):
+        """Test an empty frame gives an empty summary"""
+        assert DataAggregator.app_usage_summary(pd.DataFrame()) == {}
+
+    def test_batched_matches_per_user_day(self):
+        """Test batched summaries equal one summary per participant-day"""
+        df = make_screenshots()
+
+        summaries = DataAggregator.app_usage_summaries(df)
+
+        expected = {
+            (user, day): reference_app_usage(group)
+            for (user, day), group in df.groupby(['userId', df.index.normalize()])
+        }
+        assert list(summaries) == sorted(expected)
+        for key, summary in summaries.items():
+            assert summary == expected[key]
+            assert list(summary['top_apps']) == list(expected[key]['top_apps'])
+
+    def test_batched_requires_user_column(self):
+        """Test a missing participant column is reported"""
+        df = make_screenshots().drop(columns='userId')
+
+        with pytest.raises(ValueError, match='userId'):
+            DataAggregator.app_usage_summaries(df)
+
+
+class TestDailyActivitySummary:
+    """Test daily activity summaries"""
+
+    def test_matches_reference(self):
+        """Test results match value_counts, groupby and hourly resampling"""
+        activity, steps = make_activity(users=('user1',), days=1)
+
+        summary = DataAggregator.daily_activity_summary(activity, steps)
+
+        assert summary['activity_distribution'] == activity['activityType'].value_counts().to_dict()
+        assert summary['activity_minutes'] == activity.groupby('activityType').size().to_dict()
+        assert list(summary['activity_minutes']) == sorted(ACTIVITIES)
+        assert summary['total_steps'] == steps['steps'].sum()
+        assert summary['avg_steps_per_hour'] == pytest.approx(
+            steps.resample('1h')['steps'].sum().mean()
+        )
+
+    def test_steps_only(self):
+        """Test activity keys are omitted without activity data"""
+        _, steps = make_activity(users=('user1',), days=1)
+
+        summary = DataAggregator.daily_activity_summary(pd.DataFrame(), steps)
+
+        assert set(summary) == {'total_steps', 'avg_steps_per_hour'}
+
+    def test_empty(self):
+        """Test empty frames give an empty summary"""
+        assert DataAggregator.daily_activity_summary(pd.DataFrame(), pd.DataFrame()) == {}
+
+    def test_batched_matches_per_user_day(self):
+        """Test batched summaries equal one summary per participant-day"""
+        activity, steps = make_activity(users=('user1', 'user2', 'user3'))
+        # user3 has no step counter on the second day
+        steps = steps[~((steps['userId'] == 'user3') & (steps.index.day == 16))]
+
+        summaries = DataAggregator.daily_activity_summaries(activity, steps)
+
+        assert len(summaries) == 6
+        for (user, day), summary in summaries.items():
+            in_day = slice(day, day + pd.Timedelta(days=1) - pd.Timedelta(1))
+            user_activity = activity[activity['userId'] == user].loc[in_day]
+            user_steps = steps[steps['userId'] == user].loc[in_day]
+            expected = DataAggregator.daily_activity_summary(user_activity, user_steps)
+            assert summary == expected
+        assert 'total_steps' not in summaries[('user3', pd.Timestamp('2026-01-16'))]
@@ -0,0 +1,191 @@
+"""
+Unit tests for the memory-mapped Arrow session cache
+"""
+
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils.data_access import OSRPData, StorageBackend
+
+pa = pytest.importorskip('pyarrow')
+
+from osrp.analysis.utils.arrow_cache import ArrowSessionCache  # noqa: E402
+
+from .conftest import REGION  # noqa: E402
+
+START = datetime(2026, 1, 15)
+END = START + timedelta(days=1)
+BASE_MS = int(START.timestamp() * 1000)
+
+
+def populate(dynamodb):
+    """Sensor readings and events with nested data for one participant"""
+    with dynamodb.Table('SensorTimeSeries').batch_writer() as batch:
+        for i in range(200):
+            batch.put_item(Item={
+                'userIdSensorType': 'user-1#accelerometer',
+                'timestamp': BASE_MS + i * 60_000,
+                'data': {'x': Decimal(i) / 4, 'y': Decimal('-9.8'), 'z': Decimal(i % 3)},
+                'accuracy': 3,
+            })
+    with dynamodb.Table('EventLog').batch_writer() as batch:
+        for i in range(5):
+            batch.put_item(Item={
+                'userId': 'user-1',
+                'timestampEventType': f"{BASE_MS + i * 1000}#app_launch",
+                'eventType': 'app_launch',
+                'eventData': {'app': 'Chrome', 'battery': Decimal(80 - i)},
+            })
+
+
+def session(directory, **kwargs):
+    """An OSRPData session with a cache on a shared directory"""
+    return OSRPData(region=REGION, session_cache=ArrowSessionCache(str(directory), **kwargs))
+
+
+def forbid_queries(data):
+    """Fail the test if the session queries DynamoDB"""
+    return patch.object(data.backend, '_query', side_effect=AssertionError('queried DynamoDB'))
+
+
+class TestArrowSessionCache:
+    """Test frames served from memory-mapped Arrow files"""
+
+    def test_frames_match_backend(self, dynamodb, tmp_path):
+        """Test cached frames equal the frames read from DynamoDB"""
+        populate(dynamodb)
+        plain = OSRPData(region=REGION)
+        data = session(tmp_path)
+
+        for _ in range(2):
+            pd.testing.assert_frame_equal(
+                data.get_sensor_data('user-1', 'accelerometer', START, END),
+                plain.get_sensor_data('user-1', 'accelerometer', START, END)
+            )
+            pd.testing.assert_frame_equal(
+                data.get_events('user-1', START, END),
+                plain.get_events('user-1', START, END)
+            )
+
+        assert data.session_cache.hits == 2
+        assert data.session_cache.misses == 2
+
+    def test_sessions_share_files(self, dynamodb, tmp_path):
+        """Test another session on the same directory maps the existing file"""
+        populate(dynamodb)
+        first = session(tmp_path).get_sensor_data('user-1', 'accelerometer', START, END)
+
+        other = session(tmp_path)
+        with forbid_queries(other):
+            second = other.get_sensor_data('user-1', 'accelerometer', START, END)
+
+        pd.testing.assert_frame_equal(first, second)
+        assert len(list(tmp_path.glob('*.arrow'))) == 1
+
+    def test_frames_are_zero_copy_views(self, dynamodb, tmp_path):
+        """Test numeric columns and the index view the mapped file"""
+        populate(dynamodb)
+        data = session(tmp_path)
+        data.get_sensor_data('user-1', 'accelerometer', START, END)
+
+        df = data.get_sensor_data('user-1', 'accelerometer', START, END)
+
+        (path,) = tmp_path.glob('*.arrow')
+        _, table = data.session_cache._tables[str(path)]
+        for column in ('x', 'timestamp'):
+            mapped = np.frombuffer(table.column(column).chunk(0).buffers()[1], dtype=np.int64)
+            values = df.index.to_numpy() if column == 'timestamp' else df[column].to_numpy()
+            assert np.shares_memory(values, mapped)
+            assert not values.flags.writeable
+
+        df['magnitude'] = np.sqrt(df['x'] ** 2 + df['y'] ** 2)
+        with pytest.raises(ValueError):
+            df.loc[df.index[0], 'x'] = 0.0
+        writable = df.copy()
+        writable.loc[writable.index[0], 'x'] = 0.0
+        assert writable['x'].iloc[0] == 0.0
+
+    def test_columns_are_cached_separately(self, dynamodb, tmp_path):
+        """Test projected reads get their own cache entry"""
+        populate(dynamodb)
+        data = session(tmp_path)
+
+        full = data.get_sensor_data('user-1', 'accelerometer', START, END)
+        projected = data.get_sensor_data('user-1', 'accelerometer', START, END, columns=['x'])
+
+        assert list(projected.columns) == ['x']
+        assert projected['x'].tolist() == full['x'].tolist()
+        assert len(list(tmp_path.glob('*.arrow'))) == 2
+
+    def test_empty_results(self, dynamodb, tmp_path):
+        """Test empty results are cached and returned as empty frames"""
+        data = session(tmp_path)
+
+        assert data.get_sensor_data('nobody', 'accelerometer', START, END).empty
+        with forbid_queries(data):
+            assert data.get_sensor_data('nobody', 'accelerometer', START, END).empty
+
+    def test_max_age(self, dynamodb, tmp_path):
+        """Test expired files are read from the source again"""
+        populate(dynamodb)
+        data = session(tmp_path, max_age=60)
+        data.get_sensor_data('user-1', 'accelerometer', START, END)
+        (path,) = tmp_path.glob('*.arrow')
+        os.utime(path, (0, 0))
+
+        df = data.get_sensor_data('user-1', 'accelerometer', START, END)
+
+        assert data.session_cache.misses == 2
+        assert len(df) == 200
+
+    def test_recent_ranges_not_cached(self, dynamodb, tmp_path):
+        """Test ranges ending within the ingestion lag are read fresh until they settle"""
+        populate(dynamodb)
+        now = END.timestamp() + 60
+        data = session(tmp_path, clock=lambda: now)
+        data.get_sensor_data('user-1', 'accelerometer', START, END)
+        dynamodb.Table('SensorTimeSeries').put_item(Item={
+            'userIdSensorType': 'user-1#accelerometer',
+            'timestamp': BASE_MS + 200 * 60_000,
+            'data': {'x': Decimal(50), 'y': Decimal('-9.8'), 'z': Decimal(2)},
+        })
+
+        df = data.get_sensor_data('user-1', 'accelerometer', START, END)
+
+        assert len(df) == 201
+        assert not list(tmp_path.glob('*.arrow'))
+        now = END.timestamp() + 600
+        data.get_sensor_data('user-1', 'accelerometer', START, END)
+        with forbid_queries(data):
+            assert len(data.get_sensor_data('user-1', 'accelerometer', START, END)) == 201
+
+    def test_clear(self, dynamodb, tmp_path):
+        """Test clearing removes the cache files"""
+        populate(dynamodb)
+        data = session(tmp_path)
+        data.get_sensor_data('user-1', 'accelerometer', START, END)
+
+        data.session_cache.clear()
+
+        assert not list(tmp_path.glob('*.arrow'))
+
+    def test_backend_without_source_is_not_cached(self, tmp_path):
+        """Test backends without a stable source identifier bypass the cache"""
+        class MemoryBackend(StorageBackend):
+            def read(self, table, partition_value, start_time, end_time, columns=None):
+                return pd.DataFrame(
+                    {'x': [1.0]}, index=pd.DatetimeIndex([start_time], name='timestamp')
+                )
+
+        cache = ArrowSessionCache(str(tmp_path))
+        data = OSRPData(region=REGION, backend=MemoryBackend(), session_cache=cache)
+
+        assert data.get_sensor_data('user-1', 'accelerometer', START, END)['x'].tolist() == [1.0]
+        assert cache.misses == 0
+        assert not list(tmp_path.glob('*.arrow'))
@@ -0,0 +1,118 @@
+"""
+Unit tests for the AsyncOSRPData access layer
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('aiobotocore')
+
+from osrp.analysis.utils.async_data_access import AsyncOSRPData
+from osrp.analysis.utils.data_access import OSRPData
+
+START = datetime(2026, 1, 15)
+END = START + timedelta(days=1)
+BASE_MS = int(START.timestamp() * 1000)
+
+
+def populate(dynamodb, users):
+    """Write a small day of data for each participant"""
+    sensors = dynamodb.Table('SensorTimeSeries')
+    wearables = dynamodb.Table('WearableData')
+    surveys = dynamodb.Table('EMAResponse')
+
+    for user_id in users:
+        with sensors.batch_writer() as batch:
+            for i in range(20):
+                batch.put_item(Item={
+                    'userIdSensorType': f"{user_id}#accelerometer",
+                    'timestamp': BASE_MS + i * 1000,
+                    'data': {'x': Decimal(i), 'y': Decimal('0.5'), 'z': Decimal('9.8')},
+                })
+        wearables.put_item(Item={
+            'userIdSource': f"{user_id}#polar_h10",
+            'timestamp': BASE_MS,
+            'values': {'heartRate': 72},
+        })
+        surveys.put_item(Item={
+            'userId': user_id,
+            'timestampSurveyId': f"{BASE_MS}#mood",
+            'surveyId': 'mood',
+            'responses': {'mood': 4},
+        })
+
+
+class TestAsyncOSRPData:
+    """Test AsyncOSRPData against a moto server"""
+
+    def test_matches_sync_frames(self, server_dynamodb, moto_server):
+        """Test async getters return the same frames as OSRPData"""
+        populate(server_dynamodb, ['user-1'])
+        sync_data = OSRPData(region='us-west-2', endpoint_url=moto_server)
+
+        async def fetch():
+            async with AsyncOSRPData(region='us-west-2', endpoint_url=moto_server) as data:
+                return await data.get_daily_summary('user-1', START)
+
+        summary = asyncio.run(fetch())
+        expected = sync_data.get_daily_summary('user-1', START)
+
+        assert set(summary) == set(expected)
+        for name, df in summary.items():
+            assert df.equals(expected[name]), name
+        assert len(summary['accelerometer']) == 20
+        assert summary['heart_rate']['heartRate'].iloc[0] == 72
+        assert summary['ema_responses']['mood'].iloc[0] == 4
+
+    def test_many_concurrent_queries(self, server_dynamodb, moto_server):
+        """Test one event loop drives hundreds of queries through a bounded pool"""
+        users = [f"user-{i}" for i in range(10)]
+        populate(server_dynamodb, users)
+
+        async def fetch():
+            data = AsyncOSRPData(
+                region='us-west-2',
+                endpoint_url=moto_server,
+                max_pool_connections=8,
+                max_concurrency=16
+            )
+            try:
+                return await asyncio.gather(*[
+                    data.get_sensor_data(users[i % len(users)], 'accelerometer', START, END)
+                    for i in range(200)
+                ])
+            finally:
+                await data.close()
+
+        frames = asyncio.run(fetch())
+
+        assert len(frames) == 200
+        assert all(len(df) == 20 for df in frames)
+
+    def test_survey_filter(self, server_dynamodb, moto_server):
+        """Test EMA responses filtered by survey ID"""
+        populate(server_dynamodb, ['user-1'])
+
+        async def fetch():
+            async with AsyncOSRPData(region='us-west-2', endpoint_url=moto_server) as data:
+                return await data.get_ema_responses('user-1', START, END, survey_id='sleep')
+
+        assert asyncio.run(fetch()).empty
+
+    def test_columns_projection(self, server_dynamodb, moto_server):
+        """Test async getters honour column projection"""
+        populate(server_dynamodb, ['user-1'])
+
+        async def fetch():
+            async with AsyncOSRPData(region='us-west-2', endpoint_url=moto_server) as data:
+                return await data.get_sensor_data(
+                    'user-1', 'accelerometer', START, END, columns=['z']
+                )
+
+        df = asyncio.run(fetch())
+
+        assert list(df.columns) == ['z']
+        assert len(df) == 20
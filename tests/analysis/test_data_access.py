@@ -0,0 +1,358 @@
+"""
+Unit tests for the OSRPData access layer
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils.data_access import (
+    SENSOR_ATTRIBUTES,
+    OSRPData,
+    QueryCache,
+    _items_to_frame,
+    _projection,
+)
+
+START = datetime(2026, 1, 15)
+END = START + timedelta(days=1)
+BASE_MS = int(START.timestamp() * 1000)
+
+
+def put_sensor_readings(dynamodb, user_id='user-1', sensor_type='accelerometer', count=10, step_ms=1000):
+    """Write synthetic sensor readings for one participant"""
+    table = dynamodb.Table('SensorTimeSeries')
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                'userIdSensorType': f"{user_id}#{sensor_type}",
+                'timestamp': BASE_MS + i * step_ms,
+                'groupCode': 'test_study',
+                'data': {'x': Decimal(str(i * 0.5)), 'y': Decimal('-9.8'), 'z': Decimal('0.1')},
+                'accuracy': 3,
+            })
+
+
+class TestItemsToFrame:
+    """Test item decoding"""
+
+    def test_empty_items(self):
+        """Test decoding an empty result"""
+        assert _items_to_frame([]).empty
+
+    def test_expand_aligns_with_index(self):
+        """Test nested maps expand onto the same rows, sorted by timestamp"""
+        items = [
+            {'timestamp': Decimal(BASE_MS + 2000), 'data': {'x': Decimal('2.5')}},
+            {'timestamp': Decimal(BASE_MS), 'data': {'x': Decimal('1.5')}},
+        ]
+
+        df = _items_to_frame(items, expand='data')
+
+        assert len(df) == 2
+        assert df.index.is_monotonic_increasing
+        assert df['x'].tolist() == [1.5, 2.5]
+        assert df['x'].dtype == 'float64'
+
+    def test_composite_sort_key(self):
+        """Test timestamps parsed from timestamp#suffix sort keys"""
+        items = [{'timestampEventType': f"{BASE_MS}#app_launch", 'eventType': 'app_launch'}]
+
+        df = _items_to_frame(items, sort_key='timestampEventType')
+
+        assert df.index[0] == pd.Timestamp(START)
+
+
+class TestOSRPData:
+    """Test OSRPData getters against a local DynamoDB stand-in"""
+
+    def test_get_sensor_data(self, dynamodb):
+        """Test sensor readings are returned flattened and time-filtered"""
+        put_sensor_readings(dynamodb, count=10)
+        data = OSRPData(region='us-west-2')
+
+        df = data.get_sensor_data(
+            'user-1', 'accelerometer', START, START + timedelta(seconds=4)
+        )
+
+        assert len(df) == 5
+        assert {'x', 'y', 'z', 'accuracy', 'groupCode'} <= set(df.columns)
+        assert 'data' not in df.columns
+        assert df['x'].iloc[-1] == 2.0
+
+    def test_get_sensor_data_paginates(self, dynamodb):
+        """Test queries follow LastEvaluatedKey past the 1 MB page limit"""
+        table = dynamodb.Table('SensorTimeSeries')
+        padding = 'p' * 50_000
+        with table.batch_writer() as batch:
+            for i in range(40):
+                batch.put_item(Item={
+                    'userIdSensorType': 'user-1#accelerometer',
+                    'timestamp': BASE_MS + i,
+                    'data': {'x': i, 'blob': padding},
+                })
+
+        df = OSRPData(region='us-west-2').get_sensor_data('user-1', 'accelerometer', START, END)
+
+        assert len(df) == 40
+
+    def test_get_sensor_data_sharded(self, dynamodb):
+        """Test sharded streams are gathered from every shard and the unsharded key"""
+        put_sensor_readings(dynamodb, count=10)
+        table = dynamodb.Table('SensorTimeSeries')
+        with table.batch_writer() as batch:
+            # Readings 8 and 9 were re-sent after sharding was enabled
+            for i in range(8, 40):
+                batch.put_item(Item={
+                    'userIdSensorType': f"user-1#accelerometer#{i % 4}",
+                    'timestamp': BASE_MS + i * 1000,
+                    'data': {'x': Decimal(str(i * 0.5)), 'y': Decimal('-9.8'), 'z': Decimal('0.1')},
+                })
+        data = OSRPData(region='us-west-2', sensor_shards=4, cache=QueryCache())
+
+        df = data.get_sensor_data('user-1', 'accelerometer', START, END, columns=['x'])
+        again = data.get_sensor_data('user-1', 'accelerometer', START, END, columns=['x'])
+
+        assert df['x'].tolist() == [i * 0.5 for i in range(40)]
+        assert df.index.is_monotonic_increasing
+        pd.testing.assert_frame_equal(df, again)
+        assert OSRPData(region='us-west-2').get_sensor_data(
+            'user-1', 'accelerometer', START, END
+        )['x'].tolist() == [i * 0.5 for i in range(10)]
+
+    def test_sharded_read_with_small_cache(self, dynamodb):
+        """Test shards cached by a read are not evicted before it collects them"""
+        table = dynamodb.Table('SensorTimeSeries')
+        with table.batch_writer() as batch:
+            for i in range(40):
+                batch.put_item(Item={
+                    'userIdSensorType': f"user-1#accelerometer#{i % 2}",
+                    'timestamp': BASE_MS + i * 1000,
+                    'data': {'x': Decimal(str(i))},
+                })
+        data = OSRPData(region='us-west-2', sensor_shards=2, cache=QueryCache(max_bytes=3000))
+
+        first = data.get_sensor_data('user-1', 'accelerometer', START, END)
+        assert len(first) == 40
+        for _ in range(2):
+            df = data.get_sensor_data(
+                'user-1', 'accelerometer', START - timedelta(hours=1), END
+            )
+            assert df['x'].tolist() == list(range(40))
+
+    def test_get_events_with_filter(self, dynamodb):
+        """Test event type filtering"""
+        table = dynamodb.Table('EventLog')
+        for i, event_type in enumerate(['app_launch', 'screen_on', 'app_launch']):
+            table.put_item(Item={
+                'userId': 'user-1',
+                'timestampEventType': f"{BASE_MS + i * 1000}#{event_type}",
+                'eventType': event_type,
+            })
+
+        df = OSRPData(region='us-west-2').get_events('user-1', START, END, event_type='app_launch')
+
+        assert len(df) == 2
+        assert set(df['eventType']) == {'app_launch'}
+
+    def test_get_daily_summary_empty(self, dynamodb):
+        """Test daily summary returns every stream even without data"""
+        summary = OSRPData(region='us-west-2').get_daily_summary('nobody', START)
+
+        assert set(summary) == {
+            'screenshots', 'accelerometer', 'gyroscope', 'location', 'activity',
+            'events', 'heart_rate', 'steps', 'ema_responses'
+        }
+        assert all(df.empty for df in summary.values())
+
+
+class TestProjection:
+    """Test column projection"""
+
+    def test_no_columns_fetches_full_items(self):
+        """Test projection is skipped without columns"""
+        assert _projection(None, 'timestamp', 'data', SENSOR_ATTRIBUTES) is None
+
+    def test_nested_and_top_level_paths(self):
+        """Test columns map to top-level attributes or nested map paths"""
+        projection = _projection(
+            ['x', 'accuracy', 'gps.lat'], 'timestamp', 'data', SENSOR_ATTRIBUTES
+        )
+
+        assert projection['ProjectionExpression'] == '#sk, #nested.#c0_0, #c1, #nested.#c2_0.#c2_1'
+        assert projection['ExpressionAttributeNames'] == {
+            '#sk': 'timestamp', '#nested': 'data', '#c0_0': 'x',
+            '#c1': 'accuracy', '#c2_0': 'gps', '#c2_1': 'lat'
+        }
+
+    def test_get_sensor_data_columns(self, dynamodb):
+        """Test only requested columns are fetched and returned"""
+        put_sensor_readings(dynamodb, count=5)
+        data = OSRPData(region='us-west-2')
+
+        df = data.get_sensor_data(
+            'user-1', 'accelerometer', START, END, columns=['x', 'accuracy']
+        )
+        full = data.get_sensor_data('user-1', 'accelerometer', START, END)
+
+        assert list(df.columns) == ['x', 'accuracy']
+        assert df.equals(full[['x', 'accuracy']])
+
+    def test_get_wearable_data_columns(self, dynamodb):
+        """Test nested wearable values are projected"""
+        dynamodb.Table('WearableData').put_item(Item={
+            'userIdSource': 'user-1#polar_h10',
+            'timestamp': BASE_MS,
+            'groupCode': 'test_study',
+            'values': {'heartRate': 72, 'rrInterval': 830},
+        })
+
+        df = OSRPData(region='us-west-2').get_wearable_data(
+            'user-1', 'polar_h10', START, END, columns=['heartRate']
+        )
+
+        assert list(df.columns) == ['heartRate']
+        assert df['heartRate'].iloc[0] == 72
+
+    def test_filter_column_not_returned(self, dynamodb):
+        """Test columns needed for filtering are fetched but not returned"""
+        table = dynamodb.Table('EventLog')
+        for i, event_type in enumerate(['app_launch', 'screen_on']):
+            table.put_item(Item={
+                'userId': 'user-1',
+                'timestampEventType': f"{BASE_MS + i}#{event_type}",
+                'eventType': event_type,
+                'eventData': {'sessionId': str(i)},
+            })
+
+        df = OSRPData(region='us-west-2').get_events(
+            'user-1', START, END, event_type='screen_on', columns=['eventData']
+        )
+
+        assert list(df.columns) == ['eventData']
+        assert df['eventData'].iloc[0] == {'sessionId': '1'}
+
+
+class TestAlignMultiModal:
+    """Test aligning streams on a common time index"""
+
+    def test_string_columns_and_gaps(self):
+        """Test only numeric columns are resampled and gaps are forward filled"""
+        index = pd.to_datetime([BASE_MS, BASE_MS + 30_000, BASE_MS + 180_000], unit='ms')
+        accel = pd.DataFrame({
+            'userIdSensorType': ['user-1#accelerometer'] * 3,
+            'x': [1.0, 3.0, 5.0],
+        }, index=index)
+        heart_rate = pd.DataFrame({'heartRate': [70.0]}, index=index[:1])
+
+        aligned = OSRPData(region='us-west-2').align_multi_modal(
+            {'accel': accel, 'hr': heart_rate, 'empty': pd.DataFrame()}
+        )
+
+        assert list(aligned.columns) == ['accel_x', 'hr_heartRate']
+        assert aligned['accel_x'].tolist() == [2.0, 2.0, 2.0, 5.0]
+        assert aligned['hr_heartRate'].tolist() == [70.0] * 4
+
+
+def put_summaries(dynamodb, user_id, minutes, group_code='test_study'):
+    """Write per-minute accelerometer summaries as the upload handler does"""
+    table = dynamodb.Table('SensorSummary')
+    for minute in range(minutes):
+        table.put_item(Item={
+            'userIdSensorType': f"{user_id}#accelerometer",
+            'timestamp': BASE_MS + minute * 60_000,
+            'groupCode': group_code,
+            'x_count': 60, 'x_sum': Decimal('30'), 'x_sumsq': Decimal('60'),
+            'x_min': Decimal(str(-minute)), 'x_max': Decimal(str(minute)),
+            'magnitude_count': 60, 'magnitude_sum': Decimal('600'),
+            'magnitude_sumsq': Decimal('6000'), 'magnitude_min': Decimal('9'),
+            'magnitude_max': Decimal('11'),
+        })
+
+
+class TestSensorSummaries:
+    """Test reading upload-time summaries"""
+
+    def test_resolutions(self, dynamodb):
+        """Test minutes are combined into coarser buckets"""
+        put_summaries(dynamodb, 'user-1', 90)
+        data = OSRPData(region='us-west-2')
+
+        minutes = data.get_sensor_summaries('user-1', 'accelerometer', START, END)
+        hourly = data.get_sensor_summaries('user-1', 'accelerometer', START, END, '1h')
+
+        assert len(minutes) == 90
+        assert minutes['x_count'].dtype == 'int64'
+        assert hourly['x_count'].tolist() == [3600, 1800]
+        assert hourly['x_max'].tolist() == [59.0, 89.0]
+        assert hourly['x_mean'].tolist() == [0.5, 0.5]
+
+    def test_columns_and_start_bucket(self, dynamodb):
+        """Test only requested columns are read and the start bucket is whole"""
+        put_summaries(dynamodb, 'user-1', 30)
+
+        df = OSRPData(region='us-west-2').get_sensor_summaries(
+            'user-1', 'accelerometer', START + timedelta(minutes=20), END, '15min',
+            columns=['magnitude']
+        )
+
+        assert df.index[0] == pd.Timestamp(START + timedelta(minutes=15))
+        assert set(df.columns) == {
+            f'magnitude_{stat}' for stat in ('count', 'sum', 'sumsq', 'min', 'max', 'mean')
+        }
+        assert df['magnitude_count'].tolist() == [900]
+
+    def test_invalid_resolution(self, dynamodb):
+        """Test resolutions finer than the summaries are rejected"""
+        with pytest.raises(ValueError, match='whole number of minutes'):
+            OSRPData(region='us-west-2').get_sensor_summaries(
+                'user-1', 'accelerometer', START, END, '30s'
+            )
+
+    def test_cohort(self, dynamodb):
+        """Test participants are concatenated with a userId column"""
+        put_summaries(dynamodb, 'user-1', 60)
+        put_summaries(dynamodb, 'user-2', 120)
+
+        df = OSRPData(region='us-west-2').get_cohort_summaries(
+            'accelerometer', START, END, '1h', user_ids=['user-1', 'user-2', 'user-3']
+        )
+
+        assert df.groupby('userId')['x_count'].sum().to_dict() == {
+            'user-1': 3600, 'user-2': 7200
+        }
+
+
+class TestLatestDeviceStates:
+    """Test the study-wide current device state lookup"""
+
+    def test_batch_get(self, dynamodb):
+        """Test states of more than one batch of participants are read"""
+        table = dynamodb.Table('LatestDeviceState')
+        with table.batch_writer() as batch:
+            for i in range(120):
+                batch.put_item(Item={
+                    'userId': f'user-{i:03d}',
+                    'timestamp': BASE_MS + i,
+                    'groupCode': 'test_study',
+                    'batteryLevel': Decimal(i % 100),
+                    'appVersion': '0.3.0',
+                })
+        user_ids = [f'user-{i:03d}' for i in range(120)] + ['user-000', 'never-reported']
+
+        fleet = OSRPData(region='us-west-2').get_latest_device_states(user_ids)
+        battery = OSRPData(region='us-west-2').get_latest_device_states(
+            user_ids, columns=['batteryLevel']
+        )
+
+        assert len(fleet) == 120
+        assert fleet.index.name == 'userId' and fleet.index.is_monotonic_increasing
+        assert fleet.loc['user-105', 'batteryLevel'] == 5.0
+        assert fleet.loc['user-105', 'timestamp'] == pd.Timestamp(BASE_MS + 105, unit='ms')
+        assert list(battery.columns) == ['timestamp', 'batteryLevel']
+
+    def test_no_states(self, dynamodb):
+        """Test participants without reports give an empty frame"""
+        assert OSRPData(region='us-west-2').get_latest_device_states(['nobody']).empty
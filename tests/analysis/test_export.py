@@ -0,0 +1,292 @@
+"""
+Unit tests for the study export pipeline
+"""
+
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import boto3
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils import export as export_module
+from osrp.analysis.utils.data_access import OSRPData
+from osrp.analysis.utils.export import StudyExporter, partition_path, stream_partition
+
+from .conftest import REGION
+
+ds = pytest.importorskip('pyarrow.dataset')
+pq = pytest.importorskip('pyarrow.parquet')
+
+STUDY = 'test_study'
+START = datetime(2026, 1, 15)
+BASE_MS = int(START.timestamp() * 1000)
+HOUR_MS = 3_600_000
+
+
+def populate(dynamodb, users=('user-1', 'user-2'), hours=30):
+    """Sensor readings across two days plus events, another study and participants"""
+    sensors = dynamodb.Table('SensorTimeSeries')
+    with sensors.batch_writer() as batch:
+        for user in users:
+            for i in range(hours):
+                batch.put_item(Item={
+                    'userIdSensorType': f"{user}#accelerometer",
+                    'timestamp': BASE_MS + i * HOUR_MS,
+                    'groupCode': STUDY,
+                    'data': {'x': Decimal(i), 'y': Decimal('-9.8'), 'z': Decimal('0.1')},
+                    'accuracy': 3,
+                })
+        # Another study sharing the table must not be exported
+        batch.put_item(Item={
+            'userIdSensorType': 'other-user#accelerometer',
+            'timestamp': BASE_MS,
+            'groupCode': 'other_study',
+            'data': {'x': Decimal(1)},
+        })
+
+    events = dynamodb.Table('EventLog')
+    for i in range(3):
+        events.put_item(Item={
+            'userId': users[0],
+            'timestampEventType': f"{BASE_MS + i * 1000}#app_launch",
+            'groupCode': STUDY,
+            'eventType': 'app_launch',
+            'eventData': {'app': 'Chrome', 'tags': ['a', 'b']},
+        })
+
+    participants = dynamodb.Table('ParticipantStatus')
+    for user in users:
+        participants.put_item(Item={
+            'userId': user,
+            'groupCode': STUDY,
+            'deviceInfo': {'model': 'Pixel 8'},
+        })
+    participants.put_item(Item={'userId': 'other-user', 'groupCode': 'other_study'})
+
+
+def read_stream(root, stream):
+    """Read one exported stream back as a frame sorted like OSRPData output"""
+    dataset = ds.dataset(
+        str(root / f'study={STUDY}' / f'stream={stream}'), format='parquet', partitioning='hive'
+    )
+    df = dataset.to_table().to_pandas()
+    return df.sort_values(['user', 'timestamp']).reset_index(drop=True)
+
+
+class TestPartitioning:
+    """Test stream and path naming"""
+
+    def test_stream_partition(self):
+        """Test composite partition keys split into stream and user"""
+        assert stream_partition('sensor', 'user-1#accelerometer') == (
+            'sensor_accelerometer', 'user-1'
+        )
+        assert stream_partition('sensor', 'user-1#accelerometer#3') == (
+            'sensor_accelerometer', 'user-1'
+        )
+        assert stream_partition('events', 'user-1') == ('events', 'user-1')
+
+    def test_partition_path_escapes_values(self):
+        """Test partition values are URI-escaped"""
+        assert partition_path('s', 'events', 'a/b', '2026-01-15') == (
+            'study=s/stream=events/user=a%2Fb/date=2026-01-15'
+        )
+
+
+class TestStudyExporter:
+    """Test exporting a study from DynamoDB"""
+
+    def test_requires_one_destination(self, dynamodb):
+        """Test bucket and output are mutually exclusive"""
+        with pytest.raises(ValueError):
+            StudyExporter(STUDY)
+
+    def test_export_to_hive_partitions(self, dynamodb, tmp_path):
+        """Test every row of the study lands in its stream/user/date partition"""
+        populate(dynamodb)
+        exporter = StudyExporter(
+            STUDY, output=str(tmp_path), export_id='e1', segments=3, processes=False
+        )
+
+        metadata = exporter.run()
+
+        root = tmp_path / STUDY / 'e1'
+        assert metadata['rows'] == {'events': 3, 'sensor_accelerometer': 60}
+        assert metadata['participants'] == 2
+        assert json.loads((root / 'metadata.json').read_text())['exportId'] == 'e1'
+        assert sorted(pd.read_csv(root / 'participants.csv')['userId']) == ['user-1', 'user-2']
+
+        days = root / f'study={STUDY}' / 'stream=sensor_accelerometer' / 'user=user-1'
+        assert sorted(p.name for p in days.iterdir()) == ['date=2026-01-15', 'date=2026-01-16']
+
+        sensor = read_stream(root, 'sensor_accelerometer')
+        assert len(sensor) == 60
+        assert set(sensor['groupCode']) == {STUDY}
+        assert sensor.loc[sensor['user'] == 'user-1', 'x'].tolist() == list(range(30))
+
+    def test_rows_match_osrpdata(self, dynamodb, tmp_path):
+        """Test exported rows equal the frames returned by OSRPData"""
+        populate(dynamodb)
+        StudyExporter(
+            STUDY, output=str(tmp_path), export_id='e1', segments=2, processes=False
+        ).run()
+
+        expected = OSRPData(region=REGION).get_sensor_data(
+            'user-2', 'accelerometer', START, START + timedelta(days=2)
+        )
+        exported = read_stream(tmp_path / STUDY / 'e1', 'sensor_accelerometer')
+        exported = exported[exported['user'] == 'user-2'].set_index('timestamp')
+
+        assert exported.index.equals(expected.index)
+        for column in expected.columns:
+            assert exported[column].tolist() == expected[column].tolist()
+
+    def test_nested_attributes_stored_as_json(self, dynamodb, tmp_path):
+        """Test non-expanded maps and lists round-trip through JSON columns"""
+        populate(dynamodb)
+        StudyExporter(
+            STUDY, output=str(tmp_path), export_id='e1', segments=2, processes=False
+        ).run()
+
+        root = tmp_path / STUDY / 'e1'
+        path = next(root.glob('study=*/stream=events/**/*.parquet'))
+        table = pq.read_table(path)
+
+        assert json.loads(table.schema.metadata[b'osrp.json_columns']) == ['eventData']
+        assert json.loads(table.column('eventData')[0].as_py()) == {
+            'app': 'Chrome', 'tags': ['a', 'b']
+        }
+
+    def test_resume_after_failure(self, dynamodb, tmp_path):
+        """Test a rerun with the same export ID resumes from the last checkpoint"""
+        populate(dynamodb, hours=40)
+        flush = export_module._flush_partitions
+        parts = []
+
+        def failing_flush(sink, study_id, unit, part, buffers, row_group_size):
+            if unit['table'] == 'sensor':
+                parts.append(part)
+                if len(parts) == 3:
+                    raise RuntimeError('worker crashed')
+            return flush(sink, study_id, unit, part, buffers, row_group_size)
+
+        exporter = StudyExporter(
+            STUDY, output=str(tmp_path), export_id='e1', segments=1,
+            processes=False, flush_rows=20, page_size=10
+        )
+        with patch.object(export_module, '_flush_partitions', side_effect=failing_flush):
+            with pytest.raises(RuntimeError):
+                exporter.run()
+            del parts[:]
+            metadata = exporter.run()
+
+        # Parts 0 and 1 were checkpointed and are not exported again
+        assert parts[0] == 2
+        assert metadata['rows']['sensor_accelerometer'] == 80
+        sensor = read_stream(tmp_path / STUDY / 'e1', 'sensor_accelerometer')
+        assert len(sensor) == 80
+        assert not sensor.duplicated(['user', 'timestamp']).any()
+
+    def test_time_range_uses_index_queries(self, dynamodb, tmp_path):
+        """Test tables with a groupCode-timestamp GSI are read by time slices"""
+        dynamodb.Table('SensorTimeSeries').delete()
+        dynamodb.create_table(
+            TableName='SensorTimeSeries',
+            KeySchema=[
+                {'AttributeName': 'userIdSensorType', 'KeyType': 'HASH'},
+                {'AttributeName': 'timestamp', 'KeyType': 'RANGE'},
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'userIdSensorType', 'AttributeType': 'S'},
+                {'AttributeName': 'timestamp', 'AttributeType': 'N'},
+                {'AttributeName': 'groupCode', 'AttributeType': 'S'},
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'groupCode-timestamp-index',
+                'KeySchema': [
+                    {'AttributeName': 'groupCode', 'KeyType': 'HASH'},
+                    {'AttributeName': 'timestamp', 'KeyType': 'RANGE'},
+                ],
+                'Projection': {'ProjectionType': 'ALL'},
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        populate(dynamodb)
+        exporter = StudyExporter(
+            STUDY, output=str(tmp_path), export_id='e1', segments=4, processes=False
+        )
+        end = START + timedelta(hours=10) - timedelta(milliseconds=1)
+
+        units = exporter.plan(START, end)
+        metadata = exporter.run(START, end)
+
+        sensor_units = [unit for unit in units if unit['table'] == 'sensor']
+        assert all('index' in unit for unit in sensor_units)
+        assert sensor_units[0]['start'] == BASE_MS
+        assert sensor_units[-1]['end'] == BASE_MS + 10 * HOUR_MS - 1
+        assert metadata['rows']['sensor_accelerometer'] == 20
+        assert metadata['rows']['events'] == 3
+
+    def test_missing_tables_are_skipped(self, dynamodb, tmp_path):
+        """Test tables not deployed in the account are left out of the plan"""
+        exporter = StudyExporter(STUDY, output=str(tmp_path), processes=False)
+
+        tables = {unit['table_name'] for unit in exporter.plan()}
+
+        assert 'DeviceState' in tables
+        dynamodb.Table('DeviceState').delete()
+        assert 'DeviceState' not in {unit['table_name'] for unit in exporter.plan()}
+
+    def test_export_to_s3(self, dynamodb):
+        """Test exports land under exports/{studyId}/{exportId}/ in the bucket"""
+        populate(dynamodb)
+        s3 = boto3.client('s3', region_name=REGION)
+        s3.create_bucket(
+            Bucket='osrp-data', CreateBucketConfiguration={'LocationConstraint': REGION}
+        )
+
+        StudyExporter(
+            STUDY, bucket='osrp-data', export_id='e1', segments=2, processes=False
+        ).run()
+
+        keys = [
+            obj['Key']
+            for obj in s3.list_objects_v2(Bucket='osrp-data')['Contents']
+        ]
+        assert f'exports/{STUDY}/e1/metadata.json' in keys
+        assert f'exports/{STUDY}/e1/participants.csv' in keys
+        assert any(
+            key.startswith(f'exports/{STUDY}/e1/study={STUDY}/stream=sensor_accelerometer/')
+            for key in keys
+        )
+
+    def test_process_workers(self, server_dynamodb, moto_server, tmp_path):
+        """Test segments exported by worker processes"""
+        populate(server_dynamodb)
+        exporter = StudyExporter(
+            STUDY, output=str(tmp_path), export_id='e1', endpoint_url=moto_server,
+            segments=2, workers=2
+        )
+
+        metadata = exporter.run()
+
+        assert metadata['rows'] == {'events': 3, 'sensor_accelerometer': 60}
+
+    def test_cli(self, dynamodb, tmp_path):
+        """Test `osrp export` runs the exporter and reports exported rows"""
+        from click.testing import CliRunner
+
+        from osrp.cli import main
+
+        populate(dynamodb)
+        result = CliRunner().invoke(main, [
+            'export', STUDY, '--output', str(tmp_path), '--export-id', 'e1',
+            '--segments', '2', '--threads',
+        ])
+
+        assert result.exit_code == 0, result.output
+        assert 'sensor_accelerometer' in result.output
+        assert (tmp_path / STUDY / 'e1' / 'metadata.json').exists()
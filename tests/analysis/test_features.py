@@ -0,0 +1,175 @@
+"""
+Unit tests for the context feature engine
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils.data_access import DataAggregator
+from osrp.analysis.utils.features import (
+    ContextFeatureEngine,
+    WindowAccumulator,
+    haversine,
+    window_features,
+)
+from osrp.analysis.utils.synthetic import SyntheticCohort
+
+
+def make_accelerometer(start='2026-01-15 08:00', periods=6000, freq='100ms', seed=0):
+    """Noisy accelerometer readings around 1 g"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq=freq, name='timestamp')
+    return pd.DataFrame({
+        'x': rng.normal(0.0, 0.3, periods),
+        'y': rng.normal(9.81, 0.3, periods),
+        'z': rng.normal(0.0, 0.3, periods),
+    }, index=index)
+
+
+def make_location(start='2026-01-15 08:00', periods=60, freq='20s'):
+    """A participant walking north"""
+    index = pd.date_range(start, periods=periods, freq=freq, name='timestamp')
+    return pd.DataFrame({
+        'latitude': 47.6 + np.arange(periods) * 1e-4,
+        'longitude': np.full(periods, -122.3),
+    }, index=index)
+
+
+class TestHaversine:
+    """Test vectorized haversine distance"""
+
+    def test_one_degree_latitude(self):
+        """Test one degree of latitude is about 111 km"""
+        assert haversine(0.0, 0.0, 1.0, 0.0) == pytest.approx(111_195, rel=1e-3)
+
+    def test_vectorized_with_nan(self):
+        """Test array inputs propagate NaN"""
+        result = haversine(np.array([0.0, np.nan]), np.zeros(2), np.ones(2), np.zeros(2))
+        assert np.isnan(result[1]) and result[0] > 0
+
+
+class TestWindowAccumulator:
+    """Test running per-window moments"""
+
+    def test_matches_numpy(self):
+        """Test one-pass mean/std match two-pass results"""
+        rng = np.random.default_rng(1)
+        values = rng.normal(1000.0, 0.01, 500)
+        ids = np.repeat(np.arange(5), 100)
+
+        acc = WindowAccumulator()
+        acc.add(ids[:250], values[:250])
+        acc.add(ids[250:], values[250:])
+
+        expected = values.reshape(5, 100)
+        np.testing.assert_allclose(acc.mean()[:, 0], expected.mean(axis=1))
+        np.testing.assert_allclose(acc.std()[:, 0], expected.std(axis=1, ddof=1), rtol=1e-6)
+
+    def test_out_of_order_windows(self):
+        """Test earlier windows are inserted in sorted position"""
+        acc = WindowAccumulator()
+        acc.add(np.array([5, 5]), np.array([1.0, 3.0]))
+        changed = acc.add(np.array([2, 5]), np.array([4.0, 5.0]))
+
+        assert changed.tolist() == [2, 5]
+        assert acc.windows.tolist() == [2, 5]
+        assert acc.count.tolist() == [1, 3]
+        np.testing.assert_allclose(acc.mean()[:, 0], [4.0, 3.0])
+
+
+class TestContextFeatureEngine:
+    """Test incremental context features"""
+
+    def test_matches_resample(self):
+        """Test features equal the pandas resample computation"""
+        accel = make_accelerometer()
+        magnitude = np.sqrt(accel['x'] ** 2 + accel['y'] ** 2 + accel['z'] ** 2)
+
+        features = DataAggregator.context_features({'accelerometer': accel}, window='1min')
+
+        np.testing.assert_allclose(features['movement_mean'], magnitude.resample('1min').mean())
+        np.testing.assert_allclose(
+            features['movement_std'], magnitude.resample('1min').std(), rtol=1e-6
+        )
+        assert features.index.equals(magnitude.resample('1min').mean().index)
+
+    def test_does_not_mutate_input(self):
+        """Test the caller's frames are left untouched"""
+        accel = make_accelerometer(periods=100)
+        DataAggregator.context_features({'accelerometer': accel})
+
+        assert list(accel.columns) == ['x', 'y', 'z']
+
+    def test_location_change_in_meters(self):
+        """Test location change uses haversine distance between windows"""
+        features = DataAggregator.context_features({'location': make_location()}, window='5min')
+
+        # 15 fixes of 1e-4 degrees per window is about 167 m between window means
+        assert np.isnan(features['location_change'].iloc[0])
+        assert features['location_change'].iloc[1] == pytest.approx(166.8, rel=1e-2)
+
+    def test_incremental_equals_batch(self):
+        """Test appending chunks gives the same result as one batch"""
+        accel = make_accelerometer()
+        location = make_location()
+
+        engine = ContextFeatureEngine(window='1min')
+        for chunk in np.array_split(np.arange(len(accel)), 7):
+            engine.update({'accelerometer': accel.iloc[chunk]})
+        engine.update({'location': location.iloc[:30]})
+        engine.update({'location': location.iloc[30:]})
+
+        batch = DataAggregator.context_features(
+            {'accelerometer': accel, 'location': location}, window='1min'
+        )
+        pd.testing.assert_frame_equal(engine.features(), batch, check_freq=False)
+
+    def test_update_reports_changed_windows(self):
+        """Test only windows touched by new data are reported"""
+        accel = make_accelerometer()
+        engine = ContextFeatureEngine(window='1min')
+        engine.update({'accelerometer': accel.iloc[:3000]})
+
+        changed = engine.update({'accelerometer': accel.iloc[2990:]})
+
+        # Overlapping rows are skipped; new rows span minutes 5 through 9
+        assert len(changed) == 5
+        assert changed[0] == pd.Timestamp('2026-01-15 08:05')
+
+    def test_empty_input(self):
+        """Test no data gives an empty frame"""
+        assert ContextFeatureEngine().features().empty
+        assert DataAggregator.context_features({'accelerometer': pd.DataFrame()}).empty
+
+
+class TestWindowFeatures:
+    """Test the notebook feature engineering step"""
+
+    def test_matches_per_window_masks(self):
+        """Test features equal those computed by masking each window"""
+        cohort = SyntheticCohort(participants=1, days=1, accelerometer_hz=1.0)
+        summary = cohort.daily_summary(cohort.user_ids[0], cohort.start)
+
+        features = window_features(summary, cohort.start, '2h', user_id='user-1')
+
+        assert len(features) == 12
+        assert (features['user_id'] == 'user-1').all()
+        ema = summary['ema_responses']
+        for start, row in features.iterrows():
+            def in_window(df):
+                return df[(df.index >= start) & (df.index < start + pd.Timedelta('2h'))]
+
+            screenshots = in_window(summary['screenshots'])
+            assert row['screen_count'] == len(screenshots)
+            assert row['unique_apps'] == screenshots['appName'].nunique()
+            assert row['steps'] == in_window(summary['steps'])['steps'].sum()
+            heart_rate = in_window(summary['heart_rate'])['heartRate']
+            assert row['hr_max'] == pytest.approx(heart_rate.max())
+            accel = in_window(summary['accelerometer'])
+            magnitude = np.sqrt(accel['x'] ** 2 + accel['y'] ** 2 + accel['z'] ** 2)
+            assert row['movement_mean'] == pytest.approx(magnitude.mean())
+            surveys = in_window(ema)
+            assert row['has_label'] == (len(surveys) > 0)
+            if len(surveys):
+                assert row['label'] == int(surveys['stress_level'].iloc[-1] >= 4)
@@ -0,0 +1,160 @@
+"""
+Unit tests for the Parquet storage backend
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils.data_access import OSRPData
+from osrp.analysis.utils.export import StudyExporter
+
+pytest.importorskip('pyarrow')
+
+from osrp.analysis.utils.parquet_backend import ParquetBackend  # noqa: E402
+
+from .conftest import REGION  # noqa: E402
+
+STUDY = 'test_study'
+START = datetime(2026, 1, 15)
+BASE_MS = int(START.timestamp() * 1000)
+HOUR_MS = 3_600_000
+
+
+def populate(dynamodb):
+    """Two days of every stream for two participants"""
+    sensors = dynamodb.Table('SensorTimeSeries')
+    wearables = dynamodb.Table('WearableData')
+    screenshots = dynamodb.Table('ScreenshotMetadata')
+    events = dynamodb.Table('EventLog')
+    ema = dynamodb.Table('EMAResponse')
+
+    for user in ('user-1', 'user-2'):
+        with sensors.batch_writer() as batch:
+            for i in range(48):
+                batch.put_item(Item={
+                    'userIdSensorType': f"{user}#accelerometer",
+                    'timestamp': BASE_MS + i * HOUR_MS,
+                    'groupCode': STUDY,
+                    'data': {'x': Decimal(i) / 4, 'y': Decimal('-9.8'), 'z': Decimal(i % 3)},
+                    'accuracy': 3,
+                })
+        with wearables.batch_writer() as batch:
+            for i in range(24):
+                batch.put_item(Item={
+                    'userIdSource': f"{user}#polar_h10",
+                    'timestamp': BASE_MS + i * 2 * HOUR_MS,
+                    'groupCode': STUDY,
+                    'dataType': 'heartRate',
+                    'source': 'polar_h10',
+                    'values': {'heartRate': 60 + i},
+                })
+        with screenshots.batch_writer() as batch:
+            for i in range(30):
+                batch.put_item(Item={
+                    'userId': user,
+                    'timestamp': BASE_MS + i * 1500 * 1000,
+                    'groupCode': STUDY,
+                    'appName': ['Chrome', 'Maps', 'Slack'][i % 3],
+                    's3Key': f"screenshots/{user}/{i}.png",
+                    's3Bucket': 'osrp-data',
+                    'location': {'lat': Decimal('47.6'), 'lon': Decimal('-122.3')},
+                })
+        for i in range(10):
+            # Pairs of events share a timestamp
+            millis = BASE_MS + (i // 2) * 7 * HOUR_MS
+            event_type = ['screen_on', 'app_launch'][i % 2]
+            events.put_item(Item={
+                'userId': user,
+                'timestampEventType': f"{millis}#{event_type}",
+                'groupCode': STUDY,
+                'eventType': event_type,
+                'eventData': {'battery': Decimal(80 - i), 'tags': ['a']},
+            })
+        for i in range(6):
+            survey = ['mood', 'sleep'][i % 2]
+            ema.put_item(Item={
+                'userId': user,
+                'timestampSurveyId': f"{BASE_MS + i * 8 * HOUR_MS}#{survey}",
+                'groupCode': STUDY,
+                'surveyId': survey,
+                'triggerType': 'scheduled',
+                'responses': {'score': Decimal(i), 'note': f"note {i}"},
+                'context': {'activity': 'still'},
+            })
+
+
+@pytest.fixture
+def backends(dynamodb, tmp_path):
+    """OSRPData over DynamoDB and over an export of the same tables"""
+    populate(dynamodb)
+    StudyExporter(
+        STUDY, output=str(tmp_path), export_id='e1', segments=2, processes=False
+    ).run()
+
+    parquet = OSRPData(region=REGION, backend=ParquetBackend(str(tmp_path / STUDY / 'e1')))
+    return OSRPData(region=REGION), parquet
+
+
+# Full range, and one cutting both days mid-way
+RANGES = [
+    (START, START + timedelta(days=2)),
+    (START + timedelta(hours=5, minutes=30), START + timedelta(hours=31)),
+]
+
+
+class TestParquetBackend:
+    """Test frames match the DynamoDB backend"""
+
+    @pytest.mark.parametrize('start, end', RANGES)
+    @pytest.mark.parametrize('columns', [None, ['x', 'accuracy'], ['z', 'missing']])
+    def test_sensor_data(self, backends, start, end, columns):
+        """Test sensor frames, with and without column projection"""
+        dynamo, parquet = backends
+        args = ('user-1', 'accelerometer', start, end)
+
+        pd.testing.assert_frame_equal(
+            parquet.get_sensor_data(*args, columns=columns),
+            dynamo.get_sensor_data(*args, columns=columns)
+        )
+
+    @pytest.mark.parametrize('start, end', RANGES)
+    def test_other_getters(self, backends, start, end):
+        """Test screenshots, events, wearables and EMA frames"""
+        dynamo, parquet = backends
+
+        for getter, args, kwargs in [
+            ('get_screenshots', ('user-2', start, end), {}),
+            ('get_screenshots', ('user-2', start, end), {'columns': ['appName']}),
+            ('get_events', ('user-1', start, end), {}),
+            ('get_events', ('user-1', start, end), {'event_type': 'app_launch'}),
+            ('get_wearable_data', ('user-2', 'polar_h10', start, end), {}),
+            ('get_ema_responses', ('user-1', start, end), {}),
+            ('get_ema_responses', ('user-1', start, end), {
+                'survey_id': 'mood', 'columns': ['score', 'context']
+            }),
+        ]:
+            expected = getattr(dynamo, getter)(*args, **kwargs)
+            actual = getattr(parquet, getter)(*args, **kwargs)
+            assert not expected.empty
+            pd.testing.assert_frame_equal(actual, expected, obj=f"{getter}{kwargs}")
+
+    def test_missing_data(self, backends):
+        """Test unknown participants, streams and ranges give empty frames"""
+        dynamo, parquet = backends
+        later = START + timedelta(days=30)
+
+        assert parquet.get_sensor_data('nobody', 'accelerometer', START, later).empty
+        assert parquet.get_sensor_data('user-1', 'gyroscope', START, later).empty
+        assert parquet.get_sensor_data(
+            'user-1', 'accelerometer', later, later + timedelta(days=1)
+        ).empty
+
+    def test_study_is_discovered(self, backends, tmp_path):
+        """Test the study ID is read from the dataset when omitted"""
+        assert ParquetBackend(str(tmp_path / STUDY / 'e1')).study_id == STUDY
+
+        with pytest.raises(ValueError):
+            ParquetBackend(str(tmp_path))
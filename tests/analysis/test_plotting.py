@@ -0,0 +1,149 @@
+"""
+Unit tests for plot decimation
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from plotly.subplots import make_subplots
+
+from osrp.analysis.utils.plotting import (
+    ResampledFigure, decimate, lttb_indices, minmax_indices, scatter
+)
+
+START = pd.Timestamp('2026-01-15')
+
+
+def make_series(n=100_000, seed=0):
+    """Noisy 50 Hz readings with one spike"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(START, periods=n, freq='20ms', name='timestamp')
+    values = rng.normal(size=n)
+    values[n // 3] = 40.0
+    return index, values
+
+
+def reference_lttb(x, y, n_out):
+    """Straightforward per-bucket LTTB"""
+    n = len(y)
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(int)
+    kept, out = 0, [0]
+    for bucket in range(n_out - 2):
+        lo, hi = bounds[bucket], bounds[bucket + 1]
+        if bucket == n_out - 3:
+            mean_x, mean_y = x[-1], y[-1]
+        else:
+            nxt = slice(bounds[bucket + 1], bounds[bucket + 2])
+            mean_x, mean_y = x[nxt].mean(), y[nxt].mean()
+        areas = [
+            abs((x[kept] - mean_x) * (y[i] - y[kept]) - (x[kept] - x[i]) * (mean_y - y[kept]))
+            for i in range(lo, hi)
+        ]
+        kept = lo + int(np.argmax(areas))
+        out.append(kept)
+    return np.array(out + [n - 1])
+
+
+class TestDecimation:
+    """Test point selection"""
+
+    def test_minmax_keeps_extremes_per_pixel(self):
+        """Test every bucket's min and max (and the spike) survive"""
+        index, values = make_series()
+
+        indices = minmax_indices(index, values, 1000)
+
+        assert len(indices) <= 1000
+        assert np.all(np.diff(indices) > 0)
+        assert indices[0] == 0 and indices[-1] == len(values) - 1
+        assert len(values) // 3 in indices
+        assert values[indices].min() == values.min()
+
+    def test_minmax_irregular_and_missing(self):
+        """Test buckets follow time, not row count, and NaN is skipped"""
+        times = pd.DatetimeIndex(
+            [START + pd.Timedelta(seconds=s) for s in [0, 1, 2, 3, 3600, 3601, 7200]]
+        )
+        values = np.array([5.0, np.nan, -1.0, 2.0, 9.0, np.nan, 0.0])
+
+        indices = minmax_indices(times, values, 6)
+
+        assert indices.tolist() == [0, 2, 4, 6]
+
+    def test_lttb_matches_reference(self):
+        """Test the vectorized selection equals the textbook algorithm"""
+        rng = np.random.default_rng(1)
+        x = np.cumsum(rng.uniform(0.5, 1.5, 2000))
+        y = np.cumsum(rng.normal(size=2000))
+
+        np.testing.assert_array_equal(
+            lttb_indices(pd.Index(x), y, 150), reference_lttb(x - x[0], y, 150)
+        )
+
+    @pytest.mark.parametrize('method', ['minmax', 'lttb'])
+    def test_decimate(self, method):
+        """Test output points are original points and short series pass through"""
+        index, values = make_series(n=20_000)
+
+        x, y = decimate(index, values, 500, method)
+
+        assert len(y) <= 500
+        assert isinstance(x, pd.DatetimeIndex)
+        np.testing.assert_array_equal(y, values[index.get_indexer(x)])
+        short_x, short_y = decimate(index[:100], values[:100], 500, method)
+        np.testing.assert_array_equal(short_y, values[:100])
+
+    def test_decimate_validation(self):
+        """Test unknown methods and mismatched lengths are rejected"""
+        with pytest.raises(ValueError, match='median'):
+            decimate([1, 2], [1, 2], method='median')
+        with pytest.raises(ValueError, match='values'):
+            decimate([1, 2], [1])
+
+    def test_webgl_threshold(self):
+        """Test traces switch to WebGL above the threshold"""
+        index, values = make_series(n=20_000)
+
+        assert isinstance(scatter(index, values), go.Scatter)
+        assert isinstance(scatter(index, values, max_points=None), go.Scattergl)
+        assert isinstance(scatter(index, values, max_points=15_000), go.Scattergl)
+
+
+class TestResampledFigure:
+    """Test re-decimation on zoom"""
+
+    def test_update_range(self):
+        """Test zooming re-selects points from the full series"""
+        index, values = make_series()
+        fig = ResampledFigure(make_subplots(rows=2, cols=1), max_points=1000)
+        fig.add_trace(index, values, row=1, col=1, name='Movement')
+        fig.add_trace(index, values, method='lttb', row=2, col=1)
+
+        assert [trace.xaxis for trace in fig.figure.data] == ['x', 'x2']
+        assert len(fig.figure.data[0].x) <= 1000
+
+        lo, hi = START + pd.Timedelta(minutes=5), START + pd.Timedelta(minutes=6)
+        fig.update_range(lo, hi)
+
+        # One minute at 50 Hz is 3000 readings, decimated again to 1000
+        for trace in fig.figure.data:
+            x = pd.DatetimeIndex(trace.x)
+            assert 900 <= len(x) <= 1000
+            assert x[0] < lo <= x[1] and x[-2] <= hi < x[-1]
+        assert list(fig.figure.layout.xaxis2.range) == [lo, hi]
+
+        fig.update_range(lo, lo + pd.Timedelta(seconds=2))
+        np.testing.assert_array_equal(fig.figure.data[0].y, values[14_999:15_102])
+
+    def test_update_single_axis(self):
+        """Test string bounds from Plotly relayout events on one axis"""
+        index, values = make_series()
+        fig = ResampledFigure(make_subplots(rows=2, cols=1), max_points=1000)
+        fig.add_trace(index, values, row=1, col=1)
+        fig.add_trace(index, values, row=2, col=1)
+
+        fig.update_range('2026-01-15 00:00:10', '2026-01-15 00:00:11', axis='x2')
+
+        assert len(fig.figure.data[0].y) <= 1000
+        assert len(fig.figure.data[1].y) == 53
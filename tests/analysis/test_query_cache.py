@@ -0,0 +1,191 @@
+"""
+Unit tests for the query cache
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from osrp.analysis.utils.data_access import OSRPData
+from osrp.analysis.utils.query_cache import QueryCache
+
+DAY_MS = 24 * 60 * 60 * 1000
+START = datetime(2026, 1, 14)
+BASE_MS = int(START.timestamp() * 1000)
+
+
+def items_for(start, end, step):
+    """Synthetic items and their timestamps"""
+    times = list(range(start, end + 1, step))
+    return [{'timestamp': t, 'value': t} for t in times], times
+
+
+class TestQueryCache:
+    """Test coverage tracking and eviction"""
+
+    def test_missing_on_empty_cache(self):
+        """Test an unseen key needs the full range"""
+        cache = QueryCache()
+        assert cache.missing(('t', 'pk'), 0, 100) == [(0, 100)]
+
+    def test_gaps_around_covered_interval(self):
+        """Test only uncovered sub-ranges are reported"""
+        cache = QueryCache()
+        items, times = items_for(100, 200, 10)
+        cache.add(('t', 'pk'), 100, 200, items, times)
+
+        assert cache.missing(('t', 'pk'), 120, 180) == []
+        assert cache.missing(('t', 'pk'), 0, 300) == [(0, 99), (201, 300)]
+        assert cache.missing(('t', 'pk'), 150, 250) == [(201, 250)]
+
+    def test_adjacent_intervals_merge(self):
+        """Test adjacent fetches become a single covered interval"""
+        cache = QueryCache()
+        cache.add(('t', 'pk'), 0, 99, *items_for(0, 99, 10))
+        cache.add(('t', 'pk'), 100, 199, *items_for(100, 199, 10))
+
+        assert cache.missing(('t', 'pk'), 0, 199) == []
+        assert [item['value'] for item in cache.get(('t', 'pk'), 95, 105)] == [100]
+
+    def test_get_returns_ordered_sub_range(self):
+        """Test gap items are merged in timestamp order"""
+        cache = QueryCache()
+        cache.add(('t', 'pk'), 100, 199, *items_for(100, 199, 10))
+        cache.add(('t', 'pk'), 0, 99, *items_for(0, 99, 10))
+
+        values = [item['value'] for item in cache.get(('t', 'pk'), 50, 150)]
+        assert values == list(range(50, 151, 10))
+
+    def test_lru_eviction_by_bytes(self):
+        """Test least recently used partitions are evicted over budget"""
+        cache = QueryCache(max_bytes=30_000)
+        cache.add(('t', 'a'), 0, 999, *items_for(0, 999, 10))
+        cache.add(('t', 'b'), 0, 999, *items_for(0, 999, 10))
+        cache.get(('t', 'a'), 0, 999)
+        cache.add(('t', 'c'), 0, 999, *items_for(0, 999, 10))
+
+        assert ('t', 'a') in cache
+        assert ('t', 'b') not in cache
+        assert cache.size <= 30_000
+
+    def test_max_entries(self):
+        """Test entry count limit"""
+        cache = QueryCache(max_entries=2)
+        for key in 'abc':
+            cache.add(('t', key), 0, 10, [], [])
+
+        assert len(cache) == 2
+        assert ('t', 'a') not in cache
+
+    def test_invalidate_and_clear(self):
+        """Test manual invalidation"""
+        cache = QueryCache()
+        cache.add(('t', 'a'), 0, 99, *items_for(0, 99, 10))
+        cache.invalidate(('t', 'a'))
+
+        assert cache.missing(('t', 'a'), 0, 99) == [(0, 99)]
+        cache.clear()
+        assert cache.size == 0 and len(cache) == 0
+
+    def test_recent_data_not_cached(self):
+        """Test coverage stops at the ingestion lag and newer items are returned uncached"""
+        now = 1_000
+        cache = QueryCache(ingestion_lag=300, clock=lambda: now)
+        items, times = items_for(0, 999_990, 10_000)
+
+        recent = cache.add(('t', 'pk'), 0, 1_200_000, items, times)
+
+        assert [item['value'] for item in recent] == list(range(710_000, 999_991, 10_000))
+        assert cache.missing(('t', 'pk'), 0, 1_200_000) == [(700_001, 1_200_000)]
+        assert cache.get(('t', 'pk'), 0, 1_200_000)[-1]['value'] == 700_000
+
+        now = 2_000
+        tail = items_for(710_000, 1_190_000, 10_000)
+        assert cache.add(('t', 'pk'), 700_001, 1_200_000, *tail) == []
+        assert cache.missing(('t', 'pk'), 0, 1_200_000) == []
+        assert len(cache.get(('t', 'pk'), 0, 1_200_000)) == 120
+        assert cache.add(('t', 'new'), 1_800_000, 1_900_000, *items_for(1_800_000, 1_800_000, 1))
+        assert ('t', 'new') not in cache
+
+
+class TestOSRPDataCaching:
+    """Test OSRPData only queries uncovered ranges"""
+
+    def test_sliding_window_fetches_new_day_only(self, dynamodb):
+        """Test widening a cached day queries only the two new days"""
+        table = dynamodb.Table('SensorTimeSeries')
+        with table.batch_writer() as batch:
+            for hour in range(72):
+                batch.put_item(Item={
+                    'userIdSensorType': 'user-1#accelerometer',
+                    'timestamp': BASE_MS + hour * 3600 * 1000,
+                    'data': {'x': Decimal(hour)},
+                })
+
+        data = OSRPData(region='us-west-2', cache=QueryCache())
+        day = START + timedelta(days=1)
+
+        with patch.object(data.backend, '_query', wraps=data.backend._query) as query:
+            first = data.get_sensor_data('user-1', 'accelerometer', day, day + timedelta(days=1))
+            assert query.call_count == 1
+
+            again = data.get_sensor_data('user-1', 'accelerometer', day, day + timedelta(hours=12))
+            assert query.call_count == 1
+
+            wide = data.get_sensor_data(
+                'user-1', 'accelerometer', START, START + timedelta(days=3)
+            )
+            assert query.call_count == 3
+
+        uncached = OSRPData(region='us-west-2').get_sensor_data(
+            'user-1', 'accelerometer', START, START + timedelta(days=3)
+        )
+        assert len(first) == 25
+        assert len(again) == 13
+        assert wide.equals(uncached)
+
+    def test_todays_data_refetched(self, dynamodb):
+        """Test re-running a query of today sees data ingested since the last run"""
+        table = dynamodb.Table('SensorTimeSeries')
+        now = datetime.now()
+        now_ms = int(now.timestamp() * 1000)
+
+        def put(offset_ms):
+            table.put_item(Item={
+                'userIdSensorType': 'user-1#light',
+                'timestamp': now_ms + offset_ms,
+                'data': {'lux': Decimal(1)},
+            })
+
+        put(-3600 * 1000)
+        put(-30 * 1000)
+        data = OSRPData(region='us-west-2', cache=QueryCache())
+        start, end = now - timedelta(hours=2), now + timedelta(hours=1)
+
+        with patch.object(data.backend, '_query', wraps=data.backend._query) as query:
+            assert len(data.get_sensor_data('user-1', 'light', start, end)) == 2
+            put(-10 * 1000)
+            assert len(data.get_sensor_data('user-1', 'light', start, end)) == 3
+            assert query.call_count == 2
+            assert query.call_args.args[1]['ExpressionAttributeValues'][':start'] > now_ms - 600_000
+
+    def test_composite_sort_key_cached(self, dynamodb):
+        """Test event queries are served from cache for sub-ranges"""
+        table = dynamodb.Table('EventLog')
+        for i in range(5):
+            table.put_item(Item={
+                'userId': 'user-1',
+                'timestampEventType': f"{BASE_MS + i * 1000}#screen_on",
+                'eventType': 'screen_on',
+            })
+
+        data = OSRPData(region='us-west-2', cache=QueryCache())
+        data.get_events('user-1', START, START + timedelta(days=1))
+
+        with patch.object(data.backend, '_query') as query:
+            df = data.get_events('user-1', START, START + timedelta(seconds=2))
+            query.assert_not_called()
+
+        assert len(df) == 3
@@ -0,0 +1,201 @@
+"""
+Unit tests for the rollup pyramid
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import boto3
+import numpy as np
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils.data_access import OSRPData
+
+pytest.importorskip('pyarrow')
+
+from osrp.analysis.utils.rollups import (  # noqa: E402
+    LEVELS, RollupStore, combine, rollup_frame, select_level
+)
+
+from .conftest import REGION  # noqa: E402
+
+START = datetime(2026, 1, 15, 14)
+BASE_MS = int(START.timestamp() * 1000)
+
+
+def make_raw(n=5000, seed=0):
+    """Irregular accelerometer readings with a missing value"""
+    rng = np.random.default_rng(seed)
+    offsets = np.sort(rng.integers(0, 3 * 3_600_000, n))
+    index = pd.DatetimeIndex(pd.to_datetime(BASE_MS + offsets, unit='ms'), name='timestamp')
+    df = pd.DataFrame(rng.normal(size=(n, 3)), columns=['x', 'y', 'z'], index=index)
+    df['accuracy'] = 3
+    df['source'] = 'phone'
+    df.iloc[7, 0] = np.nan
+    return df
+
+
+def reference(series, freq):
+    """count/sum/sumsq/min/max via resample, dropping empty buckets"""
+    grouped = series.resample(freq)
+    frame = pd.DataFrame({
+        'count': grouped.count(),
+        'sum': grouped.sum(),
+        'sumsq': (series ** 2).resample(freq).sum(),
+        'min': grouped.min(),
+        'max': grouped.max(),
+    })
+    return frame[frame['count'] > 0]
+
+
+def populate(dynamodb, hours=20, step_s=60):
+    """Minute-level accelerometer readings across two UTC days"""
+    with dynamodb.Table('SensorTimeSeries').batch_writer() as batch:
+        for i in range(hours * 3600 // step_s):
+            batch.put_item(Item={
+                'userIdSensorType': 'user-1#accelerometer',
+                'timestamp': BASE_MS + i * step_s * 1000,
+                'data': {'x': Decimal(i % 7), 'y': Decimal('-9.8'), 'z': Decimal(i % 3) / 2},
+            })
+
+
+class TestRollupFrames:
+    """Test bucket statistics"""
+
+    def test_matches_resample(self):
+        """Test 1s statistics equal resampling the raw readings"""
+        raw = make_raw()
+
+        rollup = rollup_frame(raw)
+
+        for column in ('x', 'accuracy'):
+            expected = reference(raw[column].astype(float), '1s')
+            for stat in expected.columns:
+                np.testing.assert_allclose(
+                    rollup[f'{column}_{stat}'].to_numpy(dtype=float), expected[stat].to_numpy()
+                )
+        assert 'source_sum' not in rollup.columns
+        magnitude = np.sqrt(raw['x'] ** 2 + raw['y'] ** 2 + raw['z'] ** 2)
+        np.testing.assert_allclose(
+            rollup['magnitude_max'], reference(magnitude, '1s')['max'], equal_nan=True
+        )
+
+    def test_combine_matches_direct_rollup(self):
+        """Test coarser levels built from finer ones equal rolling up raw data"""
+        raw = make_raw()
+        pyramid = rollup_frame(raw)
+
+        for size in list(LEVELS.values())[1:]:
+            pyramid = combine(pyramid, size)
+            pd.testing.assert_frame_equal(pyramid, rollup_frame(raw, size))
+
+    def test_select_level(self):
+        """Test the coarsest level dividing the resolution is chosen"""
+        assert select_level('1s') == '1s'
+        assert select_level('90s') == '1s'
+        assert select_level('5min') == '1min'
+        assert select_level('30min') == '15min'
+        assert select_level('1h') == '1h'
+        assert select_level('1D') == '1h'
+        with pytest.raises(ValueError):
+            select_level('500ms')
+
+
+class TestRollupStore:
+    """Test building and reading the pyramid"""
+
+    def test_build_and_read(self, dynamodb, tmp_path):
+        """Test reads at several resolutions match the raw readings"""
+        populate(dynamodb)
+        store = RollupStore(str(tmp_path))
+        data = OSRPData(region=REGION, rollups=store)
+        end = START + timedelta(hours=20)
+
+        written = store.build(data, 'user-1', 'sensor_accelerometer', START, end)
+
+        assert written == {'1s': 1200, '1min': 1200, '15min': 80, '1h': 20}
+        files = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob('*.parquet'))
+        assert len(files) == 8
+        assert 'sensor_accelerometer/user-1/1h/2026-01-16.parquet' in files
+
+        raw = data.get_sensor_data('user-1', 'accelerometer', START, end)
+        magnitude = np.sqrt(raw['x'] ** 2 + raw['y'] ** 2 + raw['z'] ** 2)
+        for resolution in ('1min', '5min', '2h'):
+            rollup = data.get_rollups(
+                'user-1', 'sensor_accelerometer', START, end, resolution, columns=['magnitude']
+            )
+            expected = reference(magnitude, resolution)
+            assert list(rollup.columns) == [
+                f'magnitude_{stat}' for stat in ('count', 'sum', 'sumsq', 'min', 'max', 'mean')
+            ]
+            np.testing.assert_array_equal(rollup.index, expected.index)
+            np.testing.assert_allclose(rollup['magnitude_sum'], expected['sum'])
+            np.testing.assert_allclose(
+                rollup['magnitude_mean'], expected['sum'] / expected['count']
+            )
+
+    def test_read_range_and_missing(self, dynamodb, tmp_path):
+        """Test reads are trimmed to the range and empty without rollups"""
+        populate(dynamodb, hours=3)
+        store = RollupStore(str(tmp_path))
+        data = OSRPData(region=REGION, rollups=store)
+        store.build(data, 'user-1', 'sensor_accelerometer', START, START + timedelta(hours=3))
+
+        rollup = data.get_rollups(
+            'user-1', 'sensor_accelerometer',
+            START + timedelta(minutes=20), START + timedelta(minutes=40), '15min'
+        )
+
+        assert rollup.index.tolist() == [
+            pd.Timestamp(START + timedelta(minutes=m)) for m in (15, 30)
+        ]
+        assert data.get_rollups(
+            'user-2', 'sensor_accelerometer', START, START + timedelta(hours=1)
+        ).empty
+
+    def test_requires_store_or_bucket(self, dynamodb):
+        """Test a clear error without anywhere to read rollups from"""
+        with pytest.raises(ValueError, match='data_bucket'):
+            OSRPData(region=REGION).get_rollups('user-1', 'sensor_accelerometer', START, START)
+
+    def test_unsupported_stream(self, dynamodb, tmp_path):
+        """Test only sensor and wearable streams can be rolled up"""
+        store = RollupStore(str(tmp_path))
+        with pytest.raises(ValueError, match='events'):
+            store.build(OSRPData(region=REGION), 'user-1', 'events', START, START)
+
+    def test_default_store_in_data_bucket(self, server_dynamodb, moto_server):
+        """Test rollups are written to and read from processed/rollups/ in S3"""
+        populate(server_dynamodb, hours=2)
+        s3 = boto3.client('s3', region_name=REGION, endpoint_url=moto_server)
+        s3.create_bucket(
+            Bucket='osrp-data', CreateBucketConfiguration={'LocationConstraint': REGION}
+        )
+        data = OSRPData(region=REGION, data_bucket='osrp-data', endpoint_url=moto_server)
+        end = START + timedelta(hours=2)
+
+        data.get_rollups('user-1', 'sensor_accelerometer', START, end)
+        data.rollups.build(data, 'user-1', 'sensor_accelerometer', START, end)
+        rollup = data.get_rollups('user-1', 'sensor_accelerometer', START, end, '1h')
+
+        keys = [obj['Key'] for obj in s3.list_objects_v2(Bucket='osrp-data')['Contents']]
+        assert 'processed/rollups/sensor_accelerometer/user-1/1h/2026-01-15.parquet' in keys
+        assert rollup['x_count'].tolist() == [60, 60]
+
+    def test_cli(self, dynamodb, tmp_path):
+        """Test `osrp rollup` builds every level for the given participants"""
+        from click.testing import CliRunner
+
+        from osrp.cli import main
+
+        populate(dynamodb, hours=2)
+        result = CliRunner().invoke(main, [
+            'rollup', 'test_study', '--stream', 'sensor_accelerometer',
+            '--user', 'user-1', '--output', str(tmp_path),
+            '--start', '2026-01-15', '--end', '2026-01-15',
+        ])
+
+        assert result.exit_code == 0, result.output
+        assert '1min' in result.output
+        assert (tmp_path / 'sensor_accelerometer' / 'user-1' / '1h' / '2026-01-15.parquet').exists()
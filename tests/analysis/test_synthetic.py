@@ -0,0 +1,112 @@
+"""
+Unit tests for the synthetic cohort generator
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils.data_access import TABLES, OSRPData, _items_to_frame
+from osrp.analysis.utils.synthetic import SyntheticCohort
+
+from .conftest import REGION
+
+
+def small_cohort(**kwargs):
+    """Low sampling rates keep generation and moto loads fast"""
+    options = {'participants': 2, 'days': 2, 'accelerometer_hz': 0.5, 'heart_rate_hz': 0.1}
+    options.update(kwargs)
+    return SyntheticCohort(**options)
+
+
+def assert_summaries_equal(actual, expected):
+    """Compare get_daily_summary results stream by stream"""
+    assert set(actual) == set(expected)
+    for name, df in expected.items():
+        if df.empty:
+            assert actual[name].empty, name
+        else:
+            pd.testing.assert_frame_equal(actual[name], df, check_like=True, obj=name)
+
+
+class TestSyntheticCohort:
+    """Test generated streams"""
+
+    def test_deterministic(self):
+        """Test the same seed gives the same data and another seed does not"""
+        cohort = small_cohort()
+        user_id, date = cohort.user_ids[1], cohort.dates[1]
+
+        first = cohort.frames(user_id, date)
+        again = small_cohort().frames(user_id, date)
+        other = small_cohort(seed=1).frames(user_id, date)
+
+        assert first.keys() == again.keys()
+        for key, df in first.items():
+            pd.testing.assert_frame_equal(again[key], df)
+        assert not other[('wearable', f"{user_id}#polar_h10")].equals(
+            first[('wearable', f"{user_id}#polar_h10")]
+        )
+
+    def test_streams_cover_the_day(self):
+        """Test every stream is generated within the day at the requested rate"""
+        cohort = small_cohort(accelerometer_hz=2.0)
+        date = cohort.dates[1]
+
+        summary = cohort.daily_summary(cohort.user_ids[0], date)
+
+        for name in ('accelerometer', 'location', 'heart_rate', 'steps', 'screenshots', 'events'):
+            index = summary[name].index
+            assert index.min() >= pd.Timestamp(date), name
+            assert index.max() < pd.Timestamp(date) + pd.Timedelta(days=1), name
+        assert len(summary['accelerometer']) == 2 * 86_400
+        assert len(summary['steps']) == 1440
+        assert summary['gyroscope'].empty and summary['activity'].empty
+        assert summary['ema_responses']['stress_level'].between(1, 5).all()
+
+    def test_frames_match_items(self):
+        """Test vectorized frames equal the frames built from the items"""
+        cohort = small_cohort()
+        user_id, date = cohort.user_ids[0], cohort.start
+
+        items = {}
+        for table, item in cohort.items(user_id, date):
+            partition_key = TABLES[table]['partition_key']
+            items.setdefault((table, item[partition_key]), []).append(item)
+
+        for (table, partition_value), df in cohort.frames(user_id, date).items():
+            spec = TABLES[table]
+            expected = _items_to_frame(
+                items[(table, partition_value)], sort_key=spec['sort_key'], expand=spec['expand']
+            )
+            pd.testing.assert_frame_equal(df, expected, check_like=True, obj=partition_value)
+
+    def test_parquet_round_trip(self, tmp_path):
+        """Test ParquetBackend serves the generated frames"""
+        pytest.importorskip('pyarrow')
+        from osrp.analysis.utils.parquet_backend import ParquetBackend
+
+        cohort = small_cohort(days=1)
+        data = OSRPData(backend=ParquetBackend(cohort.write_parquet(str(tmp_path))))
+
+        for user_id in cohort.user_ids:
+            assert_summaries_equal(
+                data.get_daily_summary(user_id, cohort.start),
+                cohort.daily_summary(user_id, cohort.start),
+            )
+
+    def test_load_dynamodb(self, dynamodb):
+        """Test OSRPData reads the loaded cohort back from DynamoDB"""
+        cohort = small_cohort(participants=1, days=1, accelerometer_hz=0.01, heart_rate_hz=0.01)
+        user_id = cohort.user_ids[0]
+
+        written = cohort.load_dynamodb(dynamodb)
+
+        assert written == sum(1 for _ in cohort.items(user_id, cohort.start)) + 1
+        assert_summaries_equal(
+            OSRPData(region=REGION).get_daily_summary(user_id, datetime(2026, 1, 15, 12)),
+            cohort.daily_summary(user_id, cohort.start),
+        )
+        status = dynamodb.Table('ParticipantStatus').get_item(Key={'userId': user_id})['Item']
+        assert status['groupCode'] == 'synthetic_study'
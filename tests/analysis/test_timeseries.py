@@ -0,0 +1,158 @@
+"""
+Unit tests for the sorted-array TimeSeries container
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from osrp.analysis.utils.timeseries import TimeSeries, window_edges
+
+START = pd.Timestamp('2026-01-15')
+
+
+def make_frame(n=2000, seed=0):
+    """Irregular readings over a day with gaps and missing values"""
+    rng = np.random.default_rng(seed)
+    offsets = np.sort(rng.integers(0, 86_400_000, n))
+    # A quiet stretch leaves some windows empty
+    offsets = offsets[(offsets < 30_000_000) | (offsets > 40_000_000)]
+    index = pd.DatetimeIndex(START + pd.to_timedelta(offsets, unit='ms'), name='timestamp')
+    value = rng.normal(size=len(index))
+    value[::17] = np.nan
+    return pd.DataFrame({
+        'value': value,
+        'app': rng.choice(['Chrome', 'Maps', 'Slack', None], len(index)),
+    }, index=index)
+
+
+def masked(df, edges, reduce):
+    """The boolean-mask reference: one full scan per window"""
+    bounds = pd.to_datetime(edges, unit='ms')
+    return np.array([
+        reduce(df[(df.index >= lo) & (df.index < hi)]) for lo, hi in zip(bounds[:-1], bounds[1:])
+    ], dtype=float)
+
+
+class TestTimeSeries:
+    """Test slicing and window reductions"""
+
+    def test_slice_is_view(self):
+        """Test range slicing returns views of the same rows as a mask"""
+        df = make_frame()
+        series = TimeSeries.from_frame(df)
+        lo, hi = START + pd.Timedelta(hours=3), START + pd.Timedelta(hours=5)
+
+        window = series.slice(lo, hi)
+
+        expected = df[(df.index >= lo) & (df.index < hi)]
+        np.testing.assert_array_equal(window['value'], expected['value'].to_numpy())
+        assert np.shares_memory(window['value'], series['value'])
+        pd.testing.assert_index_equal(window.to_frame().index, expected.index.as_unit('ms'))
+
+    def test_slice_bounds(self):
+        """Test open and inverted bounds"""
+        series = TimeSeries.from_frame(make_frame())
+
+        assert len(series.slice()) == len(series)
+        assert len(series.slice(START + pd.Timedelta(hours=2), START)) == 0
+
+    @pytest.mark.parametrize('how, reference', [
+        ('count', lambda w: w['value'].count()),
+        ('sum', lambda w: w['value'].sum()),
+        ('mean', lambda w: w['value'].mean()),
+        ('std', lambda w: w['value'].std()),
+        ('var', lambda w: w['value'].var()),
+        ('min', lambda w: w['value'].min()),
+        ('max', lambda w: w['value'].max()),
+        ('first', lambda w: w['value'].iloc[0] if len(w) else np.nan),
+        ('last', lambda w: w['value'].iloc[-1] if len(w) else np.nan),
+    ])
+    def test_reductions_match_masks(self, how, reference):
+        """Test every reduction equals masking the frame once per window"""
+        df = make_frame()
+        edges = window_edges(START, START + pd.Timedelta(days=1), '15min')
+
+        result = TimeSeries.from_frame(df).reduce(edges, 'value', how)
+
+        np.testing.assert_allclose(result, masked(df, edges, reference), equal_nan=True)
+
+    def test_row_counts_and_nunique(self):
+        """Test row counts and distinct values per window"""
+        df = make_frame()
+        edges = window_edges(START, START + pd.Timedelta(days=1), '1h')
+        series = TimeSeries.from_frame(df)
+
+        np.testing.assert_array_equal(series.reduce(edges), masked(df, edges, len))
+        np.testing.assert_array_equal(
+            series.reduce(edges, 'app', 'nunique'), masked(df, edges, lambda w: w['app'].nunique())
+        )
+
+    def test_arbitrary_edges(self):
+        """Test uneven edges, including ones outside the data"""
+        df = make_frame()
+        edges = pd.DatetimeIndex([
+            START - pd.Timedelta(hours=1), START + pd.Timedelta(minutes=7),
+            START + pd.Timedelta(hours=9), START + pd.Timedelta(hours=9),
+            START + pd.Timedelta(days=2),
+        ])
+
+        result = TimeSeries.from_frame(df).reduce(edges, 'value', 'sum')
+
+        expected = masked(df, edges.as_unit('ms').asi8, lambda w: w['value'].sum())
+        np.testing.assert_allclose(result, expected)
+
+    def test_aggregate(self):
+        """Test several reductions as a frame indexed by window start"""
+        df = make_frame()
+        edges = window_edges(START, START + pd.Timedelta(days=1), '6h')
+
+        features = TimeSeries.from_frame(df).aggregate(
+            edges, rows=(None, 'count'), value_mean=('value', 'mean')
+        )
+
+        expected = df.resample('6h').agg({'value': 'mean'})
+        pd.testing.assert_index_equal(
+            features.index, pd.DatetimeIndex(expected.index.as_unit('ms'), name='timestamp')
+        )
+        np.testing.assert_allclose(features['value_mean'], expected['value'])
+        assert features['rows'].sum() == len(df)
+
+    def test_unsorted_frame_and_timezone(self):
+        """Test unsorted input is sorted and the timezone is kept"""
+        df = make_frame(n=50).tz_localize('UTC').tz_convert('America/Los_Angeles')
+        shuffled = df.sample(frac=1, random_state=0)
+
+        series = TimeSeries.from_frame(shuffled)
+
+        assert series.tz == 'America/Los_Angeles'
+        pd.testing.assert_frame_equal(
+            series.to_frame(), df.set_axis(df.index.as_unit('ms')), check_freq=False
+        )
+
+    def test_empty(self):
+        """Test empty frames and edge arrays"""
+        series = TimeSeries.from_frame(pd.DataFrame())
+        edges = window_edges(START, START + pd.Timedelta(hours=1), '15min')
+
+        np.testing.assert_array_equal(series.reduce(edges), [0, 0, 0, 0])
+        assert len(TimeSeries.from_frame(make_frame()).reduce(edges[:1], 'value', 'mean')) == 0
+
+    def test_validation(self):
+        """Test unsorted timestamps/edges and unknown reductions are rejected"""
+        with pytest.raises(ValueError, match='sorted'):
+            TimeSeries(np.array([2, 1]), {'value': np.array([1.0, 2.0])})
+        with pytest.raises(ValueError, match='values'):
+            TimeSeries(np.array([1, 2]), {'value': np.array([1.0])})
+
+        series = TimeSeries.from_frame(make_frame())
+        with pytest.raises(ValueError, match='sorted'):
+            series.reduce(np.array([5, 1]))
+        with pytest.raises(ValueError, match='median'):
+            series.reduce(np.array([1, 5]), 'value', 'median')
+
+    def test_window_edges(self):
+        """Test a shorter final window is kept"""
+        edges = window_edges(START, START + pd.Timedelta(minutes=25), '10min')
+
+        assert np.diff(edges).tolist() == [600_000, 600_000, 300_000]
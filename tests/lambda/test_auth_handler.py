@@ -20,6 +20,7 @@ def mock_env_vars(monkeypatch):
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../infrastructure/lambda'))
+import auth_handler
 from auth_handler import (
     lambda_handler,
     handle_register,
@@ -325,6 +326,113 @@ class TestRefreshHandler:
         assert 'invalid' in response_body['error'].lower()
 
 
+class TestEnrollHandler:
+    """Test bulk participant enrollment"""
+
+    def enroll_event(self, body, groups='admins'):
+        """Enroll request of a user in the given Cognito groups"""
+        return {
+            'httpMethod': 'POST',
+            'path': '/auth/enroll',
+            'body': json.dumps(body),
+            'requestContext': {'authorizer': {'claims': {'cognito:groups': groups}}}
+        }
+
+    def test_requires_admin_group(self):
+        """Test users outside the admin group are refused"""
+        body = {'roster': 'email,studyCode,participantId\np1@example.com,s,P1\n'}
+
+        for groups in ['', 'participants', '[participants admins-readonly]']:
+            result = lambda_handler(self.enroll_event(body, groups), None)
+            assert result['statusCode'] == 403
+
+    def test_invalid_roster(self, monkeypatch):
+        """Test rosters without required columns, rows, or over the row limit"""
+        monkeypatch.setattr(auth_handler, 'ENROLL_MAX_ROWS', 2)
+        bodies = [
+            {'roster': 'email,participantId\np1@example.com,P1\n'},
+            {'roster': 'email,studyCode,participantId\n'},
+            {'participants': [{'email': f"p{i}@example.com"} for i in range(3)]},
+            {'participants': 'p1@example.com'},
+        ]
+
+        for body in bodies:
+            result = lambda_handler(self.enroll_event(body), None)
+            assert result['statusCode'] == 400
+
+    @patch('auth_handler.participant_table', None)
+    @patch('auth_handler.enroll_cognito_client')
+    def test_successful_enrollment(self, mock_cognito):
+        """Test each row gets a result and invalid rows do not reach Cognito"""
+        mock_cognito.admin_create_user.return_value = {
+            'User': {'Attributes': [{'Name': 'sub', 'Value': 'user-sub'}]}
+        }
+        body = {'participants': [
+            {'email': 'p1@example.com', 'studyCode': 's', 'participantId': 'P1'},
+            {'email': 'p2@example.com', 'studyCode': 's', 'participantId': 'P2'},
+            {'email': 'p3@example.com', 'studyCode': 's'},
+        ]}
+
+        result = lambda_handler(self.enroll_event(body, '[admins participants]'), None)
+
+        assert result['statusCode'] == 200
+        response_body = json.loads(result['body'])
+        assert response_body['summary']['created'] == 2
+        assert response_body['summary']['invalid'] == 1
+        assert {r['row']: r['status'] for r in response_body['results']} == {
+            1: 'created', 2: 'created', 3: 'invalid'
+        }
+        assert mock_cognito.admin_create_user.call_count == 2
+        request = mock_cognito.admin_create_user.call_args.kwargs
+        assert request['UserPoolId'] == 'us-west-2_TEST123'
+        assert {'Name': 'custom:studyCode', 'Value': 's'} in request['UserAttributes']
+
+    @patch('auth_handler.participant_table', None)
+    @patch('auth_handler.enroll_cognito_client')
+    def test_time_budget(self, mock_cognito):
+        """Test rows are skipped once the invocation runs out of time"""
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 2000
+        body = {'roster': 'email,studyCode,participantId\np1@example.com,s,P1\n'}
+
+        result = lambda_handler(self.enroll_event(body), context)
+
+        [row] = json.loads(result['body'])['results']
+        assert row['status'] == 'skipped'
+        mock_cognito.admin_create_user.assert_not_called()
+
+
+class TestMetrics:
+    """Test the embedded metric format record of each invocation"""
+
+    @patch('auth_handler.cognito_client')
+    def test_login_record(self, mock_cognito, capsys, monkeypatch):
+        """Test latency, Cognito timing, retries and cold start of a login"""
+        monkeypatch.setattr(auth_handler, 'cold_start', True)
+
+        def initiate_auth(**kwargs):
+            auth_handler.count_retries(parsed={'ResponseMetadata': {'RetryAttempts': 1}})
+            return {'ChallengeName': 'NEW_PASSWORD_REQUIRED', 'Session': 'session'}
+
+        mock_cognito.initiate_auth.side_effect = initiate_auth
+        event = {
+            'httpMethod': 'POST',
+            'path': '/auth/login',
+            'body': json.dumps({'email': 'test@example.com', 'password': 'SecurePass123!'})
+        }
+
+        assert lambda_handler(event, None)['statusCode'] == 200
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+
+        assert record['Service'] == 'Auth'
+        assert record['Route'] == 'POST /auth/login'
+        assert record['ColdStart'] == 1
+        assert record['CognitoRetries'] == 1
+        assert record['StatusCode'] == 200
+        assert record['Latency'] >= record['CognitoTime'] >= 0
+        assert 'ParseTime' in record
+
+
 class TestResponseHelpers:
     """Test response helper functions"""
 
@@ -0,0 +1,78 @@
+"""
+Unit tests for the token authorizer Lambda handler
+"""
+
+import json
+import os
+import sys
+
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip('cryptography')
+from osrp.tokens import JWKSCache, TokenVerifier  # noqa: E402
+from tests.test_tokens import CLIENT_ID, ISSUER, SigningKey  # noqa: E402
+
+# The handler builds its verifier from the environment at import time
+os.environ.setdefault('USER_POOL_ID', 'us-west-2_TEST123')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../infrastructure/lambda'))
+import authorizer_handler  # noqa: E402
+from authorizer_handler import lambda_handler, stage_arn  # noqa: E402
+
+METHOD_ARN = 'arn:aws:execute-api:us-west-2:123456789012:abc123/prod/POST/data/sensor'
+
+
+@pytest.fixture(scope='module')
+def key():
+    """Signing key of the test user pool"""
+    return SigningKey('key-1')
+
+
+@pytest.fixture
+def verifier(key):
+    """Verifier of the test pool's tokens, installed in the handler"""
+    jwks = JWKSCache('https://example.com/jwks.json', fetch=lambda url: {'keys': [key.jwk()]})
+    verifier = TokenVerifier(ISSUER, [CLIENT_ID], jwks=jwks, clock=lambda: 1_768_500_000)
+    with patch('authorizer_handler.token_verifier', verifier):
+        yield verifier
+
+
+class TestAuthorizer:
+    """Test policies returned for valid and invalid tokens"""
+
+    def test_allow(self, key, verifier, capsys):
+        """Test a valid token is allowed on the whole stage with its claims as context"""
+        event = {
+            'type': 'TOKEN', 'methodArn': METHOD_ARN,
+            'authorizationToken': f"Bearer {key.sign(email='p@example.com')}",
+        }
+
+        policy = lambda_handler(event, None)
+        lambda_handler(event, None)
+
+        assert policy['principalId'] == 'user-123'
+        [statement] = policy['policyDocument']['Statement']
+        assert statement['Effect'] == 'Allow'
+        assert statement['Resource'] == 'arn:aws:execute-api:us-west-2:123456789012:abc123/prod/*/*'
+        assert policy['context'] == {
+            'sub': 'user-123', 'email': 'p@example.com', 'token_use': 'id',
+        }
+        first, second = (json.loads(line) for line in capsys.readouterr().out.splitlines())
+        assert (first['JWKSFetches'], first['CacheHits']) == (1, 0)
+        assert (second['JWKSFetches'], second['CacheHits']) == (0, 1)
+
+    @pytest.mark.parametrize('token', ['', 'Bearer garbage', 'expired'])
+    def test_deny(self, key, verifier, token, capsys):
+        """Test missing, malformed and expired tokens are answered with Unauthorized"""
+        if token == 'expired':
+            token = key.sign(exp=1_768_000_000)
+
+        with pytest.raises(Exception, match='^Unauthorized$'):
+            lambda_handler({'authorizationToken': token, 'methodArn': METHOD_ARN}, None)
+
+        assert json.loads(capsys.readouterr().out)['Denied'] == 1
+
+    def test_stage_arn(self):
+        """Test the policy resource covers every method and path of the stage"""
+        assert stage_arn(METHOD_ARN).endswith(':abc123/prod/*/*')
+        assert stage_arn('arn:aws:execute-api:r:1:api/dev/GET/').endswith(':api/dev/*/*')
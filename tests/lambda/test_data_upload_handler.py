@@ -2,12 +2,17 @@
 Unit tests for data upload Lambda handler
 """
 
+import base64
 import json
+import time
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from decimal import Decimal
 from botocore.exceptions import ClientError
 
+from osrp import profiling
+from osrp.codec import encode_readings
+
 
 # Mock environment variables before importing handler
 @pytest.fixture(autouse=True)
@@ -24,6 +29,7 @@ def mock_env_vars(monkeypatch):
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../infrastructure/lambda'))
+import data_upload_handler
 from data_upload_handler import (
     lambda_handler,
     handle_sensor_upload,
@@ -31,6 +37,7 @@ from data_upload_handler import (
     handle_device_state_upload,
     handle_presigned_url,
     extract_user_id,
+    summarize_readings,
     convert_floats_to_decimal,
     success_response,
     error_response
@@ -150,6 +157,29 @@ class TestExtractUserId:
         user_id = extract_user_id(event)
         assert user_id is None
 
+    def test_extract_from_token_authorizer(self):
+        """Test the token authorizer's flat context is read too"""
+        event = {'requestContext': {'authorizer': {'principalId': 'user-789', 'sub': 'user-789'}}}
+
+        assert extract_user_id(event) == 'user-789'
+
+    def test_local_verification_fallback(self):
+        """Test the bearer token is verified when no authorizer claims are present"""
+        event = {'requestContext': {}, 'headers': {'authorization': 'Bearer token'}}
+        verifier = Mock()
+        verifier.verify.return_value = {'sub': 'user-123'}
+
+        with patch('data_upload_handler.token_verifier', verifier):
+            assert extract_user_id(event) == 'user-123'
+            verifier.verify.assert_called_once_with('Bearer token')
+
+            verifier.verify.side_effect = data_upload_handler.tokens.TokenError('Token expired')
+            assert extract_user_id(event) is None
+            assert extract_user_id({'requestContext': {}}) is None
+
+        with patch('data_upload_handler.token_verifier', None):
+            assert extract_user_id(event) is None
+
 
 class TestSensorUpload:
     """Test sensor data upload"""
@@ -244,6 +274,150 @@ class TestSensorUpload:
         result = handle_sensor_upload('user-123', body)
         assert result['statusCode'] == 400
 
+    @patch('data_upload_handler.sensor_table')
+    def test_compressed_upload(self, mock_table):
+        """Test a gorilla block is written like the equivalent readings"""
+        mock_batch = MagicMock()
+        mock_table.batch_writer.return_value.__enter__.return_value = mock_batch
+
+        readings = [
+            {'timestamp': 1705334400123 + 20 * i,
+             'data': {'x': round(0.234 + i / 1000, 3), 'y': -9.812, 'z': 0.156},
+             'accuracy': 3}
+            for i in range(50)
+        ]
+        body = {
+            'sensorType': 'accelerometer',
+            'encoding': 'gorilla',
+            'block': base64.b64encode(encode_readings(readings)).decode('ascii'),
+            'studyCode': 'test_study'
+        }
+
+        with patch('data_upload_handler.update_participant_last_seen'):
+            result = handle_sensor_upload('user-123', body)
+
+        assert result['statusCode'] == 200
+        assert json.loads(result['body'])['count'] == 50
+        item = mock_batch.put_item.call_args_list[1][1]['Item']
+        assert item['timestamp'] == 1705334400143
+        assert item['data'] == {
+            'x': Decimal('0.235'), 'y': Decimal('-9.812'), 'z': Decimal('0.156')
+        }
+        assert item['accuracy'] == 3
+
+    @patch('data_upload_handler.SENSOR_WRITE_SHARDS', 4)
+    @patch('data_upload_handler.sensor_table')
+    def test_sharded_upload(self, mock_table):
+        """Test sharded keys spread a stream and are stable across retries"""
+        mock_batch = MagicMock()
+        mock_table.batch_writer.return_value.__enter__.return_value = mock_batch
+        body = {
+            'sensorType': 'accelerometer',
+            'readings': [{'timestamp': 1705334400000 + 20 * i, 'data': {'x': 1.0}}
+                         for i in range(200)],
+            'studyCode': 'test_study'
+        }
+
+        with patch('data_upload_handler.update_participant_last_seen'):
+            handle_sensor_upload('user-123', body)
+            handle_sensor_upload('user-123', body)
+
+        keys = [call[1]['Item']['userIdSensorType'] for call in mock_batch.put_item.call_args_list]
+        assert set(keys) == {f'user-123#accelerometer#{shard}' for shard in range(4)}
+        assert keys[:200] == keys[200:]
+
+    @patch('data_upload_handler.sensor_table')
+    def test_invalid_readings_are_all_reported(self, mock_table):
+        """Test a batch is rejected whole, listing every invalid reading, before any write"""
+        readings = [{'timestamp': 1705334400000 + 20 * i, 'data': {'x': 1.0}} for i in range(10)]
+        readings[2]['timestamp'] = '1705334400040'
+        readings[5]['accuracy'] = 'high'
+        readings[9]['timestamp'] = readings[8]['timestamp']
+        body = {'sensorType': 'accelerometer', 'readings': readings, 'studyCode': 'test_study'}
+
+        result = handle_sensor_upload('user-123', body)
+
+        assert result['statusCode'] == 400
+        assert json.loads(result['body']) == {
+            'error': 'Invalid readings',
+            'details': [
+                {'index': 2, 'error': "'timestamp' must be an integer"},
+                {'index': 5, 'error': "'accuracy' must be a number"},
+                {'index': 9, 'error': "'timestamp' must be greater than the previous item's"},
+            ]
+        }
+        mock_table.batch_writer.assert_not_called()
+
+    def test_sensor_ranges(self):
+        """Test location coordinates and the upload envelope are range checked"""
+        readings = [{'timestamp': 1705334400000, 'data': {'latitude': 91.0, 'longitude': 0.0}}]
+
+        result = handle_sensor_upload('user-123', {
+            'sensorType': 'location', 'readings': readings, 'studyCode': 'test_study'
+        })
+        details = json.loads(result['body'])['details']
+        assert details == [{'index': 0, 'error': "'data.latitude' must be at most 90"}]
+
+        result = handle_sensor_upload('user-123', {'sensorType': '', 'readings': readings})
+        assert json.loads(result['body'])['details'] == [
+            "'sensorType' must not be empty", "'studyCode' is required"
+        ]
+
+    def test_non_finite_values(self):
+        """Test NaN and infinities are rejected in JSON bodies and codec blocks"""
+        event = {
+            'httpMethod': 'POST',
+            'path': '/data/sensor',
+            'body': '{"sensorType": "light", "studyCode": "s",'
+                    ' "readings": [{"timestamp": 1, "data": {"lux": NaN}}]}',
+            'requestContext': {'authorizer': {'claims': {'sub': 'user-123'}}}
+        }
+        result = lambda_handler(event, None)
+        assert result['statusCode'] == 400
+        assert json.loads(result['body'])['error'] == 'Invalid JSON'
+
+        # Out of range numbers parse to infinity without the Infinity literal
+        for body in [
+            '{"sensorType": "light", "studyCode": "s",'
+            ' "readings": [{"timestamp": 1, "data": {"lux": 1e999}}]}',
+            '{"eventType": "app_open", "timestamp": 1, "studyCode": "s",'
+            ' "eventData": {"duration": -1e999}}',
+        ]:
+            path = '/data/sensor' if 'readings' in body else '/data/event'
+            result = lambda_handler({**event, 'path': path, 'body': body}, None)
+            assert result['statusCode'] == 400
+            assert json.loads(result['body'])['error'] == 'Invalid JSON'
+
+        block = encode_readings([{'timestamp': 1, 'data': {'lux': float('inf')}}])
+        result = handle_sensor_upload('user-123', {
+            'sensorType': 'light', 'encoding': 'gorilla', 'studyCode': 's',
+            'block': base64.b64encode(block).decode('ascii')
+        })
+        assert json.loads(result['body'])['details'] == [
+            {'index': 0, 'error': "'data' values must be finite"}
+        ]
+
+    def test_invalid_compressed_upload(self):
+        """Test malformed, oversized and unknown encodings are rejected"""
+        oversized = encode_readings([{'timestamp': i, 'data': {'x': 1.0}} for i in range(1001)])
+        for encoding, block, message in [
+            ('gorilla', 'not base64!', 'Invalid sensor block'),
+            ('gorilla', base64.b64encode(b'OSRG\x01\x05').decode(), 'Invalid sensor block'),
+            ('gorilla', base64.b64encode(oversized).decode(), 'Maximum 1000'),
+            ('zstd', '', 'Unsupported encoding'),
+        ]:
+            body = {
+                'sensorType': 'accelerometer',
+                'encoding': encoding,
+                'block': block,
+                'studyCode': 'test_study'
+            }
+
+            result = handle_sensor_upload('user-123', body)
+
+            assert result['statusCode'] == 400
+            assert message in json.loads(result['body'])['error']
+
 
 class TestEventUpload:
     """Test event logging"""
@@ -289,6 +463,25 @@ class TestEventUpload:
         mock_table.put_item.assert_called_once()
 
 
+    @patch('data_upload_handler.event_table')
+    def test_invalid_event(self, mock_table):
+        """Test every invalid field is reported and nothing is written"""
+        body = {'eventType': 'app_launch', 'timestamp': '2024-01-15', 'eventData': 'launch'}
+
+        result = handle_event_upload('user-123', body)
+
+        assert result['statusCode'] == 400
+        assert json.loads(result['body']) == {
+            'error': 'Invalid event',
+            'details': [
+                "'timestamp' must be an integer",
+                "'studyCode' is required",
+                "'eventData' must be an object",
+            ]
+        }
+        mock_table.put_item.assert_not_called()
+
+
 class TestDeviceStateUpload:
     """Test device state upload"""
 
@@ -319,6 +512,452 @@ class TestDeviceStateUpload:
         # Verify participant last seen was updated
         mock_update.assert_called_once_with('user-123', 'test_study')
 
+    @pytest.fixture
+    def latest_table(self, monkeypatch):
+        """Latest device state table on a moto DynamoDB stand-in"""
+        moto = pytest.importorskip('moto')
+        import boto3
+
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+        with moto.mock_aws():
+            dynamodb = boto3.resource('dynamodb', region_name='us-west-2')
+            table = dynamodb.create_table(
+                TableName='osrp-LatestDeviceState-dev',
+                KeySchema=[{'AttributeName': 'userId', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'userId', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            with patch('data_upload_handler.latest_device_state_table', table), \
+                    patch('data_upload_handler.device_state_table'), \
+                    patch('data_upload_handler.update_participant_last_seen'):
+                yield table
+
+    def test_latest_state_keeps_newest_report(self, latest_table):
+        """Test the latest record is replaced by newer reports only"""
+        for timestamp, battery in [(2000, 80), (1000, 95), (3000, 60)]:
+            result = handle_device_state_upload('user-123', {
+                'timestamp': timestamp, 'studyCode': 'test_study', 'batteryLevel': battery
+            })
+            assert result['statusCode'] == 200
+            latest = latest_table.get_item(Key={'userId': 'user-123'})['Item']
+            # The report from 1000 arrived late and must not replace 2000
+            assert latest['batteryLevel'] == {2000: 80, 1000: 80, 3000: 60}[timestamp]
+
+        assert latest['timestamp'] == 3000
+        assert latest['groupCode'] == 'test_study'
+        assert 'expirationTime' not in latest
+
+    def test_latest_state_failures_tolerated(self):
+        """Test the upload succeeds when the latest record cannot be written"""
+        with patch('data_upload_handler.latest_device_state_table') as mock_latest, \
+                patch('data_upload_handler.device_state_table') as mock_table, \
+                patch('data_upload_handler.update_participant_last_seen'):
+            mock_latest.put_item.side_effect = ClientError(
+                {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'x'}},
+                'PutItem'
+            )
+            result = handle_device_state_upload('user-123', {
+                'timestamp': 1000, 'studyCode': 'test_study'
+            })
+
+        assert result['statusCode'] == 200
+        mock_table.put_item.assert_called_once()
+
+    @patch('data_upload_handler.device_state_table')
+    def test_invalid_device_state(self, mock_table):
+        """Test device state fields are type and range checked"""
+        result = handle_device_state_upload('user-123', {
+            'timestamp': 1705334400000, 'studyCode': 'test_study', 'batteryLevel': 150,
+            'batteryCharging': 'yes', 'storageAvailable': -1
+        })
+
+        assert result['statusCode'] == 400
+        assert json.loads(result['body'])['details'] == [
+            "'batteryLevel' must be at most 100",
+            "'batteryCharging' must be a boolean",
+            "'storageAvailable' must be at least 0",
+        ]
+        mock_table.put_item.assert_not_called()
+
+
+class TestBackpressure:
+    """Test 429/Retry-After signaling when DynamoDB throttles"""
+
+    @pytest.fixture(autouse=True)
+    def recent_uploads(self):
+        """Start every test with no upload history in the container"""
+        data_upload_handler.recent_uploads.clear()
+        yield data_upload_handler.recent_uploads
+        data_upload_handler.recent_uploads.clear()
+
+    @staticmethod
+    def throttling(code='ProvisionedThroughputExceededException'):
+        return ClientError({'Error': {'Code': code, 'Message': 'Rate exceeded'}}, 'BatchWriteItem')
+
+    @staticmethod
+    def sensor_body():
+        return {
+            'sensorType': 'accelerometer',
+            'readings': [{'timestamp': 1705334400000 + i, 'data': {'x': 1.5}} for i in range(3)],
+            'studyCode': 'test_study'
+        }
+
+    @patch('data_upload_handler.sensor_table')
+    def test_throttled_sensor_upload(self, mock_table, recent_uploads):
+        """Test throttling is answered with 429 and a Retry-After header"""
+        mock_table.batch_writer.return_value.__enter__.return_value.put_item.side_effect = (
+            self.throttling()
+        )
+
+        result = handle_sensor_upload('user-123', self.sensor_body())
+
+        assert result['statusCode'] == 429
+        assert 1 <= int(result['headers']['Retry-After']) <= 60
+        # Browser clients may read it and send Idempotency-Key on the retry
+        assert result['headers']['Access-Control-Expose-Headers'] == 'Retry-After'
+        assert 'Idempotency-Key' in result['headers']['Access-Control-Allow-Headers'].split(',')
+        assert [throttled for _, throttled in recent_uploads] == [True]
+
+    @patch('data_upload_handler.event_table')
+    def test_throttled_event_upload(self, mock_table):
+        """Test every upload endpoint signals throttling"""
+        mock_table.put_item.side_effect = self.throttling('RequestLimitExceeded')
+
+        result = handle_event_upload('user-123', {
+            'eventType': 'app_launch', 'timestamp': 1705334400123, 'studyCode': 'test_study'
+        })
+
+        assert result['statusCode'] == 429
+        assert 'Retry-After' in result['headers']
+
+    @patch('data_upload_handler.event_table')
+    def test_other_errors_are_500(self, mock_table):
+        """Test errors other than throttling keep the 500 response"""
+        mock_table.put_item.side_effect = self.throttling('ValidationException')
+
+        result = handle_event_upload('user-123', {
+            'eventType': 'app_launch', 'timestamp': 1705334400123, 'studyCode': 'test_study'
+        })
+
+        assert result['statusCode'] == 500
+        assert 'Retry-After' not in result['headers']
+
+    def test_retry_after_follows_throttle_rate(self, recent_uploads):
+        """Test the rate covers the rolling window and scales Retry-After"""
+        from data_upload_handler import record_upload_outcome, retry_after_seconds, throttle_rate
+
+        for second, throttled in [(0, True), (50, False), (70, True), (80, False)]:
+            record_upload_outcome(throttled, now=1000 + second)
+
+        # The first upload left the 60 s window
+        assert throttle_rate(now=1100) == pytest.approx(1 / 3)
+        assert len(recent_uploads) == 3
+        assert throttle_rate(now=2000) == 0.0
+        assert all(1 <= retry_after_seconds(0.0) <= 2 for _ in range(20))
+        assert all(retry_after_seconds(1.0) == 60 for _ in range(20))
+        assert retry_after_seconds(0.5) < 20
+
+    @patch('data_upload_handler.SPILL_THROTTLED_BATCHES', True)
+    @patch('data_upload_handler.s3_client')
+    @patch('data_upload_handler.sensor_table')
+    def test_spill_throttled_batch(self, mock_table, mock_s3):
+        """Test throttled batches can be accepted into S3 for a deferred write"""
+        mock_table.batch_writer.return_value.__enter__.return_value.put_item.side_effect = (
+            self.throttling()
+        )
+
+        first = handle_sensor_upload('user-123', self.sensor_body())
+        handle_sensor_upload('user-123', self.sensor_body())
+
+        assert first['statusCode'] == 202
+        assert json.loads(first['body'])['deferred'] is True
+        (_, first_call), (_, retry_call) = mock_s3.put_object.call_args_list
+        assert first_call['Key'].startswith('temp/spill/sensor/')
+        assert '/user-123/accelerometer-' in first_call['Key']
+        # A retried batch overwrites its spill
+        assert retry_call['Key'] == first_call['Key']
+        assert first_call['Metadata']['study-code'] == 'test_study'
+
+        mock_s3.put_object.side_effect = Exception('S3 unavailable')
+        assert handle_sensor_upload('user-123', self.sensor_body())['statusCode'] == 429
+
+
+class TestAsyncIngest:
+    """Test spilling sensor batches to S3 and draining them into DynamoDB"""
+
+    @pytest.fixture
+    def aws(self, monkeypatch):
+        """Sensor table and data bucket on moto, patched into the handler"""
+        moto = pytest.importorskip('moto')
+        import boto3
+
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+        with moto.mock_aws():
+            dynamodb = boto3.resource('dynamodb', region_name='us-west-2')
+            table = dynamodb.create_table(
+                TableName='osrp-SensorTimeSeries-dev',
+                KeySchema=[
+                    {'AttributeName': 'userIdSensorType', 'KeyType': 'HASH'},
+                    {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+                ],
+                AttributeDefinitions=[
+                    {'AttributeName': 'userIdSensorType', 'AttributeType': 'S'},
+                    {'AttributeName': 'timestamp', 'AttributeType': 'N'}
+                ],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            s3 = boto3.client('s3', region_name='us-west-2')
+            s3.create_bucket(
+                Bucket=data_upload_handler.DATA_BUCKET_NAME,
+                CreateBucketConfiguration={'LocationConstraint': 'us-west-2'}
+            )
+            with patch('data_upload_handler.sensor_table', table), \
+                    patch('data_upload_handler.s3_client', s3), \
+                    patch('data_upload_handler.sensor_summary_table', None), \
+                    patch('data_upload_handler.update_participant_last_seen'), \
+                    patch('data_upload_handler.SENSOR_INGEST_MODE', 'async'):
+                yield table, s3
+
+    @staticmethod
+    def upload(user_id='user-123', sensor_type='accelerometer', readings=None):
+        readings = readings or [
+            {'timestamp': 1705334400000 + 20 * i, 'data': {'x': 0.25 * i, 'y': -9.8}, 'accuracy': 3}
+            for i in range(50)
+        ]
+        return handle_sensor_upload(user_id, {
+            'sensorType': sensor_type, 'readings': readings, 'studyCode': 'test_study'
+        })
+
+    @staticmethod
+    def spilled(s3):
+        response = s3.list_objects_v2(
+            Bucket=data_upload_handler.DATA_BUCKET_NAME, Prefix='temp/spill/sensor/'
+        )
+        return [obj['Key'] for obj in response.get('Contents', [])]
+
+    def test_async_upload_and_drain(self, aws):
+        """Test batches are acknowledged before they are written and drained losslessly"""
+        from data_upload_handler import drain_spilled_batches
+
+        table, s3 = aws
+        locations = [{'timestamp': 1705334400000, 'data': {'lat': 47.6, 'provider': 'gps'}}]
+
+        first = self.upload()
+        self.upload('user-456')
+        self.upload(sensor_type='location', readings=locations)
+
+        assert first['statusCode'] == 202
+        assert json.loads(first['body']) == {
+            'message': 'Sensor data accepted for deferred write',
+            'count': 50, 'sensorType': 'accelerometer', 'deferred': True
+        }
+        assert table.scan()['Count'] == 0
+        keys = self.spilled(s3)
+        assert len(keys) == 3
+        # Numeric batches are stored as codec blocks, others as gzipped JSON
+        assert sorted(key.rsplit('.', 1)[-1] for key in keys) == ['gz', 'osrg', 'osrg']
+
+        stats = drain_spilled_batches()
+
+        assert stats == {
+            'batches': 3, 'readings': 101, 'failed': 0, 'throttled': False, 'complete': True
+        }
+        assert self.spilled(s3) == []
+        item = table.get_item(
+            Key={'userIdSensorType': 'user-123#accelerometer', 'timestamp': 1705334400020}
+        )['Item']
+        assert item['data'] == {'x': Decimal('0.25'), 'y': Decimal('-9.8')}
+        assert item['accuracy'] == 3 and item['groupCode'] == 'test_study'
+        location = table.get_item(
+            Key={'userIdSensorType': 'user-123#location', 'timestamp': 1705334400000}
+        )['Item']
+        assert location['data'] == {'lat': Decimal('47.6'), 'provider': 'gps'}
+
+    def test_retried_batch_spills_once(self, aws):
+        """Test a retried batch replaces its spill instead of adding another"""
+        _, s3 = aws
+
+        self.upload()
+        self.upload()
+
+        assert len(self.spilled(s3)) == 1
+
+    def test_spill_failure_writes_synchronously(self, aws):
+        """Test uploads fall back to a direct write when S3 is unavailable"""
+        table, s3 = aws
+
+        with patch.object(s3, 'put_object', side_effect=Exception('S3 unavailable')):
+            result = self.upload()
+
+        assert result['statusCode'] == 200
+        assert table.scan()['Count'] == 50
+
+    def test_drain_pacing_and_limits(self, aws):
+        """Test the drain paces writes, stops when throttled and before the deadline"""
+        from data_upload_handler import drain_handler, drain_spilled_batches
+
+        table, s3 = aws
+        for i in range(3):
+            self.upload(f'user-{i}')
+
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 5_000
+        assert drain_handler({}, context)['batches'] == 0
+
+        with patch('data_upload_handler.time.sleep') as sleep:
+            stats = drain_spilled_batches(items_per_second=100, max_batches=2)
+        assert stats['batches'] == 2 and not stats['complete']
+        # The second batch waits until the first 50 readings took half a second
+        assert sleep.call_count == 1 and 0.4 < sleep.call_args[0][0] <= 0.5
+
+        with patch('data_upload_handler.write_sensor_batch', side_effect=ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'x'}},
+            'BatchWriteItem'
+        )):
+            stats = drain_spilled_batches()
+        assert stats['throttled'] and stats['batches'] == 0
+        assert len(self.spilled(s3)) == 1
+
+
+class TestMetrics:
+    """Test the embedded metric format record of each invocation"""
+
+    @staticmethod
+    def last_record(capsys):
+        """The last EMF record written to stdout"""
+        lines = [line for line in capsys.readouterr().out.splitlines() if '"_aws"' in line]
+        return json.loads(lines[-1])
+
+    @staticmethod
+    def sensor_event():
+        return {
+            'httpMethod': 'POST',
+            'path': '/data/sensor',
+            'body': json.dumps({
+                'sensorType': 'accelerometer',
+                'readings': [
+                    {'timestamp': 1705334400000 + i, 'data': {'x': 1.5}} for i in range(3)
+                ],
+                'studyCode': 'test_study'
+            }),
+            'requestContext': {'authorizer': {'claims': {'sub': 'user-123'}}}
+        }
+
+    @patch('data_upload_handler.sensor_table')
+    @patch('data_upload_handler.update_participant_last_seen')
+    def test_sensor_upload_record(self, mock_update, mock_table, capsys, monkeypatch):
+        """Test latency, phase timings, batch size and cold start of a sensor upload"""
+        monkeypatch.setattr(data_upload_handler, 'cold_start', True)
+        context = Mock(aws_request_id='request-1')
+
+        assert lambda_handler(self.sensor_event(), context)['statusCode'] == 200
+        record = self.last_record(capsys)
+
+        assert record['Service'] == 'DataUpload'
+        assert record['Route'] == 'POST /data/sensor'
+        assert record['ColdStart'] == 1
+        assert record['BatchSize'] == 3
+        assert record['StatusCode'] == 200
+        assert record['RequestId'] == 'request-1'
+        metrics = {metric['Name'] for metric in record['_aws']['CloudWatchMetrics'][0]['Metrics']}
+        assert {
+            'Latency', 'RequestBytes', 'ParseTime', 'ValidateTime', 'ConvertTime', 'WriteTime',
+            'SummaryTime'
+        } <= metrics
+        assert record['Latency'] >= record['WriteTime'] >= 0
+
+        lambda_handler(self.sensor_event(), None)
+        assert self.last_record(capsys)['ColdStart'] == 0
+
+    def test_unknown_route(self, capsys):
+        """Test routes outside the known set share one dimension value"""
+        event = dict(self.sensor_event(), path='/data/users/user-123')
+
+        assert lambda_handler(event, None)['statusCode'] == 404
+        record = self.last_record(capsys)
+
+        assert record['Route'] == 'other'
+        assert record['StatusCode'] == 404
+
+    def test_retries_and_throttles(self, capsys):
+        """Test botocore retries and throttled responses are counted"""
+        def throttled(user_id, body):
+            data_upload_handler.count_retries(
+                'after-call.dynamodb.BatchWriteItem',
+                parsed={'ResponseMetadata': {'RetryAttempts': 2}}
+            )
+            return data_upload_handler.throttled_response()
+
+        with patch('data_upload_handler.handle_sensor_upload', side_effect=throttled):
+            lambda_handler(self.sensor_event(), None)
+        record = self.last_record(capsys)
+
+        assert record['DynamoDBRetries'] == 2
+        assert record['Throttles'] == 1
+        assert record['StatusCode'] == 429
+
+    def test_drain_record(self, capsys):
+        """Test drain runs report their batches under the drain route"""
+        stats = {'batches': 4, 'readings': 400, 'failed': 1, 'throttled': True, 'complete': False}
+        with patch('data_upload_handler.drain_spilled_batches', return_value=stats):
+            data_upload_handler.drain_handler({}, None)
+        record = self.last_record(capsys)
+
+        assert record['Route'] == 'drain'
+        assert record['DrainedBatches'] == 4
+        assert record['DrainedReadings'] == 400
+        assert record['FailedBatches'] == 1
+        assert record['Throttles'] == 1
+
+
+class TestProfiling:
+    """Test sampled invocation profiles"""
+
+    @staticmethod
+    def slow_upload(user_id, body):
+        """Sensor upload stand-in that keeps the CPU busy for 50 ms"""
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return success_response({'message': 'ok'})
+
+    @patch('data_upload_handler.s3_client')
+    def test_profiled_invocation(self, mock_s3, monkeypatch):
+        """Test sampled invocations write their stacks from lambda_handler down"""
+        monkeypatch.setattr(data_upload_handler, 'PROFILE_SAMPLE_RATE', 1.0)
+
+        with patch('data_upload_handler.handle_sensor_upload', side_effect=self.slow_upload):
+            result = lambda_handler(TestMetrics.sensor_event(), Mock(aws_request_id='req-1'))
+
+        assert result['statusCode'] == 200
+        call = mock_s3.put_object.call_args.kwargs
+        assert call['Key'].startswith('temp/debug/profiles/')
+        assert call['Key'].endswith('/post-data-sensor/req-1.folded.gz')
+        assert call['Metadata']['route'] == 'POST /data/sensor'
+        assert call['Metadata']['status-code'] == '200'
+        stacks = profiling.loads(call['Body'])
+        assert sum(stacks.values()) == int(call['Metadata']['samples']) > 0
+        assert all(stack.startswith('lambda_handler (data_upload_handler.py:') for stack in stacks)
+        assert any('slow_upload' in stack for stack in stacks)
+
+    @patch('data_upload_handler.s3_client')
+    def test_unsampled_and_failed_profiles(self, mock_s3, monkeypatch):
+        """Test profiling is off by default and a failed profile write is only logged"""
+        with patch('data_upload_handler.handle_sensor_upload', side_effect=self.slow_upload):
+            lambda_handler(TestMetrics.sensor_event(), None)
+            mock_s3.put_object.assert_not_called()
+
+            monkeypatch.setattr(data_upload_handler, 'PROFILE_SAMPLE_RATE', 1.0)
+            mock_s3.put_object.side_effect = Exception('Access denied')
+            result = lambda_handler(TestMetrics.sensor_event(), None)
+
+        assert result['statusCode'] == 200
+        assert '/local-' in mock_s3.put_object.call_args.kwargs['Key']
+
 
 class TestPresignedUrl:
     """Test presigned URL generation"""
@@ -451,3 +1090,233 @@ class TestUpdateParticipantLastSeen:
 
         # Should not raise exception
         update_participant_last_seen('user-123', 'test_study')
+
+
+class TestIdempotentUploads:
+    """Test replay of upload batches sharing an Idempotency-Key"""
+
+    @pytest.fixture
+    def batch_table(self, monkeypatch):
+        """Upload batch table on a moto DynamoDB stand-in"""
+        moto = pytest.importorskip('moto')
+        import boto3
+
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+        with moto.mock_aws():
+            dynamodb = boto3.resource('dynamodb', region_name='us-west-2')
+            table = dynamodb.create_table(
+                TableName='osrp-UploadBatches-dev',
+                KeySchema=[{'AttributeName': 'batchKey', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'batchKey', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            with patch('data_upload_handler.upload_batch_table', table):
+                yield table
+
+    @pytest.fixture
+    def sensor_batch(self):
+        """Batch writer of a mocked sensor table"""
+        with patch('data_upload_handler.sensor_table') as mock_table, \
+                patch('data_upload_handler.update_participant_last_seen'):
+            mock_batch = MagicMock()
+            mock_table.batch_writer.return_value.__enter__.return_value = mock_batch
+            yield mock_batch
+
+    @staticmethod
+    def upload(key='batch-0001', readings=3):
+        event = {
+            'httpMethod': 'POST',
+            'path': '/data/sensor',
+            'headers': {'idempotency-key': key},
+            'body': json.dumps({
+                'sensorType': 'accelerometer',
+                'readings': [{'timestamp': i, 'data': {'x': 1.0}} for i in range(readings)],
+                'studyCode': 'test_study'
+            }),
+            'requestContext': {'authorizer': {'claims': {'sub': 'user-123'}}}
+        }
+        return lambda_handler(event, None)
+
+    def test_replay_returns_original_result(self, batch_table, sensor_batch):
+        """Test a retried batch gets the first response without rewriting items"""
+        first = self.upload()
+        replay = self.upload()
+
+        assert sensor_batch.put_item.call_count == 3
+        assert replay['statusCode'] == first['statusCode'] == 200
+        assert replay['body'] == first['body']
+        assert replay['headers']['Idempotent-Replayed'] == 'true'
+        record = batch_table.get_item(Key={'batchKey': 'user-123#batch-0001'})['Item']
+        assert record['status'] == 'COMPLETED'
+        assert record['expirationTime'] > time.time() + 3600
+
+    def test_keys_are_per_user_and_request(self, batch_table, sensor_batch):
+        """Test new keys are processed and a key reused for other data is rejected"""
+        self.upload()
+        second = self.upload(key='batch-0002')
+        reused = self.upload(readings=5)
+
+        assert second['statusCode'] == 200
+        assert reused['statusCode'] == 422
+        assert sensor_batch.put_item.call_count == 6
+
+    def test_in_progress_and_abandoned(self, batch_table, sensor_batch):
+        """Test concurrent retries wait and abandoned claims are taken over"""
+        now = int(time.time())
+        for key, locked_until in [('running', now + 60), ('abandoned', now - 1)]:
+            batch_table.put_item(Item={
+                'batchKey': f'user-123#{key}', 'status': 'IN_PROGRESS', 'requestHash': 'x',
+                'lockedUntil': locked_until, 'expirationTime': now + 86400
+            })
+
+        assert self.upload(key='running')['statusCode'] == 409
+        assert self.upload(key='abandoned')['statusCode'] == 200
+        assert sensor_batch.put_item.call_count == 3
+
+    def test_failures_release_the_key(self, batch_table, sensor_batch):
+        """Test a failed batch can be retried with the same key"""
+        sensor_batch.put_item.side_effect = [
+            ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException',
+                                   'Message': 'Throttled'}}, 'BatchWriteItem'),
+            None, None, None
+        ]
+
+        assert self.upload()['statusCode'] == 429
+        assert 'Item' not in batch_table.get_item(Key={'batchKey': 'user-123#batch-0001'})
+        assert self.upload()['statusCode'] == 200
+
+    def test_without_key_or_table(self, sensor_batch):
+        """Test requests are processed every time without a key or batch table"""
+        with patch('data_upload_handler.upload_batch_table', None):
+            self.upload()
+            self.upload()
+
+        assert sensor_batch.put_item.call_count == 6
+
+
+class TestSensorSummaries:
+    """Test per-minute summaries materialized at upload time"""
+
+    @pytest.fixture
+    def summary_table(self, monkeypatch):
+        """Sensor summary table on a moto DynamoDB stand-in"""
+        moto = pytest.importorskip('moto')
+        import boto3
+
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+        monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-west-2')
+        with moto.mock_aws():
+            dynamodb = boto3.resource('dynamodb', region_name='us-west-2')
+            table = dynamodb.create_table(
+                TableName='osrp-SensorSummary-dev',
+                KeySchema=[
+                    {'AttributeName': 'userIdSensorType', 'KeyType': 'HASH'},
+                    {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+                ],
+                AttributeDefinitions=[
+                    {'AttributeName': 'userIdSensorType', 'AttributeType': 'S'},
+                    {'AttributeName': 'timestamp', 'AttributeType': 'N'}
+                ],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            with patch('data_upload_handler.sensor_summary_table', table), \
+                    patch('data_upload_handler.sensor_table'), \
+                    patch('data_upload_handler.update_participant_last_seen'):
+                yield table
+
+    @staticmethod
+    def upload(readings, sensor_type='accelerometer'):
+        return handle_sensor_upload('user-123', {
+            'sensorType': sensor_type, 'readings': readings, 'studyCode': 'test_study'
+        })
+
+    def test_summarize_readings(self):
+        """Test readings are grouped by minute with magnitude and non-numbers skipped"""
+        summaries = summarize_readings([
+            {'timestamp': 1705334400000, 'data': {'x': 3.0, 'y': 4.0, 'z': 0.0}},
+            {'timestamp': 1705334459999, 'data': {'x': 1.0, 'y': 0.0, 'z': 0.0, 'label': 'walk'}},
+            {'timestamp': 1705334460000, 'data': {'x': 2.0, 'flag': True}},
+        ])
+
+        assert sorted(summaries) == [1705334400000, 1705334460000]
+        first = summaries[1705334400000]
+        assert first['x'] == {'count': 2, 'sum': 4.0, 'sumsq': 10.0, 'min': 1.0, 'max': 3.0}
+        assert first['magnitude']['max'] == 5.0
+        assert set(summaries[1705334460000]) == {'x'}
+
+    def test_batches_combine(self, summary_table):
+        """Test later batches add to counts and extend min and max of a minute"""
+        start = 1705334400000
+        first = [{'timestamp': start + i * 1000, 'data': {'x': float(i), 'y': 1.0}}
+                 for i in range(10)]
+        second = [{'timestamp': start + 20_000 + i * 1000, 'data': {'x': 20.0 - i, 'y': 1.0}}
+                  for i in range(25)]
+
+        assert self.upload(first)['statusCode'] == 200
+        assert self.upload(second)['statusCode'] == 200
+
+        item = summary_table.get_item(
+            Key={'userIdSensorType': 'user-123#accelerometer', 'timestamp': start}
+        )['Item']
+        expected = summarize_readings(first + second)[start]
+        for channel, stats in expected.items():
+            for stat, value in stats.items():
+                assert float(item[f'{channel}_{stat}']) == pytest.approx(value)
+        assert item['x_min'] == -4 and item['x_max'] == 20
+        assert item['groupCode'] == 'test_study'
+        assert item['expirationTime'] > time.time() + 300 * 86400
+
+    def test_matches_rollups(self, summary_table):
+        """Test OSRPData summaries equal rollups of the raw readings"""
+        from datetime import datetime, timezone
+
+        import pandas as pd
+
+        from osrp.analysis.utils.data_access import OSRPData
+        from osrp.analysis.utils.rollups import rollup_frame
+
+        start = 1705334400000
+        readings = [
+            {'timestamp': start + i * 700,
+             'data': {'x': (i % 7) * 0.5, 'y': -9.8 + (i % 3) * 0.1, 'z': 0.1 * (i % 5)}}
+            for i in range(2500)
+        ]
+        for offset in range(0, len(readings), 1000):
+            assert self.upload(readings[offset:offset + 1000])['statusCode'] == 200
+
+        data = OSRPData(region='us-west-2', summary_table='osrp-SensorSummary-dev')
+        begin = datetime.fromtimestamp(start / 1000, tz=timezone.utc)
+        end = datetime.fromtimestamp((start + 3_600_000) / 1000, tz=timezone.utc)
+        summaries = data.get_sensor_summaries('user-123', 'accelerometer', begin, end)
+        hourly = data.get_sensor_summaries('user-123', 'accelerometer', begin, end, '1h')
+
+        raw = pd.DataFrame(
+            [reading['data'] for reading in readings],
+            index=pd.to_datetime([reading['timestamp'] for reading in readings], unit='ms')
+        )
+        expected = rollup_frame(raw, 60_000)
+        pd.testing.assert_frame_equal(
+            summaries[expected.columns], expected, check_freq=False, check_index_type=False
+        )
+        assert summaries['magnitude_mean'].notna().all()
+        assert len(hourly) == 1
+        assert hourly['x_count'].iloc[0] == 2500
+        assert hourly['x_max'].iloc[0] == 3.0
+
+    def test_failures_do_not_fail_the_upload(self, summary_table):
+        """Test the readings are accepted when summaries cannot be written"""
+        with patch.object(summary_table, 'update_item', side_effect=Exception('Throttled')):
+            result = self.upload([{'timestamp': 1705334400000, 'data': {'x': 1.0}}])
+
+        assert result['statusCode'] == 200
+
+    def test_without_table(self):
+        """Test uploads skip summaries when no summary table is configured"""
+        with patch('data_upload_handler.sensor_table'), \
+                patch('data_upload_handler.update_participant_last_seen'), \
+                patch('data_upload_handler.sensor_summary_table', None):
+            assert self.upload([{'timestamp': 1, 'data': {'x': 1.0}}])['statusCode'] == 200
@@ -0,0 +1,157 @@
+"""
+Unit tests for the sensor block codec
+"""
+
+import json
+import math
+import random
+import struct
+from decimal import Decimal
+
+import pytest
+
+from osrp.codec import (
+    CodecError,
+    block_count,
+    decode_block,
+    decode_floats,
+    decode_readings,
+    decode_timestamps,
+    encode_block,
+    encode_floats,
+    encode_readings,
+    encode_timestamps,
+)
+
+
+def make_readings(n=1000, seed=0):
+    """50 Hz accelerometer readings with timing jitter, as the mobile client sends them"""
+    rng = random.Random(seed)
+    timestamp, x, z = 1705334400123, 0.0, 0.0
+    readings = []
+    for _ in range(n):
+        timestamp += 20 + rng.choice([-1, 0, 0, 0, 1])
+        x = 0.9 * x + rng.gauss(0, 0.3)
+        z = 0.8 * z + rng.gauss(0, 0.2)
+        readings.append({
+            'timestamp': timestamp,
+            'data': {'x': round(x, 3), 'y': round(-9.81 + rng.gauss(0, 0.05), 3), 'z': round(z, 3)},
+            'accuracy': 3,
+        })
+    return readings
+
+
+def same_bits(a, b):
+    """Compare floats by bit pattern, so NaN and -0.0 count"""
+    return [struct.pack('>d', v) for v in a] == [struct.pack('>d', v) for v in b]
+
+
+class TestTimestamps:
+    """Test delta-of-delta encoding"""
+
+    @pytest.mark.parametrize('timestamps', [
+        [],
+        [1705334400123],
+        list(range(1705334400000, 1705334420000, 20)),
+        [5, 3, 3, 900, -2 ** 63, 2 ** 63 - 1, 0],
+    ])
+    def test_round_trip(self, timestamps):
+        """Test regular, irregular, unsorted and extreme timestamps"""
+        data = encode_timestamps(timestamps)
+
+        assert decode_timestamps(data, len(timestamps)) == timestamps
+
+    def test_regular_sampling_costs_a_bit(self):
+        """Test evenly spaced timestamps take about one bit each"""
+        timestamps = list(range(1705334400000, 1705334400000 + 20 * 8000, 20))
+
+        assert len(encode_timestamps(timestamps)) < 8000 // 8 + 32
+
+    def test_out_of_range(self):
+        """Test values beyond 64 bits are rejected"""
+        with pytest.raises(CodecError):
+            encode_timestamps([0, 2 ** 64])
+
+
+class TestFloats:
+    """Test XOR encoding"""
+
+    def test_round_trip(self):
+        """Test arbitrary doubles, including special values, are bit-exact"""
+        rng = random.Random(1)
+        values = [rng.uniform(-1e6, 1e6) for _ in range(500)]
+        values += [math.nan, math.inf, -math.inf, -0.0, 0.0, 5e-324, 1.5, 1.5, 1.5]
+
+        assert same_bits(decode_floats(encode_floats(values), len(values)), values)
+
+    def test_repeated_values(self):
+        """Test unchanged values take one bit each"""
+        assert len(encode_floats([72.5] * 800)) < 8 + 100
+
+
+class TestBlocks:
+    """Test multi-channel blocks"""
+
+    def test_round_trip_and_projection(self):
+        """Test channels round-trip and can be decoded selectively"""
+        timestamps = [10, 20, 30, 45]
+        columns = {
+            'x': [0.234, -9.812, None, 1e300],
+            'steps': [1, 2, 2, 5],
+            'noise': [0.1 + 0.2, math.pi, -0.0, 7.0],
+        }
+
+        data = encode_block(timestamps, columns)
+        decoded_times, decoded = decode_block(data)
+
+        assert decoded_times == timestamps
+        assert decoded['steps'] == [1.0, 2.0, 2.0, 5.0]
+        assert same_bits(decoded['noise'], columns['noise'])
+        assert decoded['x'][:2] == [0.234, -9.812] and math.isnan(decoded['x'][2])
+        assert list(decode_block(data, columns=['steps'])[1]) == ['steps']
+        assert block_count(data) == 4
+
+    def test_readings_round_trip(self):
+        """Test the upload request shape round-trips, leaving out missing values"""
+        readings = make_readings(200)
+        del readings[5]['data']['y']
+        readings[7]['data']['x'] = 0.1 + 0.2
+        del readings[9]['accuracy']
+
+        assert decode_readings(encode_readings(readings)) == readings
+
+    def test_compression_ratio(self):
+        """Test IMU readings compress 10x or more against JSON and DynamoDB items"""
+        readings = make_readings()
+
+        data = encode_readings(readings)
+
+        # DynamoDB stores each reading as an item with a map of Decimals
+        items = sum(
+            len(json.dumps({
+                'userIdSensorType': 'us-west-2:0f1e2d3c-4b5a-6978-8796-a5b4c3d2e1f0#accelerometer',
+                'timestamp': r['timestamp'], 'groupCode': 'depression_study_2026',
+                'data': {k: str(Decimal(str(v))) for k, v in r['data'].items()},
+                'accuracy': r['accuracy'], 'expirationTime': 1713110400,
+            }))
+            for r in readings
+        )
+        assert len(json.dumps(readings)) / len(data) >= 10
+        assert items / len(data) >= 10
+
+    def test_invalid_blocks(self):
+        """Test foreign, truncated and mismatched input is rejected"""
+        data = encode_readings(make_readings(50))
+
+        with pytest.raises(CodecError, match='Not an OSRP'):
+            decode_block(b'PK\x03\x04')
+        with pytest.raises(CodecError, match='Truncated'):
+            decode_block(data[:len(data) // 2])
+        with pytest.raises(CodecError, match='version'):
+            decode_block(b'OSRG\x07')
+        with pytest.raises(CodecError, match='values'):
+            encode_block([1, 2], {'x': [1.0]})
+        with pytest.raises(CodecError, match='numeric'):
+            encode_block([1], {'label': ['walking']})
+        with pytest.raises(CodecError, match='clash'):
+            encode_readings([{'timestamp': 1, 'data': {'accuracy': 1.0}}])
@@ -0,0 +1,340 @@
+"""
+Unit tests for bulk participant enrollment
+"""
+
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from osrp.enrollment import (
+    AdaptiveRateLimiter,
+    BulkEnroller,
+    read_roster,
+    summarize,
+    validate_rows,
+)
+
+try:
+    import moto
+except ImportError:  # moto is a dev extra
+    moto = None
+
+
+ROSTER = """Email,study_code,participantId
+p1@example.com,depression_study_2026,P001
+p2@example.com,depression_study_2026,P002
+p3@example.com,depression_study_2026,P003
+"""
+
+
+def roster(count, study='depression_study_2026'):
+    """Roster CSV of `count` participants"""
+    lines = ['email,studyCode,participantId']
+    lines += [f"p{i}@example.com,{study},P{i:04d}" for i in range(count)]
+    return '\n'.join(lines) + '\n'
+
+
+class FakeClock:
+    """Clock advanced by sleeping"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+class ThrottlingCognito:
+    """Cognito client throttling the first `throttles` AdminCreateUser calls"""
+
+    def __init__(self, client, throttles):
+        self.client = client
+        self.throttles = throttles
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def admin_create_user(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            throttled = self.throttles > 0
+            self.throttles -= throttled
+        if throttled:
+            raise ClientError(
+                {'Error': {'Code': 'TooManyRequestsException', 'Message': 'Rate exceeded'}},
+                'AdminCreateUser'
+            )
+        return self.client.admin_create_user(**kwargs)
+
+    def admin_get_user(self, **kwargs):
+        return self.client.admin_get_user(**kwargs)
+
+
+class TestRoster:
+    """Test roster parsing and validation"""
+
+    def test_read_roster(self):
+        """Test column names are matched in any case or snake_case"""
+        rows = read_roster(ROSTER)
+
+        assert rows[0] == {
+            'email': 'p1@example.com', 'studyCode': 'depression_study_2026',
+            'participantId': 'P001', 'row': 1,
+        }
+        assert [row['row'] for row in rows] == [1, 2, 3]
+        with pytest.raises(ValueError, match='participantId'):
+            read_roster('email,studyCode\na@example.com,s\n')
+
+    def test_validate_rows(self):
+        """Test incomplete rows, bad emails and duplicates are reported"""
+        rows = read_roster(
+            'email,studyCode,participantId\n'
+            'a@example.com,s,P1\n'
+            ',s,P2\n'
+            'not-an-email,s,P3\n'
+            'A@example.com,s,P4\n'
+            'b@example.com,s,P1\n'
+            'c@example.com,t,P1\n'
+        )
+
+        assert validate_rows(rows) == {
+            2: 'Missing email',
+            3: 'Invalid email',
+            4: 'Duplicate email in roster',
+            5: 'Duplicate participantId in study',
+        }
+
+
+class TestAdaptiveRateLimiter:
+    """Test call spacing and additive increase / multiplicative decrease"""
+
+    def test_spacing(self):
+        """Test calls are spaced at the current rate"""
+        clock = FakeClock()
+        limiter = AdaptiveRateLimiter(rate=10, increase=0, clock=clock, sleep=clock.sleep)
+        for _ in range(11):
+            limiter.acquire()
+
+        assert clock.now == pytest.approx(1.0)
+
+    def test_aimd(self):
+        """Test throttles halve the rate once per cooldown and successes raise it"""
+        clock = FakeClock()
+        limiter = AdaptiveRateLimiter(rate=20, min_rate=4, max_rate=30, clock=clock,
+                                      sleep=clock.sleep)
+        limiter.throttled()
+        limiter.throttled()
+        assert limiter.rate == 10
+        clock.now += 1
+        limiter.throttled()
+        clock.now += 1
+        limiter.throttled()
+        assert limiter.rate == 4
+        assert limiter.throttles == 4
+
+        for _ in range(1000):
+            limiter.success()
+        assert limiter.rate == 30
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Cognito user pool and ParticipantStatus table on moto"""
+    if moto is None:
+        pytest.skip('moto not installed')
+    import boto3
+
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with moto.mock_aws():
+        cognito = boto3.client('cognito-idp', region_name='us-west-2')
+        pool_id = cognito.create_user_pool(
+            PoolName='osrp-users-test',
+            UsernameAttributes=['email'],
+            Schema=[
+                {'Name': 'studyCode', 'AttributeDataType': 'String', 'Mutable': True},
+                {'Name': 'participantId', 'AttributeDataType': 'String', 'Mutable': False},
+            ]
+        )['UserPool']['Id']
+        dynamodb = boto3.resource('dynamodb', region_name='us-west-2')
+        table = dynamodb.create_table(
+            TableName='ParticipantStatus',
+            KeySchema=[{'AttributeName': 'userId', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'userId', 'AttributeType': 'S'},
+                {'AttributeName': 'groupCode', 'AttributeType': 'S'},
+                {'AttributeName': 'lastSeenTimestamp', 'AttributeType': 'N'},
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'groupCode-lastSeen-index',
+                'KeySchema': [
+                    {'AttributeName': 'groupCode', 'KeyType': 'HASH'},
+                    {'AttributeName': 'lastSeenTimestamp', 'KeyType': 'RANGE'},
+                ],
+                'Projection': {'ProjectionType': 'ALL'},
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield cognito, pool_id, table
+
+
+def fast_limiter():
+    """Limiter that does not slow the tests down"""
+    return AdaptiveRateLimiter(rate=1000, min_rate=1000, max_rate=1000, sleep=lambda s: None)
+
+
+class TestBulkEnroller:
+    """Test enrolling rosters in a local Cognito stand-in"""
+
+    def test_enroll(self, aws):
+        """Test every row becomes a user and a ParticipantStatus row"""
+        cognito, pool_id, table = aws
+        enroller = BulkEnroller(cognito, pool_id, table, concurrency=4, limiter=fast_limiter(),
+                                send_invitation=False)
+
+        results = list(enroller.enroll(read_roster(roster(60))))
+
+        assert summarize(results)['created'] == 60
+        assert sorted(result['row'] for result in results) == list(range(1, 61))
+        users = cognito.list_users(UserPoolId=pool_id)['Users']
+        assert len(users) == 60
+        result = next(result for result in results if result['participantId'] == 'P0007')
+        item = table.get_item(Key={'userId': result['userSub']})['Item']
+        assert item['groupCode'] == 'depression_study_2026'
+        assert item['email'] == 'p7@example.com'
+        assert item['dataCollectionStatus'] == 'enrolled'
+        assert table.scan(Select='COUNT')['Count'] == 60
+
+    def test_enrolled_participants_listed(self, aws):
+        """Test enrolled participants are listed by study before their first upload"""
+        from osrp.analysis.utils.data_access import OSRPData
+
+        cognito, pool_id, table = aws
+        enroller = BulkEnroller(cognito, pool_id, table, limiter=fast_limiter(),
+                                send_invitation=False)
+        results = list(enroller.enroll(read_roster(ROSTER)))
+        list(enroller.enroll(read_roster(roster(2, study='other_study'))))
+
+        item = table.get_item(Key={'userId': results[0]['userSub']})['Item']
+        assert item['lastSeenTimestamp'] == item['enrolledAt']
+        participants = OSRPData(region='us-west-2').get_participant_list('depression_study_2026')
+        assert sorted(participants) == sorted(result['userSub'] for result in results)
+
+    def test_rerun(self, aws):
+        """Test a re-run reports enrolled rows, completes their rows and flags conflicts"""
+        cognito, pool_id, table = aws
+        enroller = BulkEnroller(cognito, pool_id, None, limiter=fast_limiter(),
+                                send_invitation=False)
+        first = {r['participantId']: r for r in enroller.enroll(read_roster(ROSTER))}
+        table.put_item(Item={'userId': first['P001']['userSub'], 'lastSeenTimestamp': 1})
+
+        enroller.participant_table = table
+        results = list(enroller.enroll(read_roster(
+            ROSTER + 'p4@example.com,depression_study_2026,P004\n'
+            'p5@example.com,depression_study_2026,\n'
+        )))
+        results += enroller.enroll([{
+            'row': 1, 'email': 'p2@example.com', 'studyCode': 'other_study', 'participantId': 'P9'
+        }])
+
+        statuses = {(r['participantId'], r['status']) for r in results}
+        assert statuses == {
+            ('P001', 'exists'), ('P002', 'exists'), ('P003', 'exists'), ('P004', 'created'),
+            ('', 'invalid'), ('P9', 'conflict'),
+        }
+        item = table.get_item(Key={'userId': first['P001']['userSub']})['Item']
+        assert item['lastSeenTimestamp'] == 1 and item['participantId'] == 'P001'
+
+    def test_throttling(self, aws):
+        """Test throttled rows are retried and slow the limiter down"""
+        cognito, pool_id, table = aws
+        client = ThrottlingCognito(cognito, throttles=5)
+        limiter = AdaptiveRateLimiter(rate=40, max_rate=40, sleep=lambda s: None)
+        enroller = BulkEnroller(client, pool_id, table, concurrency=4, limiter=limiter,
+                                send_invitation=False)
+
+        results = list(enroller.enroll(read_roster(roster(20))))
+
+        assert summarize(results)['created'] == 20
+        assert client.calls == 25
+        assert limiter.throttles == 5
+        assert limiter.rate < 40
+
+        client.throttles = 100
+        enroller.max_attempts = 2
+        [result] = enroller.enroll(read_roster(roster(1, study='s2').replace('p0@', 'new@')))
+        assert result['status'] == 'failed'
+        assert result['error'] == 'TooManyRequestsException'
+
+    def test_deadline(self, aws):
+        """Test rows not started before the deadline are skipped"""
+        cognito, pool_id, table = aws
+        clock = FakeClock()
+        limiter = AdaptiveRateLimiter(rate=10, max_rate=10, clock=clock, sleep=clock.sleep)
+        enroller = BulkEnroller(cognito, pool_id, table, concurrency=1, limiter=limiter,
+                                send_invitation=False, clock=clock)
+
+        results = list(enroller.enroll(read_roster(roster(20)), deadline=0.95))
+
+        counts = summarize(results)
+        assert counts['created'] == 10
+        assert counts['skipped'] == 10
+
+    def test_deadline_takes_no_slots(self, aws):
+        """Test skipped rows return at the deadline without waiting for rate slots"""
+        cognito, pool_id, table = aws
+        clock = FakeClock()
+        limiter = AdaptiveRateLimiter(rate=10, max_rate=10, clock=clock, sleep=clock.sleep)
+        enroller = BulkEnroller(cognito, pool_id, table, concurrency=1, limiter=limiter,
+                                send_invitation=False, clock=clock)
+
+        results = list(enroller.enroll(read_roster(roster(300)), deadline=3))
+
+        counts = summarize(results)
+        assert counts['created'] == 30
+        assert counts['skipped'] == 270
+        assert clock.now < 3
+        assert not limiter.acquire(deadline=3)
+
+    def test_deadline_real_time(self, aws):
+        """Test a large roster at a low rate returns soon after a real deadline"""
+        cognito, pool_id, table = aws
+        limiter = AdaptiveRateLimiter(rate=20, max_rate=20)
+        enroller = BulkEnroller(cognito, pool_id, table, concurrency=4, limiter=limiter,
+                                send_invitation=False)
+
+        started = time.monotonic()
+        results = list(enroller.enroll(read_roster(roster(300)), deadline=started + 0.5))
+
+        assert time.monotonic() - started < 2
+        assert summarize(results)['skipped'] >= 280
+
+    def test_cli(self, aws, tmp_path):
+        """Test `osrp enroll` streams per-row results and writes the results CSV"""
+        from click.testing import CliRunner
+
+        from osrp.cli import main
+
+        cognito, pool_id, table = aws
+        path = tmp_path / 'roster.csv'
+        path.write_text(roster(5) + 'bad,depression_study_2026,P9999\n')
+        output = tmp_path / 'results.csv'
+
+        result = CliRunner().invoke(main, [
+            'enroll', str(path), '--user-pool-id', pool_id, '--participant-table', table.name,
+            '--no-invitation', '--rate', '50', '--output', str(output),
+        ])
+
+        assert result.exit_code == 1, result.output
+        assert result.output.count('created') >= 5
+        assert '1 rows were not enrolled' in result.output
+        lines = output.read_text().splitlines()
+        assert lines[0].startswith('row,email,studyCode,participantId,status,userSub')
+        assert len(lines) == 7
+        assert table.scan(Select='COUNT')['Count'] == 5
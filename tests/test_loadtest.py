@@ -0,0 +1,159 @@
+"""
+Unit tests for the ingestion load test harness
+"""
+
+import base64
+import json
+
+import pytest
+
+from osrp.codec import decode_readings
+from osrp.loadtest import DeviceProfile, LoadTest, SimulatedDevice
+
+try:
+    import moto
+except ImportError:  # moto is a dev extra
+    moto = None
+
+needs_moto = pytest.mark.skipif(moto is None, reason='moto not installed')
+
+START_MS = 1705334400000
+
+
+def small_profile(**kwargs):
+    """Low-rate profile so runs against moto stay fast"""
+    options = {
+        'sensor_rates': {'accelerometer': 5.0},
+        'events_per_hour': 60.0,
+        'screenshot_interval': 60.0,
+        'screenshot_bytes': 100,
+        'device_state_interval': 90.0,
+        'offline_probability': 0.0,
+    }
+    options.update(kwargs)
+    return DeviceProfile(**options)
+
+
+class TestSimulatedDevice:
+    """Test request generation"""
+
+    def test_request_mix(self):
+        """Test sensor batches are split at 1,000 readings and cadences are followed"""
+        profile = small_profile(sensor_rates={'accelerometer': 50.0, 'light': 1.0})
+        device = SimulatedDevice('user-1', 'study', profile, seed=1, start_ms=START_MS)
+
+        requests = device.requests(120)
+
+        by_endpoint = {}
+        for request in requests:
+            by_endpoint.setdefault(request['endpoint'], []).append(request)
+        sensor_items = [request['items'] for request in by_endpoint['sensor']]
+        # Two uploads of 3,000 accelerometer and 60 light readings each
+        assert sensor_items == [1000, 1000, 1000, 60] * 2
+        assert len(by_endpoint['screenshot']) == 1
+        assert len(by_endpoint['device-state']) == 1
+        assert [request['at'] for request in requests] == sorted(r['at'] for r in requests)
+        key = by_endpoint['screenshot'][0]['query']['key']
+        assert key == 'raw/screenshots/user-1/2024-01-15/1705334460000.png'
+
+    def test_offline_queue(self):
+        """Test requests made while offline are flushed together on reconnect"""
+        profile = small_profile(offline_probability=1.0, offline_seconds=150.0)
+        device = SimulatedDevice('user-1', 'study', profile, seed=2, start_ms=START_MS)
+
+        requests = device.requests(300)
+
+        assert {request['at'] for request in requests if request['endpoint'] == 'sensor'} == {
+            # Offline from the first upload on, each upload extending the period
+            300 + 150.0
+        }
+        assert all(request['queued'] for request in requests if request['at'] >= 60)
+
+    def test_gorilla_encoding(self):
+        """Test sensor requests can carry codec blocks"""
+        device = SimulatedDevice(
+            'user-1', 'study', small_profile(encoding='gorilla'), start_ms=START_MS
+        )
+
+        body = json.loads(device.requests(60)[-1]['body'])
+
+        assert body['encoding'] == 'gorilla'
+        assert len(decode_readings(base64.b64decode(body['block']))) == 300
+
+    def test_unknown_encoding(self):
+        """Test unknown encodings are rejected"""
+        with pytest.raises(ValueError, match='protobuf'):
+            DeviceProfile(encoding='protobuf')
+
+
+@needs_moto
+class TestLoadTest:
+    """Test runs against moto"""
+
+    def test_run(self):
+        """Test every generated item is written and latencies are reported"""
+        test = LoadTest(devices=2, duration=120, profile=small_profile(), concurrency=2)
+
+        report = test.run()
+
+        assert report.requests == len(test.schedule())
+        assert report.failed == 0 and report.retries == 0
+        assert report.items_written == {
+            endpoint: report.expected_items.get(endpoint, 0)
+            for endpoint in ('sensor', 'event', 'device-state', 'screenshot')
+        }
+        assert report.items_written['sensor'] == 2 * 2 * 300
+        assert report.items_written['screenshot'] == 2
+        assert set(report.latencies) >= {'sensor', 'screenshot', 'device-state'}
+        latency = report.percentiles()
+        assert 0 < latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['max']
+        assert json.loads(json.dumps(report.to_dict()))['statuses'] == {'200': report.requests}
+
+    def test_lost_responses_are_replayed(self):
+        """Test retries of delivered requests replay instead of writing again"""
+        profile = small_profile(screenshot_interval=None)
+        test = LoadTest(devices=1, duration=120, profile=profile, lost_response_rate=0.5, seed=3)
+
+        report = test.run()
+
+        # Every retry is of a POST and answered from the UploadBatches table
+        assert report.retries > 0
+        assert report.replayed == report.retries
+        assert report.items_written['sensor'] == report.expected_items['sensor']
+
+    def test_us_east_1(self):
+        """Test the bucket is created without a location constraint in us-east-1"""
+        profile = small_profile(screenshot_interval=None)
+        test = LoadTest(devices=1, duration=60, profile=profile, region='us-east-1')
+
+        report = test.run()
+
+        assert report.failed == 0
+        assert report.items_written['sensor'] == report.expected_items['sensor']
+
+    def test_async_ingest(self):
+        """Test spilled sensor batches are all written by the drain"""
+        profile = small_profile(screenshot_interval=None, encoding='gorilla')
+        test = LoadTest(devices=2, duration=120, profile=profile, ingest_mode='async')
+
+        report = test.run()
+
+        assert report.statuses == {202: 4, 200: report.requests - 4}
+        assert report.drain['batches'] == 4 and report.drain['complete']
+        assert report.items_written['sensor'] == report.expected_items['sensor'] == 2 * 2 * 300
+
+    def test_cli(self, tmp_path):
+        """Test `osrp loadtest` prints the report and writes it as JSON"""
+        from click.testing import CliRunner
+
+        from osrp.cli import main
+
+        path = tmp_path / 'report.json'
+        result = CliRunner().invoke(main, [
+            'loadtest', '--devices', '1', '--duration', '60', '--sensor', 'accelerometer=2',
+            '--encoding', 'gorilla', '--json', str(path),
+        ])
+
+        assert result.exit_code == 0, result.output
+        assert 'p95' in result.output
+        assert json.loads(path.read_text())['items_written']['sensor'] == 120
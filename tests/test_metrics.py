@@ -0,0 +1,102 @@
+"""
+Unit tests for the embedded metric format logger
+"""
+
+import io
+import json
+
+import pytest
+
+from osrp.metrics import MAX_VALUES_PER_METRIC, MetricsLogger
+
+
+def records(stream):
+    """EMF records written to a stream"""
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestMetricsLogger:
+    """Test EMF record construction"""
+
+    def test_record(self):
+        """Test a record carries its metrics, dimensions and properties with _aws metadata"""
+        stream = io.StringIO()
+        metrics = MetricsLogger('OSRP', {'Service': 'DataUpload'}, stream=stream)
+        metrics.put_dimension('Route', 'POST /data/sensor')
+        metrics.put_metric('BatchSize', 1000)
+        metrics.put_metric('WriteTime', 12.5, 'Milliseconds')
+        metrics.put_metric('WriteTime', 7.5, 'Milliseconds')
+        metrics.set_property('StatusCode', 200)
+
+        metrics.flush()
+
+        [record] = records(stream)
+        assert record['Service'] == 'DataUpload'
+        assert record['Route'] == 'POST /data/sensor'
+        assert record['BatchSize'] == 1000
+        assert record['WriteTime'] == [12.5, 7.5]
+        assert record['StatusCode'] == 200
+        [directive] = record['_aws']['CloudWatchMetrics']
+        assert directive['Namespace'] == 'OSRP'
+        assert directive['Dimensions'] == [['Route', 'Service']]
+        assert directive['Metrics'] == [
+            {'Name': 'BatchSize', 'Unit': 'Count'},
+            {'Name': 'WriteTime', 'Unit': 'Milliseconds'},
+        ]
+        assert isinstance(record['_aws']['Timestamp'], int)
+
+    def test_flush_resets(self):
+        """Test flushing drops per-record dimensions and writes nothing without metrics"""
+        stream = io.StringIO()
+        metrics = MetricsLogger('OSRP', {'Service': 'Auth'}, stream=stream)
+        metrics.put_dimension('Route', 'POST /auth/login')
+        metrics.put_metric('Latency', 3, 'Milliseconds')
+        metrics.flush()
+        metrics.flush()
+        metrics.put_metric('Latency', 4, 'Milliseconds')
+        metrics.flush()
+
+        first, second = records(stream)
+        assert first['Route'] == 'POST /auth/login'
+        assert 'Route' not in second and second['Service'] == 'Auth'
+
+    def test_full_metric_flushes(self):
+        """Test a metric with the most values EMF allows starts a new record"""
+        stream = io.StringIO()
+        metrics = MetricsLogger('OSRP', {'Service': 'DataUpload'}, stream=stream)
+        metrics.put_dimension('Route', 'drain')
+        for i in range(MAX_VALUES_PER_METRIC + 1):
+            metrics.put_metric('WriteTime', i, 'Milliseconds')
+        metrics.flush()
+
+        first, second = records(stream)
+        assert first['WriteTime'] == list(range(MAX_VALUES_PER_METRIC))
+        assert second['WriteTime'] == MAX_VALUES_PER_METRIC
+        assert second['Route'] == 'drain'
+
+    def test_timer(self):
+        """Test timers record milliseconds, also when the block raises"""
+        metrics = MetricsLogger('OSRP', stream=io.StringIO())
+        with pytest.raises(RuntimeError):
+            with metrics.timer('WriteTime'):
+                raise RuntimeError
+
+        assert metrics.metrics['WriteTime']['unit'] == 'Milliseconds'
+        assert 0 <= metrics.metrics['WriteTime']['values'][0] < 1000
+
+    def test_disabled(self, capsys):
+        """Test disabled loggers write nothing, and stdout is the default stream"""
+        metrics =MetricsLogger('OSRP', enabled=False)
+        metrics.put_metric('Latency', 1)
+        metrics.flush()
+        assert capsys.readouterr().out == ''
+
+        metrics = MetricsLogger('OSRP')
+        metrics.put_metric('Latency', 1)
+        metrics.flush()
+        assert json.loads(capsys.readouterr().out)['Latency'] == 1
+
+    def test_unknown_unit(self):
+        """Test units CloudWatch does not know are rejected"""
+        with pytest.raises(ValueError, match='ms'):
+            MetricsLogger('OSRP').put_metric('Latency', 1, 'ms')
@@ -0,0 +1,190 @@
+"""
+Unit tests for the Lambda sampling profiler and flame graphs
+"""
+
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from osrp.profiling import (
+    PROFILE_PREFIX,
+    SamplingProfiler,
+    dumps,
+    fetch_profiles,
+    function_totals,
+    loads,
+    merge,
+    profile_key,
+    profile_keys,
+    render_flamegraph,
+    route_slug,
+)
+
+try:
+    import moto
+except ImportError:  # moto is a dev extra
+    moto = None
+
+
+def spin(seconds):
+    """Keep the CPU busy, as a handler converting a batch does"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def handler():
+    """Stand-in handler with one hot callee"""
+    spin(0.1)
+
+
+STACKS = Counter({
+    'lambda_handler;handle_request;write_sensor_batch;convert_floats_to_decimal': 60,
+    'lambda_handler;handle_request;write_sensor_batch;batch_writer': 30,
+    'lambda_handler;handle_request;json.loads': 10,
+})
+
+
+class TestSamplingProfiler:
+    """Test sampling the profiled thread"""
+
+    def test_samples_start_at_entry_frame(self):
+        """Test stacks run from the entering function to the sampled leaf"""
+        with SamplingProfiler(interval=0.002) as profiler:
+            handler()
+
+        assert profiler.samples >= 5
+        assert sum(profiler.stacks.values()) == profiler.samples
+        assert 0.1 <= profiler.elapsed < 1
+        for stack in profiler.stacks:
+            frames = stack.split(';')
+            assert frames[0].startswith('test_samples_start_at_entry_frame (test_profiling.py:')
+        assert any('spin (test_profiling.py:' in stack for stack in profiler.stacks)
+
+    def test_exceptions_propagate(self):
+        """Test the profiler stops and re-raises when the block fails"""
+        with pytest.raises(RuntimeError):
+            with SamplingProfiler() as profiler:
+                raise RuntimeError
+
+        assert not profiler._thread.is_alive()
+
+
+class TestFoldedStacks:
+    """Test serializing, merging and summarizing folded stacks"""
+
+    def test_round_trip(self):
+        """Test dumps/loads round-trip, and plain folded text is read too"""
+        assert loads(dumps(STACKS)) == STACKS
+        assert loads(b'a;b 2\na;c 3\n\nbroken\n') == Counter({'a;b': 2, 'a;c': 3})
+
+    def test_merge(self):
+        """Test profiles merge by adding samples"""
+        merged = merge([STACKS, Counter({'lambda_handler;handle_request;json.loads': 5})])
+
+        assert merged['lambda_handler;handle_request;json.loads'] == 15
+        assert sum(merged.values()) == 105
+
+    def test_function_totals(self):
+        """Test self and total samples per function, counting recursion once"""
+        totals = function_totals(STACKS + Counter({'a;a;a': 4}))
+
+        assert totals[0] == ('handle_request', 0, 100)
+        assert ('convert_floats_to_decimal', 60, 60) in totals
+        assert ('write_sensor_batch', 0, 90) in totals
+        assert ('a', 4, 4) in totals
+
+
+class TestFlameGraph:
+    """Test SVG rendering"""
+
+    def test_render(self):
+        """Test every function gets a box with its samples in the tooltip"""
+        svg = render_flamegraph(STACKS, title='POST /data/sensor <all>')
+
+        root = ElementTree.fromstring(svg)
+        namespace = '{http://www.w3.org/2000/svg}'
+        titles = [title.text for title in root.iter(f'{namespace}title')]
+        assert 'convert_floats_to_decimal (60 samples, 60.0%)' in titles
+        assert 'lambda_handler (100 samples, 100.0%)' in titles
+        assert len(titles) == 6
+        assert 'POST /data/sensor &lt;all&gt;' in svg
+
+    def test_empty(self):
+        """Test a profile without samples renders an empty graph"""
+        root = ElementTree.fromstring(render_flamegraph(Counter()))
+        assert not list(root.iter('{http://www.w3.org/2000/svg}title'))
+
+
+class TestProfileKeys:
+    """Test where profiles are stored and found"""
+
+    def test_profile_key(self):
+        """Test keys are grouped by day and route"""
+        assert route_slug('POST /data/sensor') == 'post-data-sensor'
+        assert route_slug('post-data-sensor') == 'post-data-sensor'
+        assert profile_key(
+            'temp/debug/profiles/', 'POST /data/sensor', 'abc', day=date(2026, 1, 16)
+        ) == 'temp/debug/profiles/2026-01-16/post-data-sensor/abc.folded.gz'
+
+    @pytest.fixture
+    def bucket(self, monkeypatch):
+        """Bucket on moto holding four profiles over three days and two routes"""
+        if moto is None:
+            pytest.skip('moto not installed')
+        import boto3
+
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        with moto.mock_aws():
+            s3 = boto3.client('s3', region_name='us-east-1')
+            s3.create_bucket(Bucket='data')
+            for day, route, request_id in [
+                (date(2026, 1, 15), 'POST /data/sensor', 'a'),
+                (date(2026, 1, 16), 'POST /data/sensor', 'b'),
+                (date(2026, 1, 16), 'POST /data/event', 'c'),
+                (date(2026, 1, 17), 'POST /data/sensor', 'd'),
+            ]:
+                s3.put_object(
+                    Bucket='data', Key=profile_key(PROFILE_PREFIX, route, request_id, day),
+                    Body=dumps(STACKS)
+                )
+            yield s3
+
+    def test_fetch(self, bucket):
+        """Test profiles are listed by day and route and merged"""
+        keys = list(profile_keys(
+            bucket, 'data', PROFILE_PREFIX, date(2026, 1, 15), date(2026, 1, 16),
+            'POST /data/sensor'
+        ))
+        assert [key.split('/')[-1] for key in keys] == ['a.folded.gz', 'b.folded.gz']
+        every_route = profile_keys(bucket, 'data', PROFILE_PREFIX, date(2026, 1, 16),
+                                   date(2026, 1, 16))
+        assert len(list(every_route)) == 2
+
+        assert fetch_profiles(bucket, 'data', keys) == STACKS + STACKS
+
+    def test_cli(self, bucket, tmp_path):
+        """Test `osrp profiles` writes the merged flame graph and folded stacks"""
+        from click.testing import CliRunner
+
+        from osrp.cli import main
+
+        svg, folded = tmp_path / 'flame.svg', tmp_path / 'stacks.folded'
+        result = CliRunner().invoke(main, [
+            'profiles', 'data', '--start', '2026-01-16', '--end', '2026-01-17',
+            '--route', 'POST /data/sensor', '--output', str(svg), '--folded', str(folded),
+        ])
+
+        assert result.exit_code == 0, result.output
+        assert 'Merged 2 profiles (200 samples)' in result.output
+        assert 'convert_floats_to_decimal' in result.output
+        assert loads(folded.read_bytes()) == STACKS + STACKS
+        assert 'lambda_handler (200 samples, 100.0%)' in svg.read_text()
+
+        result = CliRunner().invoke(main, ['profiles', 'data', '--start', '2026-02-01'])
+        assert result.exit_code == 1
+        assert 'No profiles' in result.output
@@ -0,0 +1,246 @@
+"""
+Unit tests for local Cognito token verification
+"""
+
+import base64
+import json
+
+import pytest
+
+from osrp.tokens import (
+    JWKSCache,
+    TokenError,
+    TokenVerifier,
+    cognito_issuer,
+    rsa_verify,
+    verifier_from_environment,
+)
+
+# Tokens are signed with locally generated keys
+rsa = pytest.importorskip('cryptography.hazmat.primitives.asymmetric.rsa')
+from cryptography.hazmat.primitives import hashes  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import padding  # noqa: E402
+
+ISSUER = cognito_issuer('us-west-2', 'us-west-2_TEST123')
+CLIENT_ID = 'test-client-id-123'
+NOW = 1_768_500_000
+
+
+def b64url(data):
+    """Unpadded base64url, as in JWTs"""
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def uint(value):
+    """JWK encoding of an unsigned integer"""
+    return b64url(value.to_bytes((value.bit_length() + 7) // 8, 'big'))
+
+
+class SigningKey:
+    """RSA key signing tokens the way a Cognito user pool does"""
+
+    def __init__(self, kid):
+        self.kid = kid
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def jwk(self):
+        numbers = self.private_key.public_key().public_numbers()
+        return {
+            'kid': self.kid, 'kty': 'RSA', 'alg': 'RS256', 'use': 'sig',
+            'n': uint(numbers.n), 'e': uint(numbers.e),
+        }
+
+    def sign(self, header=None, **claims):
+        header = {'kid': self.kid, 'alg': 'RS256', **(header or {})}
+        payload = {
+            'sub': 'user-123', 'iss': ISSUER, 'token_use': 'id', 'aud': CLIENT_ID,
+            'iat': NOW - 60, 'exp': NOW + 3600, **claims,
+        }
+        signing_input = '.'.join(
+            b64url(json.dumps(part).encode('utf-8')) for part in (header, payload)
+        )
+        signature = self.private_key.sign(
+            signing_input.encode('ascii'), padding.PKCS1v15(), hashes.SHA256()
+        )
+        return f"{signing_input}.{b64url(signature)}"
+
+
+@pytest.fixture(scope='module')
+def keys():
+    """Two signing keys, as a pool holds during rotation"""
+    return SigningKey('key-1'), SigningKey('key-2')
+
+
+class Clock:
+    """Settable time source"""
+
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+class JWKSEndpoint:
+    """JWKS document served to the cache, counting fetches"""
+
+    def __init__(self, *keys):
+        self.keys = list(keys)
+        self.fetched = []
+        self.down = False
+
+    def __call__(self, url):
+        self.fetched.append(url)
+        if self.down:
+            raise OSError('connection refused')
+        return {'keys': [key.jwk() for key in self.keys]}
+
+
+@pytest.fixture
+def clock():
+    """Clock at NOW"""
+    return Clock()
+
+
+def make_verifier(endpoint, clock, **kwargs):
+    """Verifier of the test pool's tokens, fetching keys from an endpoint"""
+    jwks = JWKSCache(f"{ISSUER}/.well-known/jwks.json", fetch=endpoint, clock=clock)
+    return TokenVerifier(ISSUER, [CLIENT_ID], jwks=jwks, clock=clock, **kwargs)
+
+
+class TestRSAVerify:
+    """Test the standard library RS256 check against cryptography's signatures"""
+
+    def test_signatures(self, keys):
+        """Test valid signatures pass and altered messages, signatures or keys fail"""
+        numbers = keys[0].private_key.public_key().public_numbers()
+        signature = keys[0].private_key.sign(b'message', padding.PKCS1v15(), hashes.SHA256())
+
+        assert rsa_verify(numbers.n, numbers.e, b'message', signature)
+        assert not rsa_verify(numbers.n, numbers.e, b'massage', signature)
+        assert not rsa_verify(numbers.n, numbers.e, b'message', signature[:-1])
+        other = keys[1].private_key.public_key().public_numbers()
+        assert not rsa_verify(other.n, other.e, b'message', signature)
+
+
+class TestTokenVerifier:
+    """Test claims checks and decision caching"""
+
+    def test_valid_tokens(self, keys, clock):
+        """Test ID and access tokens of the pool's client are accepted"""
+        verifier = make_verifier(JWKSEndpoint(*keys), clock)
+
+        assert verifier.verify(keys[0].sign())['sub'] == 'user-123'
+        access_token = keys[1].sign(token_use='access', client_id=CLIENT_ID, aud=None)
+        assert verifier.verify(f"Bearer {access_token}")['token_use'] == 'access'
+
+    @pytest.mark.parametrize('claims, header, message', [
+        ({'exp': NOW - 120}, None, 'expired'),
+        ({'iat': NOW + 600}, None, 'future'),
+        ({'iss': cognito_issuer('us-west-2', 'us-west-2_OTHER')}, None, 'another user pool'),
+        ({'aud': 'other-client'}, None, 'another app client'),
+        ({'token_use': 'refresh'}, None, 'Token use'),
+        ({'sub': ''}, None, 'subject'),
+        ({}, {'alg': 'HS256'}, 'algorithm'),
+        ({}, {'kid': 'unknown'}, 'Unknown signing key'),
+    ])
+    def test_rejected_claims(self, keys, clock, claims, header, message):
+        """Test tokens of other pools, clients or times are rejected"""
+        verifier = make_verifier(JWKSEndpoint(*keys), clock)
+
+        with pytest.raises(TokenError, match=message):
+            verifier.verify(keys[0].sign(header, **claims))
+
+    def test_forged_tokens(self, keys, clock):
+        """Test tampered payloads, foreign signatures and garbage are rejected"""
+        verifier = make_verifier(JWKSEndpoint(keys[0]), clock)
+        header, payload, signature = keys[0].sign().split('.')
+        tampered = b64url(json.dumps({
+            'sub': 'admin', 'iss': ISSUER, 'token_use': 'id', 'aud': CLIENT_ID, 'exp': NOW + 60,
+        }).encode('utf-8'))
+        foreign = keys[1].sign({'kid': 'key-1'})
+
+        for token in [f"{header}.{tampered}.{signature}", foreign, 'not.a.token', 'abc', '']:
+            with pytest.raises(TokenError):
+                verifier.verify(token)
+
+    def test_decisions_cached_until_expiry(self, keys, clock):
+        """Test a token is verified once while valid, then rejected once expired"""
+        verifier = make_verifier(JWKSEndpoint(keys[0]), clock, leeway=0)
+        token = keys[0].sign(exp=NOW + 300)
+
+        for _ in range(3):
+            assert verifier.verify(token)['sub'] == 'user-123'
+        assert (verifier.misses, verifier.hits) == (1, 2)
+
+        clock.now = NOW + 301
+        with pytest.raises(TokenError, match='expired'):
+            verifier.verify(token)
+        with pytest.raises(TokenError, match='expired'):
+            verifier.verify(token)
+        assert (verifier.misses, verifier.hits) == (2, 3)
+
+    def test_cache_is_bounded(self, keys, clock):
+        """Test the least recently used decisions are dropped beyond cache_size"""
+        verifier = make_verifier(JWKSEndpoint(keys[0]), clock, cache_size=2)
+        first, second, third = (keys[0].sign(jti=str(i)) for i in range(3))
+        for token in (first, second, first, third, first):
+            verifier.verify(token)
+        verifier.verify(second)
+
+        assert len(verifier._decisions) == 2
+        assert (verifier.misses, verifier.hits) == (4, 2)
+
+
+class TestJWKSCache:
+    """Test fetching and rotating the pool's signing keys"""
+
+    def test_rotation(self, keys, clock):
+        """Test an unknown key ID refetches the keys, at most every 30 seconds"""
+        endpoint = JWKSEndpoint(keys[0])
+        verifier = make_verifier(endpoint, clock)
+        verifier.verify(keys[0].sign())
+
+        endpoint.keys.append(keys[1])
+        clock.now += 10
+        with pytest.raises(TokenError, match='Unknown signing key'):
+            verifier.verify(keys[1].sign(jti='early'))
+        assert len(endpoint.fetched) == 1
+
+        clock.now += 30
+        assert verifier.verify(keys[1].sign())['sub'] == 'user-123'
+        assert len(endpoint.fetched) == 2
+
+        with pytest.raises(TokenError, match='Unknown signing key'):
+            verifier.verify(keys[1].sign({'kid': 'forged'}))
+        assert len(endpoint.fetched) == 2
+
+    def test_outage_keeps_cached_keys(self, keys, clock):
+        """Test expired keys stay in use while the endpoint is down"""
+        endpoint = JWKSEndpoint(keys[0])
+        cache = JWKSCache('https://example.com/jwks.json', ttl=60, fetch=endpoint, clock=clock)
+        assert cache.key('key-1')
+
+        endpoint.down = True
+        clock.now += 120
+        assert cache.key('key-1')
+        assert cache.fetches == 1
+
+        with pytest.raises(TokenError, match='Could not fetch'):
+            JWKSCache('https://example.com/jwks.json', fetch=endpoint, clock=clock).key('key-1')
+
+    def test_file_url(self, keys, tmp_path, clock):
+        """Test keys can be read from a local JWKS file"""
+        path = tmp_path / 'jwks.json'
+        path.write_text(json.dumps({'keys': [keys[0].jwk(), {'kty': 'EC', 'kid': 'ec'}]}))
+
+        verifier = verifier_from_environment({
+            'TOKEN_ISSUER': ISSUER, 'CLIENT_ID': f"other, {CLIENT_ID}", 'JWKS_URL': path.as_uri(),
+        })
+
+        assert verifier.client_ids == {'other', CLIENT_ID}
+        assert verifier.verify(keys[0].sign(exp=2 ** 40, iat=None))['sub'] == 'user-123'
+        assert verifier_from_environment({}) is None
+        assert verifier_from_environment({
+            'USER_POOL_ID': 'eu-west-1_ABC', 'AWS_REGION': 'eu-west-1',
+        }).jwks.url == cognito_issuer('eu-west-1', 'eu-west-1_ABC') + '/.well-known/jwks.json'
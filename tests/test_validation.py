@@ -0,0 +1,206 @@
+"""
+Unit tests for the compiled payload validators
+"""
+
+import math
+import random
+
+import pytest
+
+from osrp.validation import (
+    MAX_SAFE_INTEGER,
+    Field,
+    compile_batch_validator,
+    compile_object_validator,
+)
+
+READING_FIELDS = [
+    Field('timestamp', 'integer', minimum=0, maximum=MAX_SAFE_INTEGER),
+    Field('data', 'object', finite=True, fields=[
+        Field('latitude', 'number', required=False, minimum=-90, maximum=90),
+    ]),
+    Field('accuracy', 'number', required=False),
+]
+
+
+def make_readings(n=1000, seed=0):
+    """50 Hz readings with timing jitter, as the mobile client sends them"""
+    rng = random.Random(seed)
+    timestamp = 1705334400123
+    readings = []
+    for _ in range(n):
+        timestamp += 20 + rng.choice([-1, 0, 0, 0, 1])
+        readings.append({
+            'timestamp': timestamp,
+            'data': {'x': round(rng.gauss(0, 0.3), 3), 'y': -9.81, 'z': 0.156},
+            'accuracy': 3,
+        })
+    return readings
+
+
+def reference_errors(readings):
+    """Invalid indices of a batch of READING_FIELDS readings, checked naively"""
+    def finite(value):
+        return type(value) is not float or math.isfinite(value)
+
+    invalid, previous = [], None
+    for index, reading in enumerate(readings):
+        if type(reading) is not dict:
+            invalid.append(index)
+            continue
+        timestamp, data = reading.get('timestamp'), reading.get('data')
+        accuracy = reading.get('accuracy')
+        latitude = data.get('latitude') if type(data) is dict else None
+        valid = (
+            type(timestamp) is int and 0 <= timestamp <= MAX_SAFE_INTEGER
+            and type(data) is dict and all(finite(value) for value in data.values())
+            and (latitude is None or (type(latitude) in (int, float) and finite(latitude)
+                                      and -90 <= latitude <= 90))
+            and (accuracy is None or (type(accuracy) in (int, float) and finite(accuracy)))
+        )
+        if not valid:
+            invalid.append(index)
+            continue
+        if previous is not None and timestamp <= previous:
+            invalid.append(index)
+        previous = timestamp
+    return invalid
+
+
+class TestField:
+    """Test schema declaration"""
+
+    def test_unknown_kind(self):
+        """Test unknown kinds are rejected"""
+        with pytest.raises(ValueError, match='uuid'):
+            Field('id', 'uuid')
+
+    def test_fields_of_scalars(self):
+        """Test only objects take nested fields"""
+        with pytest.raises(ValueError, match='level'):
+            Field('level', 'number', fields=[Field('x', 'number')])
+
+    def test_increasing_field(self):
+        """Test the increasing field must be a required number"""
+        with pytest.raises(ValueError, match='accuracy'):
+            compile_batch_validator(READING_FIELDS, increasing='accuracy')
+
+
+class TestObjectValidator:
+    """Test single-payload validation"""
+
+    validate = staticmethod(compile_object_validator([
+        Field('eventType', 'string', min_length=1, max_length=8),
+        Field('timestamp', 'integer', minimum=0),
+        Field('level', 'number', required=False, minimum=0, maximum=100),
+        Field('charging', 'boolean', required=False),
+        Field('context', 'object', required=False),
+    ]))
+
+    def test_valid(self):
+        """Test valid payloads, with optional fields missing or null"""
+        assert self.validate({'eventType': 'launch', 'timestamp': 0}) == []
+        assert self.validate({
+            'eventType': 'launch', 'timestamp': 1, 'level': 99.5, 'charging': None,
+            'context': {}, 'unknown': [1]
+        }) == []
+
+    def test_every_invalid_field_is_reported(self):
+        """Test each invalid field is reported with its first problem"""
+        errors = self.validate({
+            'eventType': '', 'timestamp': True, 'level': float('nan'), 'charging': 1,
+            'context': []
+        })
+
+        assert errors == [
+            "'eventType' must not be empty",
+            "'timestamp' must be an integer",
+            "'level' must be finite",
+            "'charging' must be a boolean",
+            "'context' must be an object",
+        ]
+
+    @pytest.mark.parametrize('payload, error', [
+        ({'timestamp': 1}, "'eventType' is required"),
+        ({'eventType': 'a' * 9, 'timestamp': 1}, "'eventType' must be at most 8 characters"),
+        ({'eventType': 'a', 'timestamp': -1}, "'timestamp' must be at least 0"),
+        ({'eventType': 'a', 'timestamp': 1.0}, "'timestamp' must be an integer"),
+        ({'eventType': 'a', 'timestamp': 1, 'level': 101}, "'level' must be at most 100"),
+        ({'eventType': 'a', 'timestamp': 1, 'level': '5'}, "'level' must be a number"),
+    ])
+    def test_checks(self, payload, error):
+        """Test presence, type, range and length checks"""
+        assert self.validate(payload) == [error]
+
+    def test_not_an_object(self):
+        """Test non-object payloads"""
+        assert self.validate([]) == ['payload must be an object']
+
+
+class TestBatchValidator:
+    """Test batch validation"""
+
+    validate = staticmethod(compile_batch_validator(READING_FIELDS, increasing='timestamp'))
+
+    def test_valid(self):
+        """Test a valid batch, including strings and booleans in data"""
+        readings = make_readings()
+        readings[5]['data'] = {'latitude': 47.6, 'provider': 'gps', 'mock': False}
+        del readings[6]['accuracy']
+        readings[7]['accuracy'] = None
+
+        assert self.validate(readings) == []
+        assert self.validate([]) == []
+
+    def test_every_invalid_reading_is_reported(self):
+        """Test all invalid indices are reported in order with their first problem"""
+        readings = make_readings(10)
+        readings[1]['timestamp'] = str(readings[1]['timestamp'])
+        del readings[3]['data']
+        readings[4]['data']['x'] = float('inf')
+        readings[5]['data']['latitude'] = 91
+        readings[6]['accuracy'] = 'high'
+        readings[8]['timestamp'] = readings[7]['timestamp']
+        readings[9] = None
+
+        assert self.validate(readings) == [
+            (1, "'timestamp' must be an integer"),
+            (3, "'data' is required"),
+            (4, "'data' values must be finite"),
+            (5, "'data.latitude' must be at most 90"),
+            (6, "'accuracy' must be a number"),
+            (8, "'timestamp' must be greater than the previous item's"),
+            (9, 'must be an object'),
+        ]
+
+    def test_boolean_timestamps(self):
+        """Test booleans are not integers, where bulk checks could mistake them"""
+        readings = [{'timestamp': False, 'data': {}}, {'timestamp': True, 'data': {}}]
+
+        assert [index for index, _ in self.validate(readings)] == [0, 1]
+        assert self.validate([{'timestamp': 0, 'data': {}}, {'timestamp': 1, 'data': {}}]) == []
+
+    def test_matches_reference(self):
+        """Test randomly corrupted batches against a naive implementation"""
+        rng = random.Random(0)
+        corruptions = [
+            ('timestamp', None), ('timestamp', -5), ('timestamp', 1.5), ('timestamp', True),
+            ('timestamp', MAX_SAFE_INTEGER + 1), ('timestamp', '17'), ('data', None),
+            ('data', [1]), ('data', {'x': float('nan')}), ('data', {'x': -float('inf')}),
+            ('data', {'latitude': -90.5}), ('data', {'latitude': 'north'}),
+            ('data', {'x': 1e308, 'y': 1e308}), ('accuracy', float('nan')),
+            ('accuracy', [3]), ('accuracy', False), ('accuracy', 10 ** 400),
+        ]
+        for trial in range(200):
+            readings = make_readings(50, seed=trial)
+            for _ in range(rng.choice([0, 0, 1, 3])):
+                reading = readings[rng.randrange(50)]
+                key, value = rng.choice(corruptions)
+                reading[key] = value
+            if rng.random() < 0.2:
+                i = rng.randrange(49)
+                readings[i], readings[i + 1] = readings[i + 1], readings[i]
+
+            errors = self.validate(readings)
+
+            assert [index for index, _ in errors] == reference_errors(readings), trial